@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+PostToolUse hook - records tool usage for the active task
+
+Fast path first: only os/sys (already loaded by the interpreter) are touched
+until the hook knows it has work to do. Handlers live in doom.hooks.post_tool_use.
+"""
+
+import os
+import sys
+
+if os.environ.get('DOOM_ENABLED', 'true').strip().lower() in ('0', 'false', 'no', 'off'):
+    sys.exit(0)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from doom import hooks
+
+if not hooks.has_active_task():
+    sys.exit(0)
+
+sys.exit(hooks.run('post_tool_use', 'doom.hooks.post_tool_use', hooks.read_input()))
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+PreToolUse hook - security and permission pre-check for every tool call
+
+Fast path first: only os/sys (already loaded by the interpreter) are touched
+until the hook knows it has work to do. Handlers live in doom.hooks.pre_tool_use.
+"""
+
+import os
+import sys
+
+if os.environ.get('DOOM_ENABLED', 'true').strip().lower() in ('0', 'false', 'no', 'off'):
+    sys.exit(0)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from doom import hooks
+
+raw = sys.stdin.read()
+if hooks.is_fast_path_tool(raw) and not hooks.budget_blocked():
+    sys.exit(0)
+
+sys.exit(hooks.run('pre_tool_use', 'doom.hooks.pre_tool_use', hooks.parse_input(raw)))
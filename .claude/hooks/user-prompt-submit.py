@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+UserPromptSubmit hook - detects the task and assigns an agent
+
+Fast path first: only os/sys (already loaded by the interpreter) are touched
+until the hook knows it has work to do. Handlers live in doom.hooks.user_prompt_submit.
+"""
+
+import os
+import sys
+
+if os.environ.get('DOOM_ENABLED', 'true').strip().lower() in ('0', 'false', 'no', 'off'):
+    sys.exit(0)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from doom import hooks
+
+data = hooks.read_input()
+if not (data.get('prompt') or data.get('userPrompt')):
+    sys.exit(0)
+
+sys.exit(hooks.run('user_prompt_submit', 'doom.hooks.user_prompt_submit', data))
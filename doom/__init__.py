@@ -0,0 +1,24 @@
+"""
+Doom-RLVR core library
+
+Hooks, scripts and the CLI import from here. Submodules are loaded on first
+attribute access so that short-lived hook processes only pay for what they use.
+"""
+
+__version__ = "1.0.0"
+
+_SUBMODULES = ("advisories", "agents", "archive", "api", "budget", "ci", "cli", "coverage", "evaluator", "events", "feedback", "hooks", "impact", "leaderboard", "listing", "metrics", "paths", "policy", "prompts", "repo", "resources", "similar", "spool", "sprints", "templates", "trace", "weights")
+
+
+def __getattr__(name):
+    """Import submodules lazily on first access"""
+    if name == "evaluate":
+        from doom.evaluator import evaluate
+        return evaluate
+    if name in _SUBMODULES:
+        import sys
+        __import__(f"{__name__}.{name}")
+        module = sys.modules[f"{__name__}.{name}"]
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,443 @@
+"""
+Offline vulnerability advisories for the security component
+
+An OSV advisory snapshot (the per-ecosystem `all.zip` dumps from
+osv-vulnerabilities, a directory of OSV JSON files, or a single file) is
+ingested into a local index sharded by ecosystem and package name. The
+security component then reads the project's lockfiles and looks each
+locked package up in its shard, with no network access and no scanner
+process.
+
+Scan results are cached under a key built from the lockfile contents and
+the snapshot id, so an evaluation whose dependencies did not change reads
+one small file.
+
+Layout under .claude/security/:
+    index/meta.json                 {snapshot_id, ingested_at, advisories, packages, ecosystems}
+    index/<ecosystem>/<xx>.json     {package: [{id, severity, ranges, versions}]}, xx = sha1(package)[:2]
+    results/<key>.json              cached scan for one lockfile set and snapshot
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from doom import paths
+
+SEVERITIES = ('low', 'medium', 'high', 'critical')
+GHSA_SEVERITY = {'LOW': 'low', 'MODERATE': 'medium', 'MEDIUM': 'medium', 'HIGH': 'high', 'CRITICAL': 'critical'}
+
+# Lockfile name -> ecosystem; requirements*.txt files are read as PyPI too
+LOCKFILES = {
+    'package-lock.json': 'npm',
+    'npm-shrinkwrap.json': 'npm',
+    'yarn.lock': 'npm',
+    'pnpm-lock.yaml': 'npm',
+    'poetry.lock': 'PyPI',
+    'Pipfile.lock': 'PyPI',
+    'Cargo.lock': 'crates.io',
+    'go.sum': 'Go',
+}
+
+
+def security_dir() -> Path:
+    return paths.claude_dir() / 'security'
+
+
+def index_dir() -> Path:
+    return security_dir() / 'index'
+
+
+def results_dir() -> Path:
+    return security_dir() / 'results'
+
+
+def normalize_name(ecosystem: str, name: str) -> str:
+    if ecosystem == 'PyPI':
+        return re.sub(r'[-_.]+', '-', name).lower()
+    return name
+
+
+def shard_file(ecosystem: str, name: str, root: Optional[Path] = None) -> Path:
+    shard = hashlib.sha1(name.encode()).hexdigest()[:2]
+    return (root or index_dir()) / ecosystem / f'{shard}.json'
+
+
+# --- severity -------------------------------------------------------------
+
+_CVSS3 = {
+    'AV': {'N': 0.85, 'A': 0.62, 'L': 0.55, 'P': 0.2},
+    'AC': {'L': 0.77, 'H': 0.44},
+    'UI': {'N': 0.85, 'R': 0.62},
+    'CIA': {'H': 0.56, 'L': 0.22, 'N': 0.0},
+}
+
+
+def _roundup(value: float) -> float:
+    scaled = round(value * 100000)
+    return scaled / 100000.0 if scaled % 10000 == 0 else (math.floor(scaled / 10000) + 1) / 10.0
+
+
+def cvss3_score(vector: str) -> Optional[float]:
+    """Base score of a CVSS:3.x vector string"""
+    try:
+        metrics = dict(part.split(':', 1) for part in vector.split('/')[1:])
+        changed = metrics['S'] == 'C'
+        privileges = {'N': 0.85, 'L': 0.68 if changed else 0.62, 'H': 0.5 if changed else 0.27}[metrics['PR']]
+        impact_base = 1 - ((1 - _CVSS3['CIA'][metrics['C']]) * (1 - _CVSS3['CIA'][metrics['I']]) *
+                           (1 - _CVSS3['CIA'][metrics['A']]))
+        exploitability = 8.22 * _CVSS3['AV'][metrics['AV']] * _CVSS3['AC'][metrics['AC']] * privileges * \
+            _CVSS3['UI'][metrics['UI']]
+    except (KeyError, ValueError):
+        return None
+    if changed:
+        impact = 7.52 * (impact_base - 0.029) - 3.25 * (impact_base - 0.02) ** 15
+    else:
+        impact = 6.42 * impact_base
+    if impact <= 0:
+        return 0.0
+    total = impact + exploitability
+    return _roundup(min(1.08 * total if changed else total, 10))
+
+
+def severity_of(advisory: Dict, affected: Dict) -> str:
+    for source in (advisory.get('database_specific'), affected.get('ecosystem_specific'),
+                   affected.get('database_specific')):
+        label = str((source or {}).get('severity', '')).upper()
+        if label in GHSA_SEVERITY:
+            return GHSA_SEVERITY[label]
+    for entry in advisory.get('severity') or []:
+        if entry.get('type') == 'CVSS_V3':
+            score = cvss3_score(entry.get('score', ''))
+            if score is not None:
+                return 'low' if score < 4 else 'medium' if score < 7 else 'high' if score < 9 else 'critical'
+    return 'medium'
+
+
+# --- versions --------------------------------------------------------------
+
+_VERSION = re.compile(r'^v?(\d+(?:\.\d+)*)(.*)$')
+# Suffix rank: pre-releases sort before the release, post/build after it
+_PRE = re.compile(r'^[-.+_]?(dev|a|alpha|b|beta|pre|preview|c|rc)\.?(\d*)', re.IGNORECASE)
+_PRE_RANK = {'dev': 0, 'a': 1, 'alpha': 1, 'b': 2, 'beta': 2, 'pre': 3, 'preview': 3, 'c': 3, 'rc': 3}
+
+
+def version_key(version: str, semver: bool = True) -> Tuple:
+    """
+    Sort key for semver, PEP 440 and Go-style versions. Under semver any
+    "-suffix" is a pre-release; PEP 440 treats unknown suffixes as post-releases.
+    """
+    match = _VERSION.match(version.strip())
+    if not match:
+        return ((), 1, 0, version)
+    release = tuple(int(part) for part in match.group(1).split('.'))
+    # 1.0 == 1.0.0
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]
+    suffix = match.group(2)
+    if not suffix or suffix.startswith('+'):
+        return (release, 1, 0, '')
+    pre = _PRE.match(suffix)
+    if pre:
+        return (release, 0, _PRE_RANK[pre.group(1).lower()], int(pre.group(2) or 0), suffix)
+    if semver and suffix.startswith('-'):
+        return (release, 0, 0, 0, suffix)
+    return (release, 2, 0, 0, suffix)
+
+
+def is_affected(version: str, entry: Dict, ecosystem: str = 'npm') -> bool:
+    """OSV affected-range semantics for one package entry"""
+    if version in entry.get('versions', ()):
+        return True
+    semver = ecosystem != 'PyPI'
+    key = version_key(version, semver)
+
+    def event_key(event):
+        value = next(iter(event.values()))
+        return ((), -1) if value == '0' else version_key(value, semver)
+
+    for events in entry.get('ranges', ()):
+        affected = False
+        for event in sorted(events, key=event_key):
+            if 'introduced' in event and event_key(event) <= key:
+                affected = True
+            elif 'fixed' in event and event_key(event) <= key:
+                affected = False
+            elif 'last_affected' in event and event_key(event) < key:
+                affected = False
+        if affected:
+            return True
+    return False
+
+
+# --- ingest ----------------------------------------------------------------
+
+def _read_advisories(source: Path) -> Iterator[Dict]:
+    def parsed(data):
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict) and item.get('id'):
+                yield item
+
+    if source.is_dir():
+        for path in sorted(source.rglob('*')):
+            if path.suffix in ('.json', '.zip'):
+                yield from _read_advisories(path)
+    elif source.suffix == '.zip':
+        with zipfile.ZipFile(source) as archive:
+            for name in archive.namelist():
+                if name.endswith('.json'):
+                    try:
+                        yield from parsed(json.loads(archive.read(name)))
+                    except ValueError:
+                        continue
+    else:
+        try:
+            yield from parsed(json.loads(source.read_text()))
+        except ValueError:
+            return
+
+
+def ingest(sources: Iterable) -> Dict:
+    """Replace the index with the advisories found in the given files, zips or directories"""
+    shards: Dict[Path, Dict[str, List[Dict]]] = {}
+    digest = hashlib.sha256()
+    ids = set()
+    staging = security_dir() / f'.index.{os.getpid()}'
+    shutil.rmtree(staging, ignore_errors=True)
+
+    for source in sources:
+        for advisory in _read_advisories(Path(source)):
+            if advisory.get('withdrawn') or advisory['id'] in ids:
+                continue
+            ids.add(advisory['id'])
+            digest.update(f"{advisory['id']}@{advisory.get('modified', '')}\n".encode())
+            for affected in advisory.get('affected') or []:
+                package = affected.get('package') or {}
+                ecosystem = package.get('ecosystem', '').split(':', 1)[0]
+                if not ecosystem or not package.get('name'):
+                    continue
+                name = normalize_name(ecosystem, package['name'])
+                ranges = [r['events'] for r in affected.get('ranges') or []
+                          if r.get('type') in ('SEMVER', 'ECOSYSTEM') and r.get('events')]
+                shard = shards.setdefault(shard_file(ecosystem, name, staging), {})
+                shard.setdefault(name, []).append({
+                    'id': advisory['id'],
+                    'severity': severity_of(advisory, affected),
+                    'summary': (advisory.get('summary') or '')[:200],
+                    'ranges': ranges,
+                    'versions': affected.get('versions') or [],
+                })
+
+    for path, packages in shards.items():
+        paths.ensure_dir(path.parent)
+        with open(path, 'w') as f:
+            json.dump(packages, f, separators=(',', ':'))
+    meta = {
+        'snapshot_id': digest.hexdigest()[:16],
+        'ingested_at': datetime.utcnow().isoformat(),
+        'advisories': len(ids),
+        'packages': sum(len(packages) for packages in shards.values()),
+        'ecosystems': sorted({path.parent.name for path in shards}),
+    }
+    paths.ensure_dir(staging)
+    with open(staging / 'meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    # Swap the finished index in; readers see the old or the new one, never a mix
+    previous = security_dir() / f'.index.old.{os.getpid()}'
+    if index_dir().exists():
+        os.replace(index_dir(), previous)
+    os.replace(staging, index_dir())
+    shutil.rmtree(previous, ignore_errors=True)
+    shutil.rmtree(results_dir(), ignore_errors=True)
+    return meta
+
+
+def snapshot() -> Optional[Dict]:
+    try:
+        with open(index_dir() / 'meta.json') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# --- lockfiles -------------------------------------------------------------
+
+def parse_package_lock(text: str) -> List[Tuple[str, str]]:
+    data = json.loads(text)
+    found = []
+    for key, entry in (data.get('packages') or {}).items():
+        if key and 'node_modules/' in key and entry.get('version') and not entry.get('link'):
+            found.append((key.rsplit('node_modules/', 1)[1], entry['version']))
+    if not data.get('packages'):
+        pending = list((data.get('dependencies') or {}).items())
+        while pending:
+            name, entry = pending.pop()
+            if entry.get('version'):
+                found.append((name, entry['version']))
+            pending.extend((entry.get('dependencies') or {}).items())
+    return found
+
+
+def parse_yarn_lock(text: str) -> List[Tuple[str, str]]:
+    found = []
+    names: List[str] = []
+    for line in text.splitlines():
+        if line and not line.startswith((' ', '#')) and line.rstrip().endswith(':'):
+            names = []
+            for spec in line.rstrip(':').split(','):
+                spec = spec.strip().strip('"')
+                names.append(spec[:spec.rfind('@')] if spec.rfind('@') > 0 else spec)
+            names = [name for name in names if not name.startswith('__')]
+        elif names and line.strip().startswith('version'):
+            version = line.strip().split(None, 1)[1].strip('"')
+            found.extend((name, version) for name in dict.fromkeys(names))
+            names = []
+    return found
+
+
+def parse_pnpm_lock(text: str) -> List[Tuple[str, str]]:
+    found = []
+    for match in re.finditer(r"^\s{2}'?/?((?:@[^/@\s]+/)?[^/@\s(]+)[@/](\d[^:(\s']*)", text, re.MULTILINE):
+        found.append((match.group(1), match.group(2)))
+    return found
+
+
+def parse_requirements(text: str) -> List[Tuple[str, str]]:
+    found = []
+    for line in text.splitlines():
+        match = re.match(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)(?:\[[^\]]*\])?\s*===?\s*([^\s;#,]+)', line)
+        if match:
+            found.append((match.group(1), match.group(2)))
+    return found
+
+
+def _toml_packages(text: str) -> List[Tuple[str, str]]:
+    """name/version pairs of [[package]] tables (poetry.lock, Cargo.lock)"""
+    try:
+        import tomllib
+        return [(p['name'], p['version']) for p in tomllib.loads(text).get('package', [])
+                if 'name' in p and 'version' in p]
+    except ImportError:
+        found = []
+        for block in text.split('[[package]]')[1:]:
+            name = re.search(r'^name\s*=\s*"([^"]+)"', block, re.MULTILINE)
+            version = re.search(r'^version\s*=\s*"([^"]+)"', block, re.MULTILINE)
+            if name and version:
+                found.append((name.group(1), version.group(1)))
+        return found
+
+
+def parse_pipfile_lock(text: str) -> List[Tuple[str, str]]:
+    data = json.loads(text)
+    return [(name, entry['version'].lstrip('=')) for section in ('default', 'develop')
+            for name, entry in (data.get(section) or {}).items() if entry.get('version')]
+
+
+def parse_go_sum(text: str) -> List[Tuple[str, str]]:
+    found = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 2:
+            found[(parts[0], parts[1].split('/', 1)[0])] = True
+    return list(found)
+
+
+PARSERS = {
+    'package-lock.json': parse_package_lock,
+    'npm-shrinkwrap.json': parse_package_lock,
+    'yarn.lock': parse_yarn_lock,
+    'pnpm-lock.yaml': parse_pnpm_lock,
+    'poetry.lock': _toml_packages,
+    'Pipfile.lock': parse_pipfile_lock,
+    'Cargo.lock': _toml_packages,
+    'go.sum': parse_go_sum,
+}
+
+
+def find_lockfiles(root) -> List[Path]:
+    root = Path(root)
+    found = [root / name for name in LOCKFILES if (root / name).is_file()]
+    found += sorted(path for path in root.glob('requirements*.txt') if path.is_file())
+    return found
+
+
+def locked_packages(lockfile: Path) -> List[Tuple[str, str, str]]:
+    """(ecosystem, package, version) for every locked dependency"""
+    if lockfile.name.startswith('requirements'):
+        ecosystem, parser = 'PyPI', parse_requirements
+    else:
+        ecosystem, parser = LOCKFILES[lockfile.name], PARSERS[lockfile.name]
+    try:
+        pairs = parser(lockfile.read_text())
+    except (OSError, ValueError, KeyError, AttributeError):
+        return []
+    return sorted({(ecosystem, normalize_name(ecosystem, name), version) for name, version in pairs})
+
+
+# --- scan ------------------------------------------------------------------
+
+def lookup(packages: Iterable[Tuple[str, str, str]]) -> List[Dict]:
+    """Vulnerabilities affecting the given packages; each shard is read once"""
+    by_shard: Dict[Path, List[Tuple[str, str, str]]] = {}
+    for ecosystem, name, version in packages:
+        by_shard.setdefault(shard_file(ecosystem, name), []).append((ecosystem, name, version))
+
+    found = []
+    for shard, wanted in sorted(by_shard.items()):
+        try:
+            with open(shard) as f:
+                advisories = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for ecosystem, name, version in wanted:
+            for entry in advisories.get(name, ()):
+                if is_affected(version, entry, ecosystem):
+                    found.append({'id': entry['id'], 'ecosystem': ecosystem, 'package': name,
+                                  'version': version, 'severity': entry['severity'], 'summary': entry['summary']})
+    return found
+
+
+def scan(root=None) -> Optional[Dict]:
+    """
+    Vulnerabilities in the project's locked dependencies from the offline
+    snapshot, or None when no snapshot has been ingested. Cached by the
+    lockfile contents and snapshot id.
+    """
+    meta = snapshot()
+    if meta is None:
+        return None
+    root = Path(root or paths.project_root())
+    lockfiles = find_lockfiles(root)
+    digest = hashlib.sha256(meta['snapshot_id'].encode())
+    for lockfile in lockfiles:
+        digest.update(f'\0{lockfile.name}\0'.encode())
+        digest.update(lockfile.read_bytes())
+    cache = results_dir() / f'{digest.hexdigest()[:32]}.json'
+    try:
+        with open(cache) as f:
+            return dict(json.load(f), cached=True)
+    except (OSError, ValueError):
+        pass
+
+    packages = sorted({p for lockfile in lockfiles for p in locked_packages(lockfile)})
+    result = {
+        'provider': 'osv',
+        'snapshot_id': meta['snapshot_id'],
+        'lockfiles': [lockfile.name for lockfile in lockfiles],
+        'packages': len(packages),
+        'vulnerabilities': lookup(packages),
+    }
+    paths.ensure_dir(cache.parent)
+    tmp = cache.parent / f'.{cache.name}.{os.getpid()}'
+    with open(tmp, 'w') as f:
+        json.dump(result, f)
+    os.replace(tmp, cache)
+    return dict(result, cached=False)
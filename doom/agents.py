@@ -0,0 +1,122 @@
+"""
+Agent registry
+
+Agents are defined in .claude/agents/ as markdown files with YAML
+front-matter (agent-*.md) or plain YAML (agent-*.yml). When no definitions
+exist the built-in roster used for task assignment is reported instead.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from doom import paths
+
+AGENT_SUFFIXES = ('.md', '.yml', '.yaml')
+TIERS = ('junior', 'senior', 'principal', 'suspended')
+
+# Best agent per task type, most senior first; UserPromptSubmit assigns from it
+AGENT_ROSTER = {
+    'bugfix': ['agent-bugfix-senior', 'agent-bugfix-junior'],
+    'feature': ['agent-feature-senior', 'agent-feature-junior'],
+    'refactor': ['agent-refactor-principal'],
+    'security': ['agent-security-senior'],
+    'performance': ['agent-refactor-principal', 'agent-feature-senior'],
+}
+
+
+def agents_dir():
+    return paths.claude_dir() / 'agents'
+
+
+def _parse_yaml(text: str) -> Dict:
+    try:
+        import yaml
+    except ImportError:
+        # Flat "key: value" definitions work without PyYAML
+        data = {}
+        for line in text.splitlines():
+            if ':' in line and not line.startswith((' ', '\t', '#', '-')):
+                key, _, value = line.partition(':')
+                data[key.strip()] = value.strip()
+        return data
+    try:
+        data = yaml.safe_load(text) or {}
+    except yaml.YAMLError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _front_matter(text: str) -> str:
+    if not text.startswith('---'):
+        return ''
+    end = text.find('\n---', 3)
+    return text[3:end] if end != -1 else ''
+
+
+def _as_list(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    if isinstance(value, str) and value:
+        return [v.strip() for v in value.replace(' - ', ',').split(',') if v.strip()]
+    return []
+
+
+def tier_from_name(name: str) -> str:
+    """Infer the tier from the agent-<type>-<tier> naming convention"""
+    suffix = name.rsplit('-', 1)[-1]
+    return suffix if suffix in TIERS else 'junior'
+
+
+def parse_agent_file(path) -> Optional[Dict]:
+    """Read one agent definition; returns None if it has no usable name"""
+    with open(path) as f:
+        text = f.read()
+    data = _parse_yaml(_front_matter(text) if str(path).endswith('.md') else text)
+    # implementation-guide.md nests the definition under "agent:"
+    if isinstance(data.get('agent'), dict):
+        data = dict(data['agent'], **data['agent'].get('config', {}))
+    name = data.get('name') or os.path.splitext(os.path.basename(str(path)))[0]
+    if not name.startswith('agent-'):
+        return None
+    return {
+        'name': name,
+        'tier': data.get('tier') or tier_from_name(name),
+        'description': data.get('description', ''),
+        'specializations': _as_list(data.get('specializations')),
+        'tools_allowed': _as_list(data.get('tools_allowed') or data.get('tools')),
+        'max_context_tokens': data.get('max_context_tokens'),
+        'source': str(path),
+    }
+
+
+def builtin_agents() -> List[Dict]:
+    """The roster UserPromptSubmit assigns from"""
+    specializations: Dict[str, List[str]] = {}
+    for task_type, roster in AGENT_ROSTER.items():
+        for name in roster:
+            specializations.setdefault(name, []).append(task_type)
+    return [{
+        'name': name,
+        'tier': tier_from_name(name),
+        'description': '',
+        'specializations': types,
+        'tools_allowed': [],
+        'max_context_tokens': None,
+        'source': 'builtin',
+    } for name, types in sorted(specializations.items())]
+
+
+def load_agents() -> List[Dict]:
+    """All defined agents, sorted by name"""
+    directory = agents_dir()
+    agents = []
+    if directory.is_dir():
+        for path in sorted(directory.iterdir()):
+            if path.suffix in AGENT_SUFFIXES and path.name.startswith('agent-'):
+                try:
+                    agent = parse_agent_file(path)
+                except (OSError, ValueError):
+                    continue
+                if agent:
+                    agents.append(agent)
+    return agents or builtin_agents()
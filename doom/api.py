@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+"""
+Local REST API for Doom-RLVR (specs/api-specification.yaml)
+
+A single long-running process keeps tasks, the RLVR scoreboard and the agent
+registry in memory and serves them over HTTP, so dashboards can poll without
+launching a process and scanning .claude/ per request.
+
+- A watcher thread re-stats the underlying files every poll interval. The
+  scoreboard is read incrementally from the last offset. The task directory
+  is listed again only when its mtime changes, and only the metadata of
+  unfinished tasks is re-stated.
+- Any change bumps the state generation and drops the rendered-response
+  cache. Responses carry a content ETag and honour If-None-Match with 304.
+- List endpoints page with an opaque `cursor` (stable while new rows are
+  appended); `page` is still accepted for spec compatibility.
+
+Run: python3 -m doom.api [--host 127.0.0.1] [--port 8080]
+Set DOOM_API_KEY to require a matching X-API-Key header.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from doom import agents, archive, leaderboard, paths
+
+API_PREFIX = '/api/v1'
+DEFAULT_PORT = 8080
+POLL_INTERVAL = 1.0
+# Rendered responses are also dropped after this long so time windows roll over
+RESPONSE_TTL = 30.0
+
+PERIODS = {'24h': timedelta(hours=24), '7d': timedelta(days=7), '30d': timedelta(days=30), 'all': None}
+ACTIVE_STATUSES = ('pending', 'assigned', 'in_progress')
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def _stat_key(path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class RewardLog:
+    """Incremental reader for the append-only scoreboard/rlvr.jsonl"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows: List[Dict] = []
+        # Bumped whenever rows are dropped, so consumers know to rebuild rather than append
+        self.epoch = 0
+        self._inode = None
+        self._offset = 0
+
+    def refresh(self) -> bool:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            changed = bool(self.rows)
+            if changed:
+                self.epoch += 1
+            self.rows, self._inode, self._offset = [], None, 0
+            return changed
+
+        changed = False
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # Replaced or truncated: start over
+            self.rows, self._inode, self._offset = [], st.st_ino, 0
+            self.epoch += 1
+            changed = True
+        if st.st_size > self._offset:
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read(st.st_size - self._offset)
+            # Leave a partially written last line for the next refresh
+            complete = data[:data.rfind(b'\n') + 1]
+            for line in complete.splitlines():
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(row, dict) and 'reward' in row:
+                    self.rows.append(row)
+            self._offset += len(complete)
+            changed = changed or bool(complete)
+        return changed
+
+
+def _is_final(task: Dict) -> bool:
+    """A task whose reward is recorded; nothing rewrites its metadata afterwards"""
+    return task.get('evaluation') == 'final' or (task.get('reward') is not None and task.get('evaluation') != 'pending')
+
+
+class TaskStore:
+    """
+    Task metadata keyed by task id. The directory is listed only when its
+    mtime changes; only unfinished tasks have their metadata re-stated.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.tasks: Dict[str, Dict] = {}
+        self._names: set = set()
+        self._final: set = set()
+        self._dir_key = None
+        self._stats: Dict[str, Tuple[int, int]] = {}
+
+    def refresh(self) -> bool:
+        changed = False
+        dir_key = _stat_key(self.directory)
+        if dir_key != self._dir_key:
+            self._dir_key = dir_key
+            try:
+                self._names = {entry.name for entry in os.scandir(self.directory) if entry.is_dir()}
+            except OSError:
+                self._names = set()
+            for task_id in set(self.tasks) - self._names:
+                del self.tasks[task_id]
+                changed = True
+            for task_id in set(self._stats) - self._names:
+                self._stats.pop(task_id)
+            # A finished task whose directory was recreated under the same id is read again
+            self._final = {task_id for task_id in self._final & self._names
+                           if _stat_key(self._metadata(task_id)) == self._stats.get(task_id)}
+
+        for task_id in self._names - self._final:
+            path = self._metadata(task_id)
+            key = _stat_key(path)
+            if key is None:
+                changed = self.tasks.pop(task_id, None) is not None or changed
+                self._stats.pop(task_id, None)
+                continue
+            if self._stats.get(task_id) == key:
+                continue
+            try:
+                with open(path) as f:
+                    self.tasks[task_id] = json.load(f)
+            except (OSError, ValueError):
+                continue
+            self._stats[task_id] = key
+            if _is_final(self.tasks[task_id]):
+                self._final.add(task_id)
+            changed = True
+        return changed
+
+    def _metadata(self, task_id: str) -> str:
+        return os.path.join(self.directory, task_id, 'metadata.json')
+
+
+class AgentRegistry:
+    """Agent definitions, reloaded when any file in .claude/agents changes"""
+
+    def __init__(self):
+        self.agents: List[Dict] = []
+        self._signature = ()
+
+    def refresh(self) -> bool:
+        directory = agents.agents_dir()
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            names = []
+        signature = tuple((name, _stat_key(directory / name)) for name in names)
+        if signature == self._signature and self.agents:
+            return False
+        self._signature = signature
+        self.agents = agents.load_agents()
+        return True
+
+
+class ConfigSource:
+    """Evaluator configuration, reloaded when its file changes"""
+
+    def __init__(self):
+        self.config: Dict = {}
+        self._signature = None
+
+    def refresh(self) -> bool:
+        candidates = paths.evaluator_config_files()
+        signature = tuple(_stat_key(p) for p in candidates)
+        if signature == self._signature:
+            return False
+        from doom.evaluator import load_config
+        self._signature = signature
+        self.config = load_config()
+        return True
+
+
+def encode_cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return tuple(json.loads(base64.urlsafe_b64decode(padded)))
+    except (ValueError, TypeError):
+        raise ApiError(400, 'invalid_cursor', 'Malformed cursor')
+
+
+def paginate(items: List[Dict], keys: List[tuple], cursor: Optional[str], limit: int,
+             page: Optional[int] = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Newest-first page of `items` (sorted ascending by `keys`). The cursor is
+    the key of the last row served, so appended rows never shift later pages.
+    """
+    if cursor:
+        end = bisect_left(keys, decode_cursor(cursor))
+    else:
+        end = len(items) - ((page or 1) - 1) * limit
+    end = max(end, 0)
+    start = max(end - limit, 0)
+    next_cursor = encode_cursor(keys[start]) if start > 0 else None
+    return items[start:end][::-1], next_cursor
+
+
+def _int_param(query: Dict, name: str, default: int, maximum: Optional[int] = None) -> int:
+    value = query.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(400, 'invalid_parameter', f"'{name}' must be an integer")
+    if number < 1:
+        raise ApiError(400, 'invalid_parameter', f"'{name}' must be positive")
+    return min(number, maximum) if maximum else number
+
+
+def _period_start(period: str) -> Optional[str]:
+    if period not in PERIODS:
+        raise ApiError(400, 'invalid_parameter', f"'period' must be one of {', '.join(PERIODS)}")
+    delta = PERIODS[period]
+    return (datetime.utcnow() - delta).isoformat() if delta else None
+
+
+def _mean(values: List[float]) -> float:
+    return round(sum(values) / len(values), 4) if values else 0.0
+
+
+def _success_rate(rows: List[Dict]) -> float:
+    return round(sum(1 for r in rows if r.get('task_status') == 'completed') / len(rows), 4) if rows else 0.0
+
+
+def _duration_ms(task: Dict) -> Optional[float]:
+    try:
+        start = datetime.fromisoformat(task['created_at'])
+        end = datetime.fromisoformat(task['completed_at'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (end - start).total_seconds() * 1000
+
+
+class ApiState:
+    """In-memory view of .claude/ state plus the rendered-response cache"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.rewards = RewardLog(paths.scoreboard_dir() / 'rlvr.jsonl')
+        self.tasks = TaskStore(paths.tasks_dir())
+        self.registry = AgentRegistry()
+        self.config = ConfigSource()
+        self.boards = leaderboard.Buckets()
+        self._boarded = 0
+        self._board_epoch = self.rewards.epoch
+        self.generation = 0
+        self.last_check = None
+        self._lock = threading.RLock()
+        self._responses: Dict[str, Tuple[float, str, bytes]] = {}
+        self._indexes: Dict = {}
+        self.refresh()
+
+    # -- invalidation -------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """Re-stat every source; returns True if anything changed"""
+        with self._lock:
+            changed = False
+            for source in (self.rewards, self.tasks, self.registry, self.config):
+                changed = source.refresh() or changed
+            if self.rewards.epoch != self._board_epoch:
+                # Scoreboard was replaced or truncated: rebuild the leaderboard buckets
+                self.boards, self._boarded, self._board_epoch = leaderboard.Buckets(), 0, self.rewards.epoch
+            for row in self.rewards.rows[self._boarded:]:
+                self.boards.add(row)
+            self._boarded = len(self.rewards.rows)
+            self.last_check = datetime.utcnow().isoformat()
+            if changed:
+                self.generation += 1
+                self._responses.clear()
+                self._indexes.clear()
+            return changed
+
+    def watch(self, interval: float = POLL_INTERVAL) -> threading.Event:
+        """Refresh from a daemon thread until the returned event is set"""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"doom-api: refresh failed: {e}", file=sys.stderr)
+
+        threading.Thread(target=loop, name='doom-api-watcher', daemon=True).start()
+        return stop
+
+    # -- derived indexes (rebuilt once per generation) ----------------------
+
+    def _index(self, name: str):
+        if name not in self._indexes:
+            self._indexes[name] = getattr(self, f'_build_{name}')()
+        return self._indexes[name]
+
+    def _build_task_list(self):
+        ordered = sorted(self.tasks.tasks.values(), key=lambda t: (t.get('created_at', ''), t.get('task_id', '')))
+        return ordered, [(t.get('created_at', ''), t.get('task_id', '')) for t in ordered]
+
+    def _build_reward_list(self):
+        ordered = sorted(enumerate(self.rewards.rows), key=lambda p: (p[1].get('timestamp', ''), p[0]))
+        return [row for _, row in ordered], [(row.get('timestamp', ''), i) for i, row in ordered]
+
+    def _build_rewards_by_agent(self):
+        by_agent: Dict[str, List[Dict]] = {}
+        for row in self._index('reward_list')[0]:
+            by_agent.setdefault(row.get('agent_name', 'unknown'), []).append(row)
+        return by_agent
+
+    def _build_agents_by_name(self):
+        return {agent['name']: agent for agent in self.registry.agents}
+
+    # -- request handling ---------------------------------------------------
+
+    def handle(self, method: str, target: str, if_none_match: Optional[str] = None) -> Tuple[int, Dict, bytes]:
+        """Serve one request; returns (status, headers, body)"""
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip('/') or '/'
+        if path.startswith(API_PREFIX):
+            path = path[len(API_PREFIX):] or '/'
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        cache_key = f"{path}?{'&'.join(f'{k}={v}' for k, v in sorted(query.items()))}"
+
+        if method not in ('GET', 'HEAD'):
+            return self._error(405, 'method_not_allowed', 'The local API is read-only')
+
+        with self._lock:
+            cached = self._responses.get(cache_key)
+            if cached is None or time.monotonic() - cached[0] > RESPONSE_TTL:
+                try:
+                    payload = self._route(path, query)
+                except ApiError as e:
+                    return self._error(e.status, e.code, e.message)
+                body = json.dumps(payload, separators=(',', ':')).encode()
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+                cached = (time.monotonic(), etag, body)
+                self._responses[cache_key] = cached
+
+        _, etag, body = cached
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Content-Type': 'application/json'}
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')] + ['*']:
+            return 304, headers, b''
+        return 200, headers, body
+
+    def _error(self, status: int, code: str, message: str) -> Tuple[int, Dict, bytes]:
+        body = json.dumps({'code': code, 'message': message}).encode()
+        return status, {'Content-Type': 'application/json'}, body
+
+    def _route(self, path: str, query: Dict) -> Dict:
+        parts = path.strip('/').split('/')
+        if parts == ['tasks']:
+            return self.list_tasks(query)
+        if len(parts) == 2 and parts[0] == 'tasks':
+            return self.get_task(parts[1])
+        if parts == ['agents']:
+            return self.list_agents(query)
+        if len(parts) == 2 and parts[0] == 'agents':
+            return self.get_agent(parts[1])
+        if len(parts) == 3 and parts[0] == 'agents' and parts[2] == 'metrics':
+            return self.agent_metrics(parts[1], query.get('period', '7d'))
+        if parts == ['rewards']:
+            return self.list_rewards(query)
+        if parts == ['leaderboard']:
+            return self.leaderboard(query.get('metric', 'reward'), query.get('period', '7d'))
+        if parts == ['evaluator', 'config']:
+            return self.config.config
+        if parts == ['system', 'health']:
+            return self.health()
+        if parts == ['system', 'stats']:
+            return self.stats()
+        raise ApiError(404, 'not_found', f"No such endpoint: {path}")
+
+    # -- endpoints ----------------------------------------------------------
+
+    @staticmethod
+    def task_response(task: Dict) -> Dict:
+        response = {
+            'id': task.get('task_id'),
+            'type': task.get('task_type'),
+            'priority': task.get('priority'),
+            'description': task.get('description') or task.get('prompt', ''),
+            'status': task.get('status', 'pending'),
+            'assigned_agent': task.get('agent_name'),
+            'created_at': task.get('created_at'),
+        }
+        if task.get('completed_at'):
+            response['completed_at'] = task['completed_at']
+        if 'reward' in task:
+            response['outcome'] = {'reward': task['reward']}
+            duration = _duration_ms(task)
+            if duration is not None:
+                response['outcome']['duration_ms'] = int(duration)
+        return response
+
+    def list_tasks(self, query: Dict) -> Dict:
+        ordered, keys = self._index('task_list')
+        filters = [(field, query[param]) for param, field in
+                   (('status', 'status'), ('agent', 'agent_name'), ('type', 'task_type')) if param in query]
+        if filters:
+            pairs = [(t, k) for t, k in zip(ordered, keys) if all(t.get(f) == v for f, v in filters)]
+            ordered, keys = [p[0] for p in pairs], [p[1] for p in pairs]
+
+        limit = _int_param(query, 'limit', 20, maximum=100)
+        page = _int_param(query, 'page', 1)
+        tasks, next_cursor = paginate(ordered, keys, query.get('cursor'), limit, page)
+        return {
+            'tasks': [self.task_response(t) for t in tasks],
+            'total': len(ordered),
+            'page': page,
+            'limit': limit,
+            'next_cursor': next_cursor,
+        }
+
+    def get_task(self, task_id: str) -> Dict:
+        task = self.tasks.tasks.get(task_id) or archive.load_metadata(task_id)
+        if task is None:
+            raise ApiError(404, 'not_found', f"Task '{task_id}' not found")
+        return self.task_response(task)
+
+    def agent_performance(self, name: str) -> Dict:
+        rows = self._index('rewards_by_agent').get(name, [])
+        last_10 = [row['reward'] for row in rows[-10:]]
+        return {
+            'rolling_avg_reward': _mean(last_10),
+            'total_tasks': len(rows),
+            'success_rate': _success_rate(rows),
+            'last_10_rewards': last_10,
+        }
+
+    def agent_response(self, agent: Dict) -> Dict:
+        response = {k: v for k, v in agent.items() if k != 'source' and v not in (None, '')}
+        response['performance'] = self.agent_performance(agent['name'])
+        return response
+
+    def list_agents(self, query: Dict) -> Dict:
+        selected = []
+        active_only = query.get('active', 'true').lower() != 'false'
+        for agent in self.registry.agents:
+            if 'tier' in query and agent['tier'] != query['tier']:
+                continue
+            if 'specialization' in query and query['specialization'] not in agent['specializations']:
+                continue
+            if active_only and agent['tier'] == 'suspended':
+                continue
+            selected.append(self.agent_response(agent))
+        return {'agents': selected, 'total': len(selected)}
+
+    def get_agent(self, name: str) -> Dict:
+        agent = self._index('agents_by_name').get(name)
+        if agent is None:
+            raise ApiError(404, 'not_found', f"Agent '{name}' not found")
+        return self.agent_response(agent)
+
+    def agent_metrics(self, name: str, period: str) -> Dict:
+        since = _period_start(period)
+        rows = self._index('rewards_by_agent').get(name, [])
+        if not rows and name not in self._index('agents_by_name'):
+            raise ApiError(404, 'not_found', f"Agent '{name}' not found")
+        if since:
+            rows = [r for r in rows if r.get('timestamp', '') >= since]
+
+        durations = [d for d in (_duration_ms(self.tasks.tasks.get(r.get('task_id'), {})) for r in rows)
+                     if d is not None]
+        return {
+            'agent_name': name,
+            'period': period,
+            'metrics': {
+                'avg_reward': _mean([r['reward'] for r in rows]),
+                'total_tasks': len(rows),
+                'success_rate': _success_rate(rows),
+                'avg_duration_ms': _mean(durations),
+                'reward_trend': [{'timestamp': r.get('timestamp'), 'value': r['reward']} for r in rows],
+            },
+        }
+
+    @staticmethod
+    def reward_response(row: Dict) -> Dict:
+        response = {k: row.get(k) for k in ('task_id', 'agent_name', 'reward', 'components', 'timestamp')}
+        response['id'] = f"{row.get('task_id')}@{row.get('timestamp')}"
+        response['task_status'] = row.get('task_status')
+        return response
+
+    def list_rewards(self, query: Dict) -> Dict:
+        ordered, keys = self._index('reward_list')
+        checks = []
+        if 'agent' in query:
+            checks.append(lambda r: r.get('agent_name') == query['agent'])
+        if 'task_id' in query:
+            checks.append(lambda r: r.get('task_id') == query['task_id'])
+        if 'from' in query:
+            checks.append(lambda r: r.get('timestamp', '') >= query['from'])
+        if 'to' in query:
+            checks.append(lambda r: r.get('timestamp', '') <= query['to'])
+        if checks:
+            pairs = [(r, k) for r, k in zip(ordered, keys) if all(check(r) for check in checks)]
+            ordered, keys = [p[0] for p in pairs], [p[1] for p in pairs]
+
+        limit = _int_param(query, 'limit', 100, maximum=1000)
+        rows, next_cursor = paginate(ordered, keys, query.get('cursor'), limit)
+        return {
+            'rewards': [self.reward_response(r) for r in rows],
+            'total': len(ordered),
+            'next_cursor': next_cursor,
+        }
+
+    def leaderboard(self, metric: str, period: str) -> Dict:
+        tiers = {name: agent['tier'] for name, agent in self._index('agents_by_name').items()}
+        try:
+            return self.boards.board(metric, period, tiers=tiers)
+        except ValueError as e:
+            raise ApiError(400, 'invalid_parameter', str(e))
+
+    def health(self) -> Dict:
+        def component(ok: bool) -> Dict:
+            return {'status': 'healthy' if ok else 'degraded', 'last_check': self.last_check}
+
+        components = {
+            'coordinator': component(paths.claude_dir().is_dir()),
+            'evaluator': component(bool(self.config.config)),
+            'scoreboard': component(True),
+        }
+        healthy = all(c['status'] == 'healthy' for c in components.values())
+        return {'status': 'healthy' if healthy else 'degraded', 'components': components}
+
+    def stats(self) -> Dict:
+        tasks = list(self.tasks.tasks.values())
+        today = datetime.utcnow().date().isoformat()
+        durations = [d for d in (_duration_ms(t) for t in tasks) if d is not None]
+        return {
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'tasks_total': len(tasks),
+            'tasks_active': sum(1 for t in tasks if t.get('status') in ACTIVE_STATUSES),
+            'agents_total': len(self.registry.agents),
+            'agents_active': sum(1 for a in self.registry.agents if a['tier'] != 'suspended'),
+            'rewards_today': sum(1 for r in self.rewards.rows if r.get('timestamp', '').startswith(today)),
+            'avg_task_duration_ms': _mean(durations),
+        }
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = 'doom-api/1.0'
+    state: ApiState = None
+    api_key: Optional[str] = None
+
+    def _serve(self, method: str):
+        if self.api_key and not urlsplit(self.path).path.rstrip('/').endswith('/system/health'):
+            if self.headers.get('X-API-Key') != self.api_key:
+                self._send(*self.state._error(401, 'unauthorized', 'Missing or invalid X-API-Key'), method)
+                return
+        status, headers, body = self.state.handle(method, self.path, self.headers.get('If-None-Match'))
+        self._send(status, headers, body, method)
+
+    def _send(self, status: int, headers: Dict, body: bytes, method: str):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if method != 'HEAD':
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._serve('GET')
+
+    def do_HEAD(self):
+        self._serve('HEAD')
+
+    def do_POST(self):
+        self._serve('POST')
+
+    def do_PUT(self):
+        self._serve('PUT')
+
+    def do_PATCH(self):
+        self._serve('PATCH')
+
+    def do_DELETE(self):
+        self._serve('DELETE')
+
+    def log_message(self, format, *args):
+        if os.environ.get('DOOM_API_LOG'):
+            super().log_message(format, *args)
+
+
+def make_server(host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                poll_interval: float = POLL_INTERVAL) -> ThreadingHTTPServer:
+    """Build a server with a fresh state and a running file watcher"""
+    state = ApiState()
+    handler = type('Handler', (ApiHandler,), {'state': state, 'api_key': os.environ.get('DOOM_API_KEY')})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    server.stop_watching = state.watch(poll_interval)
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Doom-RLVR local REST API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL,
+                        help='Seconds between file change checks (default: 1.0)')
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.poll_interval)
+    print(f"Doom-RLVR API listening on http://{args.host}:{server.server_address[1]}{API_PREFIX}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop_watching.set()
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Packed archive of finished task directories
+
+Each task keeps its own .claude/tasks/<task_id>/ directory while it is live.
+`doom archive` packs tasks that finished more than `older_than_days` ago
+into one zip segment per month and removes their directories, so a long-running
+project keeps a handful of files instead of one directory per task. Tasks
+still waiting in the evaluation spool, and the active task, are never packed.
+
+A segment is never modified in place: packing writes a copy with the new
+members, syncs it and renames it over the old one, so a crash leaves either
+segment whole. The index is an append-only JSONL file that maps a task id to
+its segment. Each process keeps it as a dict keyed by task id and reads only
+the rows appended since its last lookup; a lookup then reads one member
+through the zip's central directory. Reads try the live directory first, so
+callers see a task the same way whether or not it has been archived.
+
+Packing is safe to repeat after a crash. Members already in a segment are
+not written twice, indexed tasks are not indexed twice, and a directory is
+removed only after its segment has been replaced and its index row written.
+
+Layout under .claude/archive/:
+    <YYYY-MM>.zip    <task_id>/metadata.json, <task_id>/trace.jsonl, ... per task
+    index.jsonl      {task_id, segment, agent_name, status, completed_at, archived_at, files}
+    archive.lock     held while packing
+    .<segment>.tmp   a segment being written; left over only by a crash, removed by the next pack
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from doom import events, paths
+
+INDEX_FILE = 'index.jsonl'
+DEFAULT_OLDER_THAN_DAYS = 7
+
+# index.jsonl keyed by task id, with the file identity and offset read so far
+_index_cache: Dict = {'file': None, 'offset': 0, 'rows': {}}
+
+
+def archive_dir() -> Path:
+    return paths.claude_dir() / 'archive'
+
+
+def index_file() -> Path:
+    return archive_dir() / INDEX_FILE
+
+
+def settings() -> Dict:
+    """The archive section of the evaluator config, read without loading the evaluator"""
+    for candidate in paths.evaluator_config_files():
+        try:
+            with open(candidate) as f:
+                return json.load(f).get('archive', {})
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError):
+            return {}
+    return {}
+
+
+def _index() -> Dict[str, Dict]:
+    """Index rows by task id, reading only what was appended since the last call"""
+    path = index_file()
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return {}
+    with f:
+        st = os.fstat(f.fileno())
+        identity = (str(path), st.st_dev, st.st_ino)
+        if identity != _index_cache['file'] or st.st_size < _index_cache['offset']:
+            _index_cache.update(file=identity, offset=0, rows={})
+        f.seek(_index_cache['offset'])
+        data = f.read()
+    # A row still being appended is picked up on the next call
+    complete = data[:data.rfind(b'\n') + 1]
+    _index_cache['offset'] += len(complete)
+    for line in complete.splitlines():
+        try:
+            row = json.loads(line)
+            _index_cache['rows'][row['task_id']] = row
+        except (ValueError, KeyError, TypeError):
+            continue
+    return _index_cache['rows']
+
+
+def locate(task_id: str) -> Optional[Dict]:
+    """The index row of an archived task, or None"""
+    return _index().get(task_id)
+
+
+def read_file(task_id: str, name: str) -> Optional[bytes]:
+    """A task file from the live directory or, failing that, the archive"""
+    try:
+        with open(paths.task_dir(task_id) / name, 'rb') as f:
+            return f.read()
+    except OSError:
+        pass
+    row = locate(task_id)
+    if row is None:
+        return None
+    try:
+        with zipfile.ZipFile(archive_dir() / row['segment']) as segment:
+            return segment.read(f'{task_id}/{name}')
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None
+
+
+def load_metadata(task_id: str) -> Optional[Dict]:
+    """metadata.json of a live or archived task"""
+    data = read_file(task_id, 'metadata.json')
+    if data is None:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def _finished_at(directory: Path) -> float:
+    """When the task last changed: its newest file, which covers late trace appends"""
+    return max((f.stat().st_mtime for f in directory.rglob('*') if f.is_file()), default=0.0)
+
+
+def _segment_name(metadata: Dict, finished_at: float) -> str:
+    stamp = metadata.get('completed_at') or metadata.get('created_at')
+    try:
+        month = datetime.fromisoformat(stamp).strftime('%Y-%m')
+    except (TypeError, ValueError):
+        month = datetime.utcfromtimestamp(finished_at).strftime('%Y-%m')
+    return f'{month}.zip'
+
+
+def candidates(older_than_days: float) -> List[Dict]:
+    """Finished tasks old enough to pack: {task_id, directory, segment, metadata}"""
+    from doom import spool
+
+    cutoff = time.time() - older_than_days * 86400
+    active = None
+    try:
+        with open(paths.current_task_file()) as f:
+            active = json.load(f).get('task_id')
+    except (OSError, ValueError):
+        pass
+    found = []
+    for directory in sorted(paths.tasks_dir().iterdir()) if paths.tasks_dir().exists() else ():
+        if not directory.is_dir() or directory.name == active:
+            continue
+        try:
+            with open(directory / 'metadata.json') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if metadata.get('status') in (None, 'in_progress') or metadata.get('evaluation') == 'pending' \
+                or spool.state_of(directory.name):
+            continue
+        finished_at = _finished_at(directory)
+        if finished_at > cutoff:
+            continue
+        found.append({'task_id': directory.name, 'directory': directory, 'metadata': metadata,
+                      'segment': _segment_name(metadata, finished_at)})
+    return found
+
+
+def _temp_segment(segment: Path) -> Path:
+    return segment.with_name(f'.{segment.name}.tmp')
+
+
+def _pack_segment(segment: Path, tasks: List[Dict]) -> Dict[str, List[str]]:
+    """
+    Write the segment with the tasks' files added to a temporary copy, sync
+    it and rename it over the segment; returns the members of each task
+    """
+    members = {}
+    temp = _temp_segment(segment)
+    if segment.exists():
+        shutil.copyfile(segment, temp)
+    else:
+        temp.unlink(missing_ok=True)
+    with zipfile.ZipFile(temp, 'a', compression=zipfile.ZIP_DEFLATED) as archive:
+        present = set(archive.namelist())
+        for task in tasks:
+            names = []
+            for path in sorted(p for p in task['directory'].rglob('*') if p.is_file()):
+                name = f"{task['task_id']}/{path.relative_to(task['directory']).as_posix()}"
+                if name not in present:
+                    archive.write(path, name)
+                names.append(name)
+            members[task['task_id']] = names
+    with open(temp, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(temp, segment)
+    directory = os.open(segment.parent, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+    return members
+
+
+def pack(older_than_days: Optional[float] = None, dry_run: bool = False) -> Dict:
+    """
+    Pack finished tasks older than `older_than_days` into their month's
+    segment and remove their directories. Returns counts and the segments touched.
+    """
+    if older_than_days is None:
+        older_than_days = settings().get('older_than_days', DEFAULT_OLDER_THAN_DAYS)
+    summary = {'archived': 0, 'files': 0, 'bytes': 0, 'segments': []}
+    lock_fd = os.open(paths.ensure_dir(archive_dir()) / 'archive.lock', os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        for leftover in archive_dir().glob('.*.tmp'):
+            leftover.unlink(missing_ok=True)
+        tasks = candidates(older_than_days)
+        by_segment: Dict[str, List[Dict]] = {}
+        for task in tasks:
+            by_segment.setdefault(task['segment'], []).append(task)
+        summary['segments'] = sorted(by_segment)
+        for task in tasks:
+            files = [p for p in task['directory'].rglob('*') if p.is_file()]
+            summary['files'] += len(files)
+            summary['bytes'] += sum(p.stat().st_size for p in files)
+        summary['archived'] = len(tasks)
+        if dry_run:
+            return summary
+
+        indexed = task_ids()
+        for name, group in sorted(by_segment.items()):
+            members = _pack_segment(archive_dir() / name, group)
+            now = datetime.utcnow().isoformat()
+            rows = [{'task_id': t['task_id'], 'segment': name, 'agent_name': t['metadata'].get('agent_name'),
+                     'status': t['metadata'].get('status'), 'completed_at': t['metadata'].get('completed_at'),
+                     'archived_at': now, 'files': len(members[t['task_id']])}
+                    for t in group if t['task_id'] not in indexed]
+            if rows:
+                events.append_jsonl(index_file(), rows)
+            for task in group:
+                shutil.rmtree(task['directory'], ignore_errors=True)
+        return summary
+    finally:
+        os.close(lock_fd)
+
+
+def task_ids() -> set:
+    """Every archived task id"""
+    return set(_index())
+
+
+def stats() -> Dict:
+    """Archived task count and the size of every segment"""
+    segments = {p.name: p.stat().st_size for p in sorted(archive_dir().glob('*.zip'))} \
+        if archive_dir().exists() else {}
+    return {'tasks': len(task_ids()), 'segments': segments}
@@ -0,0 +1,243 @@
+"""
+Per-task token and time budgets
+
+UserPromptSubmit opens a usage counter for each task with the budget for its
+type (the `budgets` section of evaluator-config.json, overridden by
+`constraints` in the task metadata). PostToolUse adds an estimate of the
+tokens in every tool call's input and output; the counter is a small JSON file
+rewritten under a lock, so each update costs the same however long the task
+runs, and the budget settings are copied into it so PostToolUse never reads
+the evaluator config. Crossing `warn_at` of either budget records a
+budget_warning event; going over it records budget_exceeded and, with
+`enforce` (off by default), leaves a marker file that makes PreToolUse block
+every further tool call, read-only fast-path tools included. At Stop the
+totals become the evaluator's efficiency_score component.
+
+Layout under .claude/tasks/<task_id>/:
+    usage.json      {tokens_used, tool_calls, started_at, updated_at, max_tokens,
+                     timeout_ms, warn_at, enforce, state}
+    budget-blocked  empty; present once an enforced budget is exceeded
+"""
+
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from doom import paths
+
+USAGE_FILE = 'usage.json'
+# Checked with a bare stat by the PreToolUse fast path (doom.hooks.budget_blocked)
+BLOCKED_FILE = 'budget-blocked'
+
+# Rough BPE ratio for English prose and code
+CHARS_PER_TOKEN = 4
+
+DEFAULT_BUDGETS = {
+    'warn_at': 0.8,
+    'enforce': False,
+    'default': {'max_tokens': 100000, 'timeout_ms': 1200000},
+}
+
+# Ordered budget states; a counter only ever moves forward through them
+STATES = ('ok', 'warning', 'exceeded')
+
+
+def estimate_tokens(value) -> int:
+    """Approximate token count of a string or JSON-serializable value"""
+    if value is None:
+        return 0
+    if not isinstance(value, str):
+        value = json.dumps(value, separators=(',', ':'), default=str)
+    return (len(value) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def settings() -> Dict:
+    """The budgets section of the evaluator config, read without loading the evaluator"""
+    for candidate in paths.evaluator_config_files():
+        try:
+            with open(candidate) as f:
+                return json.load(f).get('budgets') or {}
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError):
+            return {}
+    return {}
+
+
+def budget_config() -> Dict:
+    return dict(DEFAULT_BUDGETS, **settings())
+
+
+def constraints_for(task_type: Optional[str], config: Optional[Dict] = None) -> Dict:
+    """{'max_tokens', 'timeout_ms'} for a task type"""
+    config = config or budget_config()
+    limits = dict(config.get('default') or DEFAULT_BUDGETS['default'])
+    limits.update(config.get(task_type) or {})
+    return {'max_tokens': limits.get('max_tokens'), 'timeout_ms': limits.get('timeout_ms')}
+
+
+def usage_file(task_id: str):
+    return paths.task_dir(task_id) / USAGE_FILE
+
+
+def blocked_file(task_id: str):
+    return paths.task_dir(task_id) / BLOCKED_FILE
+
+
+def _task_constraints(task_id: str) -> Dict:
+    """Budget for a task whose counter was not opened by UserPromptSubmit"""
+    metadata = {}
+    metadata_file = paths.task_dir(task_id) / 'metadata.json'
+    if metadata_file.exists():
+        try:
+            with open(metadata_file) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            metadata = {}
+    limits = constraints_for(metadata.get('task_type'))
+    limits.update({k: v for k, v in (metadata.get('constraints') or {}).items() if k in limits})
+    return limits
+
+
+def _new_usage(constraints: Dict, now: float, config: Optional[Dict] = None) -> Dict:
+    config = config or budget_config()
+    return {
+        'tokens_used': 0,
+        'tool_calls': 0,
+        'started_at': now,
+        'updated_at': now,
+        'max_tokens': constraints.get('max_tokens'),
+        'timeout_ms': constraints.get('timeout_ms'),
+        'warn_at': config['warn_at'],
+        'enforce': bool(config['enforce']),
+        'state': 'ok',
+    }
+
+
+@contextmanager
+def _locked_usage(task_id: str) -> Iterator[Dict]:
+    """Read-modify-write a task's usage counter under an exclusive lock"""
+    path = usage_file(task_id)
+    paths.ensure_dir(path.parent)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, 'r+') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        raw = f.read()
+        usage = json.loads(raw) if raw.strip() else {}
+        yield usage
+        f.seek(0)
+        f.truncate()
+        json.dump(usage, f, separators=(',', ':'))
+
+
+def start(task_id: str, constraints: Dict, prompt: str = '', now: Optional[float] = None,
+          config: Optional[Dict] = None) -> Dict:
+    """Open the counter for a new task, charging it for the prompt"""
+    now = time.time() if now is None else now
+    with _locked_usage(task_id) as usage:
+        try:
+            os.unlink(blocked_file(task_id))
+        except FileNotFoundError:
+            pass
+        usage.clear()
+        usage.update(_new_usage(constraints, now, config))
+        usage['tokens_used'] = estimate_tokens(prompt)
+        return dict(usage)
+
+
+def fractions(usage: Dict, now: Optional[float] = None) -> Dict:
+    """Share of the token and time budgets used so far (None without a budget)"""
+    now = time.time() if now is None else now
+    duration_ms = (now - usage['started_at']) * 1000
+    max_tokens, timeout_ms = usage.get('max_tokens'), usage.get('timeout_ms')
+    return {
+        'tokens': usage['tokens_used'] / max_tokens if max_tokens else None,
+        'time': duration_ms / timeout_ms if timeout_ms else None,
+    }
+
+
+def _state_for(usage: Dict, warn_at: float, now: float) -> str:
+    used = max((f for f in fractions(usage, now).values() if f is not None), default=0.0)
+    if used >= 1.0:
+        return 'exceeded'
+    if used >= warn_at:
+        return 'warning'
+    return 'ok'
+
+
+def record_usage(task_id: str, tokens: int, now: Optional[float] = None) -> Dict:
+    """
+    Add one tool call's tokens to the counter. The returned copy carries
+    'transition' set to the new state when this call crossed into it.
+    """
+    now = time.time() if now is None else now
+    with _locked_usage(task_id) as usage:
+        if not usage:
+            usage.update(_new_usage(_task_constraints(task_id), now))
+        usage['tokens_used'] += tokens
+        usage['tool_calls'] += 1
+        usage['updated_at'] = now
+        previous = usage['state']
+        state = _state_for(usage, usage.get('warn_at', DEFAULT_BUDGETS['warn_at']), now)
+        if STATES.index(state) > STATES.index(previous):
+            usage['state'] = state
+            if state == 'exceeded' and usage.get('enforce'):
+                blocked_file(task_id).touch()
+        result = dict(usage)
+    result['transition'] = usage['state'] if usage['state'] != previous else None
+    return result
+
+
+def load_usage(task_id: str) -> Optional[Dict]:
+    path = usage_file(task_id)
+    if not path.exists():
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_exceeded(task_id: str) -> bool:
+    usage = load_usage(task_id)
+    return bool(usage) and usage.get('state') == 'exceeded'
+
+
+def blocks_tools(task_id: str) -> bool:
+    """True once an enforced budget has been exceeded"""
+    return blocked_file(task_id).exists()
+
+
+def totals(usage: Dict, now: Optional[float] = None) -> Dict:
+    """TaskOutcome-style totals: tokens_used and duration_ms with their budgets"""
+    now = time.time() if now is None else now
+    return {
+        'tokens_used': usage['tokens_used'],
+        'duration_ms': int((now - usage['started_at']) * 1000),
+        'tool_calls': usage['tool_calls'],
+        'max_tokens': usage.get('max_tokens'),
+        'timeout_ms': usage.get('timeout_ms'),
+    }
+
+
+def efficiency_score(usage: Optional[Dict], now: Optional[float] = None) -> float:
+    """
+    Efficiency component (-1 to +1) from the larger of the token and time
+    fractions: full marks up to half the budget, 0 at the budget, -1 at 1.5x.
+    Tasks without a counter or budget score neutral.
+    """
+    if not usage:
+        return 0.0
+    used = [f for f in fractions(usage, now).values() if f is not None]
+    if not used:
+        return 0.0
+    fraction = max(used)
+    if fraction <= 0.5:
+        return 1.0
+    if fraction <= 1.0:
+        return round(1.0 - 2 * (fraction - 0.5), 4)
+    return round(max(-1.0, -2 * (fraction - 1.0)), 4)
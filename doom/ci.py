@@ -0,0 +1,240 @@
+"""
+CI status for the evaluator's ci_pipeline_status component
+
+Statuses are cached per commit. A completed run is final for its commit, so
+it is fetched once and then answered from the cache by every later
+evaluation. A pending status (or a failed request) is polled again only
+after `next_poll_at`: the delay starts at `ttl_seconds` and doubles with
+each poll up to `max_backoff_seconds`, and a Retry-After or exhausted
+rate-limit response pushes it further out. Re-polls send the cached ETag,
+so an unchanged status costs a 304, which GitHub does not count against the
+rate limit.
+
+Providers (providers.ci.type):
+    github-actions   GitHub REST API, workflow runs for the commit (needs GITHUB_TOKEN)
+    http             GET <url>/<sha> returning {status, conclusion}; a local stand-in
+    file             <path>/<sha>.json, or one JSON file mapping sha (or "default") to a status
+
+Layout under .claude/ci/:
+    <sha>.json    {commit, provider, status, conclusion, etag, checked_at, next_poll_at, polls[, error]}
+"""
+
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from doom import paths
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_BACKOFF = 900
+DEFAULT_TIMEOUT = 10
+
+# Run conclusions that do not fail a commit
+PASSING = ('success', 'skipped', 'neutral')
+
+
+class CIError(Exception):
+    """A status request failed; retry_after is the server's requested delay in seconds"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def ci_dir() -> Path:
+    return paths.claude_dir() / 'ci'
+
+
+def cache_file(commit: str) -> Path:
+    return ci_dir() / f'{commit}.json'
+
+
+def github_slug(url: Optional[str]) -> Optional[str]:
+    """owner/repo from an https or ssh GitHub remote URL"""
+    match = re.search(r'github\.com[:/]+([^/]+/[^/]+?)(?:\.git)?/*$', url or '')
+    return match.group(1) if match else None
+
+
+def combine(runs: List[Dict], required: Optional[List[str]] = None) -> Dict:
+    """One status for a commit from its workflow runs, limited to the required ones when any match"""
+    if required:
+        runs = [r for r in runs if r.get('name') in required] or runs
+    if not runs:
+        return {'status': 'queued', 'conclusion': None}
+    if any(r.get('status') != 'completed' for r in runs):
+        return {'status': 'in_progress', 'conclusion': None}
+    failed = [r.get('conclusion') for r in runs if r.get('conclusion') not in PASSING]
+    return {'status': 'completed', 'conclusion': failed[0] if failed else 'success'}
+
+
+def _retry_after(headers) -> Optional[float]:
+    """Delay requested by Retry-After or an exhausted GitHub rate limit"""
+    value = headers.get('Retry-After') if headers else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    if headers and headers.get('X-RateLimit-Remaining') == '0' and headers.get('X-RateLimit-Reset'):
+        try:
+            return max(0.0, float(headers['X-RateLimit-Reset']) - time.time())
+        except ValueError:
+            pass
+    return None
+
+
+class HttpProvider:
+    """GET <url>/<sha> answering {status, conclusion}, with conditional requests"""
+
+    name = 'http'
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT):
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+
+    def url_for(self, commit: str) -> str:
+        return f'{self.url}/{commit}'
+
+    def parse(self, body: Dict) -> Dict:
+        return {'status': body.get('status'), 'conclusion': body.get('conclusion')}
+
+    def fetch(self, commit: str, etag: Optional[str] = None) -> Tuple[Optional[Dict], Optional[str]]:
+        """(status, etag); status is None when the server answered 304 Not Modified"""
+        request = urllib.request.Request(self.url_for(commit), headers={'Accept': 'application/json'})
+        if etag:
+            request.add_header('If-None-Match', etag)
+        if self.token:
+            request.add_header('Authorization', f'Bearer {self.token}')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return self.parse(json.loads(response.read())), response.headers.get('ETag')
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None, e.headers.get('ETag') or etag
+            retry_after = _retry_after(e.headers) if e.code in (403, 429) else None
+            raise CIError(f'{self.name} returned HTTP {e.code}', retry_after)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise CIError(f'{self.name} request failed: {e}')
+
+
+class GitHubActionsProvider(HttpProvider):
+    """Workflow runs for the commit from the GitHub REST API"""
+
+    name = 'github-actions'
+
+    def __init__(self, slug: str, token: str, api_url: str = 'https://api.github.com',
+                 required: Optional[List[str]] = None, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__(api_url, token, timeout)
+        self.slug = slug
+        self.required = required or []
+
+    def url_for(self, commit: str) -> str:
+        return f'{self.url}/repos/{self.slug}/actions/runs?head_sha={commit}&per_page=100'
+
+    def parse(self, body: Dict) -> Dict:
+        return combine(body.get('workflow_runs') or [], self.required)
+
+
+class FileProvider:
+    """Statuses from local files; the file's size and mtime stand in for an ETag"""
+
+    name = 'file'
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def fetch(self, commit: str, etag: Optional[str] = None) -> Tuple[Optional[Dict], Optional[str]]:
+        source = self.path / f'{commit}.json' if self.path.is_dir() else self.path
+        try:
+            stat = source.stat()
+            tag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+            if tag == etag:
+                return None, etag
+            with open(source) as f:
+                body = json.load(f)
+        except FileNotFoundError:
+            return {'status': 'queued', 'conclusion': None}, None
+        except (OSError, ValueError) as e:
+            raise CIError(f'cannot read {source}: {e}')
+        if source == self.path and 'status' not in body:
+            body = body.get(commit) or body.get('default') or {'status': 'queued'}
+        return {'status': body.get('status'), 'conclusion': body.get('conclusion')}, tag
+
+
+def make_provider(config: Dict, repository=None):
+    """Provider for providers.ci, or None when it cannot be queried"""
+    kind = config.get('type', 'github-actions')
+    timeout = config.get('timeout_seconds', DEFAULT_TIMEOUT)
+    if kind == 'file':
+        return FileProvider(paths.project_root() / config.get('path', '.claude/ci-status'))
+    if kind == 'http':
+        return HttpProvider(config['url'], os.environ.get(config.get('token_env', ''), None), timeout)
+    if kind == 'github-actions':
+        token = os.environ.get('GITHUB_TOKEN') or os.environ.get('GH_TOKEN')
+        slug = config.get('repository') or github_slug(repository.remote_url() if repository else None)
+        if not token or not slug:
+            return None
+        return GitHubActionsProvider(slug, token, config.get('api_url', 'https://api.github.com'),
+                                     config.get('required_checks'), timeout)
+    return None
+
+
+def load(commit: str) -> Optional[Dict]:
+    try:
+        with open(cache_file(commit)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save(entry: Dict) -> None:
+    path = cache_file(entry['commit'])
+    paths.ensure_dir(path.parent)
+    tmp = path.parent / f'.{path.name}.{os.getpid()}'
+    with open(tmp, 'w') as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp, path)
+
+
+def status(commit: str, config: Optional[Dict] = None, repository=None, refresh: bool = False) -> Optional[Dict]:
+    """
+    CI status of a commit, polling the provider only when the cached entry
+    is pending and due (or refresh is set). None when no provider is usable.
+    """
+    config = config or {}
+    cached = load(commit)
+    now = time.time()
+    if cached and not refresh and (cached['status'] == 'completed' or now < cached.get('next_poll_at', 0)):
+        return dict(cached, cached=True)
+    provider = make_provider(config, repository)
+    if provider is None:
+        return None
+
+    entry = dict(cached or {'commit': commit, 'status': 'unknown', 'conclusion': None, 'etag': None, 'polls': 0})
+    entry.update(provider=provider.name, polls=entry.get('polls', 0) + 1, checked_at=datetime.utcnow().isoformat())
+    entry.pop('error', None)
+    retry_after = None
+    try:
+        fetched, entry['etag'] = provider.fetch(commit, entry.get('etag'))
+        if fetched is not None:
+            entry.update(fetched)
+    except CIError as e:
+        entry['error'] = str(e)
+        retry_after = e.retry_after
+
+    delay = min(config.get('ttl_seconds', DEFAULT_TTL) * 2 ** (entry['polls'] - 1),
+                config.get('max_backoff_seconds', DEFAULT_MAX_BACKOFF))
+    entry['next_poll_at'] = now + max(delay, retry_after or 0)
+    _save(entry)
+    return dict(entry, cached=False)
@@ -0,0 +1,841 @@
+#!/usr/bin/env python3
+"""
+doom command-line interface
+
+Every command runs in-process against the doom library; nothing here shells
+out to other doom scripts.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+
+def cmd_events(args) -> int:
+    """Record a batch of newline-delimited JSON events"""
+    from doom import events
+
+    stream = open(args.file) if args.file else sys.stdin
+    try:
+        summary = events.process_batch(events.read_ndjson(stream))
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.file:
+            stream.close()
+
+    print(json.dumps(summary) if args.json else
+          f"Recorded {summary['recorded']} events, ran {len(summary['evaluations'])} evaluations")
+    return 0
+
+
+def cmd_evaluate(args) -> int:
+    """Evaluate a task in-process and finish it as Stop would: scoreboard, metadata and counters"""
+    from doom import evaluate
+    from doom.hooks.stop import finish_task
+
+    result = evaluate(args.task_id, args.agent_name, args.task_status)
+    finish_task(args.task_id, args.agent_name, None, result)
+    print(json.dumps(result) if args.json else f"{args.task_id}: reward={result['reward']:.2f}")
+    return 0
+
+
+def cmd_sprint(args) -> int:
+    """Start or end a sprint"""
+    from doom import sprints
+
+    try:
+        if args.action == 'start':
+            sprint = sprints.start_sprint(args.name, args.days)
+            print(f"Sprint '{sprint['name']}' started ({sprint['duration_days']} days)")
+        else:
+            summary = sprints.end_sprint()
+            print(f"Sprint '{summary['name']}' ended: {summary['closed']}/{summary['opened']} tasks closed, "
+                  f"velocity {summary['velocity']:.2f}/day, avg reward {summary['avg_reward']:.2f}")
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_burndown(args) -> int:
+    """Show the active sprint's burndown from its counters"""
+    from doom import sprints
+
+    summary = sprints.burndown()
+    if not summary:
+        print("No active sprint")
+        return 1
+    if args.json:
+        print(json.dumps(summary))
+        return 0
+
+    print(f"Sprint Burndown: {summary['name']}")
+    print(f"{'Date':<12} {'Remaining':>9} {'Ideal':>7} {'Closed':>7}")
+    for point in summary['burndown']:
+        print(f"{point['date']:<12} {point['remaining']:>9} {point['ideal']:>7.1f} {point['closed']:>7}")
+    print(f"\nVelocity: {summary['velocity']:.2f} tasks/day, total reward {summary['total_reward']:.2f}")
+    for task_type, bucket in sorted(summary['by_type'].items()):
+        print(f"  {task_type:<12} {bucket['closed']}/{bucket['opened']} closed, reward {bucket['reward']:.2f}")
+    return 0
+
+
+def cmd_velocity(args) -> int:
+    """Show velocity of recently closed sprints"""
+    from doom import listing, sprints
+
+    page = _page(args, lambda after: listing.indexed(sprints.iter_history(), after), args.last)
+    if _format(args) == 'ndjson':
+        return listing.write_ndjson(page)
+    history = _rows(page)
+    if args.json:
+        print(json.dumps(history))
+        return 0
+    if not history:
+        print("No completed sprints")
+        return 0
+    for summary in history:
+        print(f"{summary['name']:<24} closed {summary['closed']:>4}  velocity {summary['velocity']:>6.2f}/day  "
+              f"avg reward {summary['avg_reward']:.2f}")
+    return 0
+
+
+def _filters(args) -> dict:
+    return {field: value for field, value in (('agent_name', args.agent), ('task_id', args.task)) if value}
+
+
+def _format(args) -> str:
+    return 'json' if getattr(args, 'json', False) else args.format
+
+
+def _page(args, pairs_after, default_limit: Optional[int]):
+    """
+    A page of a listing: pairs_after(position) yields (position, row) pairs
+    after the cursor's position. Without --limit, table and JSON output keep
+    the command's usual count and NDJSON streams every row.
+    """
+    from doom import listing
+
+    after = listing.decode_cursor(args.cursor, args.command) if args.cursor else None
+    limit = args.limit if args.limit is not None else None if _format(args) == 'ndjson' else default_limit
+    return listing.Page(args.command, pairs_after(after), limit)
+
+
+def _rows(page) -> List[Dict]:
+    """The rows of a table or JSON page; the next cursor goes to stderr"""
+    from doom import listing
+
+    rows = page.rows()
+    listing.report_cursor(page)
+    return rows
+
+
+def cmd_scores(args) -> int:
+    """Show the newest evaluations, optionally for one agent or task"""
+    from doom import events, listing, paths
+
+    page = _page(args, lambda after: events.scan_reverse(paths.scoreboard_dir() / 'rlvr.jsonl', after,
+                                                         **_filters(args)), args.last)
+    if _format(args) == 'ndjson':
+        return listing.write_ndjson(page)
+    rows = _rows(page)
+    if args.json:
+        print(json.dumps(rows))
+        return 0
+    if not rows:
+        print("No evaluations found")
+        return 0
+    print(f"{'Timestamp':<20} {'Task':<28} {'Agent':<28} {'Status':<10} {'Reward':>7}")
+    for row in rows:
+        print(f"{row.get('timestamp', '')[:19]:<20} {row.get('task_id', ''):<28} {row.get('agent_name', ''):<28} "
+              f"{row.get('task_status', ''):<10} {row.get('reward', 0.0):>7.2f}")
+    return 0
+
+
+def cmd_logs(args) -> int:
+    """Show the newest recorded events, oldest of them first; NDJSON streams newest first"""
+    from doom import events, listing
+
+    page = _page(args, lambda after: events.scan_reverse(events.events_file(), after, **_filters(args)), args.tail)
+    if _format(args) == 'ndjson':
+        return listing.write_ndjson(page)
+    rows = _rows(page)[::-1]
+    if args.json:
+        print(json.dumps(rows))
+        return 0
+    for row in rows:
+        details = {k: v for k, v in row.items() if k not in ('timestamp', 'event', 'task_id', 'agent_name')}
+        print(f"{row.get('timestamp', '')[:19]} {row['event']:<20} {row.get('task_id', '-'):<24} "
+              f"{row.get('agent_name', '-'):<24} {json.dumps(details) if details else ''}".rstrip())
+    return 0
+
+
+def cmd_status(args) -> int:
+    """Show the active task and queued evaluations, or one task with its pending or final reward"""
+    from doom import archive, listing, paths, spool
+
+    if args.task:
+        task = archive.load_metadata(args.task)
+        if task is None:
+            print(f"ERROR: unknown task {args.task}", file=sys.stderr)
+            return 1
+        task['evaluation'] = spool.state_of(args.task) or task.get('evaluation') or \
+            ('final' if task.get('reward') is not None else 'none')
+        if args.json:
+            print(json.dumps(task))
+            return 0
+        reward = f"{task['reward']:.2f}" if task.get('reward') is not None else '-'
+        print(f"{args.task}: {task.get('status', 'unknown')}, agent {task.get('agent_name', '-')}, "
+              f"reward {reward} ({task['evaluation']})")
+        if task.get('prompt_tokens'):
+            report = task['prompt_tokens']
+            trimmed = ', '.join(f"{n} {name}" for name, n in report['trimmed'].items()) or 'nothing'
+            print(f"Prompt: {report['tokens']} of {report['budget']} tokens, {report['saved_tokens']} saved "
+                  f"({report['deduplicated']} repeats removed, trimmed {trimmed})")
+        return 0
+
+    queued = spool.entries()
+    ndjson = _format(args) == 'ndjson'
+    page = _page(args, lambda after: _status_pairs(queued, after, ndjson), args.last)
+    if ndjson:
+        return listing.write_ndjson(page)
+    recent = _rows(page)
+
+    active = None
+    try:
+        with open(paths.current_task_file()) as f:
+            active = json.load(f)
+    except (OSError, ValueError):
+        pass
+    if args.json:
+        print(json.dumps({'active_task': active, 'pending': [e for e in queued if e['state'] != 'failed'],
+                          'failed': [e for e in queued if e['state'] == 'failed'], 'recent': recent}))
+        return 0
+
+    print(f"Active task: {active['task_id']} ({active.get('agent_name', '-')})" if active else "Active task: none")
+    counts = {state: sum(e['state'] == state for e in queued) for state in ('pending', 'running', 'failed')}
+    print(f"Evaluations: {counts['pending']} pending, {counts['running']} running, {counts['failed']} failed")
+    for entry in queued:
+        print(f"  {entry['state']:<8} {entry['task_id']:<28} {entry['agent_name']:<28} "
+              f"queued {entry['queued_at'][:19]}")
+    for row in recent:
+        print(f"  {'final':<8} {row.get('task_id', ''):<28} {row.get('agent_name', ''):<28} "
+              f"reward {row.get('reward', 0.0):.2f}")
+    return 0
+
+
+def _status_pairs(queued: List[Dict], after, include_queue: bool):
+    """Queued evaluations, then final rewards newest first, resuming after `after`"""
+    from doom import events, paths
+
+    if include_queue and (after is None or after[0] == 'queue'):
+        start = 0 if after is None else after[1] + 1
+        for i in range(start, len(queued)):
+            yield ['queue', i], queued[i]
+    end = after[1] if after and after[0] == 'scores' else None
+    for offset, row in events.scan_reverse(paths.scoreboard_dir() / 'rlvr.jsonl', end):
+        yield ['scores', offset], dict(row, state='final') if include_queue else row
+
+
+def cmd_drain(args) -> int:
+    """Evaluate every deferred evaluation in the foreground"""
+    from doom import spool
+
+    counts = spool.drain(args.workers)
+    if counts['busy']:
+        print("Another drainer is running", file=sys.stderr)
+        return 1
+    print(f"Evaluated {counts['evaluated']} deferred tasks, {counts['failed']} failed")
+    return 1 if counts['failed'] else 0
+
+
+def cmd_archive(args) -> int:
+    """Pack finished task directories into monthly archive segments"""
+    from doom import archive
+
+    summary = archive.pack(args.older_than, dry_run=args.dry_run)
+    if args.json:
+        print(json.dumps(dict(summary, archive=archive.stats())))
+        return 0
+    verb = 'Would pack' if args.dry_run else 'Packed'
+    print(f"{verb} {summary['archived']} tasks ({summary['files']} files, {summary['bytes']} bytes)"
+          + (f" into {', '.join(summary['segments'])}" if summary['segments'] else ''))
+    stats = archive.stats()
+    print(f"Archive: {stats['tasks']} tasks in {len(stats['segments'])} segments, "
+          f"{sum(stats['segments'].values())} bytes")
+    return 0
+
+
+def cmd_leaderboard(args) -> int:
+    """Show a ranked leaderboard for one metric and period, with rewards still pending"""
+    from doom import leaderboard, listing, paths, spool
+
+    try:
+        if args.rebuild:
+            rlvr = paths.scoreboard_dir() / 'rlvr.jsonl'
+            rows = []
+            if rlvr.exists():
+                with open(rlvr) as f:
+                    rows = [json.loads(line) for line in f if line.strip()]
+            leaderboard.rebuild(rows)
+        board = leaderboard.get_board(args.metric, args.period)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    page = _page(args, lambda after: listing.indexed(board['entries'], after), None)
+    if _format(args) == 'ndjson':
+        return listing.write_ndjson(page)
+    board = dict(board, entries=_rows(page))
+    pending = {}
+    for entry in spool.entries():
+        if entry['state'] != 'failed':
+            pending[entry['agent_name']] = pending.get(entry['agent_name'], 0) + 1
+
+    if args.json:
+        print(json.dumps(dict(board, pending=pending)))
+        return 0
+    if not board['entries'] and not pending:
+        print("No leaderboard data")
+        return 0
+
+    arrows = {'up': '↑', 'down': '↓', 'stable': '→'}
+    print(f"Leaderboard: {board['metric']} ({board['period']})")
+    print(f"{'Rank':<5} {'Agent':<28} {'Tier':<10} {'Value':>8} {'Tasks':>6}  Trend")
+    for entry in board['entries']:
+        value = f"{entry['value']:.0f}" if board['metric'] == 'tasks' else f"{entry['value']:.2f}"
+        print(f"{entry['rank']:<5} {entry['agent_name']:<28} {entry['tier']:<10} {value:>8} "
+              f"{entry['total_tasks']:>6}  {arrows[entry['trend']]}")
+    if pending:
+        print("Pending rewards: " + ', '.join(f"{agent} ({n})" for agent, n in sorted(pending.items())))
+    return 0
+
+
+def cmd_feedback(args) -> int:
+    """Show the top deduplicated lessons for an agent and/or task type"""
+    from doom import feedback, listing
+
+    if args.rebuild:
+        summary = feedback.rebuild()
+        print(f"Indexed {summary['suggestions']} suggestions into {summary['clusters']} clusters")
+    page = _page(args, lambda after: listing.indexed(feedback.top_lessons(args.agent, args.type, None), after),
+                 args.top)
+    if _format(args) == 'ndjson':
+        return listing.write_ndjson(page)
+    lessons = _rows(page)
+    if args.json:
+        print(json.dumps(lessons))
+        return 0
+    if not lessons:
+        print("No feedback recorded")
+        return 0
+    for lesson in lessons:
+        print(f"[{lesson['area']}] {lesson['text']}  (x{lesson['count']}, last {lesson['last_seen'][:10]})")
+    return 0
+
+
+def cmd_similar(args) -> int:
+    """Show the past tasks most similar to a prompt"""
+    from doom import listing, similar
+
+    if args.rebuild:
+        summary = similar.rebuild()
+        print(f"Indexed {summary['tasks']} tasks into {summary['shards']} posting shards")
+    if not args.text:
+        return 0
+    page = _page(args, lambda after: listing.indexed(similar.iter_matches(' '.join(args.text)), after), args.top)
+    if _format(args) == 'ndjson':
+        return listing.write_ndjson(page)
+    matches = _rows(page)
+    if args.json:
+        print(json.dumps(matches))
+        return 0
+    if not matches:
+        print("No similar tasks")
+        return 0
+    for match in matches:
+        reward = f"{match['reward']:.2f}" if match.get('reward') is not None else '-'
+        print(f"{match['score']:>6.2f}  {match['task_id']:<28} {match.get('agent_name') or '-':<24} "
+              f"reward {reward}  {match['summary']}")
+        for text in match.get('feedback', []):
+            print(f"        - {text}")
+    return 0
+
+
+def cmd_templates(args) -> int:
+    """Report optimization template effectiveness or compare two versions"""
+    from doom import listing, templates
+
+    if args.rebuild:
+        counts = templates.rebuild()
+        print(f"Rebuilt {counts['series']} series from {counts['rows']} outcomes")
+
+    if args.compare:
+        if not args.template:
+            print("ERROR: --compare needs --template", file=sys.stderr)
+            return 1
+        result = templates.compare(args.template, args.compare[0], args.compare[1], args.type)
+        if args.json:
+            print(json.dumps(result))
+            return 0
+        print(f"Template {result['template_id']} ({result['task_type'] or 'all task types'})")
+        for side in ('a', 'b'):
+            print(f"  v{result[side]['version']:<6} n={result[side]['n']:<5} mean reward {result[side]['mean']:.3f}")
+        if result['p_value'] is None:
+            print("  Not enough data (need at least 2 outcomes per version)")
+        else:
+            verdict = 'significant' if result['significant'] else 'not significant'
+            print(f"  difference {result['difference']:+.3f}, t={result['t']}, df={result['df']}, "
+                  f"p={result['p_value']:.4f} ({verdict})")
+        return 0
+
+    page = _page(args, lambda after: listing.indexed(templates.summary(args.type, args.template), after), None)
+    if _format(args) == 'ndjson':
+        return listing.write_ndjson(page)
+    rows = _rows(page)
+    if args.json:
+        print(json.dumps(rows))
+        return 0
+    if not rows:
+        print("No template outcomes recorded")
+        return 0
+    print(f"{'Template':<14} {'Ver':<5} {'Task type':<12} {'N':>5} {'Mean':>7} {'Stddev':>7} {'Min':>6} {'Max':>6}")
+    for row in rows:
+        print(f"{row['template_id']:<14} {row['version']:<5} {row['task_type']:<12} {row['n']:>5} "
+              f"{row['mean']:>7.3f} {row['stddev']:>7.3f} {row['min']:>6.2f} {row['max']:>6.2f}")
+    return 0
+
+
+def cmd_agents(args) -> int:
+    """List the defined agents, or the built-in roster when none are defined"""
+    from doom import agents, listing
+
+    page = _page(args, lambda after: listing.indexed(agents.load_agents(), after), None)
+    if _format(args) == 'ndjson':
+        return listing.write_ndjson(page)
+    rows = _rows(page)
+    if args.json:
+        print(json.dumps(rows))
+        return 0
+    print(f"{'Agent':<28} {'Tier':<10} {'Context':>8}  Specializations")
+    for agent in rows:
+        context = agent['max_context_tokens'] or '-'
+        print(f"{agent['name']:<28} {agent['tier']:<10} {context:>8}  {', '.join(agent['specializations']) or '-'}")
+    return 0
+
+
+def cmd_metrics(args) -> int:
+    """Print the metrics exposition or write it for the textfile collector"""
+    from doom import metrics
+
+    if args.write or args.output:
+        print(f"Wrote {metrics.write_textfile(args.output)}")
+    else:
+        sys.stdout.write(metrics.render())
+    return 0
+
+
+def cmd_resources(args) -> int:
+    """Rank hooks and evaluator components by CPU time and peak memory"""
+    from doom import events, listing, resources
+
+    filters = {'scope': args.scope} if args.scope else {}
+    ranked = resources.report(events.tail(resources.resources_file(), args.last, **filters))
+    page = _page(args, lambda after: listing.indexed(ranked, after), None if args.json else args.top)
+    if _format(args) == 'ndjson':
+        return listing.write_ndjson(page)
+    ranked = _rows(page)
+    if args.json:
+        print(json.dumps(ranked))
+        return 0
+    if not ranked:
+        print("No resource measurements recorded")
+        return 0
+    print(f"{'Scope':<10} {'Name':<26} {'Runs':>5} {'CPU total':>10} {'CPU mean':>9} {'Peak RSS':>10} "
+          f"{'I/O':>10} {'Killed':>6}")
+    for row in ranked:
+        print(f"{row['scope']:<10} {row['name']:<26} {row['runs']:>5} {row['cpu_seconds']:>9.2f}s "
+              f"{row['cpu_mean']:>8.3f}s {row['max_rss_kb'] / 1024:>7.1f} MB {row['io_bytes'] / 1048576:>7.1f} MB "
+              f"{row['killed']:>6}")
+    return 0
+
+
+def cmd_advisories(args) -> int:
+    """Ingest an offline OSV snapshot, show it, or scan the project's lockfiles"""
+    from doom import advisories
+
+    if args.action == 'ingest':
+        missing = [source for source in args.sources if not os.path.exists(source)]
+        if missing:
+            print(f"ERROR: not found: {', '.join(missing)}", file=sys.stderr)
+            return 1
+        result = advisories.ingest(args.sources)
+    elif args.action == 'status':
+        result = advisories.snapshot()
+    else:
+        result = advisories.scan()
+    if result is None:
+        print("ERROR: no advisory snapshot; run `doom advisories ingest <osv dump>`", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(result))
+    elif args.action in ('ingest', 'status'):
+        print(f"Snapshot {result['snapshot_id']}: {result['advisories']} advisories for {result['packages']} "
+              f"packages ({', '.join(result['ecosystems'])}), ingested {result['ingested_at'][:19]}")
+    else:
+        cached = ' (cached)' if result['cached'] else ''
+        print(f"{result['packages']} locked packages in {', '.join(result['lockfiles']) or 'no lockfiles'}: "
+              f"{len(result['vulnerabilities'])} vulnerabilities{cached}")
+        for vuln in sorted(result['vulnerabilities'], key=lambda v: -advisories.SEVERITIES.index(v['severity'])):
+            print(f"  {vuln['severity']:<9} {vuln['id']:<22} {vuln['package']}@{vuln['version']}  {vuln['summary']}")
+    return 0
+
+
+def cmd_ci(args) -> int:
+    """Show the cached CI status of a commit, polling the provider when it is due"""
+    from doom import ci, paths, repo
+    from doom.evaluator import load_config
+
+    config = load_config().get('providers', {}).get('ci', {})
+    with repo.Repository(str(paths.project_root())) as repository:
+        commit = args.commit or repository.head()
+        state = ci.status(commit, config, repository, refresh=args.refresh) if commit else None
+    if state is None:
+        print(f"ERROR: CI provider {config.get('type', 'github-actions')} is not configured or has no "
+              f"credentials", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(state))
+        return 0
+    result = state['conclusion'] if state['status'] == 'completed' else state['status']
+    source = 'cached' if state['cached'] else f"fetched from {state['provider']}"
+    print(f"{state['commit'][:12]}: {result} ({source}, {state['polls']} polls)")
+    if state.get('error'):
+        print(f"  last poll failed: {state['error']}")
+    if state['status'] != 'completed':
+        print(f"  next poll in {max(0, state['next_poll_at'] - time.time()):.0f}s")
+    return 0
+
+
+def cmd_trace(args) -> int:
+    """Export a task's hook, tool and evaluator spans as Chrome trace JSON"""
+    from doom import trace
+
+    document = trace.export(args.task_id)
+    if len(document['traceEvents']) == 1 + len(trace.TRACK_NAMES):
+        print(f"ERROR: no trace recorded for task {args.task_id}", file=sys.stderr)
+        return 1
+    if not args.output:
+        print(json.dumps(document))
+        return 0
+    with open(args.output, 'w') as f:
+        json.dump(document, f)
+    totals = ', '.join(f"{name} {ms:.0f} ms" for name, ms in trace.summary(document).items())
+    print(f"Wrote {args.output} ({totals}); open it in ui.perfetto.dev or chrome://tracing")
+    return 0
+
+
+def cmd_fit_weights(args) -> int:
+    """Fit reward weights from evaluation history and write a proposed config"""
+    from doom import weights
+
+    try:
+        report = weights.fit_weights(args.input, args.target, args.folds, args.chunk_size, args.l2,
+                                     args.format, args.output)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(report))
+        return 0
+    print(f"Fitted {report['rows']} evaluations against '{report['target']}' ({report['backend']} backend)")
+    if report['skipped_rows']:
+        missing = ', '.join(f"{name} missing in {count}" for name, count in sorted(report['skipped'].items()))
+        print(f"Skipped {report['skipped_rows']} rows: {missing}")
+    print(f"{'Component':<24} {'Current':>8} {'Proposed':>9}")
+    for name, weight in report['weights'].items():
+        print(f"{name:<24} {report['current_weights'].get(name, 0.0):>8.3f} {weight:>9.3f}")
+    if report['cv_mse'] is not None:
+        print(f"\nTrain MSE {report['train_mse']:.4f}, {report['cv_folds']}-fold CV MSE {report['cv_mse']:.4f}")
+    print(f"Proposed config written to {report['output']}")
+    return 0
+
+
+def cmd_coverage(args) -> int:
+    """Record a coverage report into the store or compare a revision with its baseline"""
+    from doom import coverage, paths, repo
+
+    root = str(paths.project_root())
+    with repo.Repository(root) as repository:
+        if not repository.is_repository:
+            print(f"ERROR: {root} is not a git work tree", file=sys.stderr)
+            return 1
+        try:
+            if args.action == 'record':
+                report_path = args.report or coverage.find_report(root)
+                if not report_path:
+                    print("ERROR: no coverage report found; pass --report", file=sys.stderr)
+                    return 1
+                summary = coverage.record(coverage.load_report(report_path, root), repository, root)
+                summary.pop('snapshot')
+                result = summary
+            elif args.base:
+                report_path = args.report or coverage.find_report(root)
+                if not report_path:
+                    print("ERROR: no coverage report found; pass --report", file=sys.stderr)
+                    return 1
+                current = coverage.record(coverage.load_report(report_path, root), repository, root)
+                result = coverage.delta(repository, args.base, current)
+            else:
+                result = coverage.load_tree_coverage(repository, args.rev)
+        except (OSError, ValueError, repo.GitError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+
+    if args.json:
+        print(json.dumps(result))
+        return 0 if result else 1
+    if result is None:
+        print("No stored coverage for that revision" if args.action == 'show' and not args.base
+              else "Baseline coverage unknown for some changed files")
+        return 1
+    if args.action == 'record':
+        stored = f"stored for tree {result['tree'][:12]}" if result['tree'] else "work tree differs from HEAD; bitmaps only"
+        print(f"Recorded {result['files']} files ({result['bitmaps_written']} new bitmaps), "
+              f"{_pct(result['percent'])} line coverage; {stored}")
+    elif args.base:
+        print(f"Coverage {_pct(result['before'])} at {result['base'][:12]} -> {_pct(result['after'])} now")
+        for entry in result['changed_files']:
+            print(f"  {entry['path']:<48} {_pct(entry['before']):>7} -> {_pct(entry['after']):>7}")
+    else:
+        print(f"{result['commit'][:12]}: {_pct(result['percent'])} of {result['executable']} lines "
+              f"in {result['files']} files (recorded {result['recorded_at']})")
+    return 0
+
+
+def _pct(value) -> str:
+    return '-' if value is None else f"{value * 100:.1f}%"
+
+
+def cmd_serve(args) -> int:
+    """Run the local REST API"""
+    from doom import api
+
+    return api.main(['--host', args.host, '--port', str(args.port), '--poll-interval', str(args.poll_interval)])
+
+
+def _listing_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--format', default='table', choices=['table', 'json', 'ndjson'],
+                        help='ndjson streams one row per line (--json is --format json)')
+    parser.add_argument('--limit', type=int, help='Rows per page (default: all rows for ndjson)')
+    parser.add_argument('--cursor', help='Continue after the page that printed this cursor')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='doom', description='Doom-RLVR command-line interface')
+    subparsers = parser.add_subparsers(dest='command', metavar='<command>')
+
+    events_parser = subparsers.add_parser('events', help='Record a batch of NDJSON events (stdin or --file)')
+    events_parser.add_argument('--file', help='Read events from this file instead of stdin')
+    events_parser.add_argument('--json', action='store_true', help='Print the batch summary as JSON')
+    events_parser.set_defaults(func=cmd_events)
+
+    evaluate_parser = subparsers.add_parser('evaluate', help='Run RLVR evaluation for a task')
+    evaluate_parser.add_argument('task_id')
+    evaluate_parser.add_argument('agent_name')
+    evaluate_parser.add_argument('--task-status', default='completed',
+                                 choices=['completed', 'failed', 'timeout'])
+    evaluate_parser.add_argument('--json', action='store_true', help='Print the full evaluation as JSON')
+    evaluate_parser.set_defaults(func=cmd_evaluate)
+
+    sprint_parser = subparsers.add_parser('sprint', help='Start or end a sprint')
+    sprint_actions = sprint_parser.add_subparsers(dest='action', required=True)
+    start_parser = sprint_actions.add_parser('start', help='Start a new sprint')
+    start_parser.add_argument('name')
+    start_parser.add_argument('--days', type=int, default=14, help='Sprint length in days (default: 14)')
+    sprint_actions.add_parser('end', help='Freeze and close the active sprint')
+    sprint_parser.set_defaults(func=cmd_sprint)
+
+    burndown_parser = subparsers.add_parser('burndown', help='Show the active sprint burndown')
+    burndown_parser.add_argument('--json', action='store_true')
+    burndown_parser.set_defaults(func=cmd_burndown)
+
+    velocity_parser = subparsers.add_parser('velocity', help='Show velocity of closed sprints')
+    velocity_parser.add_argument('--last', type=int, default=5)
+    velocity_parser.add_argument('--json', action='store_true')
+    _listing_arguments(velocity_parser)
+    velocity_parser.set_defaults(func=cmd_velocity)
+
+    scores_parser = subparsers.add_parser('scores', help='Show the newest evaluation scores')
+    scores_parser.add_argument('--agent', help='Only this agent')
+    scores_parser.add_argument('--task', help='Only this task')
+    scores_parser.add_argument('--last', type=int, default=10, help='Number of evaluations (default: 10)')
+    scores_parser.add_argument('--json', action='store_true')
+    _listing_arguments(scores_parser)
+    scores_parser.set_defaults(func=cmd_scores)
+
+    logs_parser = subparsers.add_parser('logs', help='Show the newest recorded events')
+    logs_parser.add_argument('--tail', type=int, default=20, help='Number of events (default: 20)')
+    logs_parser.add_argument('--agent', help='Only this agent')
+    logs_parser.add_argument('--task', help='Only this task')
+    logs_parser.add_argument('--json', action='store_true')
+    _listing_arguments(logs_parser)
+    logs_parser.set_defaults(func=cmd_logs)
+
+    status_parser = subparsers.add_parser('status', help='Active task, pending evaluations and recent rewards')
+    status_parser.add_argument('--task', help='Show one task and whether its reward is pending or final')
+    status_parser.add_argument('--last', type=int, default=5, help='Number of recent rewards (default: 5)')
+    status_parser.add_argument('--json', action='store_true')
+    _listing_arguments(status_parser)
+    status_parser.set_defaults(func=cmd_status)
+
+    drain_parser = subparsers.add_parser('drain', help='Run deferred evaluations in the foreground')
+    drain_parser.add_argument('--workers', type=int, help='Parallel evaluations (default: one per core)')
+    drain_parser.set_defaults(func=cmd_drain)
+
+    archive_parser = subparsers.add_parser('archive', help='Pack finished tasks into monthly archive segments')
+    archive_parser.add_argument('--older-than', type=float, metavar='DAYS',
+                                help='Only tasks finished this many days ago (default: archive.older_than_days)')
+    archive_parser.add_argument('--dry-run', action='store_true', help='Report what would be packed')
+    archive_parser.add_argument('--json', action='store_true')
+    archive_parser.set_defaults(func=cmd_archive)
+
+    leaderboard_parser = subparsers.add_parser('leaderboard', help='Show the agent leaderboard')
+    leaderboard_parser.add_argument('--metric', default='reward',
+                                    choices=['reward', 'tasks', 'success-rate', 'success_rate'])
+    leaderboard_parser.add_argument('--period', default='7d', choices=['24h', '7d', '30d', 'all'])
+    leaderboard_parser.add_argument('--rebuild', action='store_true',
+                                    help='Rebuild the buckets from scoreboard/rlvr.jsonl first')
+    leaderboard_parser.add_argument('--json', action='store_true')
+    _listing_arguments(leaderboard_parser)
+    leaderboard_parser.set_defaults(func=cmd_leaderboard)
+
+    feedback_parser = subparsers.add_parser('feedback', help='Show top feedback lessons')
+    feedback_parser.add_argument('--agent', help='Agent name, e.g. agent-bugfix-senior')
+    feedback_parser.add_argument('--type', help='Task type, e.g. bugfix')
+    feedback_parser.add_argument('--top', type=int, default=5)
+    feedback_parser.add_argument('--rebuild', action='store_true',
+                                 help='Rebuild the index from feedback/*_feedback.jsonl first')
+    feedback_parser.add_argument('--json', action='store_true')
+    _listing_arguments(feedback_parser)
+    feedback_parser.set_defaults(func=cmd_feedback)
+
+    similar_parser = subparsers.add_parser('similar', help='Find past tasks similar to a prompt')
+    similar_parser.add_argument('text', nargs='*', help='Prompt to match')
+    similar_parser.add_argument('--top', type=int, default=5)
+    similar_parser.add_argument('--rebuild', action='store_true',
+                                help='Rebuild the index from task metadata and feedback histories')
+    similar_parser.add_argument('--json', action='store_true')
+    _listing_arguments(similar_parser)
+    similar_parser.set_defaults(func=cmd_similar)
+
+    templates_parser = subparsers.add_parser('templates', help='Optimization template effectiveness report')
+    templates_parser.add_argument('--type', help='Only this task type')
+    templates_parser.add_argument('--template', help='Only this template id')
+    templates_parser.add_argument('--compare', nargs=2, metavar=('VERSION_A', 'VERSION_B'),
+                                  help="Welch's t-test between two versions of --template")
+    templates_parser.add_argument('--rebuild', action='store_true',
+                                  help='Recompute stats from optimization_effectiveness.jsonl first')
+    templates_parser.add_argument('--json', action='store_true')
+    _listing_arguments(templates_parser)
+    templates_parser.set_defaults(func=cmd_templates)
+
+    agents_parser = subparsers.add_parser('agents', help='List agent definitions')
+    agents_parser.add_argument('--json', action='store_true')
+    _listing_arguments(agents_parser)
+    agents_parser.set_defaults(func=cmd_agents)
+
+    metrics_parser = subparsers.add_parser('metrics', help='Hook and evaluator metrics in the Prometheus text format')
+    metrics_parser.add_argument('--write', action='store_true',
+                                help='Write the textfile (DOOM_METRICS_TEXTFILE, default .claude/metrics/doom.prom)')
+    metrics_parser.add_argument('--output', help='Write the textfile to this path instead')
+    metrics_parser.set_defaults(func=cmd_metrics)
+
+    resources_parser = subparsers.add_parser('resources', help='Heaviest hooks and evaluator components')
+    resources_parser.add_argument('--scope', choices=['hook', 'evaluator'], help='Only hooks or only components')
+    resources_parser.add_argument('--last', type=int, default=1000,
+                                  help='Measurements to aggregate, newest first (default: 1000)')
+    resources_parser.add_argument('--top', type=int, default=10)
+    resources_parser.add_argument('--json', action='store_true')
+    _listing_arguments(resources_parser)
+    resources_parser.set_defaults(func=cmd_resources)
+
+    advisories_parser = subparsers.add_parser('advisories', help='Offline OSV advisory snapshot for security scoring')
+    advisory_actions = advisories_parser.add_subparsers(dest='action', required=True)
+    ingest_parser = advisory_actions.add_parser('ingest', help='Replace the snapshot with OSV zips, files or directories')
+    ingest_parser.add_argument('sources', nargs='+')
+    snapshot_parser = advisory_actions.add_parser('status', help='Show the ingested snapshot')
+    scan_parser = advisory_actions.add_parser('scan', help="Check the project's lockfiles against the snapshot")
+    for action_parser in (ingest_parser, snapshot_parser, scan_parser):
+        action_parser.add_argument('--json', action='store_true')
+    advisories_parser.set_defaults(func=cmd_advisories)
+
+    ci_parser = subparsers.add_parser('ci', help='Cached CI status of a commit')
+    ci_parser.add_argument('--commit', help='Commit id (default HEAD)')
+    ci_parser.add_argument('--refresh', action='store_true', help='Poll the provider even if the cache is not due')
+    ci_parser.add_argument('--json', action='store_true')
+    ci_parser.set_defaults(func=cmd_ci)
+
+    trace_parser = subparsers.add_parser('trace', help="Export a task's spans in Chrome trace format")
+    trace_parser.add_argument('task_id')
+    trace_parser.add_argument('--output', '-o', help='Write the trace to this file instead of stdout')
+    trace_parser.set_defaults(func=cmd_trace)
+
+    coverage_parser = subparsers.add_parser('coverage', help='Per-commit line coverage store')
+    coverage_actions = coverage_parser.add_subparsers(dest='action', required=True)
+    record_parser = coverage_actions.add_parser('record', help='Store a coverage report for the work tree')
+    record_parser.add_argument('--report', help='lcov.info, coverage-final.json or coverage.json')
+    record_parser.add_argument('--json', action='store_true')
+    show_parser = coverage_actions.add_parser('show', help='Stored coverage of a revision, or the delta from a base')
+    show_parser.add_argument('--rev', default='HEAD')
+    show_parser.add_argument('--base', help='Compare the current report with this revision')
+    show_parser.add_argument('--report', help='Current report for --base (default: auto-detect)')
+    show_parser.add_argument('--json', action='store_true')
+    coverage_parser.set_defaults(func=cmd_coverage)
+
+    fit_parser = subparsers.add_parser('fit-weights', help='Fit reward weights from evaluation history')
+    fit_parser.add_argument('--input', help='rlvr.jsonl or CSV export (default: scoreboard/rlvr.jsonl)')
+    fit_parser.add_argument('--format', choices=['jsonl', 'csv'], help='Input format (default: from extension)')
+    fit_parser.add_argument('--target', required=True,
+                            help='Outcome field recorded with each evaluation to predict, e.g. a human rating')
+    fit_parser.add_argument('--folds', type=int, default=5, help='Cross-validation folds (1 disables)')
+    fit_parser.add_argument('--chunk-size', type=int, default=65536)
+    fit_parser.add_argument('--l2', type=float, default=0.0, help='Ridge penalty on the weights')
+    fit_parser.add_argument('--output', help='Where to write the proposed evaluator-config.json')
+    fit_parser.add_argument('--json', action='store_true')
+    fit_parser.set_defaults(func=cmd_fit_weights)
+
+    serve_parser = subparsers.add_parser('serve', help='Serve the REST API (specs/api-specification.yaml)')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8080)
+    serve_parser.add_argument('--poll-interval', type=float, default=1.0)
+    serve_parser.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.print_usage(sys.stderr)
+        return 1
+    if getattr(args, 'cursor', None):
+        from doom import listing
+
+        try:
+            listing.decode_cursor(args.cursor, args.command)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
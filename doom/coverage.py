@@ -0,0 +1,299 @@
+"""
+Per-commit line-coverage store
+
+Whenever coverage is computed, each measured file's executable and covered
+lines are saved as a pair of bitmaps keyed by the git blob id of the file's
+contents, and the set of measured files is saved as a manifest keyed by the
+commit's tree id. A file that does not change between commits keeps its blob
+id, so its bitmap is stored once and reused by every later commit.
+
+The coverage of a baseline commit is then a lookup: its manifest gives the
+project totals, and only files changed since the baseline need their old
+bitmaps, so the delta is computed over the changed files alone.
+
+Reports are read from LCOV (lcov.info), Istanbul (coverage-final.json) or
+coverage.py (coverage.json) output.
+
+Layout under .claude/coverage/:
+    files/<id[:2]>/<id[2:]>    >I line count, executable bitmap, covered bitmap
+    trees/<tree id>.json       {commit, recorded_at, files: {path: [blob id, executable, covered]}}
+"""
+
+import hashlib
+import json
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from doom import paths
+
+REPORT_CANDIDATES = ('coverage/lcov.info', 'coverage/coverage-final.json', 'coverage.json', 'lcov.info')
+
+# {relative path: (executable lines, covered lines)}
+Report = Dict[str, Tuple[Set[int], Set[int]]]
+
+
+def blob_id(content: bytes, id_length: int = 40) -> str:
+    """Git blob id of some contents, computed without a git process"""
+    digest = hashlib.sha256 if id_length == 64 else hashlib.sha1
+    return digest(b'blob %d\0' % len(content) + content).hexdigest()
+
+
+def _bits(lines: Iterable[int], size: int) -> bytes:
+    bitmap = bytearray((size + 7) // 8)
+    for line in lines:
+        if 1 <= line <= size:
+            bitmap[(line - 1) >> 3] |= 1 << ((line - 1) & 7)
+    return bytes(bitmap)
+
+
+def _lines(bitmap: bytes) -> Set[int]:
+    return {i * 8 + bit + 1 for i, byte in enumerate(bitmap) if byte for bit in range(8) if byte >> bit & 1}
+
+
+def _popcount(bitmap: bytes) -> int:
+    return bin(int.from_bytes(bitmap, 'little')).count('1')
+
+
+def encode(executable: Set[int], covered: Set[int]) -> bytes:
+    size = max(executable | covered, default=0)
+    return struct.pack('>I', size) + _bits(executable, size) + _bits(covered & executable, size)
+
+
+def decode(data: bytes) -> Tuple[Set[int], Set[int]]:
+    size = struct.unpack_from('>I', data)[0]
+    width = (size + 7) // 8
+    return _lines(data[4:4 + width]), _lines(data[4 + width:4 + 2 * width])
+
+
+def counts(data: bytes) -> Tuple[int, int]:
+    """(executable, covered) line counts straight from an encoded bitmap pair"""
+    size = struct.unpack_from('>I', data)[0]
+    width = (size + 7) // 8
+    return _popcount(data[4:4 + width]), _popcount(data[4 + width:4 + 2 * width])
+
+
+def bitmap_file(object_id: str) -> Path:
+    return paths.coverage_dir() / 'files' / object_id[:2] / object_id[2:]
+
+
+def manifest_file(tree_id: str) -> Path:
+    return paths.coverage_dir() / 'trees' / f'{tree_id}.json'
+
+
+def load_bitmap(object_id: str) -> Optional[bytes]:
+    try:
+        return bitmap_file(object_id).read_bytes()
+    except OSError:
+        return None
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    paths.ensure_dir(path.parent)
+    tmp = path.parent / f'.{path.name}.{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_manifest(tree_id: Optional[str]) -> Optional[Dict]:
+    if not tree_id:
+        return None
+    try:
+        with open(manifest_file(tree_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _relative(path: str, root: str) -> str:
+    if os.path.isabs(path):
+        path = os.path.relpath(path, root)
+    path = path.replace(os.sep, '/')
+    return path[2:] if path.startswith('./') else path
+
+
+def parse_lcov(text: str, root: str) -> Report:
+    report: Report = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith('SF:'):
+            current = report.setdefault(_relative(line[3:].strip(), root), (set(), set()))
+        elif line.startswith('DA:') and current is not None:
+            number, hits = line[3:].split(',')[:2]
+            current[0].add(int(number))
+            if int(hits) > 0:
+                current[1].add(int(number))
+        elif line.startswith('end_of_record'):
+            current = None
+    return report
+
+
+def parse_istanbul(data: Dict, root: str) -> Report:
+    report: Report = {}
+    for key, entry in data.items():
+        executable, covered = report.setdefault(_relative(entry.get('path', key), root), (set(), set()))
+        for statement, location in entry.get('statementMap', {}).items():
+            line = location['start']['line']
+            executable.add(line)
+            if entry.get('s', {}).get(statement, 0) > 0:
+                covered.add(line)
+    return report
+
+
+def parse_coverage_py(data: Dict, root: str) -> Report:
+    report: Report = {}
+    for key, entry in data.get('files', {}).items():
+        executed = set(entry.get('executed_lines', []))
+        report[_relative(key, root)] = (executed | set(entry.get('missing_lines', [])), executed)
+    return report
+
+
+def load_report(path, root: Optional[str] = None) -> Report:
+    """Per-file line coverage from an LCOV, Istanbul or coverage.py report"""
+    root = str(root or paths.project_root())
+    text = Path(path).read_text()
+    if not text.lstrip().startswith('{'):
+        return parse_lcov(text, root)
+    data = json.loads(text)
+    if 'files' in data and 'meta' in data:
+        return parse_coverage_py(data, root)
+    return parse_istanbul(data, root)
+
+
+def find_report(root: Optional[str] = None) -> Optional[Path]:
+    root = Path(root or paths.project_root())
+    for candidate in REPORT_CANDIDATES:
+        if (root / candidate).exists():
+            return root / candidate
+    return None
+
+
+def percent(executable: int, covered: int) -> Optional[float]:
+    return covered / executable if executable else None
+
+
+def record(report: Report, repository, root: Optional[str] = None, only: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Store bitmaps for every measured file's current contents, and the
+    manifest for HEAD's tree when the measured files match HEAD.
+
+    A report from a partial test run only measures `only` completely; other
+    files are skipped and no manifest is written.
+    """
+    root = str(root or paths.project_root())
+    if only is not None:
+        keep = set(only)
+        report = {path: lines for path, lines in report.items() if path in keep}
+    head = repository.rev_parse('HEAD') if repository.is_repository else None
+    id_length = len(head) if head else 40
+    head_files = repository.list_files('HEAD') if head else {}
+
+    files: Dict[str, List] = {}
+    stored = 0
+    clean = head is not None and only is None
+    for path, (executable, covered) in sorted(report.items()):
+        try:
+            content = Path(root, path).read_bytes()
+        except OSError:
+            continue
+        object_id = blob_id(content, id_length)
+        if head_files.get(path) != object_id:
+            clean = False
+        if not bitmap_file(object_id).exists():
+            _write_atomic(bitmap_file(object_id), encode(executable, covered))
+            stored += 1
+        files[path] = [object_id, len(executable), len(covered & executable)]
+
+    tree = repository.read_object('HEAD^{tree}')[0] if clean else None
+    if tree:
+        manifest = {'commit': head, 'recorded_at': datetime.utcnow().isoformat(), 'files': files}
+        _write_atomic(manifest_file(tree), json.dumps(manifest, separators=(',', ':')).encode())
+
+    executable = sum(entry[1] for entry in files.values())
+    covered = sum(entry[2] for entry in files.values())
+    return {'files': len(files), 'bitmaps_written': stored, 'tree': tree,
+            'executable': executable, 'covered': covered, 'percent': percent(executable, covered),
+            'snapshot': files}
+
+
+def file_counts(repository, rev: str, path: str) -> Optional[Tuple[int, int]]:
+    """(executable, covered) for a file at a revision; (0, 0) if absent, None if never measured"""
+    found = repository.read_object(f'{rev}:{path}')
+    if not found:
+        return 0, 0
+    data = load_bitmap(found[0])
+    return counts(data) if data is not None else None
+
+
+def delta(repository, base: str, current: Dict, changed: Optional[List[str]] = None,
+          partial: bool = False) -> Optional[Dict]:
+    """
+    Coverage before and after from the current record() result and the
+    baseline's stored bitmaps, touching only files changed since `base`.
+    Returns None when a changed file's baseline was never measured.
+
+    With `partial` the current result only covers the changed files (a
+    selected-tests run): the baseline's manifest supplies the totals and the
+    changed files adjust them to give the current coverage. A changed file
+    that no selected test reached keeps its baseline line count, all of it
+    uncovered.
+    """
+    snapshot = current['snapshot']
+    if changed is None:
+        changed = repository.changes_since(base)
+    manifest = load_manifest(repository.read_object(f'{base}^{{tree}}')[0]
+                             if repository.rev_parse(base) else None)
+    measured = set(snapshot) | set(manifest['files'] if manifest else ())
+
+    if partial:
+        if not manifest:
+            return None
+        before_executable = sum(entry[1] for entry in manifest['files'].values())
+        before_covered = sum(entry[2] for entry in manifest['files'].values())
+        after_executable, after_covered = before_executable, before_covered
+    else:
+        before_executable, before_covered = current['executable'], current['covered']
+    compared = []
+    for path in changed:
+        if path not in measured:
+            continue
+        old = file_counts(repository, base, path)
+        if old is None:
+            return None
+        now = snapshot.get(path)
+        if now is None:
+            if partial and os.path.exists(os.path.join(repository.root, path)):
+                now = [None, old[0], 0]
+            else:
+                now = [None, 0, 0]
+        if partial:
+            after_executable += now[1] - old[0]
+            after_covered += now[2] - old[1]
+        else:
+            before_executable += old[0] - now[1]
+            before_covered += old[1] - now[2]
+        compared.append({'path': path, 'before': percent(*old), 'after': percent(now[1], now[2])})
+
+    return {
+        'base': repository.rev_parse(base),
+        'before': percent(before_executable, before_covered),
+        'after': percent(after_executable, after_covered) if partial else current['percent'],
+        'changed_files': compared,
+    }
+
+
+def load_tree_coverage(repository, rev: str = 'HEAD') -> Optional[Dict]:
+    """Stored totals for a revision, or None if it was never recorded"""
+    commit = repository.rev_parse(rev)
+    if not commit:
+        return None
+    manifest = load_manifest(repository.read_object(f'{rev}^{{tree}}')[0])
+    if not manifest:
+        return None
+    executable = sum(entry[1] for entry in manifest['files'].values())
+    covered = sum(entry[2] for entry in manifest['files'].values())
+    return {'commit': commit, 'recorded_at': manifest['recorded_at'], 'files': len(manifest['files']),
+            'executable': executable, 'covered': covered, 'percent': percent(executable, covered)}
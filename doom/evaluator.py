@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+RLVR evaluator
+
+Computes the verifiable reward for a finished task from test coverage, lint,
+security, complexity, CI, review and token/time efficiency components.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from doom import advisories, budget, ci, coverage, impact, metrics, paths, repo, resources, trace
+
+
+def load_config(config_path: Optional[str] = None) -> Dict:
+    """Load evaluator config, preferring a project override over the defaults"""
+    candidates = [Path(config_path)] if config_path else paths.evaluator_config_files()
+    for candidate in candidates:
+        if candidate.exists():
+            with open(candidate) as f:
+                return json.load(f)
+    raise FileNotFoundError(f"No evaluator config found in {[str(c) for c in candidates]}")
+
+
+class RLVREvaluator:
+    def __init__(self, config_path: Optional[str] = None):
+        self.config = load_config(config_path)
+        self.weights = self.config['weights']
+        self.thresholds = self.config['thresholds']
+        self.project_root = str(paths.project_root())
+        # Open for the duration of each evaluate() call
+        self.repo: Optional[repo.Repository] = None
+        self.base = 'HEAD~1'
+        self.coverage: Optional[Dict] = None
+        self.test_impact: Optional[Dict] = None
+        self.security: Optional[Dict] = None
+        self.ci: Optional[Dict] = None
+        # Components that fell back to a neutral or default score because nothing was measured
+        self.unmeasured: List[str] = []
+        # Per-component subprocess budget; tools are never fetched at evaluation time
+        self.timeout = self.config.get('component_timeout_seconds', 120)
+        self.limits = resources.limits_for('evaluator', self.config)
+
+    def evaluate(self, task_id: str, agent_name: str, task_status: str, stopped_at: Optional[float] = None) -> Dict:
+        """
+        Main evaluation entry point. `stopped_at` is when the task stopped, so
+        a deferred evaluation does not count time spent in the spool against
+        the task's time budget.
+        """
+
+        # One git object-store process serves every repository read of this evaluation
+        with repo.Repository(self.project_root) as self.repo:
+            self.base = self._baseline_rev(task_id)
+            self.coverage = None
+            self.test_impact = None
+            self.security = None
+            self.ci = None
+            self.unmeasured = []
+            # Collect all evaluation components
+            checks = {
+                'test_coverage_delta': self._evaluate_test_coverage,
+                'lint_score': self._evaluate_lint,
+                'security_scan_score': self._evaluate_security,
+                'code_complexity_delta': self._evaluate_complexity,
+                'ci_pipeline_status': self._evaluate_ci_status,
+                'review_feedback_score': self._evaluate_review_feedback,
+                'efficiency_score': lambda: self._evaluate_efficiency(task_id, stopped_at)
+            }
+            components = {}
+            for component, check in checks.items():
+                with metrics.timer('doom_evaluator_component_duration_seconds', component=component), \
+                        trace.span(task_id, component), resources.measure('evaluator', component, task_id):
+                    components[component] = check()
+            changes = self._collect_changes()
+
+        # Calculate weighted reward
+        reward = self._calculate_reward(components, task_status)
+
+        result = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'task_id': task_id,
+            'agent_name': agent_name,
+            'task_status': task_status,
+            'reward': reward,
+            'components': components,
+            'metadata': {
+                'evaluator_version': '1.0.0',
+                'weights_used': self.weights
+            }
+        }
+        if changes:
+            result['changes'] = changes
+        if self.coverage:
+            result['coverage'] = self.coverage
+        if self.test_impact:
+            result['test_impact'] = self.test_impact
+        if self.security:
+            result['security'] = self.security
+        if self.ci:
+            result['ci'] = self.ci
+        if self.unmeasured:
+            result['unmeasured'] = self.unmeasured
+        usage = budget.load_usage(task_id)
+        if usage:
+            result['usage'] = budget.totals(usage, stopped_at)
+        return result
+
+    def _baseline_rev(self, task_id: str) -> str:
+        """The task's baseline commit, or HEAD~1 without one"""
+        metadata_file = paths.task_dir(task_id) / 'metadata.json'
+        if metadata_file.exists():
+            try:
+                with open(metadata_file) as f:
+                    return json.load(f).get('baseline_commit') or 'HEAD~1'
+            except (OSError, ValueError):
+                pass
+        return 'HEAD~1'
+
+    def _changed_files(self) -> List[str]:
+        # Doom-RLVR's own state under .claude/ is not part of the agent's work
+        return [p for p in self.repo.changes_since(self.base) if not p.startswith('.claude/')]
+
+    def _collect_changes(self) -> Optional[Dict]:
+        """Files changed since the baseline commit"""
+        if not self.repo.is_repository:
+            return None
+        try:
+            return {
+                'base': self.repo.rev_parse(self.base),
+                'head': self.repo.rev_parse('HEAD'),
+                'files_changed': self._changed_files(),
+            }
+        except repo.GitError as e:
+            print(f"Error reading repository changes: {e}", file=sys.stderr)
+            return None
+
+    def _evaluate_test_coverage(self) -> float:
+        """Evaluate test coverage delta (-1 to +1)"""
+        try:
+            command = ['npm', 'run', 'test:coverage', '--', '--json']
+            selection = self.test_impact = self._select_tests()
+            partial = bool(selection) and selection['mode'] == 'selected'
+            if partial:
+                if not selection['tests']:
+                    # No test covers the changed files, so coverage cannot have moved
+                    impact.record_run(selection)
+                    return 0.0
+                command += selection['tests']
+
+            result = resources.run(
+                command,
+                self.limits,
+                capture_output=True,
+                text=True,
+                cwd=self.project_root,
+                stdin=subprocess.DEVNULL,
+                timeout=self.timeout
+            )
+            if selection:
+                per_test = None if partial else impact.find_per_test_report(self.project_root)
+                impact.record_run(selection, per_test, self.repo.rev_parse('HEAD'))
+
+            if result.returncode != 0:
+                return -0.5  # Penalty for broken tests
+
+            self.coverage = self._coverage_from_store(partial)
+            if self.coverage and self.coverage['before'] is not None and self.coverage['after'] is not None:
+                before_coverage, current_coverage = self.coverage['before'], self.coverage['after']
+            elif partial:
+                # A selected-tests summary only covers part of the project
+                return 0.0
+            else:
+                coverage_data = json.loads(result.stdout)
+                current_coverage = coverage_data['total']['lines']['pct'] / 100
+                before_coverage = self._get_coverage_from_commit(self.base)
+
+            delta = current_coverage - before_coverage
+
+            # Normalize to -1 to +1 range
+            if delta > 0:
+                return min(delta / 0.1, 1.0)  # +10% = perfect score
+            else:
+                return max(delta / 0.05, -1.0)  # -5% = worst score
+
+        except Exception as e:
+            print(f"Error evaluating test coverage: {e}", file=sys.stderr)
+            return 0.0
+
+    def _evaluate_lint(self) -> float:
+        """Evaluate linting score (0 to 1)"""
+        try:
+            result = resources.run(
+                ['npm', 'run', 'lint', '--', '--format', 'json'],
+                self.limits,
+                capture_output=True,
+                text=True,
+                cwd=self.project_root,
+                stdin=subprocess.DEVNULL,
+                timeout=self.timeout
+            )
+
+            if result.returncode == 0:
+                return 1.0
+
+            lint_results = json.loads(result.stdout)
+            total_files = len(lint_results)
+            clean_files = sum(1 for r in lint_results if r['errorCount'] == 0)
+
+            return clean_files / total_files if total_files > 0 else 0.0
+
+        except Exception as e:
+            print(f"Error evaluating lint: {e}", file=sys.stderr)
+            return self._unmeasured('lint_score', 0.5)
+
+    def _evaluate_security(self) -> float:
+        """Evaluate security scan score (0 to 1)"""
+        provider = self.config.get('providers', {}).get('security', {})
+        if provider.get('type') == 'osv':
+            scanned = advisories.scan(self.project_root)
+            if scanned is not None:
+                found = scanned['vulnerabilities']
+                self.security = {
+                    'provider': 'osv',
+                    'snapshot_id': scanned['snapshot_id'],
+                    'lockfiles': scanned['lockfiles'],
+                    'packages': scanned['packages'],
+                    'cached': scanned['cached'],
+                    'counts': {s: sum(v['severity'] == s for v in found) for s in advisories.SEVERITIES},
+                    'ids': sorted({v['id'] for v in found})[:20],
+                }
+                return self._security_score(found)
+            if provider.get('fallback') != 'snyk':
+                print("Error evaluating security: no advisory snapshot (doom advisories ingest)", file=sys.stderr)
+                return self._unmeasured('security_scan_score', 0.8)
+
+        try:
+            result = resources.run(
+                ['snyk', 'test', '--json'],
+                self.limits,
+                capture_output=True,
+                text=True,
+                cwd=self.project_root,
+                stdin=subprocess.DEVNULL,
+                timeout=self.timeout
+            )
+
+            scan_data = json.loads(result.stdout)
+            return self._security_score(scan_data.get('vulnerabilities', []))
+
+        except Exception as e:
+            print(f"Error evaluating security: {e}", file=sys.stderr)
+            return self._unmeasured('security_scan_score', 0.8)  # Default to mostly safe
+
+    @staticmethod
+    def _security_score(vulnerabilities: List[Dict]) -> float:
+        severity_weights = {
+            'low': 0.1,
+            'medium': 0.3,
+            'high': 0.6,
+            'critical': 1.0
+        }
+
+        if not vulnerabilities:
+            return 1.0
+
+        total_weight = sum(
+            severity_weights.get(v['severity'], 0.1)
+            for v in vulnerabilities
+        )
+
+        # Normalize score
+        max_acceptable_weight = 2.0
+        return max(0, 1 - (total_weight / max_acceptable_weight))
+
+    def _evaluate_complexity(self) -> float:
+        """Evaluate code complexity delta (-1 to +1)"""
+        try:
+            result = resources.run(
+                ['npx', '--offline', 'complexity-report', 'src/', '--format', 'json'],
+                self.limits,
+                capture_output=True,
+                text=True,
+                cwd=self.project_root,
+                stdin=subprocess.DEVNULL,
+                timeout=self.timeout
+            )
+
+            if result.returncode != 0:
+                return self._unmeasured('code_complexity_delta', -0.2)  # Penalty for analysis failure
+
+            current_metrics = json.loads(result.stdout)
+            baseline = self._get_complexity_baseline()
+
+            current_avg = current_metrics['reports']['average']['cyclomatic']
+            baseline_avg = baseline.get('average_cyclomatic', current_avg)
+
+            delta_ratio = (current_avg - baseline_avg) / baseline_avg if baseline_avg > 0 else 0
+
+            # Normalize: 10% increase = -1, 10% decrease = +1
+            if delta_ratio > 0:
+                return max(-delta_ratio / 0.1, -1.0)
+            else:
+                return min(-delta_ratio / 0.1, 1.0)
+
+        except Exception as e:
+            print(f"Error evaluating complexity: {e}", file=sys.stderr)
+            return self._unmeasured('code_complexity_delta', 0.0)
+
+    def _evaluate_ci_status(self) -> float:
+        """Evaluate CI pipeline status for HEAD (0 or 1), cached per commit"""
+        try:
+            commit = self.repo.head()
+            if not commit:
+                return self._unmeasured('ci_pipeline_status', 0.5)
+            state = ci.status(commit, self.config.get('providers', {}).get('ci', {}), self.repo)
+            if state is None:
+                return self._unmeasured('ci_pipeline_status', 0.5)  # Can't check, neutral score
+            self.ci = {key: state.get(key) for key in ('commit', 'provider', 'status', 'conclusion', 'cached')}
+
+            if state['status'] == 'completed':
+                return 1.0 if state['conclusion'] == 'success' else 0.0
+
+            return self._unmeasured('ci_pipeline_status', 0.5)  # In progress
+
+        except Exception as e:
+            print(f"Error evaluating CI status: {e}", file=sys.stderr)
+            return self._unmeasured('ci_pipeline_status', 0.5)
+
+    def _unmeasured(self, component: str, score: float) -> float:
+        """Record that `component` gets a fallback score, so no feedback is drawn from it"""
+        self.unmeasured.append(component)
+        return score
+
+    def _evaluate_review_feedback(self) -> float:
+        """Evaluate review feedback score (-1 to +1)"""
+        # This would integrate with PR review systems
+        return 0.0
+
+    def _evaluate_efficiency(self, task_id: str, stopped_at: Optional[float] = None) -> float:
+        """Evaluate token/time use against the task budget (-1 to +1)"""
+        return budget.efficiency_score(budget.load_usage(task_id), stopped_at)
+
+    def _calculate_reward(self, components: Dict[str, float], task_status: str) -> float:
+        """Calculate final weighted reward"""
+
+        # Base penalty for failure
+        if task_status == 'failed':
+            base_penalty = -2.0
+        elif task_status == 'timeout':
+            base_penalty = -1.0
+        else:
+            base_penalty = 0.0
+
+        weighted_sum = sum(
+            self.weights[key] * value
+            for key, value in components.items()
+            if key in self.weights
+        )
+
+        # Normalize to -5 to +5 range and apply base penalty
+        final_reward = weighted_sum * 5 + base_penalty
+
+        return max(-5, min(5, final_reward))
+
+    def _select_tests(self) -> Optional[Dict]:
+        """Test impact selection for the changed files, or None when the mode is off"""
+        config = impact.impact_config()
+        if not config['enabled'] or not self.repo.is_repository:
+            return None
+        try:
+            return impact.select(self._changed_files(), config=config)
+        except repo.GitError as e:
+            print(f"Error selecting tests: {e}", file=sys.stderr)
+            return None
+
+    def _coverage_from_store(self, partial: bool = False) -> Optional[Dict]:
+        """
+        Record the per-file report the coverage run wrote and compare it with
+        the baseline's stored bitmaps over the changed files only
+        """
+        report_path = coverage.find_report(self.project_root)
+        if not report_path or not self.repo.is_repository:
+            return None
+        try:
+            changed = self._changed_files()
+            current = coverage.record(coverage.load_report(report_path, self.project_root), self.repo,
+                                      self.project_root, only=changed if partial else None)
+            return coverage.delta(self.repo, self.base, current, changed, partial=partial)
+        except (OSError, ValueError, KeyError, repo.GitError) as e:
+            print(f"Error reading coverage report: {e}", file=sys.stderr)
+            return None
+
+    def _get_coverage_from_commit(self, commit: str) -> float:
+        """Get test coverage recorded for a specific commit"""
+        stored = None
+        if self.repo is not None and self.repo.is_repository:
+            try:
+                stored = coverage.load_tree_coverage(self.repo, commit)
+            except repo.GitError:
+                stored = None
+        if stored and stored['percent'] is not None:
+            return stored['percent']
+        # Never measured at that commit
+        return 0.75
+
+    def _get_complexity_baseline(self) -> Dict:
+        """Get complexity metrics baseline"""
+        return {'average_cyclomatic': 5.0}
+
+
+_default_evaluator: Optional[RLVREvaluator] = None
+
+
+def evaluate(task_id: str, agent_name: str, task_status: str = 'completed',
+             evaluator: Optional[RLVREvaluator] = None, output_dir: Optional[Path] = None,
+             stopped_at: Optional[float] = None) -> Dict:
+    """
+    Evaluate a task in-process and append the result to the scoreboard.
+
+    Hooks and the CLI call this directly rather than launching
+    rlvr-evaluate.py; the evaluator (and its config) is reused across calls.
+    """
+    global _default_evaluator
+    from doom import events, leaderboard
+
+    if evaluator is None:
+        if _default_evaluator is None:
+            _default_evaluator = RLVREvaluator()
+        evaluator = _default_evaluator
+
+    with trace.span(task_id, 'evaluate', task_status=task_status):
+        result = evaluator.evaluate(task_id, agent_name, task_status, stopped_at)
+
+    if output_dir:
+        events.append_jsonl(Path(output_dir) / 'rlvr.jsonl', [result])
+    else:
+        events.append_jsonl(paths.scoreboard_dir() / 'rlvr.jsonl', [result])
+        leaderboard.record_reward(result)
+        metrics.set_gauge('doom_agent_reward', result['reward'], agent_name=agent_name)
+        metrics.observe('doom_reward', result['reward'], agent_name=agent_name)
+    events.record('evaluation', task_id=task_id, agent_name=agent_name,
+                  task_status=task_status, reward=result['reward'])
+    trace.flush()
+    resources.flush()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RLVR Evaluator')
+    parser.add_argument('--task-id', required=True)
+    parser.add_argument('--agent-name', required=True)
+    parser.add_argument('--task-status', required=True)
+    parser.add_argument('--output-dir', default=None)
+    args = parser.parse_args()
+
+    result = evaluate(args.task_id, args.agent_name, args.task_status, output_dir=args.output_dir)
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
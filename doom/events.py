@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+In-process events API
+
+Hooks and the CLI record events by calling doom.events.record() (or
+record_many() for a batch) instead of spawning helper scripts. Each call is a
+single locked append to .claude/scoreboard/events.jsonl.
+
+Batch entry point: pipe newline-delimited JSON events into
+`python3 -m doom.events`. Events of type "stop" are evaluated in the same
+process through doom.evaluate().
+
+"Last N" queries over any append-only JSONL file go through tail(), which
+reads blocks backwards from the end of the file and stops after N matches.
+scan_reverse() yields the same rows lazily with their byte offsets, so a
+listing can resume from where a previous page stopped.
+"""
+
+import fcntl
+import json
+import os
+import sys
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from doom import paths
+
+EVENTS_FILE = 'events.jsonl'
+
+# Event types that trigger an RLVR evaluation when seen in a batch
+EVALUATE_EVENTS = ('stop', 'subagent_stop')
+
+# Bytes read per step by read_reverse()
+BLOCK_SIZE = 64 * 1024
+
+
+def events_file():
+    return paths.scoreboard_dir() / EVENTS_FILE
+
+
+def _normalize(event: Dict) -> Dict:
+    if 'event' not in event:
+        raise ValueError(f"Event is missing its 'event' type: {event}")
+    normalized = {'timestamp': datetime.utcnow().isoformat()}
+    normalized.update(event)
+    return normalized
+
+
+def append_jsonl(path, rows: List[Dict]) -> None:
+    """Append rows under an exclusive lock with one write call"""
+    if not rows:
+        return
+    paths.ensure_dir(path.parent)
+    data = ''.join(json.dumps(row) + '\n' for row in rows).encode()
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _lines_reverse(path, end: Optional[int] = None, block_size: int = BLOCK_SIZE) -> Iterator[Tuple[int, bytes]]:
+    """(offset, line) for complete, non-empty lines before byte `end`, newest first"""
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        position = size if end is None else min(end, size)
+        buffer = b''
+        # Text after the final newline is a row still being written; `end` is always a line start
+        partial = end is None
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            buffer = f.read(position - start) + buffer
+            position = start
+            lines = buffer.split(b'\n')
+            buffer = lines.pop(0)
+            offsets = []
+            offset = position + len(buffer) + 1
+            for line in lines:
+                offsets.append(offset)
+                offset += len(line) + 1
+            if partial and lines:
+                lines.pop()
+                partial = False
+            for i in range(len(lines) - 1, -1, -1):
+                if lines[i].strip():
+                    yield offsets[i], lines[i]
+        if not partial and buffer.strip():
+            yield 0, buffer
+
+
+def read_reverse(path, block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """Complete, non-empty lines of a file, newest first, read in blocks from the end"""
+    for _, line in _lines_reverse(path, None, block_size):
+        yield line
+
+
+def scan_reverse(path, end: Optional[int] = None, **filters) -> Iterator[Tuple[int, Dict]]:
+    """
+    (offset, row) for rows whose fields equal `filters`, newest first, from
+    before byte `end`. Passing a row's offset as `end` resumes with the rows
+    before it. Lines that cannot contain the filter values are skipped
+    without being parsed.
+    """
+    needles = [json.dumps(value).encode() for value in filters.values()]
+    for offset, line in _lines_reverse(path, end):
+        if not all(needle in line for needle in needles):
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(row, dict) and all(row.get(key) == value for key, value in filters.items()):
+            yield offset, row
+
+
+def tail(path, last: int, **filters) -> List[Dict]:
+    """The newest `last` rows whose fields equal `filters`, newest first"""
+    if last <= 0:
+        return []
+    return [row for _, row in islice(scan_reverse(path, **filters), last)]
+
+
+def record(event: str, task_id: Optional[str] = None, agent_name: Optional[str] = None, **fields) -> Dict:
+    """Record a single event and return the stored row"""
+    row = dict(fields, event=event)
+    if task_id is not None:
+        row['task_id'] = task_id
+    if agent_name is not None:
+        row['agent_name'] = agent_name
+    return record_many([row])[0]
+
+
+def record_many(events: Iterable[Dict]) -> List[Dict]:
+    """Record many events with a single append"""
+    rows = [_normalize(event) for event in events]
+    append_jsonl(events_file(), rows)
+    return rows
+
+
+def process_batch(events: Iterable[Dict]) -> Dict:
+    """Record a batch and evaluate and finish every task that stopped within it, as Stop would"""
+    from doom.evaluator import evaluate
+    from doom.hooks.stop import finish_task
+
+    rows = record_many(events)
+    evaluations = []
+    for row in rows:
+        if row['event'] in EVALUATE_EVENTS and row.get('task_id'):
+            agent_name = row.get('agent_name', 'unknown')
+            result = evaluate(row['task_id'], agent_name, row.get('task_status', 'completed'))
+            finish_task(row['task_id'], agent_name, row.get('task_type'), result)
+            evaluations.append(result)
+    return {'recorded': len(rows), 'evaluations': evaluations}
+
+
+def read_ndjson(stream) -> List[Dict]:
+    events = []
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            events.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_number}: invalid JSON ({e})")
+    return events
+
+
+def main():
+    try:
+        summary = process_batch(read_ndjson(sys.stdin))
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
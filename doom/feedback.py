@@ -0,0 +1,304 @@
+"""
+Feedback history with deduplication and near-duplicate clustering
+
+The Stop hook turns weak reward components into improvement suggestions and
+appends them to feedback/<agent>_feedback.jsonl. Each suggestion is also
+folded into a cluster index so the learning loop reads lessons, not raw
+history:
+
+- exact duplicates are found by a hash of the normalized text
+- near-duplicates are found by MinHash over character shingles, with LSH
+  banding so only a handful of candidate clusters are compared
+- every cluster keeps counts and last-seen times per agent and task type
+
+The per-scope top lessons are materialized into a small lessons.json that
+UserPromptSubmit reads in one lookup (see top_lessons).
+
+Layout under .claude/feedback/:
+    <agent>_feedback.jsonl   raw suggestions (append-only)
+    index.json               clusters, exact hashes and LSH buckets
+    lessons.json             top clusters per agent:<name> / type:<type>
+"""
+
+import fcntl
+import hashlib
+import json
+import math
+import os
+import re
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from doom import paths
+
+INDEX_FILE = 'index.json'
+LESSONS_FILE = 'lessons.json'
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+# Estimated Jaccard similarity at which a suggestion joins an existing cluster
+SIMILARITY_THRESHOLD = 0.6
+
+# Lessons kept per scope in lessons.json, and the recency half-life used to rank them
+LESSONS_PER_SCOPE = 20
+HALF_LIFE_DAYS = 14.0
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations():
+    """Deterministic (a, b) pairs for NUM_PERM universal hash functions"""
+    perms = []
+    for i in range(NUM_PERM):
+        digest = hashlib.sha1(f'doom-minhash-{i}'.encode()).digest()
+        a = int.from_bytes(digest[:8], 'big') % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:16], 'big') % _MERSENNE_PRIME
+        perms.append((a, b))
+    return perms
+
+
+_PERMS = _permutations()
+
+# Component score checks: (component, predicate on the score, area, suggestion)
+FEEDBACK_RULES = [
+    ('test_coverage_delta', lambda v: v < 0, 'testing',
+     'Test coverage dropped; add tests that exercise the changed code paths'),
+    ('lint_score', lambda v: v < 0.8, 'lint',
+     'Lint issues remain; run the linter and fix warnings before finishing'),
+    ('security_scan_score', lambda v: v < 1.0, 'security',
+     'Security scan reported vulnerabilities; fix or justify each finding'),
+    # Positive means complexity went down
+    ('code_complexity_delta', lambda v: v < -0.1, 'complexity',
+     'Complexity increased noticeably; split large functions and simplify branching'),
+    ('ci_pipeline_status', lambda v: v < 1.0, 'ci',
+     'CI checks did not pass; run the test suite locally before stopping'),
+    ('review_feedback_score', lambda v: v < 0, 'review',
+     'Review feedback was negative; address reviewer comments before closing'),
+    ('efficiency_score', lambda v: v < 0, 'efficiency',
+     'Task ran over its token or time budget; read only the files you need and avoid re-running large outputs'),
+]
+
+
+def normalize(text: str) -> str:
+    return re.sub(r'\s+', ' ', re.sub(r'[^a-z0-9 ]+', ' ', text.lower())).strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(normalize(text).encode()).hexdigest()[:16]
+
+
+def shingles(text: str) -> set:
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> List[int]:
+    """MinHash signature of the text's character shingles"""
+    hashes = [zlib.crc32(s.encode()) for s in shingles(text)]
+    return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMS]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def band_keys(signature: List[int]) -> List[str]:
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        keys.append(f"{band}:{zlib.crc32(','.join(map(str, rows)).encode()):08x}")
+    return keys
+
+
+def generate_feedback(result: Dict) -> List[Dict]:
+    """Suggestions for the weak components of an evaluation result; fallback scores are no signal"""
+    components = result.get('components', {})
+    unmeasured = set(result.get('unmeasured', ()))
+    suggestions = []
+    for component, weak, area, suggestion in FEEDBACK_RULES:
+        value = components.get(component)
+        if component not in unmeasured and isinstance(value, (int, float)) and weak(value):
+            suggestions.append({'area': area, 'suggestion': suggestion, 'component': component, 'score': value})
+    return suggestions
+
+
+class FeedbackIndex:
+    """Clusters of equivalent suggestions with per-scope counts"""
+
+    def __init__(self, state: Optional[Dict] = None):
+        self.state = state or {'clusters': {}, 'exact': {}, 'bands': {}, 'next_id': 1}
+
+    def find(self, text: str, signature: List[int]) -> Optional[str]:
+        """Cluster id for an exact or near-duplicate suggestion, if any"""
+        cluster_id = self.state['exact'].get(text_hash(text))
+        if cluster_id:
+            return cluster_id
+        best, best_score = None, SIMILARITY_THRESHOLD
+        candidates = {cid for key in band_keys(signature) for cid in self.state['bands'].get(key, ())}
+        for cid in sorted(candidates):
+            score = similarity(signature, self.state['clusters'][cid]['signature'])
+            if score >= best_score:
+                best, best_score = cid, score
+        return best
+
+    def add(self, text: str, area: str, agent_name: str, task_type: str,
+            timestamp: Optional[str] = None) -> str:
+        """Fold one suggestion into its cluster (creating it if new)"""
+        timestamp = timestamp or datetime.utcnow().isoformat()
+        signature = minhash(text)
+        cluster_id = self.find(text, signature)
+        if cluster_id is None:
+            cluster_id = f"c{self.state['next_id']}"
+            self.state['next_id'] += 1
+            self.state['clusters'][cluster_id] = {
+                'text': text, 'area': area, 'signature': signature,
+                'count': 0, 'first_seen': timestamp, 'last_seen': timestamp, 'scopes': {},
+            }
+            for key in band_keys(signature):
+                self.state['bands'].setdefault(key, []).append(cluster_id)
+        self.state['exact'][text_hash(text)] = cluster_id
+
+        cluster = self.state['clusters'][cluster_id]
+        cluster['count'] += 1
+        cluster['last_seen'] = max(cluster['last_seen'], timestamp)
+        for scope in scopes_for(agent_name, task_type):
+            stats = cluster['scopes'].setdefault(scope, {'count': 0, 'last_seen': timestamp})
+            stats['count'] += 1
+            stats['last_seen'] = max(stats['last_seen'], timestamp)
+        return cluster_id
+
+    def lessons(self, now: Optional[datetime] = None) -> Dict[str, List[Dict]]:
+        """Top clusters per scope, ranked by recency-weighted count"""
+        now = now or datetime.utcnow()
+        by_scope: Dict[str, List[Dict]] = {}
+        for cluster_id, cluster in self.state['clusters'].items():
+            for scope, stats in cluster['scopes'].items():
+                by_scope.setdefault(scope, []).append({
+                    'cluster_id': cluster_id,
+                    'text': cluster['text'],
+                    'area': cluster['area'],
+                    'count': stats['count'],
+                    'last_seen': stats['last_seen'],
+                    'score': round(stats['count'] * _decay(stats['last_seen'], now), 4),
+                })
+        for scope, entries in by_scope.items():
+            entries.sort(key=lambda e: (-e['score'], e['cluster_id']))
+            del entries[LESSONS_PER_SCOPE:]
+        return by_scope
+
+
+def _decay(timestamp: str, now: datetime) -> float:
+    try:
+        age_days = (now - datetime.fromisoformat(timestamp)).total_seconds() / 86400
+    except ValueError:
+        return 1.0
+    return math.pow(0.5, max(age_days, 0.0) / HALF_LIFE_DAYS)
+
+
+def scopes_for(agent_name: Optional[str], task_type: Optional[str]) -> List[str]:
+    scopes = []
+    if agent_name:
+        scopes.append(f'agent:{agent_name}')
+    if task_type:
+        scopes.append(f'type:{task_type}')
+    return scopes
+
+
+def index_file():
+    return paths.feedback_dir() / INDEX_FILE
+
+
+def lessons_file():
+    return paths.feedback_dir() / LESSONS_FILE
+
+
+def history_file(agent_name: str):
+    return paths.feedback_dir() / f'{agent_name}_feedback.jsonl'
+
+
+@contextmanager
+def _locked_index() -> Iterator[FeedbackIndex]:
+    """Read-modify-write the index under an exclusive lock; refresh lessons.json"""
+    path = index_file()
+    paths.ensure_dir(path.parent)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, 'r+') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        raw = f.read()
+        index = FeedbackIndex(json.loads(raw) if raw.strip() else None)
+        yield index
+        f.seek(0)
+        f.truncate()
+        json.dump(index.state, f, separators=(',', ':'))
+
+        lessons = lessons_file()
+        tmp = lessons.with_name(f'.{lessons.name}.{os.getpid()}')
+        with open(tmp, 'w') as out:
+            json.dump({'updated_at': datetime.utcnow().isoformat(), 'scopes': index.lessons()}, out,
+                      separators=(',', ':'))
+        os.replace(tmp, lessons)
+
+
+def record_feedback(task_id: str, agent_name: str, task_type: Optional[str],
+                    suggestions: List[Dict]) -> List[str]:
+    """Append suggestions to the agent's history and cluster them; returns cluster ids"""
+    if not suggestions:
+        return []
+    from doom import events
+
+    timestamp = datetime.utcnow().isoformat()
+    rows = [dict(s, timestamp=timestamp, task_id=task_id, agent_name=agent_name, task_type=task_type)
+            for s in suggestions]
+    events.append_jsonl(history_file(agent_name), rows)
+
+    with _locked_index() as index:
+        return [index.add(row['suggestion'], row.get('area', 'general'), agent_name, task_type, timestamp)
+                for row in rows]
+
+
+def rebuild() -> Dict:
+    """Rebuild the index from every *_feedback.jsonl history"""
+    rows = []
+    for path in sorted(paths.feedback_dir().glob('*_feedback.jsonl')):
+        with open(path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(row, dict) and row.get('suggestion'):
+                    row.setdefault('agent_name', path.name[:-len('_feedback.jsonl')])
+                    rows.append(row)
+    rows.sort(key=lambda r: r.get('timestamp', ''))
+
+    with _locked_index() as index:
+        index.state = FeedbackIndex().state
+        for row in rows:
+            index.add(row['suggestion'], row.get('area', 'general'), row['agent_name'],
+                      row.get('task_type'), row.get('timestamp'))
+        return {'suggestions': len(rows), 'clusters': len(index.state['clusters'])}
+
+
+def top_lessons(agent_name: Optional[str], task_type: Optional[str], k: Optional[int] = 3) -> List[Dict]:
+    """Top-k lessons for an agent / task type from the materialized lessons.json; k None for all"""
+    try:
+        with open(lessons_file()) as f:
+            scopes = json.load(f).get('scopes', {})
+    except (OSError, ValueError):
+        return []
+
+    merged: Dict[str, Dict] = {}
+    for scope in scopes_for(agent_name, task_type):
+        for entry in scopes.get(scope, []):
+            best = merged.get(entry['cluster_id'])
+            if best is None or entry['score'] > best['score']:
+                merged[entry['cluster_id']] = entry
+    return sorted(merged.values(), key=lambda e: (-e['score'], e['cluster_id']))[:k]
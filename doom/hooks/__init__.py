@@ -0,0 +1,207 @@
+"""
+Shared helpers for the Doom-RLVR hook handlers
+
+Hook processes are short-lived and run on every prompt and tool call, so this
+module deliberately imports nothing beyond os/sys at load time. json, pathlib,
+datetime and the scoring code are imported inside the functions that need
+them, and only once a hook has decided it has real work to do.
+"""
+
+import os
+import sys
+
+# Tools that never modify the project; PreToolUse lets them through with only
+# the compiled policy's tool-set and path checks as long as every path they
+# touch stays inside the project.
+READ_ONLY_TOOLS = frozenset({'Read', 'Glob', 'Grep', 'LS', 'NotebookRead'})
+PATH_KEYS = ('file_path', 'path', 'notebook_path')
+
+_FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def doom_enabled() -> bool:
+    """DOOM_ENABLED defaults to on; any common false-y value turns hooks off"""
+    return os.environ.get('DOOM_ENABLED', 'true').strip().lower() not in _FALSE_VALUES
+
+
+def project_root() -> str:
+    return os.environ.get('CLAUDE_PROJECT_DIR') or os.getcwd()
+
+
+def current_task_path() -> str:
+    return os.path.join(project_root(), '.claude', 'tasks', 'current.json')
+
+
+def has_active_task() -> bool:
+    """Cheap check used by Stop to skip evaluation when no task is running"""
+    return bool(os.environ.get('DOOM_TASK_ID')) or os.path.exists(current_task_path())
+
+
+def budget_blocked() -> bool:
+    """
+    True once the active task has exceeded an enforced budget. Only the
+    marker doom.budget leaves is stat'ed, so read-only tools on the fast path
+    are held to the same rule as every other tool.
+    """
+    task_id = os.environ.get('DOOM_TASK_ID')
+    if not task_id:
+        try:
+            with open(current_task_path()) as f:
+                task_ids = peek_string_field(f.read(), 'task_id')
+        except OSError:
+            return False
+        if not task_ids:
+            return False
+        task_id = task_ids[0]
+    return os.path.exists(os.path.join(project_root(), '.claude', 'tasks', task_id, 'budget-blocked'))
+
+
+def read_input() -> dict:
+    """Read and parse the hook payload Claude Code sends on stdin"""
+    return parse_input(sys.stdin.read())
+
+
+def parse_input(raw: str) -> dict:
+    if not raw.strip():
+        return {}
+    import json
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def peek_string_field(raw: str, key: str):
+    """
+    Return every string value stored under `key` in a raw JSON payload, or
+    None when that cannot be done without a full parse.
+
+    Importing json drags in re and friends, which dominates fast-path startup.
+    Keys inside string values are always escaped, so an unescaped "key" token
+    followed by a colon is a real key; anything unusual falls back to None.
+    """
+    try:
+        from _json import scanstring
+    except ImportError:
+        return None
+
+    token = '"' + key + '"'
+    values = []
+    pos = raw.find(token)
+    while pos != -1:
+        cursor = pos + len(token)
+        while cursor < len(raw) and raw[cursor] in ' \t\r\n':
+            cursor += 1
+        if cursor < len(raw) and raw[cursor] == ':':
+            cursor += 1
+            while cursor < len(raw) and raw[cursor] in ' \t\r\n':
+                cursor += 1
+            if cursor >= len(raw) or raw[cursor] != '"':
+                return None
+            try:
+                value, cursor = scanstring(raw, cursor + 1, True)
+            except ValueError:
+                return None
+            values.append(value)
+        pos = raw.find(token, cursor)
+    return values
+
+
+def _peek_agent():
+    """(known, agent name) of the active task, resolved like current_task() without json"""
+    agent = os.environ.get('DOOM_AGENT_NAME') or os.environ.get('DOOM_AGENT')
+    if agent:
+        return True, agent
+    try:
+        with open(current_task_path()) as f:
+            names = peek_string_field(f.read(), 'agent_name')
+    except OSError:
+        return True, None
+    if names is None:
+        return False, None
+    return True, names[0] if names else None
+
+
+def is_fast_path_tool(raw: str) -> bool:
+    """
+    True for read-only tools whose paths all resolve inside the project and
+    that the compiled policy allows: the agent's tool set and project-relative
+    forbidden paths still apply, without parsing the payload or loading the handler.
+    """
+    tool_names = peek_string_field(raw, 'tool_name')
+    if not tool_names or len(tool_names) != 1 or tool_names[0] not in READ_ONLY_TOOLS:
+        return False
+
+    root = os.path.abspath(project_root())
+    touched = []
+    for key in PATH_KEYS:
+        values = peek_string_field(raw, key)
+        if values is None:
+            return False
+        for value in values:
+            if value.startswith('~') or '..' in value:
+                return False
+            if os.path.isabs(value) and value != root and not value.startswith(root + os.sep):
+                return False
+            touched.append((key, value))
+
+    known, agent = _peek_agent()
+    if not known:
+        return False
+    from doom import policy
+    compiled = policy.load(root)
+    if compiled.check(agent, tool_names[0], {}):
+        return False
+    return not any(compiled.check(agent, tool_names[0], {key: value}) for key, value in touched)
+
+
+def current_task() -> dict:
+    """Resolve the active task from the environment or the current-task pointer"""
+    task = {}
+    pointer = current_task_path()
+    if os.path.exists(pointer):
+        import json
+        try:
+            with open(pointer) as f:
+                task = json.load(f)
+        except (OSError, ValueError):
+            task = {}
+
+    if os.environ.get('DOOM_TASK_ID'):
+        task['task_id'] = os.environ['DOOM_TASK_ID']
+    agent = os.environ.get('DOOM_AGENT_NAME') or os.environ.get('DOOM_AGENT')
+    if agent:
+        task['agent_name'] = agent
+    return task
+
+
+def emit(payload: dict) -> None:
+    """Write a JSON response for Claude Code on stdout"""
+    import json
+    sys.stdout.write(json.dumps(payload) + '\n')
+
+
+def run(hook: str, module: str, data: dict) -> int:
+    """Import and run a handler under the hook limits, recording its latency and resource use"""
+    import time
+    from doom import resources
+    resources.limit_self('hooks')
+    usage = resources.start()
+    start = time.time()
+    # Stop clears the task pointer and UserPromptSubmit creates it: look before and after
+    task_id = current_task().get('task_id')
+    try:
+        return __import__(module, fromlist=['main']).main(data)
+    finally:
+        from doom import metrics, trace
+        end = time.time()
+        metrics.observe('doom_hook_duration_seconds', end - start, hook=hook)
+        task_id = task_id or current_task().get('task_id')
+        if task_id:
+            args = {'tool_name': data['tool_name']} if data.get('tool_name') else {}
+            trace.add_span(task_id, hook, 'hook', start, end, **args)
+        resources.finish(usage, 'hook', hook, task_id, whole_process=True)
+        trace.flush()
+        resources.flush()
+        metrics.maybe_render()
@@ -0,0 +1,62 @@
+"""
+PostToolUse handler
+
+Records one tool_use event per tool call for the active task, counts it in
+doom.metrics and charges the call's estimated tokens to the task's budget
+counter.
+"""
+
+import sys
+from typing import Dict
+
+from doom import budget, events, metrics
+from doom.hooks import current_task, emit
+
+
+def tool_status(data: Dict) -> str:
+    """Infer success/failure from the tool response Claude Code passes back"""
+    response = data.get('tool_response')
+    if isinstance(response, dict):
+        if response.get('is_error') or response.get('error'):
+            return 'failure'
+        if response.get('success') is False:
+            return 'failure'
+    return 'success'
+
+
+def main(data: Dict) -> int:
+    task = current_task()
+    task_id = task.get('task_id')
+    if not task_id:
+        return 0
+
+    status = tool_status(data)
+    events.record(
+        'tool_use',
+        task_id=task_id,
+        agent_name=task.get('agent_name'),
+        tool_name=data.get('tool_name'),
+        status=status,
+    )
+    metrics.inc('doom_tool_calls_total', tool=data.get('tool_name') or 'unknown', status=status)
+    charge_budget(task, data)
+    return 0
+
+
+def charge_budget(task: Dict, data: Dict) -> None:
+    """Add the call to the usage counter; warn or block when a budget is crossed"""
+    tokens = budget.estimate_tokens(data.get('tool_input')) + budget.estimate_tokens(data.get('tool_response'))
+    usage = budget.record_usage(task['task_id'], tokens)
+    if not usage['transition']:
+        return
+
+    totals = budget.totals(usage)
+    events.record(f"budget_{usage['transition']}", task_id=task['task_id'],
+                  agent_name=task.get('agent_name'), **totals)
+    message = (f"{totals['tokens_used']}/{totals['max_tokens']} tokens, "
+               f"{totals['duration_ms'] // 1000}s/{(totals['timeout_ms'] or 0) // 1000}s")
+    if usage['transition'] == 'exceeded' and usage['enforce']:
+        emit({'decision': 'block',
+              'reason': f"Task budget exceeded ({message}). Wrap up and stop; further tool calls are blocked."})
+    else:
+        print(f"[Doom-RLVR] {task['task_id']} budget {usage['transition']}: {message}", file=sys.stderr)
@@ -0,0 +1,25 @@
+"""
+PreToolUse handler (pre-check)
+
+Validates a tool call against the assigned agent's permissions, the sandbox
+forbidden paths, the command whitelist and the forbidden command list, using
+the compiled policy tables from doom.policy, and stops tasks that have run
+over their token or time budget.
+"""
+
+from doom import budget, policy
+from doom.hooks import current_task, emit
+
+
+def main(data: dict) -> int:
+    tool_name = data.get('tool_name', '')
+    tool_input = data.get('tool_input') or {}
+    task = current_task()
+    agent_name = task.get('agent_name')
+
+    reason = policy.load().check(agent_name, tool_name, tool_input)
+    if not reason and task.get('task_id') and budget.blocks_tools(task['task_id']):
+        reason = f"Task {task['task_id']} has exceeded its token/time budget"
+    if reason:
+        emit({'decision': 'block', 'reason': reason})
+    return 0
@@ -0,0 +1,132 @@
+"""
+Stop handler
+
+Evaluates the active task in-process through doom.evaluate(), which appends
+the result to the scoreboard, then closes the task, bumps the sprint
+counters, records feedback for the weak reward components, adds the task to
+the similar-task index and updates the optimization template statistics and
+the task metrics. A task that ran past its time budget is evaluated as a
+timeout unless the payload says otherwise.
+
+With deferred evaluation on, the task is queued in doom.spool instead and
+the background drainer calls finish_task() once the reward is known.
+"""
+
+import json
+import sys
+from datetime import datetime
+from typing import Dict
+
+from doom import agents, budget, feedback, metrics, paths, similar, spool, sprints, templates
+from doom.hooks import current_task
+
+
+def update_task_metadata(task_id: str, result: Dict) -> Dict:
+    metadata_file = paths.task_dir(task_id) / 'metadata.json'
+    metadata = {}
+    if metadata_file.exists():
+        with open(metadata_file) as f:
+            metadata = json.load(f)
+
+    metadata.update({
+        'status': 'completed' if result['task_status'] == 'completed' else result['task_status'],
+        'reward': result['reward'],
+        'evaluation': 'final',
+        'completed_at': datetime.utcnow().isoformat(),
+    })
+    if result.get('usage'):
+        metadata['tokens_used'] = result['usage']['tokens_used']
+        metadata['duration_ms'] = result['usage']['duration_ms']
+    paths.ensure_dir(metadata_file.parent)
+    with open(metadata_file, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+
+def mark_pending(task_id: str, entry: Dict) -> None:
+    """Task metadata while its evaluation waits in the spool"""
+    metadata_file = paths.task_dir(task_id) / 'metadata.json'
+    metadata = {}
+    if metadata_file.exists():
+        with open(metadata_file) as f:
+            metadata = json.load(f)
+    metadata.update({
+        'status': entry['task_status'],
+        'reward': None,
+        'evaluation': 'pending',
+        'commit': entry['commit'],
+        'completed_at': entry['queued_at'],
+    })
+    paths.ensure_dir(metadata_file.parent)
+    with open(metadata_file, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+
+def close_current_task(task_id: str) -> None:
+    """Drop the current-task pointer if it still refers to this task"""
+    pointer = paths.current_task_file()
+    if not pointer.exists():
+        return
+    try:
+        with open(pointer) as f:
+            active = json.load(f).get('task_id')
+    except (OSError, ValueError):
+        active = None
+    if active == task_id:
+        pointer.unlink()
+
+
+def default_status(task_id: str) -> str:
+    usage = budget.load_usage(task_id)
+    if usage and (budget.fractions(usage)['time'] or 0) >= 1.0:
+        return 'timeout'
+    return 'completed'
+
+
+def record_metrics(result: Dict, task_type: str) -> None:
+    labels = {'type': task_type or 'unknown', 'agent_tier': agents.tier_from_name(result['agent_name'])}
+    metrics.inc('doom_tasks_total', status=result['task_status'], **labels)
+    if result.get('usage'):
+        metrics.observe('doom_task_duration_seconds', result['usage']['duration_ms'] / 1000, **labels)
+        metrics.observe('doom_task_tool_calls', result['usage']['tool_calls'], type=labels['type'])
+
+
+def finish_task(task_id: str, agent_name: str, task_type: str, result: Dict) -> Dict:
+    """Record an evaluated task: metadata, sprint counters, feedback, similar tasks, template stats and metrics"""
+    metadata = update_task_metadata(task_id, result)
+    task_type = task_type or metadata.get('task_type')
+    sprints.record_task_closed(task_type, result['reward'])
+    suggestions = feedback.generate_feedback(result)
+    feedback.record_feedback(task_id, agent_name, task_type, suggestions)
+    similar.add_task(dict(metadata, task_id=task_id, agent_name=agent_name), suggestions)
+    if metadata.get('template_id'):
+        templates.record_outcome(task_id, task_type, metadata['template_id'],
+                                 metadata.get('template_version', '1'), result['reward'])
+
+    record_metrics(result, task_type)
+    return metadata
+
+
+def main(data: Dict) -> int:
+    task = current_task()
+    task_id = task.get('task_id')
+    if not task_id:
+        return 0
+    agent_name = task.get('agent_name', 'unknown')
+    task_status = data.get('task_status') or default_status(task_id)
+
+    if spool.enabled():
+        entry = spool.enqueue(task_id, agent_name, task_status, task.get('task_type'))
+        mark_pending(task_id, entry)
+        close_current_task(task_id)
+        spool.start_drainer()
+        print(f"[Doom-RLVR] {task_id} queued for evaluation", file=sys.stderr)
+        return 0
+
+    from doom.evaluator import evaluate
+    result = evaluate(task_id, agent_name, task_status)
+    close_current_task(task_id)
+    finish_task(task_id, agent_name, task.get('task_type'), result)
+
+    print(f"[Doom-RLVR] {task_id} evaluated: reward={result['reward']:.2f}", file=sys.stderr)
+    return 0
@@ -0,0 +1,128 @@
+"""
+UserPromptSubmit handler
+
+Detects the task type and priority of a natural-language prompt, assigns an
+agent, records the task and returns the Doom-structured prompt. doom.prompts
+assembles it with lessons from feedback and the most similar past tasks,
+within the agent's token budget.
+"""
+
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, Tuple
+
+from doom import budget, feedback, metrics, paths, prompts, repo, similar, sprints, templates
+from doom.agents import AGENT_ROSTER
+from doom.hooks import emit
+
+# Checked in order; the first matching type wins
+TASK_KEYWORDS = [
+    ('security', ['security', 'vulnerability', 'vulnerable', 'xss', 'csrf', 'injection', 'exploit', 'cve']),
+    ('bugfix', ['fix', 'bug', 'error', 'broken', 'crash', 'fails', 'issue', 'not working']),
+    ('performance', ['slow', 'performance', 'optimize', 'optimization', 'latency', 'speed up', 'memory leak']),
+    ('refactor', ['refactor', 'restructure', 'clean up', 'cleanup', 'simplify', 'reorganize']),
+    ('feature', ['add', 'create', 'implement', 'build', 'new', 'support']),
+]
+
+PRIORITY_KEYWORDS = [
+    ('P0', ['urgent', 'critical', 'production down', 'outage', 'asap', 'emergency']),
+    ('P1', ['high priority', 'important', 'blocker', 'blocking']),
+    ('P3', ['minor', 'low priority', 'nice to have', 'when you have time']),
+]
+
+DEFAULT_TASK_TYPE = 'feature'
+DEFAULT_PRIORITY = 'P2'
+
+# Lessons from earlier feedback clusters added to each assignment
+LESSONS_IN_PROMPT = 3
+# Past tasks from the similar-task index added to each assignment
+SIMILAR_IN_PROMPT = 3
+
+
+def _matches(text: str, keyword: str) -> bool:
+    return re.search(r'\b' + re.escape(keyword) + r'\b', text) is not None
+
+
+def detect_task(prompt: str) -> Tuple[str, str]:
+    """Return (task_type, priority) for a prompt using keyword analysis"""
+    text = prompt.lower()
+
+    task_type = DEFAULT_TASK_TYPE
+    for candidate, keywords in TASK_KEYWORDS:
+        if any(_matches(text, k) for k in keywords):
+            task_type = candidate
+            break
+
+    priority = DEFAULT_PRIORITY
+    for candidate, keywords in PRIORITY_KEYWORDS:
+        if any(_matches(text, k) for k in keywords):
+            priority = candidate
+            break
+
+    return task_type, priority
+
+
+def select_agent(task_type: str, priority: str) -> str:
+    """Senior agents take P0/P1 work, juniors take the rest when available"""
+    roster = AGENT_ROSTER.get(task_type, AGENT_ROSTER[DEFAULT_TASK_TYPE])
+    if priority in ('P0', 'P1'):
+        return roster[0]
+    return roster[-1]
+
+
+def new_task_id(task_type: str) -> str:
+    return f"{task_type}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{os.urandom(2).hex()}"
+
+
+def save_task(task: Dict) -> None:
+    """Write task metadata and point the other hooks at it"""
+    task_dir = paths.ensure_dir(paths.task_dir(task['task_id']))
+    with open(task_dir / 'metadata.json', 'w') as f:
+        json.dump(task, f, indent=2)
+
+    pointer = {k: task[k] for k in ('task_id', 'agent_name', 'task_type', 'priority')}
+    with open(paths.current_task_file(), 'w') as f:
+        json.dump(pointer, f)
+
+
+def main(data: Dict) -> int:
+    prompt = data.get('prompt') or data.get('userPrompt') or ''
+    if not prompt.strip():
+        return 0
+
+    task_type, priority = detect_task(prompt)
+    task = {
+        'task_id': new_task_id(task_type),
+        'task_type': task_type,
+        'priority': priority,
+        'agent_name': select_agent(task_type, priority),
+        'status': 'in_progress',
+        'created_at': datetime.utcnow().isoformat(),
+        'prompt': prompt,
+        'constraints': budget.constraints_for(task_type),
+    }
+    # Read from .git directly; the evaluator diffs against it at Stop
+    baseline = repo.Repository(str(paths.project_root())).head()
+    if baseline:
+        task['baseline_commit'] = baseline
+    template = templates.template_for(task_type)
+    if template:
+        task['template_id'] = template['template_id']
+        task['template_version'] = template['version']
+    similar_tasks = similar.query(prompt, SIMILAR_IN_PROMPT)
+    if similar_tasks:
+        task['similar_tasks'] = [past['task_id'] for past in similar_tasks]
+    lessons = feedback.top_lessons(task['agent_name'], task_type, LESSONS_IN_PROMPT)
+    assembly = prompts.assemble(prompt, task, lessons, template, similar_tasks)
+    task['prompt_tokens'] = assembly['report']
+    save_task(task)
+    budget.start(task['task_id'], task['constraints'], prompt)
+    sprints.record_task_opened(task_type)
+    metrics.inc('doom_tasks_started_total', type=task_type)
+    metrics.inc('doom_prompt_tokens_total', assembly['report']['tokens'], type=task_type)
+    metrics.inc('doom_prompt_tokens_saved_total', assembly['report']['saved_tokens'], type=task_type)
+
+    emit({'userPrompt': assembly['text']})
+    return 0
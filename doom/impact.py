@@ -0,0 +1,229 @@
+"""
+Test impact selection
+
+A full coverage run that records which tests touched which files (coverage.py
+contexts, LCOV `TN:` records or a plain {"tests": {test: [files]}} export)
+is turned into a file -> tests map. Later evaluations run only the tests that
+cover the agent's changed files, plus changed test files themselves.
+
+A full run is forced when there is no map, when a build or test-config file
+changed, when the selection's reliability is low, every `full_run_every`
+evaluations, and when the map is older than `max_map_age_days`. Each full run
+also checks the old map: the share of tests the fresh map says were affected
+that the old map would have selected is kept as a running recall estimate.
+
+Layout under .claude/coverage/:
+    impact-map.json    {built_at, commit, tests: {test: [files]}, files: {file: [tests]},
+                        runs_since_full, recall: {checks, total}}
+"""
+
+import fnmatch
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from doom import paths
+
+MAP_FILE = 'impact-map.json'
+PER_TEST_CANDIDATES = ('coverage/per-test.json', 'coverage.json', 'coverage/lcov.info', 'lcov.info')
+
+DEFAULT_CONFIG = {
+    'enabled': True,
+    'full_run_every': 10,
+    'max_map_age_days': 7,
+    'min_reliability': 0.5,
+    'full_run_patterns': ['package.json', 'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'jest.config.*',
+                          'tsconfig*.json', 'babel.config.*', 'pyproject.toml', 'setup.cfg', 'setup.py',
+                          'requirements*.txt', 'conftest.py', 'pytest.ini', 'tox.ini', '.github/*'],
+    'ignore_patterns': ['*.md', '*.rst', '*.txt', 'docs/*', 'LICENSE*'],
+    'test_patterns': ['test_*.py', '*_test.py', '*.test.*', '*.spec.*', 'tests/*', 'test/*', '__tests__/*'],
+}
+
+
+def impact_config() -> Dict:
+    from doom.evaluator import load_config
+
+    try:
+        configured = load_config().get('test_impact') or {}
+    except FileNotFoundError:
+        configured = {}
+    return dict(DEFAULT_CONFIG, **configured)
+
+
+def map_file() -> Path:
+    return paths.coverage_dir() / MAP_FILE
+
+
+def _matches(path: str, patterns: Iterable[str]) -> bool:
+    name = path.rsplit('/', 1)[-1]
+    return any(fnmatch.fnmatch(path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def _relative(path: str, root: str) -> str:
+    if os.path.isabs(path):
+        path = os.path.relpath(path, root)
+    path = path.replace(os.sep, '/')
+    return path[2:] if path.startswith('./') else path
+
+
+def test_file_of(test_id: str) -> str:
+    """Test file of a pytest node id / coverage.py context ('tests/test_a.py::test_x|run')"""
+    return test_id.split('|', 1)[0].split('::', 1)[0]
+
+
+def parse_per_test(path, root: Optional[str] = None) -> Dict[str, Set[str]]:
+    """{test file: {source files it executed}} from a per-test coverage report"""
+    root = str(root or paths.project_root())
+    text = Path(path).read_text()
+    tests: Dict[str, Set[str]] = {}
+    if not text.lstrip().startswith('{'):
+        test, source, hit = '', None, False
+        for line in text.splitlines() + ['end_of_record']:
+            if line.startswith('TN:'):
+                test = line[3:].strip()
+            elif line.startswith('SF:'):
+                source, hit = _relative(line[3:].strip(), root), False
+            elif line.startswith('DA:') and not hit:
+                hit = int(line[3:].split(',')[1]) > 0
+            elif line.startswith('end_of_record'):
+                if test and source and hit:
+                    tests.setdefault(_relative(test_file_of(test), root), set()).add(source)
+                source = None
+        return tests
+
+    data = json.loads(text)
+    if 'tests' in data:
+        for test, files in data['tests'].items():
+            tests.setdefault(_relative(test_file_of(test), root), set()).update(_relative(f, root) for f in files)
+        return tests
+    for source, entry in data.get('files', {}).items():
+        for contexts in (entry.get('contexts') or {}).values():
+            for context in contexts:
+                if context:
+                    tests.setdefault(_relative(test_file_of(context), root), set()).add(_relative(source, root))
+    return tests
+
+
+def find_per_test_report(root: Optional[str] = None) -> Optional[Dict[str, Set[str]]]:
+    """The first candidate report that actually carries per-test data"""
+    root = str(root or paths.project_root())
+    for candidate in PER_TEST_CANDIDATES:
+        path = Path(root, candidate)
+        if path.exists():
+            try:
+                tests = parse_per_test(path, root)
+            except (OSError, ValueError, KeyError, IndexError):
+                continue
+            if tests:
+                return tests
+    return None
+
+
+def load_map() -> Dict:
+    try:
+        with open(map_file()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'tests': {}, 'files': {}, 'runs_since_full': 0, 'recall': {'checks': 0, 'total': 0.0}}
+
+
+def _save_map(mapping: Dict) -> None:
+    path = map_file()
+    paths.ensure_dir(path.parent)
+    tmp = path.parent / f'.{path.name}.{os.getpid()}'
+    with open(tmp, 'w') as f:
+        json.dump(mapping, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def affected_tests(mapping: Dict, changed: Iterable[str], config: Dict) -> Set[str]:
+    selected = set()
+    for path in changed:
+        selected.update(mapping['files'].get(path, ()))
+        if path in mapping['tests'] or _matches(path, config['test_patterns']):
+            selected.add(path)
+    return selected
+
+
+def estimated_recall(mapping: Dict) -> Optional[float]:
+    recall = mapping.get('recall') or {}
+    return recall['total'] / recall['checks'] if recall.get('checks') else None
+
+
+def select(changed: List[str], mapping: Optional[Dict] = None, config: Optional[Dict] = None) -> Dict:
+    """
+    Decide between a full run and the affected tests for a set of changed
+    files. 'reliability' is the share of changed source files the map knows,
+    scaled by the recall measured at earlier full runs.
+    """
+    config = config or impact_config()
+    mapping = mapping if mapping is not None else load_map()
+    relevant = [p for p in changed if not _matches(p, config['ignore_patterns'])]
+    sources = [p for p in relevant if p not in mapping['tests'] and not _matches(p, config['test_patterns'])]
+    unmapped = [p for p in sources if p not in mapping['files']]
+    mapped_fraction = 1 - len(unmapped) / len(sources) if sources else 1.0
+    recall = estimated_recall(mapping)
+    reliability = round(mapped_fraction * (recall if recall is not None else 1.0), 4)
+
+    reason = None
+    if not mapping['tests']:
+        reason = 'no test map yet'
+    elif any(_matches(p, config['full_run_patterns']) for p in changed):
+        reason = 'build or test configuration changed'
+    elif mapping.get('runs_since_full', 0) + 1 >= config['full_run_every']:
+        reason = f"periodic full run (every {config['full_run_every']} evaluations)"
+    elif mapping.get('built_at') and datetime.utcnow() - datetime.fromisoformat(mapping['built_at']) > \
+            timedelta(days=config['max_map_age_days']):
+        reason = 'test map is stale'
+    elif reliability < config['min_reliability']:
+        reason = f'selection reliability {reliability:.2f} below {config["min_reliability"]}'
+
+    tests = sorted(affected_tests(mapping, relevant, config)) if mapping['tests'] else []
+    return {
+        'mode': 'full' if reason else 'selected',
+        'reason': reason,
+        'tests': [] if reason else tests,
+        'total_tests': len(mapping['tests']),
+        'changed_files': relevant,
+        'unmapped_files': unmapped,
+        'mapped_fraction': round(mapped_fraction, 4),
+        'estimated_recall': round(recall, 4) if recall is not None else None,
+        'reliability': reliability,
+        'runs_since_full': mapping.get('runs_since_full', 0),
+    }
+
+
+def record_run(selection: Dict, tests: Optional[Dict[str, Set[str]]] = None,
+               commit: Optional[str] = None, config: Optional[Dict] = None) -> Dict:
+    """
+    Update the map after a run. A full run with per-test data rebuilds it,
+    first scoring what the old map would have selected for the same change.
+    """
+    config = config or impact_config()
+    mapping = load_map()
+    if selection['mode'] != 'full' or not tests:
+        # A full run without per-test data still restarts the periodic count
+        mapping['runs_since_full'] = mapping.get('runs_since_full', 0) + 1 if selection['mode'] != 'full' else 0
+        _save_map(mapping)
+        return mapping
+
+    files: Dict[str, List[str]] = {}
+    for test, sources in tests.items():
+        for source in sources:
+            files.setdefault(source, []).append(test)
+    fresh = {'tests': {t: sorted(s) for t, s in tests.items()}, 'files': {f: sorted(t) for f, t in files.items()}}
+
+    recall = dict(mapping.get('recall') or {'checks': 0, 'total': 0.0})
+    if mapping['tests']:
+        needed = affected_tests(fresh, selection['changed_files'], config)
+        if needed:
+            would_select = affected_tests(mapping, selection['changed_files'], config)
+            recall['checks'] += 1
+            recall['total'] += len(needed & would_select) / len(needed)
+
+    fresh.update({'built_at': datetime.utcnow().isoformat(), 'commit': commit, 'runs_since_full': 0,
+                  'recall': recall})
+    _save_map(fresh)
+    return fresh
@@ -0,0 +1,287 @@
+"""
+Time-windowed leaderboards from incremental buckets
+
+Every evaluation adds the reward to per-agent hourly, daily and all-time
+buckets, so a leaderboard for any metric (reward, tasks, success_rate) and
+period (24h, 7d, 30d, all) is a sum over a bounded number of buckets rather
+than a scan of rlvr.jsonl. Trend compares the window with the one before it.
+
+After each update every metric/period board is materialized into
+scoreboard/leaderboard.json; reads serve that snapshot directly and only
+re-rank from the buckets when the clock has moved into a new hour.
+
+Layout under .claude/scoreboard/:
+    leaderboard-buckets.json   per-agent buckets (hours, days, total, last_10)
+    leaderboard.json           materialized boards for every metric/period
+"""
+
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional
+
+from doom import paths
+
+BUCKETS_FILE = 'leaderboard-buckets.json'
+LEADERBOARD_FILE = 'leaderboard.json'
+
+METRICS = ('reward', 'tasks', 'success_rate')
+PERIODS = ('24h', '7d', '30d', 'all')
+
+# Buckets kept per agent: enough for the longest window and the one before it
+HOUR_RETENTION = 48
+DAY_RETENTION = 60
+
+# Relative change against the previous window that counts as up/down
+TREND_THRESHOLD = 0.05
+
+
+def _empty_bucket() -> Dict:
+    return {'tasks': 0, 'successes': 0, 'reward': 0.0}
+
+
+def _hour_key(moment: datetime) -> str:
+    return moment.strftime('%Y-%m-%dT%H')
+
+
+def _day_key(moment: datetime) -> str:
+    return moment.date().isoformat()
+
+
+def normalize_metric(metric: str) -> str:
+    """Accept the CLI spelling success-rate as well as success_rate"""
+    metric = metric.replace('-', '_')
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}'; expected one of {', '.join(METRICS)}")
+    return metric
+
+
+class Buckets:
+    """Per-agent reward buckets and the boards derived from them"""
+
+    def __init__(self, state: Optional[Dict] = None):
+        self.state = state or {'agents': {}}
+
+    def add(self, row: Dict) -> None:
+        """Fold one evaluation result (an rlvr.jsonl row) into the buckets"""
+        try:
+            moment = datetime.fromisoformat(row['timestamp'])
+            reward = float(row['reward'])
+        except (KeyError, TypeError, ValueError):
+            return
+        success = 1 if row.get('task_status', 'completed') == 'completed' else 0
+        agent = self.state['agents'].setdefault(row.get('agent_name') or 'unknown', {
+            'hours': {}, 'days': {}, 'total': _empty_bucket(), 'last_10': [], 'latest': ''
+        })
+
+        for bucket in (
+            agent['hours'].setdefault(_hour_key(moment), _empty_bucket()),
+            agent['days'].setdefault(_day_key(moment), _empty_bucket()),
+            agent['total'],
+        ):
+            bucket['tasks'] += 1
+            bucket['successes'] += success
+            bucket['reward'] += reward
+
+        if row['timestamp'] >= agent['latest']:
+            agent['latest'] = row['timestamp']
+            agent['last_10'] = (agent['last_10'] + [reward])[-10:]
+        self._prune(agent, datetime.fromisoformat(agent['latest']))
+
+    @staticmethod
+    def _prune(agent: Dict, newest: datetime) -> None:
+        oldest_hour = _hour_key(newest - timedelta(hours=HOUR_RETENTION))
+        oldest_day = _day_key(newest - timedelta(days=DAY_RETENTION))
+        for key in [k for k in agent['hours'] if k < oldest_hour]:
+            del agent['hours'][key]
+        for key in [k for k in agent['days'] if k < oldest_day]:
+            del agent['days'][key]
+
+    @staticmethod
+    def _sum(buckets: Dict, start: str, end: str) -> Dict:
+        """Sum of the buckets with start <= key < end"""
+        total = _empty_bucket()
+        for key, bucket in buckets.items():
+            if start <= key < end:
+                for field in total:
+                    total[field] += bucket[field]
+        return total
+
+    def windows(self, agent: Dict, period: str, now: datetime):
+        """
+        (value, latest, previous) bucket sums for a period ending now: the
+        window the metric is reported over, and the two windows the trend
+        compares. For "all" the trend compares the last two weeks.
+        """
+        if period == '24h':
+            end = _hour_key(now + timedelta(hours=1))
+            mid = _hour_key(now - timedelta(hours=23))
+            start = _hour_key(now - timedelta(hours=47))
+            current = self._sum(agent['hours'], mid, end)
+            return current, current, self._sum(agent['hours'], start, mid)
+
+        days = {'7d': 7, '30d': 30, 'all': 7}[period]
+        end = _day_key(now + timedelta(days=1))
+        mid = _day_key(now - timedelta(days=days - 1))
+        start = _day_key(now - timedelta(days=2 * days - 1))
+        current = self._sum(agent['days'], mid, end)
+        previous = self._sum(agent['days'], start, mid)
+        return (agent['total'] if period == 'all' else current), current, previous
+
+    @staticmethod
+    def value(bucket: Dict, metric: str) -> float:
+        if metric == 'tasks':
+            return bucket['tasks']
+        if not bucket['tasks']:
+            return 0.0
+        if metric == 'success_rate':
+            return round(bucket['successes'] / bucket['tasks'], 4)
+        return round(bucket['reward'] / bucket['tasks'], 4)
+
+    @staticmethod
+    def trend(latest: float, baseline: float, had_baseline: bool) -> str:
+        if not had_baseline:
+            return 'stable'
+        margin = abs(baseline) * TREND_THRESHOLD + 1e-9
+        if latest > baseline + margin:
+            return 'up'
+        if latest < baseline - margin:
+            return 'down'
+        return 'stable'
+
+    def board(self, metric: str, period: str, now: Optional[datetime] = None,
+              tiers: Optional[Dict[str, str]] = None) -> Dict:
+        """Ranked entries for one metric/period"""
+        from doom.agents import tier_from_name
+
+        metric = normalize_metric(metric)
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period '{period}'; expected one of {', '.join(PERIODS)}")
+        now = now or datetime.utcnow()
+        tiers = tiers or {}
+
+        entries = []
+        for name, agent in self.state['agents'].items():
+            current, recent, previous = self.windows(agent, period, now)
+            if not current['tasks']:
+                continue
+            entries.append({
+                'agent_name': name,
+                'tier': tiers.get(name) or tier_from_name(name),
+                'value': self.value(current, metric),
+                'trend': self.trend(self.value(recent, metric), self.value(previous, metric),
+                                    previous['tasks'] > 0),
+                'total_tasks': current['tasks'],
+                'success_rate': self.value(current, 'success_rate'),
+                'rolling_avg_reward': round(sum(agent['last_10']) / len(agent['last_10']), 4)
+                if agent['last_10'] else 0.0,
+            })
+
+        entries.sort(key=lambda e: (-e['value'], e['agent_name']))
+        count = len(entries)
+        for rank, entry in enumerate(entries, 1):
+            entry['rank'] = rank
+            entry['percentile'] = round(100.0 * (count - rank) / (count - 1), 1) if count > 1 else 100.0
+        return {'metric': metric, 'period': period, 'entries': entries}
+
+    def materialize(self, now: Optional[datetime] = None, tiers: Optional[Dict[str, str]] = None) -> Dict:
+        """Every metric/period board, plus the legacy per-agent summary"""
+        now = now or datetime.utcnow()
+        boards = {f'{m}:{p}': self.board(m, p, now, tiers) for m in METRICS for p in PERIODS}
+        return {
+            'updated_at': now.isoformat(),
+            'as_of': _hour_key(now),
+            'boards': boards,
+            # Shape read by older tooling: one row per agent, all-time
+            'agents': [{
+                'name': e['agent_name'],
+                'tier': e['tier'],
+                'rolling_avg_reward': e['rolling_avg_reward'],
+                'total_tasks': e['total_tasks'],
+            } for e in boards['reward:all']['entries']],
+        }
+
+
+def buckets_file():
+    return paths.scoreboard_dir() / BUCKETS_FILE
+
+
+def leaderboard_file():
+    return paths.scoreboard_dir() / LEADERBOARD_FILE
+
+
+def _agent_tiers() -> Dict[str, str]:
+    from doom.agents import load_agents
+    return {agent['name']: agent['tier'] for agent in load_agents()}
+
+
+@contextmanager
+def _locked_buckets() -> Iterator[Buckets]:
+    """Read-modify-write the bucket file under an exclusive lock"""
+    path = buckets_file()
+    paths.ensure_dir(path.parent)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, 'r+') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        raw = f.read()
+        buckets = Buckets(json.loads(raw) if raw.strip() else None)
+        yield buckets
+        f.seek(0)
+        f.truncate()
+        json.dump(buckets.state, f, separators=(',', ':'))
+        _write_snapshot(buckets.materialize(tiers=_agent_tiers()))
+
+
+def _write_snapshot(snapshot: Dict) -> None:
+    path = leaderboard_file()
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}')
+    with open(tmp, 'w') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def record_reward(result: Dict) -> None:
+    """Fold one evaluation result into the buckets and re-materialize"""
+    with _locked_buckets() as buckets:
+        buckets.add(result)
+
+
+def rebuild(rows: Iterable[Dict]) -> Dict:
+    """Replace the buckets with ones built from scratch (e.g. from rlvr.jsonl)"""
+    with _locked_buckets() as buckets:
+        buckets.state = {'agents': {}}
+        for row in sorted(rows, key=lambda r: r.get('timestamp', '')):
+            buckets.add(row)
+        return {'agents': len(buckets.state['agents'])}
+
+
+def load_buckets() -> Buckets:
+    path = buckets_file()
+    if not path.exists():
+        return Buckets()
+    with open(path) as f:
+        return Buckets(json.load(f))
+
+
+def get_board(metric: str = 'reward', period: str = '7d') -> Dict:
+    """Serve a board from the materialized snapshot"""
+    metric = normalize_metric(metric)
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period '{period}'; expected one of {', '.join(PERIODS)}")
+
+    path = leaderboard_file()
+    now = datetime.utcnow()
+    if path.exists():
+        with open(path) as f:
+            snapshot = json.load(f)
+        if snapshot.get('as_of') == _hour_key(now) and f'{metric}:{period}' in snapshot.get('boards', {}):
+            return snapshot['boards'][f'{metric}:{period}']
+
+    # The hour rolled over since the last reward: re-rank from the buckets
+    if not buckets_file().exists():
+        return {'metric': metric, 'period': period, 'entries': []}
+    snapshot = load_buckets().materialize(now, _agent_tiers())
+    _write_snapshot(snapshot)
+    return snapshot['boards'][f'{metric}:{period}']
@@ -0,0 +1,91 @@
+"""
+Pagination and NDJSON output for CLI listings
+
+Each listing command builds its rows as (position, row) pairs, read lazily
+from the underlying store and resuming after a given position. For
+scoreboard and event history, the position is a byte offset from
+events.scan_reverse(). For aggregated lists, such as leaderboard entries and
+lessons, it is an index.
+
+A Page draws at most `limit` rows and, when more remain, sets next_cursor
+to an opaque token for the position of the last row served. The cursor is
+tied to its command, and appended rows never shift later pages.
+
+`--format ndjson` writes one JSON object per line as rows are produced, with
+line buffering, so consumers see the first row at once and memory does not
+grow with the history. When more rows remain, the last line is
+{"next_cursor": "..."}.
+"""
+
+import base64
+import json
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def encode_cursor(command: str, position: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps([command, position]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, command: str) -> Any:
+    """The position in a cursor issued by `command`; ValueError if it is malformed or foreign"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        issued_by, position = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError(f"malformed cursor {cursor!r}")
+    if issued_by != command:
+        raise ValueError(f"cursor was issued by `doom {issued_by}`, not `doom {command}`")
+    return position
+
+
+def indexed(rows: Iterable[Dict], after: Optional[int] = None) -> Iterator[Tuple[int, Dict]]:
+    """(index, row) pairs of an in-memory list, after index `after`"""
+    for i, row in enumerate(rows):
+        if after is None or i > after:
+            yield i, row
+
+
+class Page:
+    """Up to `limit` rows drawn lazily from (position, row) pairs; None means every row"""
+
+    def __init__(self, command: str, pairs: Iterable[Tuple[Any, Dict]], limit: Optional[int] = None):
+        self.command = command
+        self.limit = limit
+        self.next_cursor: Optional[str] = None
+        self._pairs = iter(pairs)
+
+    def __iter__(self) -> Iterator[Dict]:
+        if self.limit is not None and self.limit <= 0:
+            return
+        served = 0
+        last = None
+        for position, row in self._pairs:
+            if self.limit is not None and served == self.limit:
+                # One row past the page: there is more to come
+                self.next_cursor = encode_cursor(self.command, last)
+                return
+            yield row
+            served += 1
+            last = position
+
+    def rows(self) -> List[Dict]:
+        return list(self)
+
+
+def write_ndjson(page: Page, stream=None) -> int:
+    """Stream a page as NDJSON, then the next cursor if more rows remain"""
+    stream = stream or sys.stdout
+    if hasattr(stream, 'reconfigure'):
+        stream.reconfigure(line_buffering=True)
+    for row in page:
+        stream.write(json.dumps(row) + '\n')
+    if page.next_cursor:
+        stream.write(json.dumps({'next_cursor': page.next_cursor}) + '\n')
+    return 0
+
+
+def report_cursor(page: Page) -> None:
+    """Table and JSON output keep stdout unchanged; the next cursor goes to stderr"""
+    if page.next_cursor:
+        print(f"More rows: --cursor {page.next_cursor}", file=sys.stderr)
@@ -0,0 +1,283 @@
+"""
+Counters, gauges and histograms shared across hook invocations
+
+Hooks are short-lived processes, so metric values live in a fixed-size
+memory-mapped state file instead of process memory. Each labelled series
+owns one slot, found by hashing its name and labels. An update locks the
+file, changes a few doubles in place and unlocks; nothing is rewritten.
+
+Every `DOOM_METRICS_INTERVAL` seconds (default 15) the next update renders
+all series as a text exposition file (`DOOM_METRICS_TEXTFILE`, default
+.claude/metrics/doom.prom) that node_exporter's textfile collector can
+scrape. `doom metrics` prints or writes the same text on demand.
+
+Layout of .claude/metrics/state.bin:
+    header   magic, version, slot count, last render time (64 bytes)
+    slots    series key (128 bytes), then 16 doubles: the value for counters
+             and gauges; bucket counts, sum and count for histograms
+"""
+
+import bisect
+import fcntl
+import mmap
+import os
+import struct
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from doom import paths
+
+STATE_FILE = 'state.bin'
+TEXTFILE = 'doom.prom'
+DEFAULT_INTERVAL = 15.0
+
+MAGIC = b'DOOMMET1'
+HEADER = struct.Struct('<8sIId')
+HEADER_SIZE = 64
+KEY_SIZE = 128
+VALUES = struct.Struct('<16d')
+SLOT_SIZE = KEY_SIZE + VALUES.size
+SLOTS = 1024
+# Histogram slots: finite bucket counts first, then sum and count
+SUM, COUNT = 14, 15
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMPONENT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+DURATION_BUCKETS = (30.0, 60.0, 300.0, 600.0, 1800.0, 3600.0, 7200.0, 14400.0)
+CALL_BUCKETS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+# Rewards are clamped to -5..5 by the evaluator
+REWARD_BUCKETS = (-5.0, -2.5, -1.0, -0.5, 0.0, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0, 5.0)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'doom_hook_duration_seconds': ('histogram', 'Hook handler latency', LATENCY_BUCKETS),
+    'doom_evaluator_component_duration_seconds': ('histogram', 'Time to compute each reward component',
+                                                  COMPONENT_BUCKETS),
+    'doom_tool_calls_total': ('counter', 'Tool calls recorded by PostToolUse', None),
+    'doom_task_tool_calls': ('histogram', 'Tool calls per finished task', CALL_BUCKETS),
+    'doom_tasks_started_total': ('counter', 'Tasks assigned by UserPromptSubmit', None),
+    'doom_prompt_tokens_total': ('counter', 'Estimated tokens of the enhanced prompts sent', None),
+    'doom_prompt_tokens_saved_total': ('counter', 'Estimated tokens removed by deduplication and the prompt budget',
+                                       None),
+    'doom_tasks_total': ('counter', 'Tasks evaluated at Stop', None),
+    'doom_task_duration_seconds': ('histogram', 'Task duration from assignment to Stop', DURATION_BUCKETS),
+    'doom_queue_depth': ('gauge', 'Tasks waiting in the deferred evaluation spool', None),
+    'doom_agent_reward': ('gauge', 'Most recent reward per agent', None),
+    'doom_reward': ('histogram', 'Reward distribution per agent', REWARD_BUCKETS),
+}
+
+
+def state_file():
+    return paths.metrics_dir() / STATE_FILE
+
+
+def textfile_path():
+    return os.environ.get('DOOM_METRICS_TEXTFILE') or str(paths.metrics_dir() / TEXTFILE)
+
+
+def render_interval() -> float:
+    try:
+        return float(os.environ.get('DOOM_METRICS_INTERVAL', DEFAULT_INTERVAL))
+    except ValueError:
+        return DEFAULT_INTERVAL
+
+
+def series_key(name: str, labels: Dict) -> bytes:
+    parts = [name] + [f'{k}={labels[k]}' for k in sorted(labels)]
+    return '\x1f'.join(parts).encode()
+
+
+def parse_key(key: bytes) -> Tuple[str, Dict[str, str]]:
+    name, *pairs = key.decode().split('\x1f')
+    return name, dict(pair.split('=', 1) for pair in pairs)
+
+
+class MetricsStore:
+    """The memory-mapped slot table; every access holds a flock on the file"""
+
+    def __init__(self, path):
+        self.path = path
+        paths.ensure_dir(path.parent)
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = HEADER_SIZE + SLOTS * SLOT_SIZE
+        with self.locked(fcntl.LOCK_EX):
+            if os.fstat(self.fd).st_size < size:
+                os.ftruncate(self.fd, size)
+                os.pwrite(self.fd, HEADER.pack(MAGIC, 1, SLOTS, 0.0), 0)
+        self.map = mmap.mmap(self.fd, size)
+        magic, _version, self.slots, _rendered = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a metrics state file")
+
+    @contextmanager
+    def locked(self, mode: int) -> Iterator[None]:
+        fcntl.flock(self.fd, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _find(self, key: bytes) -> Optional[int]:
+        """Offset of the key's slot, claiming a free one; None if the table is full"""
+        padded = key.ljust(KEY_SIZE, b'\0')
+        start = zlib.crc32(key) % self.slots
+        for probe in range(self.slots):
+            offset = HEADER_SIZE + (start + probe) % self.slots * SLOT_SIZE
+            stored = self.map[offset:offset + KEY_SIZE]
+            if stored == padded:
+                return offset
+            if stored[0] == 0:
+                self.map[offset:offset + KEY_SIZE] = padded
+                return offset
+        return None
+
+    def update(self, key: bytes, change) -> None:
+        if len(key) > KEY_SIZE:
+            return
+        with self.locked(fcntl.LOCK_EX):
+            offset = self._find(key)
+            if offset is None:
+                # A full table drops new series rather than failing the hook
+                return
+            values = list(VALUES.unpack_from(self.map, offset + KEY_SIZE))
+            change(values)
+            VALUES.pack_into(self.map, offset + KEY_SIZE, *values)
+
+    def series(self) -> List[Tuple[bytes, Tuple[float, ...]]]:
+        found = []
+        with self.locked(fcntl.LOCK_SH):
+            for slot in range(self.slots):
+                offset = HEADER_SIZE + slot * SLOT_SIZE
+                if self.map[offset]:
+                    key = self.map[offset:offset + KEY_SIZE].rstrip(b'\0')
+                    found.append((key, VALUES.unpack_from(self.map, offset + KEY_SIZE)))
+        return found
+
+    @property
+    def last_render(self) -> float:
+        return HEADER.unpack_from(self.map, 0)[3]
+
+    def mark_rendered(self, when: float) -> None:
+        struct.pack_into('<d', self.map, HEADER.size - 8, when)
+
+    def close(self) -> None:
+        self.map.close()
+        os.close(self.fd)
+
+
+_stores: Dict[str, MetricsStore] = {}
+
+
+def store() -> MetricsStore:
+    path = state_file()
+    if str(path) not in _stores:
+        _stores[str(path)] = MetricsStore(path)
+    return _stores[str(path)]
+
+
+def _update(name: str, labels: Dict, change) -> None:
+    if name not in METRICS:
+        raise KeyError(f"Unknown metric '{name}'")
+    try:
+        store().update(series_key(name, {k: str(v) for k, v in labels.items()}), change)
+    except (OSError, ValueError):
+        # Metrics never fail the hook or evaluation that records them
+        pass
+
+
+def inc(name: str, amount: float = 1.0, **labels) -> None:
+    def change(values):
+        values[0] += amount
+    _update(name, labels, change)
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    def change(values):
+        values[0] = value
+    _update(name, labels, change)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    buckets = METRICS[name][2]
+
+    def change(values):
+        index = bisect.bisect_left(buckets, value)
+        if index < len(buckets):
+            values[index] += 1
+        values[SUM] += value
+        values[COUNT] += 1
+    _update(name, labels, change)
+
+
+@contextmanager
+def timer(name: str, **labels) -> Iterator[None]:
+    """Observe the wall time of a block in a histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+def render() -> str:
+    """All series in the text exposition format, grouped by metric"""
+    by_name: Dict[str, List[Tuple[Dict, Tuple[float, ...]]]] = {}
+    for key, values in store().series():
+        name, labels = parse_key(key)
+        by_name.setdefault(name, []).append((labels, values))
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        if name not in by_name:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, values in sorted(by_name[name], key=lambda entry: sorted(entry[0].items())):
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {_number(values[0])}')
+                continue
+            cumulative = 0.0
+            for bound, count in zip(buckets, values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(dict(labels, le=_number(bound)))} {_number(cumulative)}')
+            lines.append(f'{name}_bucket{_labels(dict(labels, le="+Inf"))} {_number(values[COUNT])}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(values[SUM])}')
+            lines.append(f'{name}_count{_labels(labels)} {_number(values[COUNT])}')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def write_textfile(path: Optional[str] = None) -> str:
+    """Render to a temporary file and rename it over the textfile"""
+    path = path or textfile_path()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f'.{os.path.basename(path)}.{os.getpid()}')
+    with open(tmp, 'w') as f:
+        f.write(render())
+    os.replace(tmp, path)
+    store().mark_rendered(time.time())
+    return path
+
+
+def maybe_render() -> Optional[str]:
+    """Write the textfile if the last render is older than the interval"""
+    try:
+        if time.time() - store().last_render < render_interval():
+            return None
+        return write_textfile()
+    except (OSError, ValueError):
+        return None
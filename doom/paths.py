@@ -0,0 +1,75 @@
+"""
+Path helper for Doom-RLVR
+
+Every component resolves runtime locations through this module so that tests
+and alternate installs can relocate the whole state tree with CLAUDE_PROJECT_DIR.
+"""
+
+import os
+from pathlib import Path
+
+
+def project_root() -> Path:
+    """Project root as set by Claude Code, falling back to the cwd"""
+    return Path(os.environ.get('CLAUDE_PROJECT_DIR') or os.getcwd())
+
+
+def claude_dir() -> Path:
+    return project_root() / '.claude'
+
+
+def doom_dir() -> Path:
+    """Directory of the installed doom package (configs, prompts, agents)"""
+    return Path(__file__).resolve().parent
+
+
+def config_dir() -> Path:
+    return doom_dir() / 'config'
+
+
+def evaluator_config_files() -> list:
+    """Evaluator config candidates: the project override, then the packaged defaults"""
+    return [claude_dir() / 'evaluator-config.json', config_dir() / 'evaluator-config.json']
+
+
+def tasks_dir() -> Path:
+    return claude_dir() / 'tasks'
+
+
+def task_dir(task_id: str) -> Path:
+    return tasks_dir() / task_id
+
+
+def current_task_file() -> Path:
+    """Pointer to the active task, written by UserPromptSubmit"""
+    return tasks_dir() / 'current.json'
+
+
+def scoreboard_dir() -> Path:
+    return claude_dir() / 'scoreboard'
+
+
+def metrics_dir() -> Path:
+    return claude_dir() / 'metrics'
+
+
+def feedback_dir() -> Path:
+    return claude_dir() / 'feedback'
+
+
+def sprints_dir() -> Path:
+    return claude_dir() / 'sprints'
+
+
+def coverage_dir() -> Path:
+    return claude_dir() / 'coverage'
+
+
+def spool_dir() -> Path:
+    return claude_dir() / 'spool'
+
+
+def ensure_dir(path: Path) -> Path:
+    """Create a directory (and parents) if missing and return it"""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Compiled PreToolUse policy
+
+permissions.yml and sandbox-config.yml are compiled once into a marshal
+artifact holding per-agent tool sets, a path-prefix trie for forbidden paths,
+an Aho-Corasick automaton for forbidden command substrings and per-agent
+command-whitelist token tries. PreToolUse loads it with a single read and
+validates a call without parsing YAML or scanning lists.
+
+The artifact records the size and mtime of its sources and is rebuilt
+automatically when either file changes.
+"""
+
+import marshal
+import os
+import sys
+
+FORMAT_VERSION = 1
+ARTIFACT_NAME = 'policy.compiled'
+PERMISSIONS_FILE = 'permissions.yml'
+SANDBOX_FILE = 'sandbox-config.yml'
+
+DEFAULT_FORBIDDEN_COMMANDS = [
+    'rm -rf /',
+    'rm -rf ~',
+    'mkfs',
+    'dd if=/dev/zero',
+    ':(){ :|:& };:',
+    'chmod -R 777 /',
+]
+
+DEFAULT_FORBIDDEN_PATHS = [
+    '/etc/passwd',
+    '/etc/shadow',
+    '~/.ssh',
+    '~/.aws',
+]
+
+PATH_KEYS = ('file_path', 'path', 'notebook_path')
+
+# Terminal marker inside tries; never a valid path component or command token
+_END = ''
+
+
+def _claude_dir(project_root: str = None) -> str:
+    root = project_root or os.environ.get('CLAUDE_PROJECT_DIR') or os.getcwd()
+    return os.path.join(root, '.claude')
+
+
+def load_config_file(path: str) -> dict:
+    """Load a YAML config; JSON-formatted files work without PyYAML"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        text = f.read()
+    try:
+        import yaml
+    except ImportError:
+        import json
+        return json.loads(text) if text.strip() else {}
+    return yaml.safe_load(text) or {}
+
+
+def _signature(claude_dir: str) -> tuple:
+    """Identity of the inputs an artifact was built from"""
+    parts = [os.path.expanduser('~'), os.path.dirname(claude_dir)]
+    for name in (PERMISSIONS_FILE, SANDBOX_FILE):
+        try:
+            st = os.stat(os.path.join(claude_dir, name))
+            parts.append((st.st_size, st.st_mtime_ns))
+        except OSError:
+            parts.append(None)
+    return tuple(parts)
+
+
+def _normalize(path: str, root: str) -> str:
+    return os.path.normpath(os.path.join(root, os.path.expanduser(path)))
+
+
+def _path_parts(normalized: str) -> list:
+    return [p for p in normalized.split(os.sep) if p]
+
+
+def _build_path_trie(paths: list, root: str) -> dict:
+    trie = {}
+    for path in paths:
+        node = trie
+        for part in _path_parts(_normalize(path, root)):
+            node = node.setdefault(part, {})
+        node[_END] = path
+    return trie
+
+
+def _build_token_trie(commands: list) -> dict:
+    trie = {}
+    for command in commands:
+        tokens = command.split()
+        if not tokens:
+            continue
+        node = trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[_END] = command
+    return trie
+
+
+def _build_automaton(patterns: list) -> tuple:
+    """Aho-Corasick automaton as (goto, fail, output) tuples"""
+    goto = [{}]
+    output = [()]
+    for pattern in patterns:
+        if not pattern:
+            continue
+        state = 0
+        for ch in pattern:
+            nxt = goto[state].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[state][ch] = nxt
+                goto.append({})
+                output.append(())
+            state = nxt
+        output[state] = output[state] + (pattern,)
+
+    fail = [0] * len(goto)
+    queue = list(goto[0].values())
+    head = 0
+    while head < len(queue):
+        state = queue[head]
+        head += 1
+        for ch, nxt in goto[state].items():
+            queue.append(nxt)
+            f = fail[state]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0)
+            output[nxt] = output[nxt] + output[fail[nxt]]
+    return tuple(goto), tuple(fail), tuple(output)
+
+
+def compile_policy(project_root: str = None) -> dict:
+    """Compile the YAML sources into the artifact dictionary"""
+    claude_dir = _claude_dir(project_root)
+    root = os.path.dirname(claude_dir)
+    permissions = load_config_file(os.path.join(claude_dir, PERMISSIONS_FILE))
+    sandbox = load_config_file(os.path.join(claude_dir, SANDBOX_FILE))
+    filesystem = (sandbox.get('sandbox') or {}).get('filesystem') or {}
+    hooks_section = permissions.get('hooks') or {}
+
+    # hooks.allowed_commands is the project-wide whitelist for agents without their own
+    global_commands = hooks_section.get('allowed_commands') or []
+    global_trie = _build_token_trie(global_commands) if global_commands else None
+
+    agents = {}
+    for name, spec in (permissions.get('agents') or {}).items():
+        spec = spec or {}
+        allowed_tools = spec.get('allowed_tools') or []
+        allowed_commands = spec.get('allowed_commands') or []
+        agents[name] = (
+            frozenset(allowed_tools) if allowed_tools else None,
+            _build_token_trie(allowed_commands) if allowed_commands else global_trie,
+        )
+
+    forbidden_commands = permissions.get('forbidden_commands') or DEFAULT_FORBIDDEN_COMMANDS
+    forbidden_paths = (list(filesystem.get('forbidden_paths') or [])
+                       + list(hooks_section.get('forbidden_paths') or [])) or DEFAULT_FORBIDDEN_PATHS
+
+    return {
+        'version': FORMAT_VERSION,
+        'signature': _signature(claude_dir),
+        'root': root,
+        'agents': agents,
+        'default_agent': (None, global_trie),
+        'path_trie': _build_path_trie(forbidden_paths, root),
+        'command_automaton': _build_automaton(forbidden_commands),
+    }
+
+
+def write_artifact(compiled: dict, project_root: str = None) -> str:
+    """Atomically replace the artifact so concurrent hooks never see a partial file"""
+    claude_dir = _claude_dir(project_root)
+    os.makedirs(claude_dir, exist_ok=True)
+    target = os.path.join(claude_dir, ARTIFACT_NAME)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(marshal.dumps(compiled))
+    os.replace(tmp, target)
+    return target
+
+
+class CompiledPolicy:
+    __slots__ = ('root', 'agents', 'default_agent', 'path_trie', 'goto', 'fail', 'output')
+
+    def __init__(self, compiled: dict):
+        self.root = compiled['root']
+        self.agents = compiled['agents']
+        self.default_agent = compiled['default_agent']
+        self.path_trie = compiled['path_trie']
+        self.goto, self.fail, self.output = compiled['command_automaton']
+
+    def forbidden_path(self, value: str):
+        """Return the configured forbidden path covering `value`, if any"""
+        node = self.path_trie
+        if _END in node:
+            return node[_END]
+        for part in _path_parts(_normalize(value, self.root)):
+            node = node.get(part)
+            if node is None:
+                return None
+            if _END in node:
+                return node[_END]
+        return None
+
+    def forbidden_command(self, command: str):
+        """Return the first forbidden substring found in `command`, if any"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for ch in command:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                return output[state][0]
+        return None
+
+    @staticmethod
+    def whitelisted(trie: dict, command: str) -> bool:
+        node = trie
+        for token in command.split():
+            node = node.get(token)
+            if node is None:
+                return False
+            if _END in node:
+                return True
+        return False
+
+    def check(self, agent_name: str, tool_name: str, tool_input: dict):
+        """Return a denial reason, or None when the call is allowed"""
+        allowed_tools, command_trie = self.agents.get(agent_name) or self.default_agent
+
+        if allowed_tools is not None and tool_name not in allowed_tools:
+            return f"Tool '{tool_name}' is not permitted for {agent_name}"
+
+        for key in PATH_KEYS:
+            value = tool_input.get(key)
+            if isinstance(value, str) and value and self.forbidden_path(value):
+                return f"Access to '{value}' is forbidden by sandbox policy"
+
+        command = tool_input.get('command')
+        if tool_name == 'Bash' and isinstance(command, str):
+            forbidden = self.forbidden_command(command)
+            if forbidden:
+                return f"Forbidden command detected: {forbidden}"
+
+            stripped = command.strip()
+            if command_trie is not None and not self.whitelisted(command_trie, stripped):
+                return f"Command not in whitelist for {agent_name}: {stripped.split()[0] if stripped else ''}"
+
+        return None
+
+
+def load(project_root: str = None) -> CompiledPolicy:
+    """Load the compiled policy, rebuilding it when missing or stale"""
+    claude_dir = _claude_dir(project_root)
+    artifact = os.path.join(claude_dir, ARTIFACT_NAME)
+    compiled = None
+    try:
+        with open(artifact, 'rb') as f:
+            compiled = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        compiled = None
+
+    if (not isinstance(compiled, dict)
+            or compiled.get('version') != FORMAT_VERSION
+            or compiled.get('signature') != _signature(claude_dir)):
+        compiled = compile_policy(project_root)
+        try:
+            write_artifact(compiled, project_root)
+        except OSError:
+            pass  # Read-only checkout: still enforce, just recompile next time
+
+    return CompiledPolicy(compiled)
+
+
+def main():
+    """Compile the policy artifact for the current project"""
+    project_root = sys.argv[1] if len(sys.argv) > 1 else None
+    compiled = compile_policy(project_root)
+    target = write_artifact(compiled, project_root)
+    print(f"Compiled {len(compiled['agents'])} agents, "
+          f"{len(compiled['command_automaton'][0])} matcher states -> {target}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
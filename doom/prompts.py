@@ -0,0 +1,153 @@
+"""
+Token-budgeted assembly of the enhanced prompt
+
+UserPromptSubmit builds the assignment from sections: the assignment header,
+the optimization template, lessons from feedback, similar past tasks, the
+task id and the user's prompt. assemble() estimates tokens as
+budget.estimate_tokens does. It drops guidance already given by an earlier
+section, then trims the lowest-priority items until the prompt fits the
+budget. Similar tasks are trimmed first, then lessons, then the template.
+The header, task id and user's prompt are always kept.
+
+Sections run from most to least stable: agent and task type, template,
+lessons, similar tasks, then the task id just before the prompt. Two tasks
+for the same agent and type therefore share a byte-identical prefix that
+model-side prompt caching can reuse.
+
+The budget is `prompt.max_tokens` from evaluator-config.json. When the
+agent's definition sets `max_context_tokens`, the budget is capped at
+`context_share` of it. Each assembly reports its token count, the size of
+the undeduplicated and untrimmed prompt, and what was cut.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from doom import paths
+from doom.budget import estimate_tokens
+
+DEFAULT_MAX_TOKENS = 1000
+DEFAULT_CONTEXT_SHARE = 0.02
+
+# Optional sections, trimmed item by item in this order when over budget
+TRIM_ORDER = ('similar', 'lessons', 'template')
+
+
+def settings() -> Dict:
+    """The prompt section of the evaluator config, read without loading the evaluator"""
+    for candidate in paths.evaluator_config_files():
+        try:
+            with open(candidate) as f:
+                return json.load(f).get('prompt', {})
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError):
+            return {}
+    return {}
+
+
+def budget_for(agent_name: Optional[str], config: Optional[Dict] = None) -> int:
+    """Token budget for an agent's enhanced prompt"""
+    from doom import agents
+
+    config = settings() if config is None else config
+    limit = int(config.get('max_tokens', DEFAULT_MAX_TOKENS))
+    for agent in agents.load_agents():
+        if agent['name'] == agent_name and agent.get('max_context_tokens'):
+            try:
+                share = float(config.get('context_share', DEFAULT_CONTEXT_SHARE))
+                limit = min(limit, int(int(agent['max_context_tokens']) * share))
+            except (TypeError, ValueError):
+                pass
+            break
+    return limit
+
+
+def _key(text: str) -> str:
+    return re.sub(r'\s+', ' ', re.sub(r'[^a-z0-9 ]+', ' ', text.lower())).strip()
+
+
+def _similar_line(past: Dict, feedback: List[str]) -> str:
+    reward = f"reward {past['reward']:.2f}" if past.get('reward') is not None else 'no reward'
+    line = f"- {past['summary']} ({past.get('agent_name') or 'unknown'}, {reward})"
+    if feedback:
+        line += f"; feedback: {'; '.join(feedback)}"
+    return line
+
+
+def _sections(prompt: str, task: Dict, lessons: List[Dict], template: Optional[Dict],
+              similar_tasks: List[Dict], dedupe: bool) -> Tuple[Dict[str, List[str]], int]:
+    """({section: items}, guidance repeats dropped); items of one section are trimmed from the end"""
+    seen = set()
+    repeats = []
+
+    def fresh(text: str) -> bool:
+        key = _key(text)
+        if not dedupe:
+            return True
+        if not key or key in seen:
+            repeats.append(text)
+            return False
+        seen.add(key)
+        return True
+
+    sections = {
+        'assignment': ['[Doom-RLVR Agent Assignment]', f"Agent: {task['agent_name']}",
+                       f"Task Type: {task['task_type']}", f"Priority: {task['priority']}"],
+        # A checklist is only useful whole, so the template is a single item
+        'template': [template['text']] if template and fresh(template['text']) else [],
+        'lessons': [f"- {lesson['text']} (seen {lesson['count']}x)" for lesson in lessons if fresh(lesson['text'])],
+        'similar': [],
+        'task': [f"Task ID: {task['task_id']}", ''],
+        'prompt': [prompt],
+    }
+    for past in similar_tasks:
+        feedback = [text for text in past.get('feedback', []) if fresh(text)]
+        sections['similar'].append(_similar_line(past, feedback))
+    return sections, len(repeats)
+
+
+def _render(sections: Dict[str, List[str]]) -> str:
+    lines = []
+    for name, items in sections.items():
+        if not items:
+            continue
+        if name == 'lessons':
+            lines.append('Lessons from previous tasks:')
+        elif name == 'similar':
+            lines.append('Similar past tasks:')
+        lines.extend(items)
+    return '\n'.join(lines)
+
+
+def assemble(prompt: str, task: Dict, lessons: Optional[List[Dict]] = None, template: Optional[Dict] = None,
+             similar_tasks: Optional[List[Dict]] = None, max_tokens: Optional[int] = None) -> Dict:
+    """
+    {'text', 'report'} for the enhanced prompt. The report has the budget, the
+    tokens sent, the tokens of the full prompt, the saving, and the number of
+    items deduplicated and trimmed per section.
+    """
+    lessons, similar_tasks = lessons or [], similar_tasks or []
+    budget = max_tokens if max_tokens is not None else budget_for(task.get('agent_name'))
+    full, _ = _sections(prompt, task, lessons, template, similar_tasks, dedupe=False)
+    sections, deduplicated = _sections(prompt, task, lessons, template, similar_tasks, dedupe=True)
+
+    trimmed = {}
+    text = _render(sections)
+    for name in TRIM_ORDER:
+        while sections[name] and estimate_tokens(text) > budget:
+            sections[name].pop()
+            trimmed[name] = trimmed.get(name, 0) + 1
+            text = _render(sections)
+
+    full_tokens = estimate_tokens(_render(full))
+    tokens = estimate_tokens(text)
+    return {'text': text, 'report': {
+        'budget': budget,
+        'tokens': tokens,
+        'full_tokens': full_tokens,
+        'saved_tokens': full_tokens - tokens,
+        'deduplicated': deduplicated,
+        'trimmed': trimmed,
+    }}
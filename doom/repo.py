@@ -0,0 +1,309 @@
+"""
+Git access for evaluation
+
+A Repository keeps one long-running `git cat-file --batch` process and
+answers revision lookups, blob reads, tree listings and commit-to-commit
+changed-file lists through it, so an evaluation makes one object-store
+process launch no matter how many reads it does. The current branch and
+HEAD commit come straight from the files under .git, and working-tree
+changes come from a single `git status` whose result is kept for the life
+of the Repository.
+
+Commit pairs are immutable, so changed-file lists are cached by object id
+across Repository instances in the same process; symbolic revisions
+(HEAD, HEAD~1, branch names) are only cached per instance.
+"""
+
+import os
+import subprocess
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+TREE_MODE = b'40000'
+
+# Changed-file lists by (old tree id, new tree id), shared across instances
+DIFF_CACHE_SIZE = 256
+_diff_cache: 'OrderedDict[Tuple[str, str], List[str]]' = OrderedDict()
+
+
+class GitError(Exception):
+    """The git process failed or returned something unexpected"""
+
+
+def find_git_dir(root: str) -> Optional[str]:
+    """.git directory for a work tree, following `gitdir:` files of worktrees"""
+    path = os.path.join(root, '.git')
+    if os.path.isdir(path):
+        return path
+    if os.path.isfile(path):
+        with open(path) as f:
+            line = f.readline().strip()
+        if line.startswith('gitdir:'):
+            target = line[len('gitdir:'):].strip()
+            return target if os.path.isabs(target) else os.path.normpath(os.path.join(root, target))
+    return None
+
+
+class Repository:
+    """Batched, cached read access to one git work tree"""
+
+    def __init__(self, root: str):
+        self.root = str(root)
+        self.git_dir = find_git_dir(self.root)
+        # Number of git processes started, for diagnostics and tests
+        self.launches = 0
+        self._batch: Optional[subprocess.Popen] = None
+        self._revs: Dict[str, Optional[str]] = {}
+        self._status: Optional[Dict[str, str]] = None
+
+    def __enter__(self) -> 'Repository':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def is_repository(self) -> bool:
+        return self.git_dir is not None
+
+    def close(self) -> None:
+        if self._batch is None:
+            return
+        try:
+            self._batch.stdin.close()
+            self._batch.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._batch.kill()
+        self._batch = None
+
+    def _process(self) -> subprocess.Popen:
+        if self._batch is None or self._batch.poll() is not None:
+            if not self.is_repository:
+                raise GitError(f"{self.root} is not a git work tree")
+            self._batch = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=self.root,
+                                           stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                           stderr=subprocess.DEVNULL)
+            self.launches += 1
+        return self._batch
+
+    def read_object(self, spec: str) -> Optional[Tuple[str, str, bytes]]:
+        """(object id, type, contents) for any revision expression, or None if missing"""
+        if '\n' in spec:
+            raise ValueError(f"Object names cannot contain newlines: {spec!r}")
+        process = self._process()
+        try:
+            process.stdin.write(spec.encode() + b'\n')
+            process.stdin.flush()
+            header = process.stdout.readline()
+        except (BrokenPipeError, OSError) as e:
+            raise GitError(f"git cat-file exited: {e}") from e
+        if not header:
+            raise GitError("git cat-file exited without a reply")
+        parts = header.split()
+        if len(parts) != 3:
+            # "<spec> missing" or "<spec> ambiguous"
+            return None
+        object_id, object_type, size = parts[0].decode(), parts[1].decode(), int(parts[2])
+        contents = process.stdout.read(size)
+        process.stdout.read(1)  # trailing newline
+        return object_id, object_type, contents
+
+    def rev_parse(self, rev: str) -> Optional[str]:
+        """Object id of a revision, like `git rev-parse --verify <rev>^{commit}`"""
+        if rev not in self._revs:
+            if rev == 'HEAD' and self.git_dir:
+                self._revs[rev] = self.head() or self._object_id(f'{rev}^{{commit}}')
+            else:
+                self._revs[rev] = self._object_id(f'{rev}^{{commit}}')
+        return self._revs[rev]
+
+    def _object_id(self, spec: str) -> Optional[str]:
+        found = self.read_object(spec)
+        return found[0] if found else None
+
+    def read_file(self, rev: str, path: str) -> Optional[bytes]:
+        """Contents of a file at a revision, or None if it does not exist there"""
+        found = self.read_object(f'{rev}:{path}')
+        if not found or found[1] != 'blob':
+            return None
+        return found[2]
+
+    def current_branch(self) -> Optional[str]:
+        """Branch HEAD points at, read from .git/HEAD (None when detached)"""
+        head = self._read_git_file('HEAD')
+        if head and head.startswith('ref: refs/heads/'):
+            return head[len('ref: refs/heads/'):]
+        return None
+
+    def head(self) -> Optional[str]:
+        """Commit id of HEAD resolved from loose or packed refs without a process"""
+        head = self._read_git_file('HEAD')
+        if not head:
+            return None
+        if not head.startswith('ref: '):
+            return head
+        return self._resolve_ref(head[len('ref: '):])
+
+    def remote_url(self, name: str = 'origin') -> Optional[str]:
+        """URL of a remote, read from the repository config"""
+        if not self.git_dir:
+            return None
+        try:
+            with open(os.path.join(self._common_dir(), 'config')) as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+        section = None
+        for line in lines:
+            line = line.strip()
+            if line.startswith('['):
+                section = line
+            elif section == f'[remote "{name}"]':
+                key, _, value = line.partition('=')
+                if key.strip() == 'url':
+                    return value.strip()
+        return None
+
+    def _read_git_file(self, name: str) -> Optional[str]:
+        if not self.git_dir:
+            return None
+        try:
+            with open(os.path.join(self.git_dir, name)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _common_dir(self) -> str:
+        """Shared repository directory (differs from git_dir inside worktrees)"""
+        common = self._read_git_file('commondir')
+        if not common:
+            return self.git_dir
+        return common if os.path.isabs(common) else os.path.normpath(os.path.join(self.git_dir, common))
+
+    def _resolve_ref(self, ref: str) -> Optional[str]:
+        for base in (self.git_dir, self._common_dir()):
+            try:
+                with open(os.path.join(base, ref)) as f:
+                    return f.read().strip()
+            except OSError:
+                continue
+        try:
+            with open(os.path.join(self._common_dir(), 'packed-refs')) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        return parts[0]
+        except OSError:
+            pass
+        return None
+
+    def tree_entries(self, tree_id: str) -> Dict[bytes, Tuple[bytes, str]]:
+        """{name: (mode, object id)} of a tree object"""
+        found = self.read_object(tree_id)
+        if not found or found[1] != 'tree':
+            raise GitError(f"{tree_id} is not a tree")
+        data = found[2]
+        id_size = len(found[0]) // 2
+        entries = {}
+        pos = 0
+        while pos < len(data):
+            space = data.index(b' ', pos)
+            nul = data.index(b'\0', space)
+            mode, name = data[pos:space], data[space + 1:nul]
+            entries[name] = (mode, data[nul + 1:nul + 1 + id_size].hex())
+            pos = nul + 1 + id_size
+        return entries
+
+    def _tree_of(self, rev: str) -> Optional[str]:
+        return self._object_id(f'{rev}^{{tree}}')
+
+    def list_files(self, rev: str = 'HEAD') -> Dict[str, str]:
+        """{path: blob id} for every file at a revision"""
+        tree = self._tree_of(rev)
+        files: Dict[str, str] = {}
+        if tree:
+            self._walk(tree, '', files)
+        return files
+
+    def _walk(self, tree_id: str, prefix: str, files: Dict[str, str]) -> None:
+        for name, (mode, object_id) in self.tree_entries(tree_id).items():
+            path = prefix + name.decode('utf-8', 'surrogateescape')
+            if mode == TREE_MODE:
+                self._walk(object_id, path + '/', files)
+            else:
+                files[path] = object_id
+
+    def changed_files(self, old: str, new: str = 'HEAD') -> List[str]:
+        """
+        Paths that differ between two revisions, like
+        `git diff --name-only --no-renames old new`. Unchanged subtrees are
+        skipped by id, so the cost follows the size of the change.
+        """
+        old_tree, new_tree = self._tree_of(old), self._tree_of(new)
+        if old_tree is None or new_tree is None:
+            raise GitError(f"Unknown revision: {old if old_tree is None else new}")
+        key = (old_tree, new_tree)
+        if key in _diff_cache:
+            _diff_cache.move_to_end(key)
+            return list(_diff_cache[key])
+
+        changed: List[str] = []
+        self._diff_trees(old_tree, new_tree, '', changed)
+        changed.sort()
+        _diff_cache[key] = changed
+        if len(_diff_cache) > DIFF_CACHE_SIZE:
+            _diff_cache.popitem(last=False)
+        return list(changed)
+
+    def _diff_trees(self, old_id: Optional[str], new_id: Optional[str], prefix: str, changed: List[str]) -> None:
+        if old_id == new_id:
+            return
+        old = self.tree_entries(old_id) if old_id else {}
+        new = self.tree_entries(new_id) if new_id else {}
+        for name in old.keys() | new.keys():
+            path = prefix + name.decode('utf-8', 'surrogateescape')
+            before, after = old.get(name), new.get(name)
+            if before == after:
+                continue
+            old_tree = before[1] if before and before[0] == TREE_MODE else None
+            new_tree = after[1] if after and after[0] == TREE_MODE else None
+            if old_tree or new_tree:
+                self._diff_trees(old_tree, new_tree, path + '/', changed)
+            # A file on either side of the change (including file <-> directory swaps)
+            if (before and before[0] != TREE_MODE) or (after and after[0] != TREE_MODE):
+                changed.append(path)
+
+    def status(self) -> Dict[str, str]:
+        """{path: two-letter status} of uncommitted changes, from one `git status` per instance"""
+        if self._status is None:
+            if not self.is_repository:
+                raise GitError(f"{self.root} is not a git work tree")
+            self.launches += 1
+            result = subprocess.run(['git', 'status', '--porcelain=v1', '-z', '--untracked-files=all'],
+                                    cwd=self.root, capture_output=True, stdin=subprocess.DEVNULL)
+            if result.returncode != 0:
+                raise GitError(result.stderr.decode(errors='replace').strip())
+            self._status = {}
+            records = result.stdout.split(b'\0')
+            i = 0
+            while i < len(records):
+                record = records[i]
+                i += 1
+                if len(record) < 4:
+                    continue
+                code = record[:2].decode()
+                self._status[record[3:].decode('utf-8', 'surrogateescape')] = code
+                if code[0] in 'RC':
+                    # Renames and copies are followed by the source path
+                    i += 1
+        return dict(self._status)
+
+    def is_dirty(self) -> bool:
+        """Uncommitted changes in tracked files, like `! git diff --quiet HEAD`"""
+        return any(code != '??' for code in self.status().values())
+
+    def changes_since(self, base: str) -> List[str]:
+        """Committed changes since `base` plus uncommitted ones in the work tree"""
+        paths = set(self.changed_files(base, 'HEAD')) if self.rev_parse(base) else set()
+        paths.update(self.status())
+        return sorted(paths)
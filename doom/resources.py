@@ -0,0 +1,360 @@
+"""
+Resource limits and accounting for hooks and evaluator commands
+
+Limits come from the `resources` section of evaluator-config.json, one block
+per scope, with the fields of ResourceLimits in specs/data-models.ts:
+    max_memory_mb      memory.max in a cgroup, otherwise RLIMIT_DATA
+    max_cpu_percent    cpu.max; cgroup only, since a CPU-time rlimit kills with SIGXCPU instead of throttling
+    max_cpu_seconds    RLIMIT_CPU
+    max_processes      pids.max; cgroup only, since RLIMIT_NPROC counts every process of the user
+
+When `cgroup_parent` names a delegated cgroup v2 directory, each evaluator
+command runs in its own child cgroup. Otherwise the limits are applied with
+setrlimit in the child before exec. Hook processes lower their own soft
+limits when a handler starts, and restore_self() puts them back in children
+that outlive the hook, such as the spool drainer, and in evaluator commands
+before their own limits apply. Set `enforce` to false to
+measure without limiting.
+
+Every hook run and evaluator component is measured from getrusage: CPU time
+of the process and its reaped children, block I/O, and peak RSS. run()
+reaps its commands itself with os.wait4, so a component's peak is that of
+its own commands.
+Records are buffered and appended in one write per hook or evaluation;
+`doom resources` ranks the heaviest.
+
+Layout under .claude/metrics/:
+    resources.jsonl    {timestamp, scope, name, task_id, wall_seconds, cpu_seconds, max_rss_kb,
+                        read_bytes, write_bytes[, enforced, killed_by]}
+"""
+
+import itertools
+import json
+import os
+import resource
+import signal
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from doom import events, paths
+
+RESOURCES_FILE = 'resources.jsonl'
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+RSS_UNIT = 1024 if sys.platform == 'darwin' else 1
+BLOCK_SIZE = 512
+
+_active: List[Dict] = []
+_pending: List[Dict] = []
+_cgroup_ids = itertools.count()
+# Soft limits of this process before limit_self() lowered them
+_saved: Dict[int, int] = {}
+
+
+def resources_file() -> Path:
+    return paths.metrics_dir() / RESOURCES_FILE
+
+
+def settings() -> Dict:
+    """The resources section of the evaluator config, read without loading the evaluator"""
+    for candidate in paths.evaluator_config_files():
+        try:
+            with open(candidate) as f:
+                return json.load(f).get('resources', {})
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError):
+            return {}
+    return {}
+
+
+def limits_for(scope: str, config: Optional[Dict] = None) -> Optional[Dict]:
+    """Limits for `scope` (hooks or evaluator), or None when enforcement is off"""
+    section = settings() if config is None else config.get('resources', {})
+    if not section.get('enforce', True) or not section.get(scope):
+        return None
+    return dict(section[scope], cgroup_parent=section.get('cgroup_parent'))
+
+
+def _rlimits(limits: Dict) -> List[tuple]:
+    """(resource, soft limit) pairs for setrlimit"""
+    pairs = []
+    if limits.get('max_memory_mb'):
+        pairs.append((resource.RLIMIT_DATA, int(limits['max_memory_mb'] * 1024 * 1024)))
+    if limits.get('max_cpu_seconds'):
+        pairs.append((resource.RLIMIT_CPU, int(limits['max_cpu_seconds'])))
+    return pairs
+
+
+def _lower(pairs: List[tuple]) -> None:
+    """Lower soft limits only, so children may still set their own up to the hard limit"""
+    for which, value in pairs:
+        soft, hard = resource.getrlimit(which)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        if soft == resource.RLIM_INFINITY or value < soft:
+            resource.setrlimit(which, (value, hard))
+
+
+def limit_self(scope: str = 'hooks') -> Optional[Dict]:
+    """Apply a scope's limits to the running process; returns them, or None when off"""
+    limits = limits_for(scope)
+    if limits:
+        try:
+            pairs = _rlimits(limits)
+            for which, _ in pairs:
+                _saved.setdefault(which, resource.getrlimit(which)[0])
+            _lower(pairs)
+        except (ValueError, OSError):
+            return None
+    return limits
+
+
+def restore_self() -> None:
+    """Put back the soft limits limit_self() lowered; a preexec_fn for long-lived children"""
+    for which, soft in _saved.items():
+        try:
+            resource.setrlimit(which, (soft, resource.getrlimit(which)[1]))
+        except (ValueError, OSError):
+            pass
+
+
+def _make_cgroup(limits: Dict) -> Optional[Path]:
+    """A child cgroup of cgroup_parent carrying the limits, or None when unavailable"""
+    parent = Path(limits['cgroup_parent'])
+    if not (parent / 'cgroup.controllers').exists():
+        return None
+    group = parent / f'doom-{os.getpid()}-{next(_cgroup_ids)}'
+    controls = {}
+    if limits.get('max_memory_mb'):
+        controls['memory.max'] = str(int(limits['max_memory_mb'] * 1024 * 1024))
+    if limits.get('max_cpu_percent'):
+        controls['cpu.max'] = f"{int(limits['max_cpu_percent'] * 1000)} 100000"
+    if limits.get('max_processes'):
+        controls['pids.max'] = str(int(limits['max_processes']))
+    try:
+        group.mkdir()
+        for name, value in controls.items():
+            (group / name).write_text(value)
+    except OSError as e:
+        print(f"[Doom-RLVR] cgroup {group} unavailable, using setrlimit: {e}", file=sys.stderr)
+        _remove_cgroup(group)
+        return None
+    return group
+
+
+def _remove_cgroup(group: Path) -> None:
+    try:
+        group.rmdir()
+    except OSError:
+        pass
+
+
+def _cgroup_usage(group: Path) -> Dict:
+    usage = {}
+    try:
+        usage['max_rss_kb'] = int((group / 'memory.peak').read_text()) // 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        oom = dict(line.split() for line in (group / 'memory.events').read_text().splitlines())
+        if int(oom.get('oom_kill', 0)):
+            usage['killed_by'] = 'oom'
+    except (OSError, ValueError):
+        pass
+    return usage
+
+
+def _exit_code(status: int) -> int:
+    """Popen's returncode for a wait status: the exit code, or minus the signal"""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _reap(process: subprocess.Popen, timeout: Optional[float]):
+    """wait4 for the child, polling until `timeout`; sets returncode so Popen never reaps it"""
+    if timeout is None:
+        _, status, usage = os.wait4(process.pid, 0)
+    else:
+        deadline = time.monotonic() + timeout
+        delay = 0.0005
+        while True:
+            pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.05)
+    process.returncode = _exit_code(status)
+    return usage
+
+
+def _communicate(process: subprocess.Popen, timeout: Optional[float]):
+    """
+    (stdout, stderr, rusage, timed_out): the pipes are read in threads while
+    the child is reaped with wait4. On timeout the child is killed by pid,
+    since Popen.kill() would poll and reap it, losing its rusage.
+    """
+    output: Dict[str, object] = {}
+
+    def read(name, stream):
+        output[name] = stream.read()
+
+    if process.stdin:
+        process.stdin.close()
+    readers = [threading.Thread(target=read, args=(name, stream), daemon=True)
+               for name, stream in (('stdout', process.stdout), ('stderr', process.stderr)) if stream]
+    for reader in readers:
+        reader.start()
+    timed_out = False
+    try:
+        usage = _reap(process, timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        os.kill(process.pid, signal.SIGKILL)
+        usage = _reap(process, None)
+    for reader in readers:
+        reader.join()
+    return output.get('stdout'), output.get('stderr'), usage, timed_out
+
+
+def run(args: List[str], limits: Optional[Dict] = None, timeout: Optional[float] = None,
+        capture_output: bool = False, **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run under `limits`, folding the command's usage into the active measurements"""
+    group = _make_cgroup(limits) if limits and limits.get('cgroup_parent') else None
+    pairs = _rlimits(limits) if limits and group is None else []
+    procs = str(group / 'cgroup.procs') if group else None
+
+    def enter_limits():
+        # An inline Stop runs under the hook's own limits; the command gets only its scope's
+        restore_self()
+        if procs:
+            with open(procs, 'w') as f:
+                f.write(str(os.getpid()))
+        _lower(pairs)
+
+    if capture_output:
+        kwargs.update(stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        process = subprocess.Popen(args, preexec_fn=enter_limits if limits or _saved else None, **kwargs)
+    except OSError:
+        if group:
+            _remove_cgroup(group)
+        raise
+    rusage = None
+    try:
+        with process:
+            stdout, stderr, rusage, timed_out = _communicate(process, timeout)
+            if timed_out:
+                raise subprocess.TimeoutExpired(args, timeout, stdout, stderr)
+    finally:
+        usage = {'max_rss_kb': rusage.ru_maxrss // RSS_UNIT} if rusage else {}
+        if process.returncode is not None and process.returncode < 0:
+            try:
+                usage['killed_by'] = signal.Signals(-process.returncode).name
+            except ValueError:
+                usage['killed_by'] = f'signal {-process.returncode}'
+        if group:
+            usage.update(_cgroup_usage(group))
+            _remove_cgroup(group)
+        for measurement in _active:
+            measurement['max_rss_kb'] = max(measurement['max_rss_kb'], usage.get('max_rss_kb', 0))
+            if limits:
+                measurement['enforced'] = 'cgroup' if group else 'rlimit'
+            if usage.get('killed_by'):
+                measurement['killed_by'] = usage['killed_by']
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+def start() -> Dict:
+    """Open a measurement; pass it to finish() once the measured work is done"""
+    current = {'max_rss_kb': 0, 'started': time.time(), 'self': resource.getrusage(resource.RUSAGE_SELF),
+               'children': resource.getrusage(resource.RUSAGE_CHILDREN)}
+    _active.append(current)
+    return current
+
+
+def finish(current: Dict, scope: str, name: str, task_id: Optional[str] = None,
+           whole_process: bool = False) -> Dict:
+    """
+    Buffer the CPU time, block I/O and peak RSS since start(). whole_process
+    takes the peak of the process itself, which is right for a hook run (one
+    process per invocation) but not for a component of a longer process.
+    """
+    if current in _active:
+        _active.remove(current)
+    own, children = current['self'], current['children']
+    own_end, children_end = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    spans = ((own, own_end), (children, children_end))
+    cpu = sum(getattr(end, f) - getattr(begin, f) for begin, end in spans for f in ('ru_utime', 'ru_stime'))
+    blocks_in = sum(end.ru_inblock - begin.ru_inblock for begin, end in spans)
+    blocks_out = sum(end.ru_oublock - begin.ru_oublock for begin, end in spans)
+    max_rss_kb = current['max_rss_kb']
+    if whole_process:
+        max_rss_kb = max(max_rss_kb, own_end.ru_maxrss // RSS_UNIT, children_end.ru_maxrss // RSS_UNIT)
+    record = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'scope': scope,
+        'name': name,
+        'task_id': task_id,
+        'wall_seconds': round(time.time() - current['started'], 4),
+        'cpu_seconds': round(cpu, 4),
+        'max_rss_kb': max_rss_kb,
+        'read_bytes': blocks_in * BLOCK_SIZE,
+        'write_bytes': blocks_out * BLOCK_SIZE,
+    }
+    record.update({k: current[k] for k in ('enforced', 'killed_by') if k in current})
+    _pending.append(record)
+    return record
+
+
+@contextmanager
+def measure(scope: str, name: str, task_id: Optional[str] = None) -> Iterator[Dict]:
+    """Measure a block, such as one evaluator component"""
+    current = start()
+    try:
+        yield current
+    finally:
+        finish(current, scope, name, task_id)
+
+
+def flush() -> None:
+    """Append buffered measurements in one write"""
+    if not _pending:
+        return
+    records = _pending[:]
+    del _pending[:]
+    try:
+        events.append_jsonl(resources_file(), records)
+    except OSError:
+        # Accounting never fails the hook that measured itself
+        pass
+
+
+def report(rows: List[Dict]) -> List[Dict]:
+    """Per scope and name: runs, CPU, peak RSS and I/O, heaviest total CPU first"""
+    groups: Dict[tuple, Dict] = {}
+    for row in rows:
+        key = (row.get('scope'), row.get('name'))
+        group = groups.setdefault(key, {'scope': key[0], 'name': key[1], 'runs': 0, 'cpu_seconds': 0.0,
+                                        'wall_seconds': 0.0, 'max_rss_kb': 0, 'io_bytes': 0, 'killed': 0})
+        group['runs'] += 1
+        group['cpu_seconds'] += row.get('cpu_seconds', 0.0)
+        group['wall_seconds'] += row.get('wall_seconds', 0.0)
+        group['max_rss_kb'] = max(group['max_rss_kb'], row.get('max_rss_kb') or 0)
+        group['io_bytes'] += row.get('read_bytes', 0) + row.get('write_bytes', 0)
+        group['killed'] += 1 if row.get('killed_by') else 0
+    ranked = sorted(groups.values(), key=lambda g: (-g['cpu_seconds'], -g['max_rss_kb']))
+    for group in ranked:
+        group['cpu_mean'] = round(group['cpu_seconds'] / group['runs'], 4)
+        group['cpu_seconds'] = round(group['cpu_seconds'], 4)
+        group['wall_seconds'] = round(group['wall_seconds'], 4)
+    return ranked
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+doom CLI launcher
+
+Usage: python3 doom/scripts/doom-cli.py <command> [options]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from doom.cli import main  # noqa: E402
+
+if __name__ == '__main__':
+    sys.exit(main())
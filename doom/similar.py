@@ -0,0 +1,235 @@
+"""
+Similar-task retrieval with BM25 over past prompts
+
+Stop adds every evaluated task to an inverted index of its prompt and
+description. The index records the agent, reward and feedback it received.
+UserPromptSubmit ranks past tasks against the new prompt with BM25 and puts
+the top few into the assignment.
+
+The index is append-only and sharded so that neither side reads all of it:
+- postings are split over SHARDS files by a hash of the term, so a query
+  reads only the shards of its own terms
+- docs.idx has one fixed-width record (offset into docs.jsonl, length in
+  terms) per document id. A query reads it whole for N and the average
+  length, then seeks straight to the rows of the top hits
+- adding a task appends one row, one record and a few postings lines under
+  a lock. Nothing is rewritten
+
+A task evaluated again is added again; the newer document wins ties and
+older copies are skipped in results. `doom similar --rebuild` rebuilds the
+index from live and archived task metadata and the feedback histories.
+
+Layout under .claude/similar/:
+    docs.jsonl           {doc, task_id, agent_name, task_type, status, reward, completed_at, summary, feedback}
+    docs.idx             <offset:u64><length:u32> per doc id, little-endian
+    postings/<xx>.tsv    term<TAB>doc<TAB>tf lines
+    index.lock           held while adding
+"""
+
+import fcntl
+import json
+import math
+import os
+import re
+import shutil
+import struct
+import zlib
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from doom import paths
+
+SHARDS = 256
+K1 = 1.2
+B = 0.75
+SUMMARY_CHARS = 120
+FEEDBACK_PER_TASK = 3
+
+_RECORD = struct.Struct('<QI')
+_TOKEN = re.compile(r'[a-z0-9_]+')
+STOPWORDS = frozenset("""
+a an and are as at be but by can do for from has have in into is it its me my of on or our please so
+that the their them then there these this to up us was we were will with you your
+""".split())
+
+
+def index_dir() -> Path:
+    return paths.claude_dir() / 'similar'
+
+
+def docs_file() -> Path:
+    return index_dir() / 'docs.jsonl'
+
+
+def idx_file() -> Path:
+    return index_dir() / 'docs.idx'
+
+
+def postings_dir() -> Path:
+    return index_dir() / 'postings'
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _shard(term: str) -> str:
+    return f'{zlib.crc32(term.encode()) % SHARDS:02x}.tsv'
+
+
+def _text(metadata: Dict) -> str:
+    return ' '.join(filter(None, (metadata.get('description'), metadata.get('prompt'))))
+
+
+def _append(metadata: Dict, suggestions: Iterable[Dict]) -> Optional[int]:
+    """Add one document; the caller holds the index lock"""
+    terms = Counter(tokenize(_text(metadata)))
+    if not terms:
+        return None
+    feedback = []
+    for s in suggestions:
+        if s.get('suggestion') and s['suggestion'] not in feedback:
+            feedback.append(s['suggestion'])
+
+    # A record torn by a crash is dropped, so document ids stay aligned
+    size = idx_file().stat().st_size if idx_file().exists() else 0
+    if size % _RECORD.size:
+        os.truncate(idx_file(), size - size % _RECORD.size)
+    doc = size // _RECORD.size
+    row = {
+        'doc': doc,
+        'task_id': metadata.get('task_id'),
+        'agent_name': metadata.get('agent_name'),
+        'task_type': metadata.get('task_type'),
+        'status': metadata.get('status'),
+        'reward': metadata.get('reward'),
+        'completed_at': metadata.get('completed_at'),
+        'summary': ' '.join(_text(metadata).split())[:SUMMARY_CHARS],
+        'feedback': feedback[:FEEDBACK_PER_TASK],
+    }
+    # Row, then record, then postings: a crash in between leaves a document nothing points at
+    with open(docs_file(), 'ab') as f:
+        offset = f.tell()
+        f.write(json.dumps(row).encode() + b'\n')
+    with open(idx_file(), 'ab') as f:
+        f.write(_RECORD.pack(offset, sum(terms.values())))
+    by_shard: Dict[str, List[str]] = {}
+    for term, tf in terms.items():
+        by_shard.setdefault(_shard(term), []).append(f'{term}\t{doc}\t{tf}\n')
+    paths.ensure_dir(postings_dir())
+    for shard, lines in by_shard.items():
+        with open(postings_dir() / shard, 'a') as f:
+            f.write(''.join(lines))
+    return doc
+
+
+def _lock():
+    f = open(paths.ensure_dir(index_dir()) / 'index.lock', 'a')
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    return f
+
+
+def add_task(metadata: Dict, suggestions: Iterable[Dict] = ()) -> Optional[int]:
+    """Index a finished task with the feedback it received; returns its document id"""
+    with _lock():
+        return _append(metadata, suggestions)
+
+
+def iter_matches(text: str, exclude: Iterable[str] = ()) -> Iterator[Dict]:
+    """Past tasks matching `text`, best BM25 score first, each row read when it is reached"""
+    terms = set(tokenize(text))
+    try:
+        raw = idx_file().read_bytes()
+    except OSError:
+        return
+    records = list(_RECORD.iter_unpack(raw[:len(raw) - len(raw) % _RECORD.size]))
+    n = len(records)
+    if not n or not terms:
+        return
+    avgdl = sum(length for _, length in records) / n
+
+    wanted: Dict[str, set] = {}
+    for term in terms:
+        wanted.setdefault(_shard(term), set()).add(term)
+    postings: Dict[str, List[tuple]] = {}
+    for shard, shard_terms in wanted.items():
+        try:
+            with open(postings_dir() / shard) as f:
+                for line in f:
+                    term, _, rest = line.partition('\t')
+                    if term in shard_terms:
+                        doc, _, tf = rest.partition('\t')
+                        postings.setdefault(term, []).append((int(doc), int(tf)))
+        except (OSError, ValueError):
+            continue
+
+    scores: Dict[int, float] = {}
+    for hits in postings.values():
+        idf = math.log(1 + (n - len(hits) + 0.5) / (len(hits) + 0.5))
+        for doc, tf in hits:
+            if doc >= n:
+                continue
+            norm = K1 * (1 - B + B * records[doc][1] / avgdl)
+            scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+    seen = set(exclude)
+    with open(docs_file(), 'rb') as f:
+        for doc, score in sorted(scores.items(), key=lambda item: (-item[1], -item[0])):
+            f.seek(records[doc][0])
+            try:
+                row = json.loads(f.readline())
+            except ValueError:
+                continue
+            if row.get('task_id') in seen:
+                continue
+            seen.add(row.get('task_id'))
+            yield dict(row, score=round(score, 3))
+
+
+def query(text: str, k: int = 3, exclude: Iterable[str] = ()) -> List[Dict]:
+    """The k past tasks most similar to `text` by BM25, best first, each with its score"""
+    return list(islice(iter_matches(text, exclude), k))
+
+
+def _finished_tasks() -> List[Dict]:
+    """Metadata of every evaluated task, live or archived, oldest first"""
+    from doom import archive
+
+    tasks = {}
+    for directory in paths.tasks_dir().iterdir() if paths.tasks_dir().exists() else ():
+        metadata = archive.load_metadata(directory.name) if directory.is_dir() else None
+        if metadata:
+            tasks[directory.name] = metadata
+    for task_id in archive.task_ids() - set(tasks):
+        metadata = archive.load_metadata(task_id)
+        if metadata:
+            tasks[task_id] = metadata
+    finished = [dict(m, task_id=m.get('task_id') or task_id) for task_id, m in tasks.items()
+                if m.get('reward') is not None]
+    return sorted(finished, key=lambda m: m.get('completed_at') or '')
+
+
+def rebuild() -> Dict:
+    """Rebuild the index from task metadata and feedback histories"""
+    suggestions: Dict[str, List[Dict]] = {}
+    for path in sorted(paths.feedback_dir().glob('*_feedback.jsonl')) if paths.feedback_dir().exists() else ():
+        with open(path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(row, dict) and row.get('task_id'):
+                    suggestions.setdefault(row['task_id'], []).append(row)
+
+    tasks = _finished_tasks()
+    with _lock():
+        for path in (docs_file(), idx_file()):
+            if path.exists():
+                path.unlink()
+        shutil.rmtree(postings_dir(), ignore_errors=True)
+        indexed = sum(_append(m, suggestions.get(m['task_id'], ())) is not None for m in tasks)
+    shards = len(list(postings_dir().glob('*.tsv'))) if postings_dir().exists() else 0
+    return {'tasks': indexed, 'shards': shards}
@@ -0,0 +1,399 @@
+"""
+Deferred evaluation spool
+
+With deferred evaluation on (`deferred_evaluation.enabled` in
+evaluator-config.json, or DOOM_DEFER_EVALUATION=true), Stop writes a pending
+entry with the task and a commit of its work tree, starts a drainer in the
+background and returns. The commit is HEAD when the work
+tree is clean; otherwise the work tree is committed through a temporary
+index, leaving HEAD and the real index alone, and the snapshot is kept under
+refs/doom/spool/<task_id> until the entry is settled.
+
+The drainer claims entries by renaming them out of pending/ and evaluates
+them in a process pool (one worker per core unless `workers` says
+otherwise). Each worker checks the entry's commit out into its own detached
+git worktree and evaluates it there against the task's baseline, so
+parallel runs never share a work tree and later edits to the live tree do
+not leak in. Ignored dependency directories listed in `link_paths`
+(node_modules by default) are symlinked into the checkout. Each task is then
+finished as an inline Stop would: scoreboard, task metadata, sprint
+counters, feedback and template stats. Outside a git repository the live
+tree is evaluated, one entry at a time.
+
+Entries are plain files, so nothing is lost when a drainer dies: claims held
+by a process that no longer exists go back to pending/ on the next drain
+and their worktrees are removed; an entry that keeps failing moves to
+failed/ after `max_attempts`.
+
+Layout under .claude/spool/:
+    pending/<task_id>.json          {task_id, agent_name, task_status, task_type, commit, queued_at, attempts}
+    running/<pid>.<task_id>.json    entries claimed by drainer <pid>
+    worktrees/<pid>.<task_id>/      checkout of a claimed entry's commit
+    failed/<task_id>.json           entries that used up their attempts, with the last error
+    drain.lock                      held by the active drainer
+    drain.log                       drainer output
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from doom import paths, resources
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+SNAPSHOT_REF = 'refs/doom/spool/'
+DEFAULT_LINK_PATHS = ('node_modules',)
+# Identity for work-tree snapshot commits, which never leave the local object store
+_SNAPSHOT_IDENTITY = {'GIT_AUTHOR_NAME': 'Doom-RLVR', 'GIT_AUTHOR_EMAIL': 'doom-rlvr@localhost',
+                      'GIT_COMMITTER_NAME': 'Doom-RLVR', 'GIT_COMMITTER_EMAIL': 'doom-rlvr@localhost'}
+
+
+def pending_dir() -> Path:
+    return paths.spool_dir() / 'pending'
+
+
+def running_dir() -> Path:
+    return paths.spool_dir() / 'running'
+
+
+def failed_dir() -> Path:
+    return paths.spool_dir() / 'failed'
+
+
+def worktrees_dir() -> Path:
+    return paths.spool_dir() / 'worktrees'
+
+
+def settings() -> Dict:
+    """The deferred_evaluation section of the evaluator config, read without loading the evaluator"""
+    for candidate in paths.evaluator_config_files():
+        try:
+            with open(candidate) as f:
+                return json.load(f).get('deferred_evaluation', {})
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError):
+            return {}
+    return {}
+
+
+def enabled() -> bool:
+    override = os.environ.get('DOOM_DEFER_EVALUATION')
+    if override is not None:
+        return override.strip().lower() in _TRUE_VALUES
+    return bool(settings().get('enabled', False))
+
+
+def _write_atomic(path: Path, entry: Dict) -> None:
+    paths.ensure_dir(path.parent)
+    tmp = path.parent / f'.{path.name}.{os.getpid()}'
+    with open(tmp, 'w') as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _read(path: Path) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _git(root: str, *args: str, env: Optional[Dict] = None) -> str:
+    from doom.repo import GitError
+
+    result = subprocess.run(['git', *args], cwd=root, capture_output=True, text=True, env=env,
+                            stdin=subprocess.DEVNULL)
+    if result.returncode != 0:
+        raise GitError(f"git {args[0]}: {result.stderr.strip()}")
+    return result.stdout.strip()
+
+
+def snapshot(repository, task_id: str) -> Optional[str]:
+    """
+    Commit holding the work tree as it is now: HEAD when nothing outside
+    .claude/ changed, otherwise a snapshot on top of HEAD kept by
+    refs/doom/spool/<task_id>
+    """
+    head = repository.head()
+    if not any(not path.startswith('.claude/') for path in repository.status()):
+        return head
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, GIT_INDEX_FILE=os.path.join(tmp, 'index'), **_SNAPSHOT_IDENTITY)
+        index = os.path.join(repository.git_dir, 'index')
+        if os.path.exists(index):
+            # Starting from the real index keeps its stat cache, so only changed files are hashed
+            shutil.copyfile(index, env['GIT_INDEX_FILE'])
+        _git(repository.root, 'add', '-A', '--', '.', ':(exclude).claude', env=env)
+        tree = _git(repository.root, 'write-tree', env=env)
+        commit = _git(repository.root, 'commit-tree', tree, *(['-p', head] if head else []),
+                      '-m', f'Work tree of {task_id} for deferred evaluation', env=env)
+    _git(repository.root, 'update-ref', SNAPSHOT_REF + task_id, commit)
+    return commit
+
+
+def enqueue(task_id: str, agent_name: str, task_status: str, task_type: Optional[str] = None) -> Dict:
+    """
+    Record a pending evaluation with a commit of the task's work tree. The
+    changed files are left to the evaluation, which finds them in its checkout.
+    """
+    from doom import repo
+
+    metadata = _read(paths.task_dir(task_id) / 'metadata.json') or {}
+    entry = {
+        'task_id': task_id,
+        'agent_name': agent_name,
+        'task_status': task_status,
+        'task_type': task_type or metadata.get('task_type'),
+        'commit': None,
+        'queued_at': datetime.utcnow().isoformat(),
+        'attempts': 0,
+    }
+    with repo.Repository(str(paths.project_root())) as repository:
+        if repository.is_repository:
+            try:
+                entry['commit'] = snapshot(repository, task_id)
+            except repo.GitError as e:
+                print(f"[Doom-RLVR] could not snapshot the work tree of {task_id}: {e}", file=sys.stderr)
+    _write_atomic(pending_dir() / f'{task_id}.json', entry)
+    _record_depth()
+    return entry
+
+
+def start_drainer() -> bool:
+    """Launch a detached drainer unless autostart is off; the drainer exits at once if one is running"""
+    if not settings().get('autostart', True):
+        return False
+    log = paths.ensure_dir(paths.spool_dir()) / 'drain.log'
+    env = dict(os.environ, PYTHONPATH=str(paths.doom_dir().parent))
+    with open(log, 'a') as out:
+        # The drainer outlives the hook, so it must not inherit the hook's own limits
+        subprocess.Popen([sys.executable, '-m', 'doom.spool'], cwd=str(paths.project_root()), env=env,
+                         stdin=subprocess.DEVNULL, stdout=out, stderr=out, start_new_session=True,
+                         preexec_fn=resources.restore_self)
+    return True
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def recover() -> int:
+    """Put entries claimed by dead drainers back in pending/ and remove their worktrees"""
+    recovered = 0
+    for claim in running_dir().glob('*.json') if running_dir().exists() else ():
+        pid, _, name = claim.name.partition('.')
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            try:
+                os.rename(claim, pending_dir() / name)
+                recovered += 1
+            except OSError:
+                continue
+    for checkout in worktrees_dir().iterdir() if worktrees_dir().exists() else ():
+        pid = checkout.name.partition('.')[0]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            _remove_checkout(checkout)
+    return recovered
+
+
+def _claim() -> Optional[Path]:
+    """Move the oldest pending entry to running/; only one drainer wins each rename"""
+    try:
+        queued = sorted(pending_dir().glob('*.json'), key=lambda p: p.stat().st_mtime)
+    except (FileNotFoundError, OSError):
+        return None
+    paths.ensure_dir(running_dir())
+    for entry in queued:
+        claim = running_dir() / f'{os.getpid()}.{entry.name}'
+        try:
+            os.rename(entry, claim)
+            return claim
+        except FileNotFoundError:
+            continue
+    return None
+
+
+def _checkout(commit: str, name: str) -> Path:
+    """A detached worktree of `commit` with the configured dependency directories linked in"""
+    root = paths.project_root()
+    checkout = paths.ensure_dir(worktrees_dir()) / name
+    if checkout.exists():
+        _remove_checkout(checkout)
+    _git(str(root), 'worktree', 'add', '--detach', '--quiet', str(checkout), commit)
+    for relative in settings().get('link_paths', DEFAULT_LINK_PATHS):
+        source, target = root / relative, checkout / relative
+        if source.exists() and not os.path.lexists(target):
+            paths.ensure_dir(target.parent)
+            os.symlink(source, target)
+    return checkout
+
+
+def _remove_checkout(checkout: Path) -> None:
+    root = str(paths.project_root())
+    if subprocess.run(['git', 'worktree', 'remove', '--force', str(checkout)], cwd=root,
+                      capture_output=True, stdin=subprocess.DEVNULL).returncode != 0:
+        shutil.rmtree(checkout, ignore_errors=True)
+        subprocess.run(['git', 'worktree', 'prune'], cwd=root, capture_output=True, stdin=subprocess.DEVNULL)
+
+
+def _stopped_at(entry: Dict) -> Optional[float]:
+    """When the task stopped, from its UTC queued_at stamp"""
+    try:
+        return datetime.fromisoformat(entry['queued_at']).replace(tzinfo=timezone.utc).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _evaluate(entry: Dict, name: str) -> float:
+    """Pool worker: evaluate one entry in its own checkout and finish its task"""
+    from doom.evaluator import RLVREvaluator, evaluate
+    from doom.hooks.stop import finish_task
+
+    evaluator = RLVREvaluator()
+    checkout = _checkout(entry['commit'], name) if entry.get('commit') else None
+    try:
+        if checkout:
+            evaluator.project_root = str(checkout)
+        # Time the entry spent in the spool is not the task's
+        result = evaluate(entry['task_id'], entry['agent_name'], entry['task_status'], evaluator,
+                          stopped_at=_stopped_at(entry))
+    finally:
+        if checkout:
+            _remove_checkout(checkout)
+    finish_task(entry['task_id'], entry['agent_name'], entry.get('task_type'), result)
+    return result['reward']
+
+
+def _drop_snapshot(task_id: str) -> None:
+    subprocess.run(['git', 'update-ref', '-d', SNAPSHOT_REF + task_id], cwd=str(paths.project_root()),
+                   capture_output=True, stdin=subprocess.DEVNULL)
+
+
+def _settle(claim: Path, entry: Dict, error: Optional[BaseException]) -> str:
+    """Drop a finished claim, or requeue a failed one until it runs out of attempts"""
+    if error is None:
+        claim.unlink()
+        _drop_snapshot(entry['task_id'])
+        return 'evaluated'
+    entry['attempts'] = entry.get('attempts', 0) + 1
+    entry['error'] = f'{type(error).__name__}: {error}'
+    print(f"[Doom-RLVR] deferred evaluation of {entry['task_id']} failed: {entry['error']}", file=sys.stderr)
+    if entry['attempts'] >= settings().get('max_attempts', 2):
+        _write_atomic(failed_dir() / f"{entry['task_id']}.json", entry)
+        claim.unlink()
+        _drop_snapshot(entry['task_id'])
+        return 'failed'
+    _write_atomic(claim, entry)
+    os.replace(claim, pending_dir() / f"{entry['task_id']}.json")
+    return 'retried'
+
+
+def depth() -> int:
+    """Entries waiting for a reward: pending and claimed"""
+    return sum(1 for directory in (pending_dir(), running_dir()) if directory.exists()
+               for _ in directory.glob('*.json'))
+
+
+def _record_depth() -> None:
+    from doom import metrics
+    metrics.set_gauge('doom_queue_depth', depth())
+
+
+def drain(workers: Optional[int] = None) -> Dict:
+    """
+    Evaluate pending entries until the spool is empty. Returns how many were
+    evaluated, retried and failed; busy is set when another drainer holds the lock.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    from doom import repo
+
+    workers = workers or settings().get('workers') or os.cpu_count() or 1
+    if repo.find_git_dir(str(paths.project_root())) is None:
+        # No commits to check out: entries are evaluated in the live tree, which runs cannot share
+        workers = 1
+    counts = {'evaluated': 0, 'retried': 0, 'failed': 0, 'busy': False}
+    lock_fd = os.open(paths.ensure_dir(paths.spool_dir()) / 'drain.lock', os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        while True:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                counts['busy'] = True
+                return counts
+            recover()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                running = {}
+                while True:
+                    while len(running) < workers:
+                        claim = _claim()
+                        if claim is None:
+                            break
+                        entry = _read(claim) or {}
+                        if 'task_id' not in entry:
+                            claim.unlink()
+                            continue
+                        running[pool.submit(_evaluate, entry, claim.stem)] = (claim, entry)
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        claim, entry = running.pop(future)
+                        counts[_settle(claim, entry, future.exception())] += 1
+                        _record_depth()
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            # An entry queued after the last claim but before the unlock would otherwise wait
+            # for the next Stop; go around again if one arrived and no other drainer took it
+            if not any(pending_dir().glob('*.json')):
+                return counts
+    finally:
+        os.close(lock_fd)
+
+
+def entries() -> List[Dict]:
+    """Every spooled entry with its state: pending, running or failed"""
+    found = []
+    for state, directory in (('pending', pending_dir()), ('running', running_dir()), ('failed', failed_dir())):
+        for path in sorted(directory.glob('*.json')) if directory.exists() else ():
+            entry = _read(path)
+            if entry:
+                found.append(dict(entry, state=state))
+    return sorted(found, key=lambda e: e['queued_at'])
+
+
+def state_of(task_id: str) -> Optional[str]:
+    """pending, running or failed for a spooled task; None when it is not in the spool"""
+    if (pending_dir() / f'{task_id}.json').exists():
+        return 'pending'
+    if running_dir().exists() and any(running_dir().glob(f'*.{task_id}.json')):
+        return 'running'
+    if (failed_dir() / f'{task_id}.json').exists():
+        return 'failed'
+    return None
+
+
+def main() -> int:
+    counts = drain()
+    if not counts['busy']:
+        print(f"[Doom-RLVR] {datetime.utcnow().isoformat()} drained spool: {counts['evaluated']} evaluated, "
+              f"{counts['retried']} retried, {counts['failed']} failed", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Sprint tracking from incremental counters
+
+Hooks bump per-sprint counters as tasks open (UserPromptSubmit) and close
+(Stop), so burndown and velocity are a read of a small precomputed series
+instead of a scan over every task and reward in the sprint window. Ending a
+sprint freezes the counters into a compact summary under sprints/history/.
+
+Layout under .claude/sprints/:
+    current-sprint.json            active sprint descriptor
+    <sprint_id>.counters.json      per-day / per-type counters
+    history/<sprint_id>.json       frozen summary of a closed sprint
+"""
+
+import fcntl
+import json
+import os
+import re
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from doom import paths
+
+CURRENT_SPRINT_FILE = 'current-sprint.json'
+HISTORY_DIR = 'history'
+
+
+def _empty_bucket() -> Dict:
+    return {'opened': 0, 'closed': 0, 'reward': 0.0}
+
+
+def current_sprint_file():
+    return paths.sprints_dir() / CURRENT_SPRINT_FILE
+
+
+def counters_file(sprint_id: str):
+    return paths.sprints_dir() / f'{sprint_id}.counters.json'
+
+
+def history_dir():
+    return paths.sprints_dir() / HISTORY_DIR
+
+
+def _today() -> str:
+    return datetime.utcnow().date().isoformat()
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'sprint'
+
+
+def current_sprint() -> Optional[Dict]:
+    """Return the active sprint descriptor, or None"""
+    path = current_sprint_file()
+    if not path.exists():
+        return None
+    with open(path) as f:
+        sprint = json.load(f)
+    if sprint.get('status') != 'active':
+        return None
+    if 'sprint_id' not in sprint:
+        # Descriptors written before counters existed
+        sprint['sprint_id'] = f"{sprint.get('start_date', _today())[:10]}-{_slug(sprint.get('name', ''))}"
+    return sprint
+
+
+@contextmanager
+def _locked_counters(sprint_id: str) -> Iterator[Optional[Dict]]:
+    """
+    Read-modify-write the counters file under an exclusive lock. Yields None
+    if the sprint was ended while waiting for the lock, since its counters
+    are already frozen.
+    """
+    path = counters_file(sprint_id)
+    paths.ensure_dir(path.parent)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, 'r+') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        raw = f.read()
+        active = current_sprint()
+        if not active or active['sprint_id'] != sprint_id:
+            if not raw.strip() and os.fstat(f.fileno()).st_nlink:
+                path.unlink(missing_ok=True)
+            yield None
+            return
+        counters = json.loads(raw) if raw.strip() else {
+            'sprint_id': sprint_id, 'days': {}, 'by_type': {}, 'totals': _empty_bucket()
+        }
+        yield counters
+        f.seek(0)
+        f.truncate()
+        json.dump(counters, f, separators=(',', ':'))
+
+
+def _bump(counters: Dict, task_type: str, day: str, field: str, amount) -> None:
+    for bucket in (
+        counters['days'].setdefault(day, _empty_bucket()),
+        counters['by_type'].setdefault(task_type or 'unknown', _empty_bucket()),
+        counters['totals'],
+    ):
+        bucket[field] += amount
+
+
+def record_task_opened(task_type: str) -> bool:
+    """Count a newly opened task against the active sprint"""
+    sprint = current_sprint()
+    if not sprint:
+        return False
+    with _locked_counters(sprint['sprint_id']) as counters:
+        if counters is None:
+            return False
+        _bump(counters, task_type, _today(), 'opened', 1)
+    return True
+
+
+def record_task_closed(task_type: str, reward: float) -> bool:
+    """Count a closed task and its reward against the active sprint"""
+    sprint = current_sprint()
+    if not sprint:
+        return False
+    day = _today()
+    with _locked_counters(sprint['sprint_id']) as counters:
+        if counters is None:
+            return False
+        _bump(counters, task_type, day, 'closed', 1)
+        _bump(counters, task_type, day, 'reward', float(reward))
+    return True
+
+
+def start_sprint(name: str, duration_days: int = 14) -> Dict:
+    if current_sprint():
+        raise ValueError("A sprint is already active; end it first")
+    start = datetime.utcnow()
+    sprint = {
+        'sprint_id': f"{start.date().isoformat()}-{_slug(name)}",
+        'name': name,
+        'start_date': start.isoformat(),
+        'duration_days': duration_days,
+        'status': 'active',
+    }
+    paths.ensure_dir(paths.sprints_dir())
+    with open(current_sprint_file(), 'w') as f:
+        json.dump(sprint, f, indent=2)
+    return sprint
+
+
+def load_counters(sprint_id: str) -> Dict:
+    path = counters_file(sprint_id)
+    if not path.exists():
+        return {'sprint_id': sprint_id, 'days': {}, 'by_type': {}, 'totals': _empty_bucket()}
+    with open(path) as f:
+        return json.load(f)
+
+
+def burndown_series(sprint: Dict, counters: Dict, through: Optional[date] = None) -> List[Dict]:
+    """Per-day remaining work and ideal line from the counters"""
+    start = datetime.fromisoformat(sprint['start_date']).date()
+    duration = int(sprint.get('duration_days', 14))
+    end = start + timedelta(days=duration)
+    through = min(through or datetime.utcnow().date(), end)
+
+    # Scope is everything opened during the sprint; the ideal line burns it evenly
+    scope = counters['totals']['opened']
+    series = []
+    opened = closed = 0
+    day = start
+    while day <= through:
+        bucket = counters['days'].get(day.isoformat())
+        if bucket:
+            opened += bucket['opened']
+            closed += bucket['closed']
+        elapsed = (day - start).days
+        series.append({
+            'date': day.isoformat(),
+            'opened': opened,
+            'closed': closed,
+            # Tasks opened before the sprint can close in it; remaining work never goes below zero
+            'remaining': max(opened - closed, 0),
+            'ideal': round(max(scope * (1 - elapsed / duration), 0.0), 2) if duration else 0.0,
+        })
+        day += timedelta(days=1)
+    return series
+
+
+def summarize(sprint: Dict, counters: Dict) -> Dict:
+    totals = counters['totals']
+    series = burndown_series(sprint, counters)
+    # The series includes both the start day and today, so it has one more point than elapsed days
+    days_elapsed = max(len(series) - 1, 1)
+    return {
+        'sprint_id': sprint['sprint_id'],
+        'name': sprint.get('name'),
+        'start_date': sprint['start_date'],
+        'duration_days': sprint.get('duration_days', 14),
+        'opened': totals['opened'],
+        'closed': totals['closed'],
+        'remaining': max(totals['opened'] - totals['closed'], 0),
+        'total_reward': round(totals['reward'], 4),
+        'avg_reward': round(totals['reward'] / totals['closed'], 4) if totals['closed'] else 0.0,
+        'velocity': round(totals['closed'] / days_elapsed, 4),
+        'by_type': counters['by_type'],
+    }
+
+
+def burndown() -> Optional[Dict]:
+    """Summary and burndown series for the active sprint"""
+    sprint = current_sprint()
+    if not sprint:
+        return None
+    counters = load_counters(sprint['sprint_id'])
+    summary = summarize(sprint, counters)
+    summary['burndown'] = burndown_series(sprint, counters)
+    return summary
+
+
+def end_sprint() -> Dict:
+    """Freeze the active sprint into a compact summary and close it"""
+    sprint = current_sprint()
+    if not sprint:
+        raise ValueError("No active sprint")
+    # Freeze under the counters lock so a concurrent Stop lands either in the summary or after the end
+    with _locked_counters(sprint['sprint_id']) as counters:
+        if counters is None:
+            raise ValueError("No active sprint")
+        summary = summarize(sprint, counters)
+        summary['ended_at'] = datetime.utcnow().isoformat()
+        summary['burndown'] = [[p['date'], p['remaining']] for p in burndown_series(sprint, counters)]
+
+        paths.ensure_dir(history_dir())
+        with open(history_dir() / f"{sprint['sprint_id']}.json", 'w') as f:
+            json.dump(summary, f, separators=(',', ':'))
+
+        sprint['status'] = 'completed'
+        with open(current_sprint_file(), 'w') as f:
+            json.dump(sprint, f, indent=2)
+        counters_file(sprint['sprint_id']).unlink()
+    return summary
+
+
+def iter_history() -> Iterator[Dict]:
+    """Frozen summaries of closed sprints, newest first, read one file at a time"""
+    directory = history_dir()
+    if not directory.exists():
+        return
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        with open(path) as f:
+            yield json.load(f)
+
+
+def velocity_history(last: int = 5) -> List[Dict]:
+    """Frozen summaries of the most recent closed sprints, newest first"""
+    return list(islice(iter_history(), last))
@@ -0,0 +1,261 @@
+"""
+Optimization templates and their effectiveness statistics
+
+UserPromptSubmit appends the optimization template for the detected task
+type and records which template version it used. At Stop the reward is
+written to scoreboard/optimization_effectiveness.jsonl and folded into
+running statistics (Welford mean/variance) per template version and task
+type, so effectiveness reports and version comparisons read a small summary
+instead of the raw log.
+
+Layout under .claude/scoreboard/:
+    optimization_effectiveness.jsonl   one row per finished task (append-only)
+    template-stats.json                running stats keyed "<template>@<version>|<task_type>"
+"""
+
+import fcntl
+import json
+import math
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from doom import paths
+
+TEMPLATES_FILE = 'optimization-templates.json'
+EFFECTIVENESS_FILE = 'optimization_effectiveness.jsonl'
+STATS_FILE = 'template-stats.json'
+
+# Two-sided p-value below which a version difference is reported as significant
+SIGNIFICANCE_LEVEL = 0.05
+
+
+def load_templates() -> Dict:
+    """Templates keyed by task type, preferring a project override"""
+    for candidate in (paths.claude_dir() / TEMPLATES_FILE, paths.config_dir() / TEMPLATES_FILE):
+        if candidate.exists():
+            with open(candidate) as f:
+                return json.load(f)
+    return {}
+
+
+def template_for(task_type: str) -> Optional[Dict]:
+    """{'template_id', 'version', 'text'} for a task type, or None"""
+    entry = load_templates().get(task_type)
+    if not entry or not entry.get('template'):
+        return None
+    return {'template_id': task_type, 'version': str(entry.get('version', 1)), 'text': entry['template']}
+
+
+def _empty_stats() -> Dict:
+    return {'n': 0, 'mean': 0.0, 'm2': 0.0, 'min': None, 'max': None, 'last_seen': None}
+
+
+def update(stats: Dict, value: float, timestamp: Optional[str] = None) -> Dict:
+    """Welford update of running mean and sum of squared deviations"""
+    stats['n'] += 1
+    delta = value - stats['mean']
+    stats['mean'] += delta / stats['n']
+    stats['m2'] += delta * (value - stats['mean'])
+    stats['min'] = value if stats['min'] is None else min(stats['min'], value)
+    stats['max'] = value if stats['max'] is None else max(stats['max'], value)
+    if timestamp:
+        stats['last_seen'] = max(stats['last_seen'] or timestamp, timestamp)
+    return stats
+
+
+def merge(a: Dict, b: Dict) -> Dict:
+    """Combine two running stats (Chan et al. parallel update)"""
+    if not a['n']:
+        return dict(b)
+    if not b['n']:
+        return dict(a)
+    n = a['n'] + b['n']
+    delta = b['mean'] - a['mean']
+    return {
+        'n': n,
+        'mean': a['mean'] + delta * b['n'] / n,
+        'm2': a['m2'] + b['m2'] + delta * delta * a['n'] * b['n'] / n,
+        'min': min(a['min'], b['min']),
+        'max': max(a['max'], b['max']),
+        'last_seen': max(a['last_seen'] or '', b['last_seen'] or '') or None,
+    }
+
+
+def variance(stats: Dict) -> float:
+    """Sample variance"""
+    return stats['m2'] / (stats['n'] - 1) if stats['n'] > 1 else 0.0
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    """Continued fraction for the regularized incomplete beta (Lentz)"""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 200):
+        m2 = 2 * m
+        for numerator in (m * (b - m) * x / ((a + m2 - 1) * (a + m2)),
+                          -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= d * c
+        if abs(d * c - 1.0) < 1e-12:
+            break
+    return result
+
+
+def _incomplete_beta(a: float, b: float, x: float) -> float:
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1 - x) / b
+
+
+def welch_test(a: Dict, b: Dict) -> Dict:
+    """Welch's t-test on two running stats; two-sided p-value"""
+    if a['n'] < 2 or b['n'] < 2:
+        return {'t': None, 'df': None, 'p_value': None, 'significant': False}
+    va, vb = variance(a) / a['n'], variance(b) / b['n']
+    if va + vb == 0:
+        same = a['mean'] == b['mean']
+        return {'t': 0.0 if same else math.inf, 'df': None, 'p_value': 1.0 if same else 0.0,
+                'significant': not same}
+    t = (a['mean'] - b['mean']) / math.sqrt(va + vb)
+    df = (va + vb) ** 2 / ((va ** 2 / (a['n'] - 1) if va else 0) + (vb ** 2 / (b['n'] - 1) if vb else 0))
+    p_value = _incomplete_beta(df / 2, 0.5, df / (df + t * t))
+    return {'t': round(t, 4), 'df': round(df, 2), 'p_value': round(p_value, 6),
+            'significant': p_value < SIGNIFICANCE_LEVEL}
+
+
+def effectiveness_file():
+    return paths.scoreboard_dir() / EFFECTIVENESS_FILE
+
+
+def stats_file():
+    return paths.scoreboard_dir() / STATS_FILE
+
+
+def stats_key(template_id: str, version: str, task_type: str) -> str:
+    return f'{template_id}@{version}|{task_type}'
+
+
+def parse_key(key: str) -> Dict:
+    template_version, task_type = key.rsplit('|', 1)
+    template_id, version = template_version.rsplit('@', 1)
+    return {'template_id': template_id, 'version': version, 'task_type': task_type}
+
+
+@contextmanager
+def _locked_stats() -> Iterator[Dict]:
+    """Read-modify-write the stats file under an exclusive lock"""
+    path = stats_file()
+    paths.ensure_dir(path.parent)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, 'r+') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        raw = f.read()
+        stats = json.loads(raw) if raw.strip() else {}
+        yield stats
+        f.seek(0)
+        f.truncate()
+        json.dump(stats, f, separators=(',', ':'))
+
+
+def record_outcome(task_id: str, task_type: str, template_id: str, version: str, reward: float) -> Dict:
+    """Log a finished task's template outcome and update the running stats"""
+    from doom import events
+
+    timestamp = datetime.utcnow().isoformat()
+    with _locked_stats() as stats:
+        bucket = stats.setdefault(stats_key(template_id, version, task_type), _empty_stats())
+        baseline = bucket['mean'] if bucket['n'] else None
+        update(bucket, float(reward), timestamp)
+
+    row = {
+        'timestamp': timestamp,
+        'task_id': task_id,
+        'task_type': task_type,
+        'template': template_id,
+        'version': version,
+        'reward': reward,
+        # Helped if it beat the running mean of this template version so far
+        'improved': baseline is not None and reward > baseline,
+    }
+    events.append_jsonl(effectiveness_file(), [row])
+    return row
+
+
+def load_stats() -> Dict:
+    path = stats_file()
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def rebuild() -> Dict:
+    """Recompute the running stats from optimization_effectiveness.jsonl"""
+    rows = 0
+    with _locked_stats() as stats:
+        stats.clear()
+        path = effectiveness_file()
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                        key = stats_key(row['template'], str(row.get('version', 1)), row['task_type'])
+                        update(stats.setdefault(key, _empty_stats()), float(row['reward']), row.get('timestamp'))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    rows += 1
+        return {'rows': rows, 'series': len(stats)}
+
+
+def summary(task_type: Optional[str] = None, template_id: Optional[str] = None) -> List[Dict]:
+    """One row per template version and task type with mean, stddev and range"""
+    rows = []
+    for key, stats in sorted(load_stats().items()):
+        ident = parse_key(key)
+        if task_type and ident['task_type'] != task_type:
+            continue
+        if template_id and ident['template_id'] != template_id:
+            continue
+        rows.append(dict(ident, n=stats['n'], mean=round(stats['mean'], 4),
+                         stddev=round(math.sqrt(variance(stats)), 4),
+                         min=stats['min'], max=stats['max'], last_seen=stats['last_seen']))
+    return rows
+
+
+def combined(template_id: str, version: str, task_type: Optional[str] = None) -> Dict:
+    """Stats for a template version, for one task type or merged across all"""
+    result = _empty_stats()
+    for key, stats in load_stats().items():
+        ident = parse_key(key)
+        if ident['template_id'] == template_id and ident['version'] == version and \
+                (task_type is None or ident['task_type'] == task_type):
+            result = merge(result, stats)
+    return result
+
+
+def compare(template_id: str, version_a: str, version_b: str, task_type: Optional[str] = None) -> Dict:
+    """Compare two versions of a template with Welch's t-test"""
+    a = combined(template_id, version_a, task_type)
+    b = combined(template_id, version_b, task_type)
+    test = welch_test(a, b)
+    return {
+        'template_id': template_id,
+        'task_type': task_type,
+        'a': {'version': version_a, 'n': a['n'], 'mean': round(a['mean'], 4)},
+        'b': {'version': version_b, 'n': b['n'], 'mean': round(b['mean'], 4)},
+        'difference': round(a['mean'] - b['mean'], 4),
+        **test,
+    }
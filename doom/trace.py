@@ -0,0 +1,143 @@
+"""
+Per-task trace spans across hook processes
+
+Every hook handler and evaluator component adds a span (name, category,
+wall-clock start and duration) for the active task. Spans are buffered in
+the process and appended to the task's trace file in one write when the
+hook or evaluation finishes.
+
+`doom trace <task-id>` exports the spans in the Chrome trace event format,
+which chrome://tracing and ui.perfetto.dev open. Spans go on four tracks:
+- hooks: one span per hook run
+- tools: derived, from the end of PreToolUse to the start of the matching PostToolUse
+- evaluator: the whole evaluation and one span per reward component
+- agent: derived, the gaps where no hook or tool was running
+
+Layout under .claude/tasks/<task_id>/:
+    trace.jsonl    {name, cat, ts, dur, pid, args} per span; times in microseconds
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from doom import events, paths
+
+TRACE_FILE = 'trace.jsonl'
+TRACKS = {'hook': 1, 'tool': 2, 'evaluator': 3, 'agent': 4}
+TRACK_NAMES = {1: 'hooks', 2: 'tools', 3: 'evaluator', 4: 'agent'}
+
+_pending: Dict[str, List[Dict]] = {}
+
+
+def trace_file(task_id: str):
+    return paths.task_dir(task_id) / TRACE_FILE
+
+
+def add_span(task_id: str, name: str, cat: str, start: float, end: float, **args) -> None:
+    """Buffer a span; start and end are time.time() values"""
+    span = {'name': name, 'cat': cat, 'ts': round(start * 1e6), 'dur': max(0, round((end - start) * 1e6)),
+            'pid': os.getpid()}
+    if args:
+        span['args'] = args
+    _pending.setdefault(task_id, []).append(span)
+
+
+@contextmanager
+def span(task_id: Optional[str], name: str, cat: str = 'evaluator', **args) -> Iterator[None]:
+    start = time.time()
+    try:
+        yield
+    finally:
+        if task_id:
+            add_span(task_id, name, cat, start, time.time(), **args)
+
+
+def flush() -> None:
+    """Append every buffered span to its task's trace file"""
+    while _pending:
+        task_id, spans = _pending.popitem()
+        try:
+            events.append_jsonl(trace_file(task_id), spans)
+        except OSError:
+            # Tracing never fails the hook that recorded it
+            pass
+
+
+def load(task_id: str) -> List[Dict]:
+    """Spans of a live or archived task"""
+    from doom import archive
+
+    spans = []
+    for line in (archive.read_file(task_id, TRACE_FILE) or b'').splitlines():
+        try:
+            spans.append(json.loads(line))
+        except ValueError:
+            continue
+    return sorted(spans, key=lambda s: s['ts'])
+
+
+def _tool_spans(hook_spans: List[Dict]) -> List[Dict]:
+    """Tool execution: from each PreToolUse end to the next PostToolUse start for that tool"""
+    derived = []
+    started: Dict[str, int] = {}
+    for s in hook_spans:
+        tool = (s.get('args') or {}).get('tool_name')
+        if not tool:
+            continue
+        if s['name'] == 'pre_tool_use':
+            started[tool] = s['ts'] + s['dur']
+        elif s['name'] == 'post_tool_use' and tool in started:
+            begin = started.pop(tool)
+            derived.append({'name': tool, 'cat': 'tool', 'ts': begin, 'dur': max(0, s['ts'] - begin)})
+    return derived
+
+
+def _gaps(spans: List[Dict]) -> List[Dict]:
+    """Intervals between the first and last hook where nothing was running"""
+    gaps = []
+    busy_until = None
+    for s in sorted(spans, key=lambda s: s['ts']):
+        if busy_until is not None and s['ts'] > busy_until:
+            gaps.append({'name': 'agent', 'cat': 'agent', 'ts': busy_until, 'dur': s['ts'] - busy_until})
+        busy_until = max(busy_until or 0, s['ts'] + s['dur'])
+    return gaps
+
+
+def export(task_id: str) -> Dict:
+    """The task's spans as a Chrome trace event document"""
+    recorded = load(task_id)
+    hook_spans = [s for s in recorded if s['cat'] == 'hook']
+    tools = _tool_spans(hook_spans)
+    spans = recorded + tools + _gaps(hook_spans + tools)
+
+    trace_events = [{'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': task_id}}]
+    trace_events += [{'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': name}}
+                     for tid, name in TRACK_NAMES.items()]
+    for s in sorted(spans, key=lambda s: (s['ts'], -s['dur'])):
+        args = dict(s.get('args') or {})
+        if 'pid' in s:
+            args['os_pid'] = s['pid']
+        trace_events.append({'name': s['name'], 'cat': s['cat'], 'ph': 'X', 'ts': s['ts'], 'dur': s['dur'],
+                             'pid': 1, 'tid': TRACKS.get(s['cat'], 1), 'args': args})
+    return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+
+def summary(document: Dict) -> Dict[str, float]:
+    """Busy milliseconds per track; nested spans are counted once"""
+    totals = {}
+    for tid, name in TRACK_NAMES.items():
+        busy, until = 0, None
+        for event in document['traceEvents']:
+            if event['ph'] != 'X' or event['tid'] != tid:
+                continue
+            end = event['ts'] + event['dur']
+            if until is None or event['ts'] >= until:
+                busy += event['dur']
+            elif end > until:
+                busy += end - until
+            until = max(until or 0, end)
+        totals[name] = round(busy / 1000, 1)
+    return totals
@@ -0,0 +1,268 @@
+"""
+Reward-weight fitting over historical evaluations
+
+Fits non-negative component weights so that the weighted sum of an
+evaluation's components predicts an outcome field recorded alongside it in
+rlvr.jsonl or in a CSV export. Nothing in Doom records such an outcome, so
+the target field is always named by the caller. Rows without the target or a
+component are skipped and counted per missing field. The input is streamed in chunks and reduced to sufficient statistics
+(X'X, X'y, y'y per cross-validation fold), so memory is bounded by the number
+of components, not the number of evaluations. NumPy vectorizes the chunk
+reductions when installed; otherwise plain Python does the same arithmetic.
+
+The fitted coefficients are normalized to sum to 1 and written as a proposed
+evaluator-config.json next to the active one; nothing is applied until it
+is copied over .claude/evaluator-config.json.
+"""
+
+import csv
+import json
+import zlib
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from doom import paths
+
+DEFAULT_CHUNK_SIZE = 65536
+DEFAULT_FOLDS = 5
+PROPOSED_CONFIG = 'evaluator-config.proposed.json'
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - exercised when NumPy is absent
+    numpy = None
+
+
+def read_rows(path, fmt: Optional[str] = None) -> Iterator[Dict]:
+    """Stream rows from JSONL (components nested) or CSV (components as columns)"""
+    path = Path(path)
+    fmt = fmt or ('csv' if path.suffix == '.csv' else 'jsonl')
+    with open(path, newline='') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                yield row
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(row, dict):
+                yield row
+
+
+def extract(row: Dict, components: Sequence[str], target: str, skipped: Optional[Dict[str, int]] = None):
+    """
+    (features, target, fold key) from one row, or None if anything is missing.
+    The first missing or non-numeric field is counted in `skipped`.
+    """
+    source = row.get('components') if isinstance(row.get('components'), dict) else row
+    features = []
+    name = None
+    try:
+        for name in components:
+            features.append(float(source[name]))
+        name = target
+        value = float(row[target] if target in row else source[target])
+    except (KeyError, TypeError, ValueError):
+        if skipped is not None:
+            skipped[name] = skipped.get(name, 0) + 1
+        return None
+    return features, value, str(row.get('task_id', ''))
+
+
+def fold_of(key: str, index: int, folds: int) -> int:
+    """Stable fold assignment: by task id when present, else by position"""
+    if folds <= 1:
+        return 0
+    return (zlib.crc32(key.encode()) if key else index) % folds
+
+
+class Moments:
+    """X'X, X'y, y'y and n for one fold"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.n = 0
+        self.xtx = [[0.0] * k for _ in range(k)]
+        self.xty = [0.0] * k
+        self.yty = 0.0
+
+    def add_rows(self, xs: List[List[float]], ys: List[float]) -> None:
+        if not xs:
+            return
+        self.n += len(xs)
+        if numpy is not None:
+            x = numpy.asarray(xs, dtype=float)
+            y = numpy.asarray(ys, dtype=float)
+            gram = x.T @ x
+            cross = x.T @ y
+            for i in range(self.k):
+                self.xty[i] += float(cross[i])
+                row = self.xtx[i]
+                for j in range(self.k):
+                    row[j] += float(gram[i, j])
+            self.yty += float(y @ y)
+            return
+        k = self.k
+        xtx, xty = self.xtx, self.xty
+        for features, value in zip(xs, ys):
+            for i in range(k):
+                fi = features[i]
+                if fi:
+                    xty[i] += fi * value
+                    row = xtx[i]
+                    for j in range(i, k):
+                        row[j] += fi * features[j]
+            self.yty += value * value
+        # Mirror the upper triangle accumulated above
+        for i in range(k):
+            for j in range(i + 1, k):
+                xtx[j][i] = xtx[i][j]
+
+    def plus(self, other: 'Moments', sign: float = 1.0) -> 'Moments':
+        result = Moments(self.k)
+        result.n = self.n + int(sign) * other.n
+        result.xtx = [[a + sign * b for a, b in zip(ra, rb)] for ra, rb in zip(self.xtx, other.xtx)]
+        result.xty = [a + sign * b for a, b in zip(self.xty, other.xty)]
+        result.yty = self.yty + sign * other.yty
+        return result
+
+    def sse(self, weights: Sequence[float]) -> float:
+        """Sum of squared residuals of y - Xw from the moments alone"""
+        quad = sum(weights[i] * self.xtx[i][j] * weights[j] for i in range(self.k) for j in range(self.k))
+        return max(quad - 2 * sum(w * b for w, b in zip(weights, self.xty)) + self.yty, 0.0)
+
+
+def accumulate(rows: Iterable[Dict], components: Sequence[str], target: str,
+               folds: int = DEFAULT_FOLDS, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               skipped: Optional[Dict[str, int]] = None) -> List[Moments]:
+    """One streaming pass: per-fold moments, never holding more than a chunk"""
+    moments = [Moments(len(components)) for _ in range(max(folds, 1))]
+    iterator = iter(rows)
+    index = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        buffers = [([], []) for _ in moments]
+        for row in chunk:
+            parsed = extract(row, components, target, skipped)
+            if parsed is None:
+                continue
+            features, value, key = parsed
+            xs, ys = buffers[fold_of(key, index, len(moments))]
+            xs.append(features)
+            ys.append(value)
+            index += 1
+        for moment, (xs, ys) in zip(moments, buffers):
+            moment.add_rows(xs, ys)
+    return moments
+
+
+def nnls(xtx: List[List[float]], xty: List[float], l2: float = 0.0,
+         max_iter: int = 10000, tol: float = 1e-12) -> List[float]:
+    """
+    Non-negative least squares on the normal equations by projected
+    coordinate descent: minimize w'(X'X + l2 I)w - 2 w'X'y subject to w >= 0.
+    """
+    k = len(xty)
+    weights = [0.0] * k
+    for _ in range(max_iter):
+        largest_step = 0.0
+        for j in range(k):
+            diagonal = xtx[j][j] + l2
+            if diagonal <= 0:
+                continue
+            gradient = sum(xtx[j][i] * weights[i] for i in range(k)) + l2 * weights[j] - xty[j]
+            updated = max(0.0, weights[j] - gradient / diagonal)
+            largest_step = max(largest_step, abs(updated - weights[j]))
+            weights[j] = updated
+        if largest_step < tol:
+            break
+    return weights
+
+
+def fit(moments: List[Moments], l2: float = 0.0) -> Dict:
+    """Fit on all folds and cross-validate each held-out fold"""
+    total = moments[0]
+    for moment in moments[1:]:
+        total = total.plus(moment)
+    coefficients = nnls(total.xtx, total.xty, l2)
+
+    fold_errors = []
+    if len(moments) > 1:
+        for held_out in moments:
+            if not held_out.n:
+                continue
+            train = total.plus(held_out, -1.0)
+            fold_weights = nnls(train.xtx, train.xty, l2)
+            fold_errors.append(held_out.sse(fold_weights) / held_out.n)
+
+    return {
+        'n': total.n,
+        'coefficients': coefficients,
+        'train_mse': total.sse(coefficients) / total.n if total.n else None,
+        'cv_mse': sum(fold_errors) / len(fold_errors) if fold_errors else None,
+        'cv_folds': len(fold_errors),
+    }
+
+
+def propose_config(components: Sequence[str], coefficients: Sequence[float],
+                   base_config: Optional[Dict] = None) -> Dict:
+    """Evaluator config with the fitted weights normalized to sum to 1"""
+    from doom.evaluator import load_config
+
+    config = json.loads(json.dumps(base_config if base_config is not None else load_config()))
+    total = sum(coefficients)
+    weights = {name: round(c / total, 4) if total else 0.0 for name, c in zip(components, coefficients)}
+    config['weights'] = weights
+    return config
+
+
+def fit_weights(input_path, target: str, folds: int = DEFAULT_FOLDS,
+                chunk_size: int = DEFAULT_CHUNK_SIZE, l2: float = 0.0, fmt: Optional[str] = None,
+                output_path=None) -> Dict:
+    """Stream the history, fit, and write a proposed evaluator config"""
+    from doom.evaluator import load_config
+
+    config = load_config()
+    components = list(config['weights'])
+    input_path = Path(input_path) if input_path else paths.scoreboard_dir() / 'rlvr.jsonl'
+    if not input_path.exists():
+        raise FileNotFoundError(f"No evaluation history at {input_path}")
+
+    skipped: Dict[str, int] = {}
+    moments = accumulate(read_rows(input_path, fmt), components, target, folds, chunk_size, skipped)
+    result = fit(moments, l2)
+    if not result['n']:
+        missing = ', '.join(f"'{name}' in {count}" for name, count in sorted(skipped.items()))
+        raise ValueError(f"No rows in {input_path} have all components and '{target}'"
+                         + (f" (missing: {missing})" if missing else ''))
+
+    proposed = propose_config(components, result['coefficients'], config)
+    output_path = Path(output_path) if output_path else paths.claude_dir() / PROPOSED_CONFIG
+    paths.ensure_dir(output_path.parent)
+    with open(output_path, 'w') as f:
+        json.dump(proposed, f, indent=2)
+
+    return {
+        'input': str(input_path),
+        'output': str(output_path),
+        'target': target,
+        'rows': result['n'],
+        'skipped_rows': sum(skipped.values()),
+        # Rows skipped per field, counted under the first one each row lacked
+        'skipped': skipped,
+        'backend': 'numpy' if numpy is not None else 'python',
+        'weights': proposed['weights'],
+        'current_weights': config['weights'],
+        # Reward = 5 * sum(w * c); the fitted scale relative to that formula
+        'scale': round(sum(result['coefficients']) / 5, 6),
+        'train_mse': result['train_mse'],
+        'cv_mse': result['cv_mse'],
+        'cv_folds': result['cv_folds'],
+    }
@@ -14,19 +14,37 @@ NC='\033[0m' # No Color
 # Track overall results
 TOTAL_PASSED=0
 TOTAL_FAILED=0
+TOTAL_SKIPPED=0
 
 # Get the directory of this script
 SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 cd "$SCRIPT_DIR"
 
-# Function to run a test category
+# Suites run in parallel, each in an isolated project copy; --serial runs them
+# one after another against this checkout
+if [ "$1" != "--serial" ]; then
+    exec python3 run-tests-parallel.py "$@"
+fi
+
+# Function to run a test category; further arguments are files the suite
+# drives, and the suite is skipped when one is missing (see REQUIRES in
+# run-tests-parallel.py)
 run_test_category() {
     local category=$1
     local test_script=$2
+    shift 2
     
     echo -e "\n${YELLOW}Running $category Tests${NC}"
     echo "----------------------------------------"
     
+    for required in "$@"; do
+        if [ ! -f "../$required" ]; then
+            echo -e "${YELLOW}⏭️  $category tests skipped: missing $required${NC}"
+            ((TOTAL_SKIPPED++))
+            return
+        fi
+    done
+
     if [ -f "$test_script" ]; then
         python3 "$test_script"
         if [ $? -eq 0 ]; then
@@ -48,21 +66,51 @@ echo "Starting test execution..."
 # Hook Tests
 run_test_category "UserPromptSubmit Hook" "test-hooks/test-user-prompt-submit.py"
 run_test_category "Stop Hook" "test-hooks/test-stop-hook.py"
+run_test_category "Hook Startup Budget" "test-hooks/test-hook-startup.py"
+run_test_category "Compiled Policy" "test-hooks/test-policy.py"
+run_test_category "Task Budgets" "test-hooks/test-task-budget.py"
 
 # Scenario Tests
-run_test_category "Bugfix Scenario" "test-scenarios/bugfix-scenario.py"
-run_test_category "Feature Scenario" "test-scenarios/feature-scenario.py"
+run_test_category "Bugfix Scenario" "test-scenarios/bugfix-scenario.py" \
+    .claude/scripts/manual-assign.py .claude/scripts/rlvr-evaluate.py
+run_test_category "Feature Scenario" "test-scenarios/feature-scenario.py" \
+    .claude/scripts/manual-assign.py .claude/scripts/rlvr-evaluate.py
+
+# Integration Tests
+run_test_category "Full Workflow" "test-integration/full-workflow-test.py" .claude/scripts/manual-assign.py
+run_test_category "Events API" "test-integration/test-events-api.py"
+run_test_category "Sprint Counters" "test-integration/test-sprint-counters.py"
+run_test_category "REST API" "test-integration/test-api-server.py"
+run_test_category "Leaderboards" "test-integration/test-leaderboard.py"
+run_test_category "Feedback Index" "test-integration/test-feedback-index.py"
+run_test_category "Template Stats" "test-integration/test-template-stats.py"
+run_test_category "Weight Fitting" "test-integration/test-weight-fitting.py"
+run_test_category "Git Batch Access" "test-integration/test-git-batch.py"
+run_test_category "Coverage Store" "test-integration/test-coverage-store.py"
+run_test_category "Test Impact" "test-integration/test-test-impact.py"
+run_test_category "JSONL Tail" "test-integration/test-jsonl-tail.py"
+run_test_category "Metrics Export" "test-integration/test-metrics-export.py"
+run_test_category "Task Trace" "test-integration/test-task-trace.py"
+run_test_category "Advisory Store" "test-integration/test-advisory-store.py"
+run_test_category "CI Cache" "test-integration/test-ci-cache.py"
+run_test_category "Deferred Evaluation" "test-integration/test-deferred-evaluation.py"
+run_test_category "Resource Limits" "test-integration/test-resource-limits.py"
+run_test_category "Task Archive" "test-integration/test-task-archive.py"
+run_test_category "Similar Tasks" "test-integration/test-similar-tasks.py"
+run_test_category "Prompt Budget" "test-integration/test-prompt-budget.py"
+run_test_category "CLI NDJSON" "test-integration/test-cli-ndjson.py"
 
 # CLI Tests
-run_test_category "CLI Commands" "test-cli/test-doom-cli.py"
+run_test_category "CLI Commands" "test-cli/test-doom-cli.py" .claude/scripts/doom-cli-simple.py
 
 # Summary
 echo -e "\n${YELLOW}========================================${NC}"
 echo -e "${YELLOW}Test Summary${NC}"
 echo -e "${YELLOW}========================================${NC}"
-echo -e "Total test categories: $((TOTAL_PASSED + TOTAL_FAILED))"
+echo -e "Total test categories: $((TOTAL_PASSED + TOTAL_FAILED + TOTAL_SKIPPED))"
 echo -e "${GREEN}Passed: $TOTAL_PASSED${NC}"
 echo -e "${RED}Failed: $TOTAL_FAILED${NC}"
+echo -e "${YELLOW}Skipped: $TOTAL_SKIPPED${NC}"
 
 if [ $TOTAL_FAILED -eq 0 ]; then
     echo -e "\n${GREEN}🎉 All tests passed!${NC}"
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Parallel DOOM-RLVR test runner
+
+Each suite runs against its own temporary copy of the project, with
+CLAUDE_PROJECT_DIR pointing at that copy, so suites can run side by side
+across cores and never touch the repository's live .claude/ state. Safe to
+run while a Claude Code session is active in the same checkout.
+
+Suites listed in REQUIRES are skipped, not failed, when the files they
+drive are missing from the checkout.
+
+Usage:
+    python3 run-tests-parallel.py [-j JOBS] [-k PATTERN] [-v]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from test_support import SESSION_VARS
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+
+SUITES = [
+    ("UserPromptSubmit Hook", "test-hooks/test-user-prompt-submit.py"),
+    ("Stop Hook", "test-hooks/test-stop-hook.py"),
+    ("Hook Startup Budget", "test-hooks/test-hook-startup.py"),
+    ("Compiled Policy", "test-hooks/test-policy.py"),
+    ("Task Budgets", "test-hooks/test-task-budget.py"),
+    ("Bugfix Scenario", "test-scenarios/bugfix-scenario.py"),
+    ("Feature Scenario", "test-scenarios/feature-scenario.py"),
+    ("Full Workflow", "test-integration/full-workflow-test.py"),
+    ("Events API", "test-integration/test-events-api.py"),
+    ("Sprint Counters", "test-integration/test-sprint-counters.py"),
+    ("REST API", "test-integration/test-api-server.py"),
+    ("Leaderboards", "test-integration/test-leaderboard.py"),
+    ("Feedback Index", "test-integration/test-feedback-index.py"),
+    ("Template Stats", "test-integration/test-template-stats.py"),
+    ("Weight Fitting", "test-integration/test-weight-fitting.py"),
+    ("Git Batch Access", "test-integration/test-git-batch.py"),
+    ("Coverage Store", "test-integration/test-coverage-store.py"),
+    ("Test Impact", "test-integration/test-test-impact.py"),
+    ("JSONL Tail", "test-integration/test-jsonl-tail.py"),
+    ("Metrics Export", "test-integration/test-metrics-export.py"),
+    ("Task Trace", "test-integration/test-task-trace.py"),
+    ("Advisory Store", "test-integration/test-advisory-store.py"),
+    ("CI Cache", "test-integration/test-ci-cache.py"),
+    ("Deferred Evaluation", "test-integration/test-deferred-evaluation.py"),
+    ("Resource Limits", "test-integration/test-resource-limits.py"),
+    ("Task Archive", "test-integration/test-task-archive.py"),
+    ("Similar Tasks", "test-integration/test-similar-tasks.py"),
+    ("Prompt Budget", "test-integration/test-prompt-budget.py"),
+    ("CLI NDJSON", "test-integration/test-cli-ndjson.py"),
+    ("CLI Commands", "test-cli/test-doom-cli.py"),
+]
+
+# Legacy suites that drive the pre-package scripts under .claude/scripts/
+REQUIRES = {
+    "test-scenarios/bugfix-scenario.py": [".claude/scripts/manual-assign.py", ".claude/scripts/rlvr-evaluate.py"],
+    "test-scenarios/feature-scenario.py": [".claude/scripts/manual-assign.py", ".claude/scripts/rlvr-evaluate.py"],
+    "test-integration/full-workflow-test.py": [".claude/scripts/manual-assign.py"],
+    "test-cli/test-doom-cli.py": [".claude/scripts/doom-cli-simple.py"],
+}
+
+# Parts of the project a suite needs; runtime state is never copied
+COPY_ITEMS = ['.claude', 'doom', 'test-doom-system', 'example-tasks', 'specs']
+RUNTIME_STATE = [
+    'archive', 'ci', 'coverage', 'evaluator-config.proposed.json', 'feedback', 'metrics', 'policy.compiled',
+    'scoreboard', 'security', 'similar', 'spool', 'sprints', 'tasks',
+]
+
+SUITE_TIMEOUT = 300
+
+
+def _ignore_runtime(directory, names):
+    ignored = {'__pycache__'} & set(names)
+    if Path(directory).resolve() == (PROJECT_ROOT / '.claude').resolve():
+        ignored |= set(RUNTIME_STATE) & set(names)
+    return ignored
+
+
+def make_project_copy(parent):
+    """Copy the project (minus runtime state) into a fresh directory"""
+    root = Path(tempfile.mkdtemp(prefix='doom-test-', dir=parent))
+    for item in COPY_ITEMS:
+        source = PROJECT_ROOT / item
+        if source.is_dir():
+            shutil.copytree(source, root / item, ignore=_ignore_runtime, symlinks=True)
+        elif source.exists():
+            shutil.copy2(source, root / item)
+    return root
+
+
+def missing_requirements(script):
+    return [path for path in REQUIRES.get(script, []) if not (PROJECT_ROOT / path).exists()]
+
+
+def run_suite(name, script, parent):
+    """Run one suite in its own project copy; returns a result dict"""
+    start = time.monotonic()
+    root = make_project_copy(parent)
+
+    env = os.environ.copy()
+    for var in SESSION_VARS:
+        env.pop(var, None)
+    env['CLAUDE_PROJECT_DIR'] = str(root)
+    env['DOOM_ENABLED'] = 'true'
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+
+    try:
+        result = subprocess.run(
+            ['python3', str(root / 'test-doom-system' / script)],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=str(root),
+            timeout=SUITE_TIMEOUT
+        )
+        passed = result.returncode == 0
+        output = result.stdout + result.stderr
+    except subprocess.TimeoutExpired as e:
+        passed = False
+        output = f"{e.stdout or ''}\nTimed out after {SUITE_TIMEOUT}s"
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        'name': name,
+        'script': script,
+        'passed': passed,
+        'duration': time.monotonic() - start,
+        'output': output,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run DOOM-RLVR test suites in parallel')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Number of suites to run at once (default: CPU count)')
+    parser.add_argument('-k', '--filter', default='',
+                        help='Only run suites whose name or script contains this text')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Show output of passing suites too')
+    args = parser.parse_args()
+
+    pattern = args.filter.lower()
+    suites = [(n, s) for n, s in SUITES if pattern in n.lower() or pattern in s.lower()]
+    if not suites:
+        print(f"No suites match '{args.filter}'")
+        return 1
+
+    missing = {s: missing_requirements(s) for _, s in suites}
+    skipped = [(n, s) for n, s in suites if missing[s]]
+    runnable = [(n, s) for n, s in suites if not missing[s]]
+
+    print("🧪 DOOM-RLVR Parallel Test Suite")
+    print(f"Running {len(runnable)} suites with {args.jobs} workers\n")
+    for name, script in skipped:
+        print(f"⏭️  {name:<24} skipped: missing {', '.join(missing[script])}")
+
+    start = time.monotonic()
+    results = []
+    with tempfile.TemporaryDirectory(prefix='doom-tests-') as parent:
+        with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+            futures = [pool.submit(run_suite, name, script, parent) for name, script in runnable]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                status = "✅" if result['passed'] else "❌"
+                print(f"{status} {result['name']:<24} {result['duration']:6.2f}s")
+
+    elapsed = time.monotonic() - start
+    failed = [r for r in results if not r['passed']]
+
+    for result in sorted(results, key=lambda r: r['name']):
+        if args.verbose or not result['passed']:
+            print(f"\n{'=' * 60}\n{result['name']} ({result['script']})\n{'=' * 60}")
+            print(result['output'].rstrip())
+
+    print(f"\n📊 {len(results) - len(failed)} passed, {len(failed)} failed, {len(skipped)} skipped "
+          f"in {elapsed:.2f}s")
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Hook startup-time regression check
+Uses `python -X importtime` to verify that disabled and fast-path hook
+invocations stay within their import budget and exit quickly
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+HOOKS_DIR = PROJECT_ROOT / '.claude' / 'hooks'
+
+# Modules the fast paths must never pull in
+HEAVY_MODULES = {'subprocess', 'datetime', 'pathlib', 'yaml', 'typing', 'doom.evaluator'}
+
+# Total self-time (microseconds) allowed for imports beyond bare interpreter startup
+IMPORT_BUDGET_US = 8000
+
+# Wall-clock budget (milliseconds) on top of `python3 -c pass`
+WALL_BUDGET_MS = 30
+RUNS = 7
+
+
+def parse_importtime(stderr):
+    """Return {module: self_us} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+def run_python(args, payload, env):
+    return subprocess.run(
+        ['python3'] + args,
+        input=payload,
+        capture_output=True,
+        text=True,
+        env=env
+    )
+
+
+def baseline_modules(env):
+    return parse_importtime(run_python(['-X', 'importtime', '-c', 'pass'], '', env).stderr)
+
+
+def median_wall_ms(args, payload, env):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        run_python(args, payload, env)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def check_scenario(name, hook, payload, env, allowed_extra=None):
+    """Run one fast-path scenario; return True if within budget"""
+    print(f"Test: {name}")
+
+    baseline = baseline_modules(env)
+    result = run_python(['-X', 'importtime', str(HOOKS_DIR / hook)], payload, env)
+    if result.returncode != 0:
+        print(f"❌ Hook exited with {result.returncode}: {result.stderr[-300:]}")
+        return False
+    if result.stdout.strip():
+        print(f"❌ Fast path produced output: {result.stdout[:200]}")
+        return False
+
+    imported = parse_importtime(result.stderr)
+    extra = {m: us for m, us in imported.items() if m not in baseline}
+    heavy = sorted(m for m in extra if m.split('.')[0] in HEAVY_MODULES or m in HEAVY_MODULES)
+    unexpected = sorted(m for m in extra if allowed_extra is not None and m not in allowed_extra)
+    extra_us = sum(extra.values())
+
+    overhead_ms = (median_wall_ms([str(HOOKS_DIR / hook)], payload, env)
+                   - median_wall_ms(['-c', 'pass'], '', env))
+
+    print(f"   - Extra imports: {len(extra)} ({extra_us} us), wall overhead: {overhead_ms:.1f} ms")
+
+    if heavy:
+        print(f"❌ Heavy modules imported on fast path: {heavy}")
+        return False
+    if unexpected:
+        print(f"❌ Unexpected imports: {unexpected}")
+        return False
+    if extra_us > IMPORT_BUDGET_US:
+        print(f"❌ Import budget exceeded: {extra_us} us > {IMPORT_BUDGET_US} us")
+        return False
+    if overhead_ms > WALL_BUDGET_MS:
+        print(f"❌ Wall-clock budget exceeded: {overhead_ms:.1f} ms > {WALL_BUDGET_MS} ms")
+        return False
+
+    print("✅ Passed")
+    return True
+
+
+def main():
+    """Run startup budget checks"""
+    print("🧪 Testing Hook Startup Budget\n")
+
+    with tempfile.TemporaryDirectory() as project_dir:
+        env = os.environ.copy()
+        env['CLAUDE_PROJECT_DIR'] = project_dir
+        env.pop('DOOM_TASK_ID', None)
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+        disabled = dict(env, DOOM_ENABLED='false')
+        enabled = dict(env, DOOM_ENABLED='true')
+
+        read_payload = json.dumps({
+            'hook_event_name': 'PreToolUse',
+            'tool_name': 'Read',
+            'tool_input': {'file_path': os.path.join(project_dir, 'src', 'app.py')}
+        })
+        doom_modules = {'doom', 'doom.hooks', 'doom.policy', '_json'}
+
+        # Warm the bytecode cache so the measurement reflects steady state
+        for hook in ('user-prompt-submit.py', 'pre-check.py', 'post-tool-use.py', 'stop.py'):
+            run_python([str(HOOKS_DIR / hook)], read_payload, enabled)
+
+        scenarios = [
+            ('UserPromptSubmit disabled', 'user-prompt-submit.py', '{"prompt": "fix bug"}', disabled, set()),
+            ('PreToolUse disabled', 'pre-check.py', read_payload, disabled, set()),
+            ('PostToolUse disabled', 'post-tool-use.py', '{}', disabled, set()),
+            ('Stop disabled', 'stop.py', '{}', disabled, set()),
+            ('PreToolUse read-only tool', 'pre-check.py', read_payload, enabled, doom_modules),
+            ('PostToolUse without active task', 'post-tool-use.py', '{}', enabled, {'doom', 'doom.hooks'}),
+            ('Stop without active task', 'stop.py', '{}', enabled, {'doom', 'doom.hooks'}),
+        ]
+
+        passed = 0
+        failed = 0
+        for name, hook, payload, scenario_env, allowed in scenarios:
+            if check_scenario(name, hook, payload, scenario_env, allowed):
+                passed += 1
+            else:
+                failed += 1
+            print()
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(scenarios)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
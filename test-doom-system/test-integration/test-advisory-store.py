@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Test the offline OSV advisory store
+Verifies version-range and CVSS handling, lockfile parsing, snapshot
+ingestion with cached scans, and the evaluator's security component
+"""
+
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import advisories  # noqa: E402
+from doom.evaluator import RLVREvaluator  # noqa: E402
+from test_support import run_cli  # noqa: E402
+
+ADVISORIES = [
+    {'id': 'GHSA-lodash-1', 'modified': '2024-01-01T00:00:00Z', 'summary': 'Prototype pollution in lodash',
+     'database_specific': {'severity': 'HIGH'},
+     'affected': [{'package': {'ecosystem': 'npm', 'name': 'lodash'},
+                   'ranges': [{'type': 'SEMVER', 'events': [{'introduced': '0'}, {'fixed': '4.17.21'}]}]}]},
+    {'id': 'GHSA-minimist-1', 'modified': '2024-01-01T00:00:00Z', 'summary': 'minimist pollution',
+     'database_specific': {'severity': 'CRITICAL'},
+     'affected': [{'package': {'ecosystem': 'npm', 'name': 'minimist'},
+                   'ranges': [{'type': 'SEMVER', 'events': [{'introduced': '1.0.0'}, {'fixed': '1.2.6'}]}]}]},
+    {'id': 'PYSEC-requests-1', 'modified': '2024-01-01T00:00:00Z', 'summary': 'requests leaks headers',
+     'severity': [{'type': 'CVSS_V3', 'score': 'CVSS:3.1/AV:N/AC:H/PR:N/UI:R/S:U/C:H/I:N/A:N'}],
+     'affected': [{'package': {'ecosystem': 'PyPI', 'name': 'Requests'},
+                   'ranges': [{'type': 'ECOSYSTEM', 'events': [{'introduced': '2.3.0'}, {'fixed': '2.31.0'}]}]}]},
+    {'id': 'GHSA-old-withdrawn', 'withdrawn': '2024-02-01T00:00:00Z',
+     'affected': [{'package': {'ecosystem': 'npm', 'name': 'express'}, 'versions': ['4.18.2']}]},
+]
+
+PACKAGE_LOCK = {'lockfileVersion': 3, 'packages': {
+    '': {'name': 'demo'},
+    'node_modules/lodash': {'version': '4.17.20'},
+    'node_modules/minimist': {'version': '1.2.6'},
+    'node_modules/express': {'version': '4.18.2'},
+    'node_modules/express/node_modules/debug': {'version': '2.6.9'},
+}}
+
+
+def write_snapshot(project_dir):
+    """The first two advisories in a zip, the rest as loose files"""
+    dump = Path(project_dir) / 'osv'
+    dump.mkdir()
+    with zipfile.ZipFile(dump / 'npm-all.zip', 'w') as archive:
+        for advisory in ADVISORIES[:2]:
+            archive.writestr(f"{advisory['id']}.json", json.dumps(advisory))
+    for advisory in ADVISORIES[2:]:
+        (dump / f"{advisory['id']}.json").write_text(json.dumps(advisory))
+    return dump
+
+
+def test_versions_and_severity(project_dir):
+    """Range events, pre-releases and CVSS base scores"""
+    print("\n🔢 Testing version ranges and severity")
+
+    entry = {'ranges': [[{'introduced': '1.0.0'}, {'fixed': '1.5.0'}, {'introduced': '2.0.0'},
+                         {'last_affected': '2.3.1'}]]}
+    checks = {'0.9.9': False, '1.0.0': True, '1.4.9': True, '1.5.0': False, '1.9.0': False,
+              '2.0.0-rc.1': False, '2.0.0': True, 'v2.3.1': True, '2.3.2': False}
+    wrong = {v: want for v, want in checks.items() if advisories.is_affected(v, entry) != want}
+    pypi = {'ranges': [[{'introduced': '0'}, {'fixed': '1.0.post1'}]]}
+    if advisories.is_affected('1.0.post1', pypi, 'PyPI') or not advisories.is_affected('1.0', pypi, 'PyPI') or \
+            not advisories.is_affected('1.0rc2', pypi, 'PyPI'):
+        wrong['PyPI post/pre-releases'] = True
+    scores = (advisories.cvss3_score('CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H'),
+              advisories.cvss3_score('CVSS:3.1/AV:N/AC:L/PR:N/UI:R/S:C/C:L/I:L/A:N'),
+              advisories.cvss3_score('CVSS:3.1/AV:N/AC:H/PR:N/UI:R/S:U/C:H/I:N/A:N'))
+    if wrong or scores != (9.8, 6.1, 5.3):
+        print(f"❌ Wrong answers: {wrong}, CVSS {scores}")
+        return False
+    print(f"✅ {len(checks)} range checks, PEP 440 suffixes and CVSS scores {scores} agree with OSV/NVD")
+    return True
+
+
+def test_lockfile_parsers(project_dir):
+    """Every supported lockfile yields ecosystem/package/version triples"""
+    print("\n🔒 Testing lockfile parsers")
+
+    root = Path(project_dir)
+    (root / 'package-lock.json').write_text(json.dumps(PACKAGE_LOCK))
+    (root / 'yarn.lock').write_text('# yarn lockfile v1\n\n"@babel/core@^7.0.0", "@babel/core@^7.1.0":\n'
+                                    '  version "7.1.2"\n  resolved "https://x"\n\nleft-pad@1.3.0:\n'
+                                    '  version "1.3.0"\n')
+    (root / 'requirements-dev.txt').write_text('Requests[socks]==2.25.0  # pinned\nflask>=2\n-e .\n')
+    (root / 'poetry.lock').write_text('[[package]]\nname = "Django"\nversion = "3.2.0"\n\n'
+                                      '[package.dependencies]\nsqlparse = ">=0.2.2"\n')
+    (root / 'Cargo.lock').write_text('version = 3\n\n[[package]]\nname = "serde"\nversion = "1.0.130"\n')
+    (root / 'go.sum').write_text('golang.org/x/text v0.3.7 h1:abc=\ngolang.org/x/text v0.3.7/go.mod h1:def=\n')
+    (root / 'pnpm-lock.yaml').write_text("lockfileVersion: '6.0'\n\npackages:\n\n  /chalk@4.1.2:\n"
+                                         "    resolution: {integrity: sha512-x}\n\n  /@types/node@20.1.0:\n"
+                                         "    dev: true\n")
+
+    found = {path.name: advisories.locked_packages(path) for path in advisories.find_lockfiles(root)}
+    expected = {
+        'package-lock.json': [('npm', 'debug', '2.6.9'), ('npm', 'express', '4.18.2'),
+                              ('npm', 'lodash', '4.17.20'), ('npm', 'minimist', '1.2.6')],
+        'yarn.lock': [('npm', '@babel/core', '7.1.2'), ('npm', 'left-pad', '1.3.0')],
+        'pnpm-lock.yaml': [('npm', '@types/node', '20.1.0'), ('npm', 'chalk', '4.1.2')],
+        'poetry.lock': [('PyPI', 'django', '3.2.0')],
+        'Cargo.lock': [('crates.io', 'serde', '1.0.130')],
+        'go.sum': [('Go', 'golang.org/x/text', 'v0.3.7')],
+        'requirements-dev.txt': [('PyPI', 'requests', '2.25.0')],
+    }
+    if found != expected:
+        print(f"❌ Unexpected packages: {json.dumps(found, indent=1)}")
+        return False
+    print(f"✅ {sum(len(v) for v in found.values())} packages from {len(found)} lockfile formats")
+    return True
+
+
+def test_ingest_and_cached_scan(project_dir):
+    """Ingest a zip and loose files; repeat scans hit the cache until a lockfile changes"""
+    print("\n🗃️  Testing ingest and scan cache")
+
+    root = Path(project_dir)
+    ingested = run_cli(project_dir, 'advisories', 'ingest', str(write_snapshot(project_dir)), '--json')
+    meta = json.loads(ingested.stdout) if ingested.returncode == 0 else {}
+    if meta.get('advisories') != 3 or meta.get('ecosystems') != ['PyPI', 'npm']:
+        print(f"❌ Unexpected ingest: {ingested.stdout}{ingested.stderr}")
+        return False
+
+    (root / 'package-lock.json').write_text(json.dumps(PACKAGE_LOCK))
+    (root / 'requirements.txt').write_text('requests==2.25.0\n')
+    first = advisories.scan(root)
+    ids = sorted(v['id'] for v in first['vulnerabilities'])
+    if ids != ['GHSA-lodash-1', 'PYSEC-requests-1'] or first['cached'] or first['packages'] != 5:
+        print(f"❌ Unexpected scan: {first}")
+        return False
+
+    # With the shards gone, only the cache can answer
+    for shard in (root / '.claude' / 'security' / 'index').glob('*/*.json'):
+        shard.unlink()
+    second = advisories.scan(root)
+    (root / 'requirements.txt').write_text('requests==2.31.0\n')
+    third = advisories.scan(root)
+    if not second['cached'] or second['vulnerabilities'] != first['vulnerabilities'] or third['cached']:
+        print(f"❌ Cache should serve unchanged lockfiles only: {second['cached']}, {third['cached']}")
+        return False
+    print(f"✅ Snapshot {meta['snapshot_id']}: {len(ids)} findings; unchanged lockfiles answered from cache")
+    return True
+
+
+def test_evaluator_security_component(project_dir):
+    """security_scan_score comes from the snapshot, with the same weighting as snyk"""
+    print("\n🛡️  Testing evaluator security component")
+
+    root = Path(project_dir)
+    (root / 'package-lock.json').write_text(json.dumps(PACKAGE_LOCK))
+    evaluator = RLVREvaluator()
+    unavailable = evaluator._evaluate_security()
+
+    advisories.ingest([write_snapshot(project_dir)])
+    PACKAGE_LOCK['packages']['node_modules/minimist']['version'] = '1.2.5'
+    (root / 'package-lock.json').write_text(json.dumps(PACKAGE_LOCK))
+    PACKAGE_LOCK['packages']['node_modules/minimist']['version'] = '1.2.6'
+    score = evaluator._evaluate_security()
+
+    # high (0.6) + critical (1.0) over the 2.0 tolerance
+    if unavailable != 0.8 or abs(score - 0.2) > 1e-9:
+        print(f"❌ Expected 0.8 without a snapshot and 0.2 with it, got {unavailable} and {score}")
+        return False
+    if evaluator.security['counts'] != {'low': 0, 'medium': 0, 'high': 1, 'critical': 1} or \
+            evaluator.security['cached']:
+        print(f"❌ Unexpected security summary: {evaluator.security}")
+        return False
+    print(f"✅ Fallback {unavailable} without a snapshot; {score:.1f} from 1 high + 1 critical advisory offline")
+    return True
+
+
+def main():
+    """Run advisory store tests"""
+    print("🧪 Testing Offline Advisory Store\n")
+
+    tests = [test_versions_and_severity, test_lockfile_parsers, test_ingest_and_cached_scan,
+             test_evaluator_security_component]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Test the local REST API server
+Verifies cursor pagination, ETag / If-None-Match handling and that the
+in-memory state follows appends to the scoreboard and new task metadata,
+a replaced scoreboard and updates to unfinished tasks
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import api  # noqa: E402
+from test_support import wait_until  # noqa: E402
+
+BASE_TIME = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def write_task(project_dir, i, agent='agent-bugfix-senior', status='completed'):
+    task_dir = Path(project_dir) / '.claude' / 'tasks' / f'bugfix-{i:04d}'
+    task_dir.mkdir(parents=True, exist_ok=True)
+    created = BASE_TIME + timedelta(minutes=i)
+    metadata = {
+        'task_id': task_dir.name,
+        'task_type': 'bugfix',
+        'priority': 'P1',
+        'agent_name': agent,
+        'status': status,
+        'created_at': created.isoformat(),
+        'prompt': f'Fix bug {i}',
+    }
+    if status == 'completed':
+        metadata['completed_at'] = (created + timedelta(seconds=30)).isoformat()
+        metadata['reward'] = 3.0
+    (task_dir / 'metadata.json').write_text(json.dumps(metadata))
+
+
+def append_rewards(project_dir, rows):
+    scoreboard = Path(project_dir) / '.claude' / 'scoreboard'
+    scoreboard.mkdir(parents=True, exist_ok=True)
+    with open(scoreboard / 'rlvr.jsonl', 'a') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+
+
+def reward_row(i, agent, reward, status='completed'):
+    return {
+        'timestamp': (datetime.utcnow() - timedelta(minutes=100 - i)).isoformat(),
+        'task_id': f'bugfix-{i:04d}',
+        'agent_name': agent,
+        'task_status': status,
+        'reward': reward,
+        'components': {'lint_score': 1.0},
+    }
+
+
+def get(server, path, headers=None):
+    url = f"http://127.0.0.1:{server.server_address[1]}{api.API_PREFIX}{path}"
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, dict(response.headers), json.loads(response.read() or b'null')
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        return e.code, dict(e.headers), json.loads(body) if body else None
+
+
+def test_cursor_pagination(server, project_dir):
+    """Cursor pages stay stable when new tasks arrive between requests"""
+    print("\n📄 Testing cursor pagination")
+
+    for i in range(25):
+        write_task(project_dir, i)
+    server.state.refresh()
+
+    status, _, first = get(server, '/tasks?limit=10')
+    if status != 200 or first['total'] != 25 or first['tasks'][0]['id'] != 'bugfix-0024':
+        print(f"❌ Unexpected first page: {status} {first and first.get('total')}")
+        return False
+
+    # A new task must not shift the next page
+    write_task(project_dir, 99)
+    server.state.refresh()
+
+    seen = [t['id'] for t in first['tasks']]
+    cursor = first['next_cursor']
+    while cursor:
+        _, _, page = get(server, f'/tasks?limit=10&cursor={cursor}')
+        seen.extend(t['id'] for t in page['tasks'])
+        cursor = page['next_cursor']
+
+    expected = [f'bugfix-{i:04d}' for i in range(24, -1, -1)]
+    if seen != expected:
+        print(f"❌ Pages skipped or repeated tasks: {len(seen)} seen")
+        return False
+    print(f"✅ {len(seen)} tasks paged without gaps or duplicates")
+    return True
+
+
+def test_etag_and_invalidation(server, project_dir):
+    """Unchanged resources return 304; scoreboard appends invalidate"""
+    print("\n🏷️  Testing ETag and invalidation")
+
+    append_rewards(project_dir, [reward_row(i, 'agent-bugfix-senior', 3.0) for i in range(5)])
+    server.state.refresh()
+
+    status, headers, board = get(server, '/leaderboard?period=24h')
+    etag = headers.get('ETag')
+    if status != 200 or not etag or board['entries'][0]['agent_name'] != 'agent-bugfix-senior':
+        print(f"❌ Unexpected leaderboard: {status} {board}")
+        return False
+
+    status, _, _ = get(server, '/leaderboard?period=24h', {'If-None-Match': etag})
+    if status != 304:
+        print(f"❌ Expected 304 for unchanged leaderboard, got {status}")
+        return False
+
+    # The watcher thread picks up the append without an explicit refresh
+    append_rewards(project_dir, [reward_row(10 + i, 'agent-feature-senior', 4.5) for i in range(3)])
+
+    def leader():
+        code, _, body = get(server, '/leaderboard?period=24h', {'If-None-Match': etag})
+        return code == 200 and body['entries'][0]['agent_name'] == 'agent-feature-senior'
+
+    if not wait_until(leader, timeout=5):
+        print("❌ Leaderboard did not follow the scoreboard append")
+        return False
+    print("✅ 304 while unchanged, fresh body after append")
+    return True
+
+
+def test_endpoints(server, project_dir):
+    """Agents, metrics, rewards, stats and errors"""
+    print("\n🔌 Testing endpoints")
+
+    _, _, agents = get(server, '/agents')
+    names = {a['name'] for a in agents['agents']}
+    if 'agent-bugfix-senior' not in names:
+        print(f"❌ Built-in roster missing from /agents: {names}")
+        return False
+
+    _, _, metrics = get(server, '/agents/agent-bugfix-senior/metrics?period=24h')
+    if metrics['metrics']['total_tasks'] != 5 or metrics['metrics']['avg_reward'] != 3.0:
+        print(f"❌ Unexpected metrics: {metrics}")
+        return False
+
+    _, _, rewards = get(server, '/rewards?agent=agent-feature-senior&limit=2')
+    if rewards['total'] != 3 or len(rewards['rewards']) != 2 or not rewards['next_cursor']:
+        print(f"❌ Unexpected rewards page: {rewards}")
+        return False
+
+    _, _, stats = get(server, '/system/stats')
+    if stats['tasks_total'] != 26 or stats['avg_task_duration_ms'] != 30000.0:
+        print(f"❌ Unexpected stats: {stats}")
+        return False
+
+    for path, expected in (('/tasks/missing-task', 404), ('/agents/agent-nobody', 404),
+                           ('/leaderboard?metric=bogus', 400), ('/nowhere', 404)):
+        status, _, body = get(server, path)
+        if status != expected or 'code' not in body:
+            print(f"❌ {path}: expected {expected}, got {status}")
+            return False
+    print(f"✅ {len(names)} agents, metrics, rewards paging, stats and errors")
+    return True
+
+def test_refresh_edges(server, project_dir):
+    """Replaced scoreboards, in-place task updates, finished tasks and the health bypass"""
+    print("\n🔄 Testing refresh edge cases")
+
+    # A rewritten scoreboard as long as the old one replaces the leaderboard instead of adding to it
+    scoreboard = Path(project_dir) / '.claude' / 'scoreboard' / 'rlvr.jsonl'
+    replacement = scoreboard.with_suffix('.new')
+    rewritten = scoreboard.read_text().replace('agent-bugfix-senior', 'agent-bugfix-junior')
+    replacement.write_text(rewritten + json.dumps(reward_row(20, 'agent-feature-senior', 4.5)) + '\n')
+    os.replace(replacement, scoreboard)
+    server.state.refresh()
+    _, _, board = get(server, '/leaderboard?period=24h&metric=tasks')
+    totals = {e['agent_name']: e['total_tasks'] for e in board['entries']}
+    if totals != {'agent-feature-senior': 4, 'agent-bugfix-junior': 5}:
+        print(f"❌ Leaderboard after replacing the scoreboard: {totals}")
+        return False
+
+    # Metadata rewritten in place leaves the directory mtime alone but is still picked up
+    write_task(project_dir, 100, status='in_progress')
+    server.state.refresh()
+    write_task(project_dir, 100)
+    server.state.refresh()
+    _, _, task = get(server, '/tasks/bugfix-0100')
+    if task.get('status') != 'completed':
+        print(f"❌ In-place update of an open task was missed: {task}")
+        return False
+
+    # With an unchanged directory, only unfinished tasks are re-stated
+    write_task(project_dir, 101, status='in_progress')
+    store = api.TaskStore(str(Path(project_dir) / '.claude' / 'tasks'))
+    store.refresh()
+    stat_key, calls, caller = api._stat_key, [], threading.current_thread()
+
+    def counting(path):
+        if threading.current_thread() is caller:
+            calls.append(path)
+        return stat_key(path)
+
+    api._stat_key = counting
+    try:
+        store.refresh()
+    finally:
+        api._stat_key = stat_key
+    if len(store.tasks) != 28 or len(calls) != 2:
+        print(f"❌ Expected 28 tasks and 2 stats, got {len(store.tasks)} and {calls}")
+        return False
+
+    server.RequestHandlerClass.api_key = 'secret'
+    try:
+        health, _, _ = get(server, '/system/health?verbose=1')
+        stats, _, _ = get(server, '/system/stats')
+    finally:
+        server.RequestHandlerClass.api_key = None
+    if health != 200 or stats != 401:
+        print(f"❌ Health with a query string should bypass the key: {health}, stats {stats}")
+        return False
+    print("✅ Replaced scoreboard rebuilt, open tasks followed, finished tasks skipped")
+    return True
+
+
+def main():
+    """Run API server tests"""
+    print("🧪 Testing Local REST API\n")
+
+    tests = [test_cursor_pagination, test_etag_and_invalidation, test_endpoints, test_refresh_edges]
+    passed = 0
+    failed = 0
+
+    with tempfile.TemporaryDirectory() as project_dir:
+        os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+        os.environ.pop('DOOM_API_KEY', None)
+        server = api.make_server(port=0, poll_interval=0.05)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            for test in tests:
+                try:
+                    if test(server, project_dir):
+                        passed += 1
+                    else:
+                        failed += 1
+                except Exception as e:
+                    print(f"❌ {test.__name__} failed with error: {e}")
+                    failed += 1
+        finally:
+            server.shutdown()
+            server.stop_watching.set()
+            server.server_close()
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Test the cached CI status provider
+Verifies that a commit's completed status is fetched once, that pending
+statuses back off and re-poll with conditional requests, that rate limits
+are honoured, and the file stand-in behind `doom ci`
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import ci, repo  # noqa: E402
+from doom.evaluator import RLVREvaluator  # noqa: E402
+from test_support import run_cli  # noqa: E402
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Answers GET /<sha> from `statuses`, with ETags and optional rate limiting"""
+
+    statuses = {}
+    requests = []
+    throttle = None
+
+    def do_GET(self):
+        commit = self.path.rsplit('/', 1)[-1]
+        etag = self.headers.get('If-None-Match')
+        StandIn.requests.append((commit, etag))
+        if StandIn.throttle:
+            self.send_response(429)
+            self.send_header('Retry-After', str(StandIn.throttle))
+            self.end_headers()
+            return
+        body = json.dumps(StandIn.statuses.get(commit, {'status': 'queued'})).encode()
+        tag = f'"{hash(body) & 0xffffffff:x}"'
+        if etag == tag:
+            self.send_response(304)
+            self.send_header('ETag', tag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', tag)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in():
+    StandIn.statuses, StandIn.requests, StandIn.throttle = {}, [], None
+    server = HTTPServer(('127.0.0.1', 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, {'type': 'http', 'url': f'http://127.0.0.1:{server.server_port}/status'}
+
+
+def git_repo(project_dir):
+    """A repository with one commit; returns its id"""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=project_dir, capture_output=True, text=True, check=True).stdout
+    git('init', '-q')
+    git('config', 'user.email', 'test@example.com')
+    git('config', 'user.name', 'Test')
+    git('remote', 'add', 'origin', 'git@github.com:acme/widgets.git')
+    (Path(project_dir) / 'README.md').write_text('demo\n')
+    git('add', 'README.md')
+    git('commit', '-q', '-m', 'init')
+    return git('rev-parse', 'HEAD').strip()
+
+
+def use_provider(project_dir, provider):
+    """Project evaluator config with providers.ci replaced"""
+    config = json.loads((PROJECT_ROOT / 'doom' / 'config' / 'evaluator-config.json').read_text())
+    config['providers']['ci'] = provider
+    target = Path(project_dir) / '.claude' / 'evaluator-config.json'
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(config))
+
+
+def make_due(commit):
+    """Pretend the backoff delay has passed"""
+    entry = ci.load(commit)
+    entry['next_poll_at'] = 0
+    ci.cache_file(commit).write_text(json.dumps(entry))
+
+
+def test_completed_status_fetched_once(project_dir):
+    """Repeated evaluations of one commit make a single request"""
+    print("\n✅ Testing completed status cache")
+
+    commit = git_repo(project_dir)
+    server, provider = start_stand_in()
+    try:
+        StandIn.statuses[commit] = {'status': 'completed', 'conclusion': 'success'}
+        use_provider(project_dir, provider)
+        evaluator = RLVREvaluator()
+        scores = []
+        for _ in range(3):
+            with repo.Repository(project_dir) as evaluator.repo:
+                scores.append(evaluator._evaluate_ci_status())
+        make_due(commit)
+        with repo.Repository(project_dir) as evaluator.repo:
+            scores.append(evaluator._evaluate_ci_status())
+    finally:
+        server.shutdown()
+
+    if scores != [1.0] * 4 or StandIn.requests != [(commit, None)]:
+        print(f"❌ Expected one request and four 1.0 scores: {StandIn.requests}, {scores}")
+        return False
+    if evaluator.ci != {'commit': commit, 'provider': 'http', 'status': 'completed', 'conclusion': 'success',
+                        'cached': True}:
+        print(f"❌ Unexpected CI summary: {evaluator.ci}")
+        return False
+    print(f"✅ 4 evaluations of {commit[:8]}, 1 request")
+    return True
+
+
+def test_pending_backoff(project_dir):
+    """Pending statuses wait out the backoff and re-poll with If-None-Match"""
+    print("\n⏳ Testing pending backoff and conditional requests")
+
+    commit = 'a' * 40
+    server, provider = start_stand_in()
+    provider.update(ttl_seconds=30, max_backoff_seconds=100)
+    try:
+        StandIn.statuses[commit] = {'status': 'in_progress', 'conclusion': None}
+        first = ci.status(commit, provider)
+        early = ci.status(commit, provider)
+        delays = [round(first['next_poll_at'] - time.time())]
+        for _ in range(3):
+            make_due(commit)
+            unchanged = ci.status(commit, provider)
+            delays.append(round(unchanged['next_poll_at'] - time.time()))
+        StandIn.statuses[commit] = {'status': 'completed', 'conclusion': 'failure'}
+        make_due(commit)
+        final = ci.status(commit, provider)
+        make_due(commit)
+        after = ci.status(commit, provider)
+    finally:
+        server.shutdown()
+
+    etags = [etag for _, etag in StandIn.requests]
+    if not early['cached'] or len(StandIn.requests) != 5 or etags[0] is not None or \
+            len(set(etags[1:])) != 1 or None in etags[1:]:
+        print(f"❌ Expected 5 requests, all but the first conditional: {StandIn.requests}")
+        return False
+    if delays != [30, 60, 100, 100] or unchanged['status'] != 'in_progress':
+        print(f"❌ Expected backoff 30, 60, 100, 100 from the 30s TTL: {delays}")
+        return False
+    if (final['conclusion'], final['cached'], after['cached']) != ('failure', False, True):
+        print(f"❌ A completed failure should be final: {final}, {after}")
+        return False
+    print(f"✅ Re-polls sent If-None-Match {etags[1]}; backoff {delays}; failure cached as final")
+    return True
+
+
+def test_rate_limit(project_dir):
+    """A 429 with Retry-After scores neutral and delays the next poll"""
+    print("\n🚦 Testing rate limits")
+
+    commit = 'b' * 40
+    server, provider = start_stand_in()
+    try:
+        StandIn.throttle = 600
+        limited = ci.status(commit, provider)
+        again = ci.status(commit, provider)
+    finally:
+        server.shutdown()
+
+    wait = limited['next_poll_at'] - time.time()
+    if limited['status'] != 'unknown' or 'HTTP 429' not in limited.get('error', '') or not 590 < wait <= 600:
+        print(f"❌ Unexpected rate-limited entry: {limited}")
+        return False
+    if not again['cached'] or len(StandIn.requests) != 1:
+        print(f"❌ The next poll should wait for Retry-After: {StandIn.requests}")
+        return False
+    print(f"✅ Throttled poll recorded; next poll in {wait:.0f}s")
+    return True
+
+
+def test_file_provider_and_cli(project_dir):
+    """The file stand-in answers `doom ci`; github-actions without a token is unavailable"""
+    print("\n📁 Testing file stand-in and doom ci")
+
+    commit = git_repo(project_dir)
+    statuses = Path(project_dir) / 'ci-status.json'
+    statuses.write_text(json.dumps({commit: {'status': 'completed', 'conclusion': 'success'},
+                                    'default': {'status': 'in_progress'}}))
+    use_provider(project_dir, {'type': 'file', 'path': 'ci-status.json'})
+
+    first = json.loads(run_cli(project_dir, 'ci', '--json').stdout)
+    second = run_cli(project_dir, 'ci').stdout
+    other = ci.status('c' * 40, {'type': 'file', 'path': 'ci-status.json'})
+    if (first['conclusion'], first['cached']) != ('success', False) or 'success (cached' not in second or \
+            other['status'] != 'in_progress':
+        print(f"❌ Unexpected file provider results: {first}, {second}, {other}")
+        return False
+
+    with repo.Repository(project_dir) as repository:
+        slug = ci.github_slug(repository.remote_url())
+        saved = {key: os.environ.pop(key, None) for key in ('GITHUB_TOKEN', 'GH_TOKEN')}
+        try:
+            unavailable = ci.status('d' * 40, {'type': 'github-actions'}, repository)
+        finally:
+            os.environ.update({k: v for k, v in saved.items() if v is not None})
+    if slug != 'acme/widgets' or unavailable is not None:
+        print(f"❌ Expected slug acme/widgets and no status without a token: {slug}, {unavailable}")
+        return False
+    print(f"✅ {second.strip()}; GitHub slug {slug}")
+    return True
+
+
+def main():
+    """Run CI cache tests"""
+    print("🧪 Testing CI Status Cache\n")
+
+    tests = [test_completed_status_fetched_once, test_pending_backoff, test_rate_limit,
+             test_file_provider_and_cli]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
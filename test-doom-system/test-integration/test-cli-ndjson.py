@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test paginated NDJSON output of CLI listings
+Verifies that following next_cursor through `--format ndjson --limit` pages
+visits every row exactly once, even while rows are appended, that streaming a
+large history keeps memory flat, and that status, logs and the other
+listings page the same way with cursors bound to their command
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import events, listing, paths, spool  # noqa: E402
+from test_support import run_cli  # noqa: E402
+
+def ndjson(result):
+    """(rows, next_cursor) of an NDJSON listing"""
+    rows = [json.loads(line) for line in result.stdout.splitlines()]
+    if rows and set(rows[-1]) == {'next_cursor'}:
+        return rows[:-1], rows[-1]['next_cursor']
+    return rows, None
+
+
+def score_rows(start, count):
+    return [{'timestamp': f'2024-05-01T10:{i // 60 % 60:02d}:{i % 60:02d}', 'task_id': f'bugfix-{i}',
+             'agent_name': f'agent-bugfix-{"senior" if i % 3 == 0 else "junior"}', 'task_status': 'completed',
+             'reward': round(i / 1000, 3)} for i in range(start, start + count)]
+
+
+def test_cursor_walk(project_dir):
+    """Pages follow each other without gaps or repeats while new rows are appended"""
+    print("\n📄 Testing cursor pagination over the scoreboard")
+
+    rlvr = paths.ensure_dir(paths.scoreboard_dir()) / 'rlvr.jsonl'
+    events.append_jsonl(rlvr, score_rows(0, 1000))
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        result = run_cli(project_dir, 'scores', '--agent', 'agent-bugfix-senior', '--format', 'ndjson',
+                      '--limit', '100', *(['--cursor', cursor] if cursor else []))
+        rows, cursor = ndjson(result)
+        seen.extend(row['task_id'] for row in rows)
+        pages += 1
+        if pages == 1:
+            # Rows appended after the first page belong before it and do not shift later pages
+            events.append_jsonl(rlvr, score_rows(1000, 30))
+        if not cursor:
+            break
+    expected = [f'bugfix-{i}' for i in range(999, -1, -1) if i % 3 == 0]
+    if seen != expected or pages != 4:
+        print(f"❌ Expected {len(expected)} rows in 4 pages, got {len(seen)} in {pages}")
+        return False
+
+    result = run_cli(project_dir, 'scores', '--limit', '2')
+    if 'bugfix-1029' not in result.stdout or '--cursor' not in result.stderr or '{' in result.stdout:
+        print(f"❌ Table output should keep stdout and put the cursor on stderr: {result.stdout}{result.stderr}")
+        return False
+    print(f"✅ {len(seen)} rows in {pages} pages, no gaps or repeats")
+    return True
+
+
+def test_constant_memory(project_dir):
+    """Streaming a large history holds only a block and a row at a time"""
+    print("\n🌊 Testing streaming memory use")
+
+    rlvr = paths.ensure_dir(paths.scoreboard_dir()) / 'rlvr.jsonl'
+    for start in range(0, 100000, 10000):
+        events.append_jsonl(rlvr, score_rows(start, 10000))
+    size = rlvr.stat().st_size
+    lines = 0
+
+    class Counter(io.TextIOBase):
+        def write(self, text):
+            nonlocal lines
+            lines += text.count('\n')
+            return len(text)
+
+    tracemalloc.start()
+    listing.write_ndjson(listing.Page('scores', events.scan_reverse(rlvr)), Counter())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if lines != 100000 or peak > size // 20:
+        print(f"❌ Streamed {lines} rows with a {peak // 1024} KB peak for a {size // 1024} KB file")
+        return False
+
+    stream = io.StringIO()
+    page = listing.Page('scores', events.scan_reverse(rlvr), limit=1)
+    listing.write_ndjson(page, stream)
+    if json.loads(stream.getvalue().splitlines()[0])['task_id'] != 'bugfix-99999' or not page.next_cursor:
+        print(f"❌ Unexpected first page: {stream.getvalue()}")
+        return False
+    print(f"✅ {lines} rows streamed from {size // 1024} KB with a {peak // 1024} KB peak")
+    return True
+
+
+def test_other_listings(project_dir):
+    """Status streams queued then final rewards; logs, agents and cursors behave the same"""
+    print("\n🗂️  Testing status, logs and agents listings")
+
+    events.append_jsonl(paths.ensure_dir(paths.scoreboard_dir()) / 'rlvr.jsonl', score_rows(0, 5))
+    for i in range(3):
+        spool.enqueue(f'feature-{i}', 'agent-feature-senior', 'completed', 'feature')
+
+    rows, cursor = ndjson(run_cli(project_dir, 'status', '--format', 'ndjson', '--limit', '2'))
+    more, last = ndjson(run_cli(project_dir, 'status', '--format', 'ndjson', '--limit', '4', '--cursor', cursor))
+    states = [row['state'] for row in rows + more]
+    ids = [row['task_id'] for row in rows + more]
+    if states != ['pending'] * 3 + ['final'] * 3 or ids[3:] != ['bugfix-4', 'bugfix-3', 'bugfix-2'] or not last:
+        print(f"❌ Unexpected status stream: {list(zip(states, ids))}")
+        return False
+
+    for i in range(6):
+        events.record('tool_use', task_id='bugfix-1', agent_name='agent-bugfix-junior', tool=f'tool-{i}')
+    _, cursor = ndjson(run_cli(project_dir, 'logs', '--format', 'ndjson', '--limit', '2'))
+    page = json.loads(run_cli(project_dir, 'logs', '--json', '--limit', '2', '--cursor', cursor).stdout)
+    if [row['tool'] for row in page] != ['tool-2', 'tool-3']:
+        print(f"❌ Logs pages should show the next older events, oldest first: {page}")
+        return False
+
+    agents, cursor = ndjson(run_cli(project_dir, 'agents', '--format', 'ndjson', '--limit', '1'))
+    foreign = run_cli(project_dir, 'scores', '--cursor', cursor)
+    malformed = run_cli(project_dir, 'agents', '--cursor', 'not-a-cursor')
+    if len(agents) != 1 or foreign.returncode != 1 or 'doom agents' not in foreign.stderr or \
+            malformed.returncode != 1:
+        print(f"❌ Cursors should be rejected by other commands: {foreign.stderr}{malformed.stderr}")
+        return False
+    print(f"✅ Status streamed {len(states)} rows across pages; logs and agents paged")
+    return True
+
+
+def main():
+    """Run CLI NDJSON tests"""
+    print("🧪 Testing CLI NDJSON\n")
+
+    tests = [test_cursor_walk, test_constant_memory, test_other_listings]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
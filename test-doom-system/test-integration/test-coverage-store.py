@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Test the per-commit coverage store
+Verifies bitmap encoding and report parsing, bitmap reuse across commits,
+baseline lookups over changed files only, and the evaluator/CLI wiring
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import coverage, repo  # noqa: E402
+from doom.evaluator import RLVREvaluator  # noqa: E402
+from test_support import run_cli  # noqa: E402
+
+
+def git(project_dir, *args):
+    return subprocess.run(['git', *args], cwd=project_dir, capture_output=True, text=True, check=True).stdout
+
+
+def make_project(project_dir, modules=20):
+    """A committed project with `modules` source files of 10 lines each"""
+    git(project_dir, 'init', '-q', '-b', 'main')
+    git(project_dir, 'config', 'user.email', 'test@example.com')
+    git(project_dir, 'config', 'user.name', 'Test')
+    (Path(project_dir) / '.gitignore').write_text('.claude/\ncoverage/\n')
+    for i in range(modules):
+        path = Path(project_dir) / 'src' / f'module{i}.js'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(''.join(f'const v{n} = {i * n};\n' for n in range(10)))
+    git(project_dir, 'add', '-A')
+    git(project_dir, 'commit', '-q', '-m', 'initial')
+
+
+def write_lcov(project_dir, covered_by_file):
+    """lcov.info with lines 1-10 executable and the first N covered per file"""
+    records = []
+    for name, covered in covered_by_file.items():
+        records.append(f'SF:{Path(project_dir) / name}')
+        records.extend(f'DA:{n},{1 if n <= covered else 0}' for n in range(1, 11))
+        records.append('end_of_record')
+    path = Path(project_dir) / 'coverage' / 'lcov.info'
+    path.parent.mkdir(exist_ok=True)
+    path.write_text('\n'.join(records) + '\n')
+    return path
+
+
+def test_encoding_and_parsers(project_dir):
+    """Bitmaps round-trip and the three report formats agree"""
+    print("\n🧬 Testing bitmaps and report parsers")
+
+    executable, covered = {1, 2, 3, 9, 17, 250}, {2, 9, 250}
+    data = coverage.encode(executable, covered)
+    if coverage.decode(data) != (executable, covered) or coverage.counts(data) != (6, 3) or len(data) > 4 + 2 * 32:
+        print(f"❌ Bitmap round-trip failed ({len(data)} bytes)")
+        return False
+
+    lcov = coverage.parse_lcov(f'SF:{project_dir}/src/a.js\nDA:1,3\nDA:2,0\nDA:5,1\nend_of_record\n', project_dir)
+    istanbul = coverage.parse_istanbul({f'{project_dir}/src/a.js': {
+        'path': f'{project_dir}/src/a.js',
+        'statementMap': {'0': {'start': {'line': 1}}, '1': {'start': {'line': 2}}, '2': {'start': {'line': 5}}},
+        's': {'0': 3, '1': 0, '2': 1}}}, project_dir)
+    coverage_py = coverage.parse_coverage_py({'meta': {}, 'files': {'src/a.js': {
+        'executed_lines': [1, 5], 'missing_lines': [2]}}}, project_dir)
+    expected = {'src/a.js': ({1, 2, 5}, {1, 5})}
+    if not lcov == istanbul == coverage_py == expected:
+        print(f"❌ Parsers disagree: {lcov} / {istanbul} / {coverage_py}")
+        return False
+    print(f"✅ 6 executable lines over 250 in {len(data)} bytes; LCOV, Istanbul and coverage.py agree")
+    return True
+
+
+def test_bitmaps_reused_across_commits(project_dir):
+    """A second commit that touches one file stores one new bitmap"""
+    print("\n♻️  Testing bitmap reuse")
+
+    make_project(project_dir)
+    files = {f'src/module{i}.js': 8 for i in range(20)}
+    with repo.Repository(project_dir) as repository:
+        first = coverage.record(coverage.load_report(write_lcov(project_dir, files), project_dir), repository)
+
+    (Path(project_dir) / 'src' / 'module3.js').write_text('const changed = 1;\n' * 10)
+    git(project_dir, 'commit', '-q', '-am', 'change module3')
+    with repo.Repository(project_dir) as repository:
+        second = coverage.record(coverage.load_report(write_lcov(project_dir, files), project_dir), repository)
+        stored_first = coverage.load_tree_coverage(repository, 'HEAD~1')
+
+    bitmaps = list((Path(project_dir) / '.claude' / 'coverage' / 'files').rglob('*'))
+    bitmaps = [b for b in bitmaps if b.is_file()]
+    if first['bitmaps_written'] != 20 or second['bitmaps_written'] != 1 or len(bitmaps) != 21:
+        print(f"❌ Expected 20 + 1 bitmaps, wrote {first['bitmaps_written']} + {second['bitmaps_written']}")
+        return False
+    if not first['tree'] or not second['tree'] or stored_first['percent'] != 0.8:
+        print(f"❌ Commit manifests missing or wrong: {stored_first}")
+        return False
+    print(f"✅ 2 commits x 20 files stored as {len(bitmaps)} bitmaps; HEAD~1 baseline is a lookup")
+    return True
+
+
+def test_delta_over_changed_files(project_dir):
+    """The baseline comes from stored bitmaps and only changed files are compared"""
+    print("\n📉 Testing coverage delta")
+
+    make_project(project_dir)
+    files = {f'src/module{i}.js': 10 for i in range(20)}
+    with repo.Repository(project_dir) as repository:
+        coverage.record(coverage.load_report(write_lcov(project_dir, files), project_dir), repository)
+
+    # Work-tree edit that drops module7 to 2/10 covered lines
+    (Path(project_dir) / 'src' / 'module7.js').write_text('const edited = 1;\n' * 10)
+    files['src/module7.js'] = 2
+    with repo.Repository(project_dir) as repository:
+        current = coverage.record(coverage.load_report(write_lcov(project_dir, files), project_dir), repository)
+        result = coverage.delta(repository, 'HEAD', current)
+
+    if current['tree'] is not None:
+        print("❌ A dirty work tree must not overwrite HEAD's manifest")
+        return False
+    if [entry['path'] for entry in result['changed_files']] != ['src/module7.js']:
+        print(f"❌ Only the changed file should be compared: {result['changed_files']}")
+        return False
+    if result['before'] != 1.0 or abs(result['after'] - 192 / 200) > 1e-9:
+        print(f"❌ Unexpected before/after: {result['before']} -> {result['after']}")
+        return False
+
+    # A changed file whose baseline contents were never measured has no baseline
+    (Path(project_dir) / 'src' / 'new.js').write_text('const fresh = 1;\n')
+    git(project_dir, 'add', '-A')
+    git(project_dir, 'commit', '-q', '-m', 'unmeasured commit')
+    (Path(project_dir) / 'src' / 'new.js').write_text('const fresh = 2;\n')
+    files['src/new.js'] = 1
+    with repo.Repository(project_dir) as repository:
+        current = coverage.record(coverage.load_report(write_lcov(project_dir, files), project_dir), repository)
+        if coverage.delta(repository, 'HEAD', current) is not None:
+            print("❌ Unknown baseline for a changed file should give no delta")
+            return False
+    print(f"✅ {result['before']:.0%} -> {result['after']:.0%} from one changed file; unknown baselines refused")
+    return True
+
+
+def test_evaluator_and_cli(project_dir):
+    """The evaluator's baseline lookup and `doom coverage` use the store"""
+    print("\n🔌 Testing evaluator and CLI wiring")
+
+    make_project(project_dir, modules=4)
+    write_lcov(project_dir, {f'src/module{i}.js': 5 for i in range(4)})
+    recorded = run_cli(project_dir, 'coverage', 'record', '--json')
+    if recorded.returncode != 0 or json.loads(recorded.stdout)['percent'] != 0.5:
+        print(f"❌ CLI record failed: {recorded.stdout}{recorded.stderr}")
+        return False
+    shown = run_cli(project_dir, 'coverage', 'show')
+    if shown.returncode != 0 or '50.0%' not in shown.stdout:
+        print(f"❌ CLI show failed: {shown.stdout}{shown.stderr}")
+        return False
+
+    (Path(project_dir) / 'src' / 'module0.js').write_text('const better = 1;\n' * 10)
+    write_lcov(project_dir, {'src/module0.js': 10, **{f'src/module{i}.js': 5 for i in range(1, 4)}})
+    evaluator = RLVREvaluator()
+    with repo.Repository(project_dir) as evaluator.repo:
+        evaluator.base = 'HEAD'
+        result = evaluator._coverage_from_store()
+        baseline = evaluator._get_coverage_from_commit('HEAD')
+    if (result['before'], result['after'], baseline) != (0.5, 25 / 40, 0.5):
+        print(f"❌ Evaluator saw {result}, baseline {baseline}")
+        return False
+    print(f"✅ CLI records/shows 50%; evaluator compares 50% -> {result['after']:.1%} on 1 changed file")
+    return True
+
+
+def main():
+    """Run coverage store tests"""
+    print("🧪 Testing Coverage Store\n")
+
+    tests = [test_encoding_and_parsers, test_bitmaps_reused_across_commits, test_delta_over_changed_files,
+             test_evaluator_and_cli]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
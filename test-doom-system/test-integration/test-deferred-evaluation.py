@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Test deferred evaluation
+Verifies that Stop only queues the task, that a drain evaluates the queue
+in parallel and records final rewards, that each entry is evaluated in its
+own checkout of the work tree as it was at Stop and without the time it
+waited, that dead claims and failing entries are handled, and that the
+background drainer empties the spool by itself
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import metrics, spool  # noqa: E402
+from test_support import run_cli, run_hook  # noqa: E402
+
+
+def setup_project(project_dir, autostart=False):
+    """A git repository with one commit and a config that controls the drainer"""
+    def git(*args):
+        subprocess.run(['git', *args], cwd=project_dir, capture_output=True, check=True)
+    git('init', '-q')
+    git('config', 'user.email', 'test@example.com')
+    git('config', 'user.name', 'Test')
+    (Path(project_dir) / 'app.py').write_text('print("hi")\n')
+    git('add', 'app.py')
+    git('commit', '-q', '-m', 'init')
+
+    config = json.loads((PROJECT_ROOT / 'doom' / 'config' / 'evaluator-config.json').read_text())
+    config['deferred_evaluation'].update(autostart=autostart, workers=3)
+    target = Path(project_dir) / '.claude' / 'evaluator-config.json'
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(config))
+
+
+def run_task(project_dir, prompt, edit):
+    """Prompt, one edit and Stop; returns the task id and the Stop hook's wall time"""
+    run_hook(project_dir, 'user-prompt-submit.py', {'prompt': prompt}, DOOM_DEFER_EVALUATION='true')
+    task_id = json.loads((Path(project_dir) / '.claude' / 'tasks' / 'current.json').read_text())['task_id']
+    (Path(project_dir) / edit).write_text(f'# {prompt}\n')
+    start = time.perf_counter()
+    stop = run_hook(project_dir, 'stop.py', {}, DOOM_DEFER_EVALUATION='true')
+    elapsed = time.perf_counter() - start
+    if stop.returncode != 0:
+        raise RuntimeError(stop.stderr)
+    return task_id, elapsed
+
+
+def metadata(project_dir, task_id):
+    return json.loads((Path(project_dir) / '.claude' / 'tasks' / task_id / 'metadata.json').read_text())
+
+
+def queue_depth():
+    for line in metrics.render().splitlines():
+        if line.startswith('doom_queue_depth '):
+            return float(line.split()[1])
+    return None
+
+
+def test_stop_queues_task(project_dir):
+    """Stop records a pending entry and shows it as pending everywhere"""
+    print("\n📥 Testing Stop in deferred mode")
+
+    setup_project(project_dir)
+    task_id, elapsed = run_task(project_dir, 'Fix the crash in the login form', 'app.py')
+    entry = json.loads((Path(project_dir) / '.claude' / 'spool' / 'pending' / f'{task_id}.json').read_text())
+    if not entry['commit'] or 'changed_files' in entry or entry['task_type'] != 'bugfix':
+        print(f"❌ Unexpected spool entry: {entry}")
+        return False
+    if (Path(project_dir) / '.claude' / 'scoreboard' / 'rlvr.jsonl').exists() or \
+            (Path(project_dir) / '.claude' / 'tasks' / 'current.json').exists():
+        print("❌ Stop should close the task without evaluating it")
+        return False
+
+    task = json.loads(run_cli(project_dir, 'status', '--task', task_id, '--json').stdout)
+    board = json.loads(run_cli(project_dir, 'leaderboard', '--json').stdout)
+    if (task['evaluation'], task['reward']) != ('pending', None) or board['pending'] != {entry['agent_name']: 1}:
+        print(f"❌ Expected a pending reward: {task}, {board}")
+        return False
+    print(f"✅ Stop returned in {elapsed * 1000:.0f} ms with {task_id} pending at {entry['commit'][:8]}")
+    return True
+
+
+def test_drain_records_final_rewards(project_dir):
+    """Three queued tasks are evaluated by one drain and finished like inline Stops"""
+    print("\n⚙️  Testing drain")
+
+    setup_project(project_dir)
+    task_ids = [run_task(project_dir, prompt, 'app.py')[0] for prompt in (
+        'Fix the crash in the login form', 'Add a dark mode feature', 'Refactor the session module')]
+    queued = queue_depth()
+    drained = run_cli(project_dir, 'drain')
+    if drained.returncode != 0 or 'Evaluated 3 deferred tasks, 0 failed' not in drained.stdout:
+        print(f"❌ Drain failed: {drained.stdout}{drained.stderr}")
+        return False
+
+    rows = [json.loads(line) for line in
+            (Path(project_dir) / '.claude' / 'scoreboard' / 'rlvr.jsonl').read_text().splitlines()]
+    states = [metadata(project_dir, task_id) for task_id in task_ids]
+    if sorted(r['task_id'] for r in rows) != sorted(task_ids) or spool.entries():
+        print(f"❌ Expected three scoreboard rows and an empty spool: {rows}")
+        return False
+    if any(s['evaluation'] != 'final' or s['reward'] is None for s in states):
+        print(f"❌ Metadata should hold final rewards: {states}")
+        return False
+    status = json.loads(run_cli(project_dir, 'status', '--json').stdout)
+    if status['pending'] or len(status['recent']) != 3:
+        print(f"❌ Unexpected status: {status}")
+        return False
+    if (queued, queue_depth()) != (3, 0):
+        print(f"❌ doom_queue_depth should follow the spool: {queued} queued, {queue_depth()} after the drain")
+        return False
+    print(f"✅ {len(rows)} rewards recorded: {[round(r['reward'], 2) for r in rows]}")
+    return True
+
+
+def test_isolated_checkout(project_dir):
+    """Drains see the work tree as it was at Stop and do not charge the spool wait to the task"""
+    print("\n🧊 Testing isolated checkouts")
+
+    setup_project(project_dir)
+    task_id, _ = run_task(project_dir, 'Fix the crash in the login form', 'app.py')
+    entry_path = spool.pending_dir() / f'{task_id}.json'
+    entry = json.loads(entry_path.read_text())
+
+    # The agent's edit is uncommitted: the entry holds a snapshot, not HEAD
+    head = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=project_dir, capture_output=True, text=True).stdout.strip()
+    if entry['commit'] == head or (Path(project_dir) / '.git' / 'refs' / 'doom' / 'spool' / task_id).read_text().strip() != \
+            entry['commit']:
+        print(f"❌ Expected a referenced work-tree snapshot, got {entry['commit']} (HEAD {head})")
+        return False
+
+    # The live tree moves on and the entry waits an hour before it is drained
+    (Path(project_dir) / 'later.py').write_text('print("next task")\n')
+    usage_path = Path(project_dir) / '.claude' / 'tasks' / task_id / 'usage.json'
+    usage = json.loads(usage_path.read_text())
+    usage['started_at'] = time.time() - 3610
+    usage_path.write_text(json.dumps(usage))
+    entry['queued_at'] = datetime.utcfromtimestamp(time.time() - 3600).isoformat()
+    entry_path.write_text(json.dumps(entry))
+
+    counts = spool.drain(workers=2)
+    row = json.loads((Path(project_dir) / '.claude' / 'scoreboard' / 'rlvr.jsonl').read_text().splitlines()[-1])
+    if counts['evaluated'] != 1 or row['changes']['files_changed'] != ['app.py'] or \
+            row['changes']['head'] != entry['commit']:
+        print(f"❌ Evaluation should see only the snapshot: {counts}, {row.get('changes')}")
+        return False
+    if not 9000 <= row['usage']['duration_ms'] <= 11000 or row['components']['efficiency_score'] != 1.0:
+        print(f"❌ Spool wait counted against the task: {row['usage']}, {row['components']['efficiency_score']}")
+        return False
+
+    worktrees = subprocess.run(['git', 'worktree', 'list'], cwd=project_dir, capture_output=True, text=True).stdout
+    leftovers = list(spool.worktrees_dir().iterdir()) if spool.worktrees_dir().exists() else []
+    refs = subprocess.run(['git', 'for-each-ref', 'refs/doom'], cwd=project_dir, capture_output=True, text=True).stdout
+    if len(worktrees.splitlines()) != 1 or leftovers or refs:
+        print(f"❌ Checkout or snapshot ref left behind: {worktrees}{leftovers}{refs}")
+        return False
+    print(f"✅ Evaluated snapshot {entry['commit'][:8]} in its own worktree; "
+          f"{row['usage']['duration_ms'] // 1000}s charged after an hour in the spool")
+    return True
+
+
+def test_recovery_and_failures(project_dir):
+    """Claims of dead drainers are requeued; failing entries end in failed/ after max_attempts"""
+    print("\n🩹 Testing recovery and failures")
+
+    setup_project(project_dir)
+    task_id, _ = run_task(project_dir, 'Fix the crash in the login form', 'app.py')
+    pending = spool.pending_dir() / f'{task_id}.json'
+    spool.running_dir().mkdir(parents=True)
+    os.rename(pending, spool.running_dir() / f'999999999.{task_id}.json')
+    broken = {'task_id': 'task-broken', 'task_status': 'completed', 'queued_at': '2024-01-01T00:00:00'}
+    (spool.pending_dir() / 'task-broken.json').write_text(json.dumps(broken))
+
+    if spool.state_of(task_id) != 'running':
+        print("❌ The claim should show as running")
+        return False
+    counts = spool.drain(workers=2)
+    failed = [e for e in spool.entries() if e['state'] == 'failed']
+    if counts != {'evaluated': 1, 'retried': 1, 'failed': 1, 'busy': False}:
+        print(f"❌ Unexpected drain counts: {counts}")
+        return False
+    if len(failed) != 1 or failed[0]['attempts'] != 2 or 'KeyError' not in failed[0]['error'] or \
+            metadata(project_dir, task_id)['evaluation'] != 'final':
+        print(f"❌ Unexpected spool state: {spool.entries()}")
+        return False
+    print(f"✅ Orphaned claim evaluated; broken entry failed after {failed[0]['attempts']} attempts")
+    return True
+
+
+def test_background_drainer(project_dir):
+    """With autostart on, Stop's detached drainer empties the spool"""
+    print("\n🌙 Testing background drainer")
+
+    setup_project(project_dir, autostart=True)
+    task_id, elapsed = run_task(project_dir, 'Fix the crash in the login form', 'app.py')
+    deadline = time.time() + 90
+    while time.time() < deadline and metadata(project_dir, task_id).get('evaluation') != 'final':
+        time.sleep(0.2)
+    # Let the drainer release its lock before the project directory goes away
+    while time.time() < deadline and spool.drain(workers=1)['busy']:
+        time.sleep(0.2)
+
+    task = metadata(project_dir, task_id)
+    if task.get('evaluation') != 'final' or spool.entries():
+        log = (Path(project_dir) / '.claude' / 'spool' / 'drain.log')
+        print(f"❌ The drainer did not finish: {task}\n{log.read_text() if log.exists() else ''}")
+        return False
+    print(f"✅ Stop took {elapsed * 1000:.0f} ms; reward {task['reward']:.2f} arrived in the background")
+    return True
+
+
+def main():
+    """Run deferred evaluation tests"""
+    print("🧪 Testing Deferred Evaluation\n")
+
+    tests = [test_stop_queues_task, test_drain_records_final_rewards, test_isolated_checkout,
+             test_recovery_and_failures, test_background_drainer]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
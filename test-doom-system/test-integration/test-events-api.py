@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test the in-process events API
+Verifies doom.events.record / record_many, doom.evaluate, and that the
+batch entry point and `doom evaluate` finish tasks the way Stop does
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import doom  # noqa: E402
+from doom import events  # noqa: E402
+from doom.evaluator import RLVREvaluator  # noqa: E402
+
+
+class FixedEvaluator(RLVREvaluator):
+    """Evaluator with fixed component scores so the test needs no toolchain"""
+
+    def _evaluate_test_coverage(self):
+        return 0.5
+
+    def _evaluate_lint(self):
+        return 1.0
+
+    def _evaluate_security(self):
+        return 1.0
+
+    def _evaluate_complexity(self):
+        return 0.0
+
+    def _evaluate_ci_status(self):
+        return 1.0
+
+
+def read_jsonl(path):
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_record_and_batch(project_dir):
+    """record() and record_many() append well-formed rows"""
+    print("\n📝 Testing record / record_many")
+
+    events.record('tool_use', task_id='t-1', agent_name='agent-bugfix-senior', tool_name='Edit')
+    events.record_many([
+        {'event': 'tool_use', 'task_id': 't-1', 'tool_name': f'Tool{i}'} for i in range(50)
+    ])
+
+    rows = read_jsonl(Path(project_dir) / '.claude' / 'scoreboard' / 'events.jsonl')
+    if len(rows) != 51 or not all('timestamp' in r and r['event'] == 'tool_use' for r in rows):
+        print(f"❌ Expected 51 tool_use rows, got {len(rows)}")
+        return False
+
+    try:
+        events.record_many([{'task_id': 'missing-type'}])
+        print("❌ Event without a type was accepted")
+        return False
+    except ValueError:
+        pass
+
+    print("✅ Events recorded")
+    return True
+
+
+def test_in_process_evaluate(project_dir):
+    """doom.evaluate writes the scoreboard and an evaluation event"""
+    print("\n🎯 Testing doom.evaluate")
+
+    result = doom.evaluate('t-2', 'agent-feature-senior', 'completed', evaluator=FixedEvaluator())
+    scoreboard = read_jsonl(Path(project_dir) / '.claude' / 'scoreboard' / 'rlvr.jsonl')
+    logged = [r for r in read_jsonl(Path(project_dir) / '.claude' / 'scoreboard' / 'events.jsonl')
+              if r['event'] == 'evaluation']
+
+    if not scoreboard or scoreboard[-1]['task_id'] != 't-2':
+        print("❌ Evaluation missing from rlvr.jsonl")
+        return False
+    if not logged or logged[-1]['reward'] != result['reward']:
+        print("❌ Evaluation event missing")
+        return False
+
+    print(f"✅ Evaluated in-process - Reward: {result['reward']:.2f}")
+    return True
+
+
+def test_cli_batch(project_dir):
+    """One CLI invocation ingests a whole session's events"""
+    print("\n📦 Testing batch entry point")
+
+    batch = [{'event': 'tool_use', 'task_id': 't-3', 'agent_name': 'agent-bugfix-junior',
+              'tool_name': 'Edit'} for _ in range(200)]
+    batch.append({'event': 'stop', 'task_id': 't-3', 'agent_name': 'agent-bugfix-junior'})
+
+    env = os.environ.copy()
+    env['CLAUDE_PROJECT_DIR'] = project_dir
+    result = subprocess.run(
+        ['python3', str(PROJECT_ROOT / 'doom' / 'scripts' / 'doom-cli.py'), 'events', '--json'],
+        input='\n'.join(json.dumps(e) for e in batch),
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=120
+    )
+    if result.returncode != 0:
+        print(f"❌ Batch failed: {result.stderr[-300:]}")
+        return False
+
+    summary = json.loads(result.stdout)
+    scoreboard = read_jsonl(Path(project_dir) / '.claude' / 'scoreboard' / 'rlvr.jsonl')
+    if summary['recorded'] != 201 or len(summary['evaluations']) != 1:
+        print(f"❌ Unexpected summary: recorded={summary['recorded']}")
+        return False
+    if not any(r['task_id'] == 't-3' for r in scoreboard):
+        print("❌ Stop event was not evaluated")
+        return False
+
+    evaluated = subprocess.run(
+        ['python3', str(PROJECT_ROOT / 'doom' / 'scripts' / 'doom-cli.py'), 'evaluate', 't-4', 'agent-feature-senior'],
+        capture_output=True, text=True, env=env, timeout=120)
+    for task_id in ('t-3', 't-4'):
+        metadata_file = Path(project_dir) / '.claude' / 'tasks' / task_id / 'metadata.json'
+        metadata = json.loads(metadata_file.read_text()) if metadata_file.exists() else {}
+        if metadata.get('evaluation') != 'final' or metadata.get('reward') is None:
+            print(f"❌ {task_id} should be finished like an inline Stop: {metadata} {evaluated.stderr[-300:]}")
+            return False
+
+    print("✅ 201 events and 1 evaluation in a single process; both tasks finished")
+    return True
+
+
+def test_concurrent_appends(project_dir):
+    """Parallel writers must not interleave partial lines"""
+    print("\n🔀 Testing concurrent appends")
+
+    env = os.environ.copy()
+    env['CLAUDE_PROJECT_DIR'] = project_dir
+    env['PYTHONPATH'] = str(PROJECT_ROOT)
+    writer = ("from doom import events\n"
+              "events.record_many([{'event': 'tool_use', 'payload': 'x' * 5000} for _ in range(50)])")
+    procs = [subprocess.Popen(['python3', '-c', writer], env=env) for _ in range(6)]
+    for proc in procs:
+        proc.wait()
+
+    try:
+        rows = read_jsonl(Path(project_dir) / '.claude' / 'scoreboard' / 'events.jsonl')
+    except json.JSONDecodeError:
+        print("❌ Corrupted line in events.jsonl")
+        return False
+
+    if len(rows) != 300:
+        print(f"❌ Expected 300 rows, got {len(rows)}")
+        return False
+    print("✅ 300 rows from 6 writers, no corruption")
+    return True
+
+
+def main():
+    """Run events API tests"""
+    print("🧪 Testing Events API\n")
+
+    tests = [test_record_and_batch, test_in_process_evaluate, test_cli_batch, test_concurrent_appends]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
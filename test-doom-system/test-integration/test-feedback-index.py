@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test feedback deduplication and clustering
+Verifies exact and near-duplicate clustering, per-scope top lessons, the
+Stop -> UserPromptSubmit loop, that only measured weak components produce
+suggestions and that the index stays small under repetition
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import feedback  # noqa: E402
+from test_support import run_hook  # noqa: E402
+
+VARIANTS = [
+    'Test coverage dropped; add tests that exercise the changed code paths',
+    'test coverage dropped - add tests that exercise the changed code paths!',
+    'Test coverage dropped; please add tests that exercise the changed code paths',
+    'Test coverage dropped, add unit tests that exercise the changed code path',
+]
+
+
+def test_near_duplicates_cluster(project_dir):
+    """Exact and near-duplicate suggestions share one cluster"""
+    print("\n🧩 Testing near-duplicate clustering")
+
+    index = feedback.FeedbackIndex()
+    ids = {index.add(text, 'testing', 'agent-bugfix-junior', 'bugfix') for text in VARIANTS}
+    other = index.add('Security scan reported vulnerabilities; fix or justify each finding',
+                      'security', 'agent-bugfix-junior', 'bugfix')
+
+    if len(ids) != 1 or other in ids:
+        print(f"❌ Expected one testing cluster plus one security cluster, got {ids} / {other}")
+        return False
+    cluster = index.state['clusters'][ids.pop()]
+    if cluster['count'] != 4 or cluster['scopes']['type:bugfix']['count'] != 4:
+        print(f"❌ Unexpected cluster counts: {cluster['count']}")
+        return False
+    print(f"✅ {len(VARIANTS)} variants -> 1 cluster, unrelated suggestion kept apart")
+    return True
+
+
+def test_measured_components_only(project_dir):
+    """Fallback scores give no feedback; complexity feedback follows its sign"""
+    print("\n🎯 Testing which components produce feedback")
+
+    components = {'lint_score': 0.5, 'security_scan_score': 0.8, 'ci_pipeline_status': 0.5,
+                  'code_complexity_delta': 0.5, 'test_coverage_delta': 0.2}
+    fallback = {'components': components, 'unmeasured': ['lint_score', 'security_scan_score', 'ci_pipeline_status']}
+    if feedback.generate_feedback(fallback):
+        print(f"❌ Fallback scores produced feedback: {feedback.generate_feedback(fallback)}")
+        return False
+
+    measured = {'components': dict(components, code_complexity_delta=-0.5, ci_pipeline_status=0.0)}
+    areas = [s['area'] for s in feedback.generate_feedback(measured)]
+    if areas != ['lint', 'security', 'complexity', 'ci']:
+        print(f"❌ Measured weak components should each produce feedback: {areas}")
+        return False
+    print(f"✅ No feedback from fallback scores; measured ones flag {', '.join(areas)}")
+    return True
+
+
+def test_top_lessons_by_scope(project_dir):
+    """Top lessons are ranked per agent and task type"""
+    print("\n🎯 Testing top lessons lookup")
+
+    for _ in range(3):
+        feedback.record_feedback('t-1', 'agent-feature-junior', 'feature', [
+            {'area': 'lint', 'suggestion': 'Lint issues remain; run the linter and fix warnings before finishing'},
+        ])
+    feedback.record_feedback('t-2', 'agent-feature-junior', 'feature', [
+        {'area': 'ci', 'suggestion': 'CI checks did not pass; run the test suite locally before stopping'},
+    ])
+    feedback.record_feedback('t-3', 'agent-security-senior', 'security', [
+        {'area': 'security', 'suggestion': 'Security scan reported vulnerabilities; fix or justify each finding'},
+    ])
+
+    lessons = feedback.top_lessons('agent-feature-junior', 'feature', k=3)
+    if [lesson['area'] for lesson in lessons] != ['lint', 'ci'] or lessons[0]['count'] != 3:
+        print(f"❌ Unexpected lessons: {lessons}")
+        return False
+    if feedback.top_lessons(None, 'security', k=3)[0]['area'] != 'security':
+        print("❌ Task type scope not honoured")
+        return False
+
+    history = feedback.history_file('agent-feature-junior').read_text().splitlines()
+    if len(history) != 4:
+        print(f"❌ Raw history should keep every suggestion, has {len(history)}")
+        return False
+
+    summary = feedback.rebuild()
+    if summary != {'suggestions': 5, 'clusters': 3}:
+        print(f"❌ Unexpected rebuild summary: {summary}")
+        return False
+    print("✅ Lessons ranked per scope; rebuild reproduces 3 clusters from 5 suggestions")
+    return True
+
+
+def test_stop_feeds_next_prompt(project_dir):
+    """Feedback recorded at Stop shows up in the next assignment prompt"""
+    print("\n🔁 Testing Stop -> UserPromptSubmit loop")
+
+    def prompt(text):
+        return json.loads(run_hook(project_dir, 'user-prompt-submit.py', {'prompt': text}).stdout)['userPrompt']
+
+    prompt('Fix the crash in the importer')
+    run_hook(project_dir, 'stop.py', {})
+
+    histories = list(Path(project_dir, '.claude', 'feedback').glob('*_feedback.jsonl'))
+    if not histories:
+        print("❌ Stop hook recorded no feedback")
+        return False
+
+    enhanced = prompt('Fix the broken export button')
+    if 'Lessons from previous tasks:' not in enhanced:
+        print(f"❌ Lessons missing from prompt:\n{enhanced}")
+        return False
+    print(f"✅ {len(histories)} feedback history file(s); lessons injected into next prompt")
+    return True
+
+
+def test_index_stays_small(project_dir):
+    """Thousands of repeated suggestions keep a small index and lookup"""
+    print("\n⏱️  Testing index size under repetition")
+
+    index = feedback.FeedbackIndex()
+    areas = [rule[2] for rule in feedback.FEEDBACK_RULES]
+    texts = [rule[3] for rule in feedback.FEEDBACK_RULES]
+    for i in range(3000):
+        text = texts[i % len(texts)]
+        if i % 3 == 0:
+            text = text.replace(';', ' -').upper()
+        index.add(text, areas[i % len(areas)], f'agent-a{i % 4}-senior', ['bugfix', 'feature'][i % 2])
+
+    clusters = len(index.state['clusters'])
+    lessons_size = len(json.dumps({'scopes': index.lessons()}))
+    if clusters != len(texts):
+        print(f"❌ Expected {len(texts)} clusters, got {clusters}")
+        return False
+
+    feedback.lessons_file().parent.mkdir(parents=True, exist_ok=True)
+    feedback.lessons_file().write_text(json.dumps({'scopes': index.lessons()}))
+    start = time.perf_counter()
+    for _ in range(200):
+        feedback.top_lessons('agent-a1-senior', 'feature')
+    per_lookup_ms = (time.perf_counter() - start) * 1000 / 200
+    print(f"   - 3000 suggestions -> {clusters} clusters, lessons.json {lessons_size} bytes, "
+          f"lookup {per_lookup_ms:.2f} ms")
+    if lessons_size > 16384 or per_lookup_ms > 5:
+        print("❌ Lessons lookup is not small")
+        return False
+    print("✅ Index bounded by distinct lessons, not history length")
+    return True
+
+
+def main():
+    """Run feedback index tests"""
+    print("🧪 Testing Feedback Index\n")
+
+    tests = [test_near_duplicates_cluster, test_measured_components_only, test_top_lessons_by_scope,
+             test_stop_feeds_next_prompt, test_index_stays_small]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test the batched git access layer
+Compares revision lookups, file reads and changed-file lists with the git
+CLI, and checks that a whole evaluation starts at most two git processes
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from doom import repo  # noqa: E402
+from doom.evaluator import RLVREvaluator  # noqa: E402
+
+
+def git(project_dir, *args):
+    return subprocess.run(['git', *args], cwd=project_dir, capture_output=True, text=True, check=True).stdout
+
+
+def make_history(project_dir):
+    """Three commits touching nested files, a deletion, a rename and a file/dir swap"""
+    root = Path(project_dir)
+    git(project_dir, 'init', '-q', '-b', 'main')
+    git(project_dir, 'config', 'user.email', 'test@example.com')
+    git(project_dir, 'config', 'user.name', 'Test')
+    for i in range(30):
+        path = root / 'src' / f'pkg{i % 3}' / f'module{i}.py'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f'VALUE = {i}\n')
+    (root / 'README.md').write_text('# demo\n')
+    (root / 'docs').write_text('docs as a file\n')
+    git(project_dir, 'add', '-A')
+    git(project_dir, 'commit', '-q', '-m', 'initial')
+
+    (root / 'src' / 'pkg1' / 'module4.py').write_text('VALUE = 400\n')
+    (root / 'src' / 'pkg2' / 'module5.py').unlink()
+    (root / 'src' / 'pkg0' / 'module0.py').rename(root / 'src' / 'pkg0' / 'renamed.py')
+    git(project_dir, 'add', '-A')
+    git(project_dir, 'commit', '-q', '-m', 'edit, delete, rename')
+
+    (root / 'docs').unlink()
+    (root / 'docs').mkdir()
+    (root / 'docs' / 'index.md').write_text('docs as a directory\n')
+    git(project_dir, 'add', '-A')
+    git(project_dir, 'commit', '-q', '-m', 'docs directory')
+
+
+def test_matches_git_cli(project_dir):
+    """rev_parse, read_file, list_files and changed_files agree with git"""
+    print("\n🔍 Testing agreement with the git CLI")
+
+    make_history(project_dir)
+    with repo.Repository(project_dir) as repository:
+        for rev in ('HEAD', 'HEAD~1', 'HEAD~2', 'main'):
+            if repository.rev_parse(rev) != git(project_dir, 'rev-parse', rev).strip():
+                print(f"❌ rev_parse({rev}) differs")
+                return False
+        if repository.rev_parse('no-such-branch') is not None:
+            print("❌ Unknown revisions should resolve to None")
+            return False
+
+        content = repository.read_file('HEAD~2', 'src/pkg1/module4.py')
+        if content != b'VALUE = 4\n' or repository.read_file('HEAD', 'src/pkg2/module5.py') is not None:
+            print(f"❌ Unexpected file contents: {content!r}")
+            return False
+
+        listed = sorted(repository.list_files('HEAD'))
+        if listed != sorted(git(project_dir, 'ls-tree', '-r', '--name-only', 'HEAD').split()):
+            print("❌ list_files differs from git ls-tree")
+            return False
+
+        for old, new in (('HEAD~2', 'HEAD~1'), ('HEAD~1', 'HEAD'), ('HEAD~2', 'HEAD'), ('HEAD', 'HEAD~2')):
+            expected = sorted(git(project_dir, 'diff', '--name-only', '--no-renames', old, new).split())
+            if repository.changed_files(old, new) != expected:
+                print(f"❌ changed_files({old}, {new}) = {repository.changed_files(old, new)}, expected {expected}")
+                return False
+        if repository.current_branch() != 'main':
+            print(f"❌ Unexpected branch: {repository.current_branch()}")
+            return False
+    print(f"✅ Revisions, file reads, {len(listed)} listed files and 4 diffs match git "
+          f"({repository.launches} process)")
+    return True
+
+
+def test_working_tree_status(project_dir):
+    """Uncommitted edits and untracked files come from a single git status"""
+    print("\n📝 Testing working-tree changes")
+
+    make_history(project_dir)
+    root = Path(project_dir)
+    with repo.Repository(project_dir) as repository:
+        clean = repository.is_dirty()
+    (root / 'src' / 'pkg1' / 'module7.py').write_text('VALUE = 70\n')
+    (root / 'notes.txt').write_text('untracked\n')
+
+    with repo.Repository(project_dir) as repository:
+        dirty = repository.is_dirty()
+        changes = repository.changes_since('HEAD~1')
+        launches = repository.launches
+    expected = sorted(['docs', 'docs/index.md', 'src/pkg1/module7.py', 'notes.txt'])
+    if clean or not dirty or changes != expected:
+        print(f"❌ Unexpected status: clean={clean}, dirty={dirty}, changes={changes}")
+        return False
+    if launches != 2:
+        print(f"❌ Expected one cat-file and one status process, saw {launches}")
+        return False
+    print(f"✅ {len(changes)} changed paths since HEAD~1 with {launches} git processes")
+    return True
+
+
+def test_evaluation_process_budget(project_dir):
+    """A full evaluation makes at most two git launches and records its changes"""
+    print("\n⚙️  Testing evaluation process count")
+
+    make_history(project_dir)
+    (Path(project_dir) / 'README.md').write_text('# demo, edited\n')
+    task_dir = Path(project_dir) / '.claude' / 'tasks' / 'task-1'
+    task_dir.mkdir(parents=True)
+    base = git(project_dir, 'rev-parse', 'HEAD~2').strip()
+    (task_dir / 'metadata.json').write_text(json.dumps({'task_id': 'task-1', 'baseline_commit': base}))
+    git(project_dir, 'add', 'README.md')
+
+    evaluator = RLVREvaluator()
+    evaluator.timeout = 5
+    result = evaluator.evaluate('task-1', 'agent-bugfix-junior', 'completed')
+    expected = sorted(set(git(project_dir, 'diff', '--name-only', '--no-renames', base).split()))
+    if result.get('changes', {}).get('files_changed') != expected or result['changes']['base'] != base:
+        print(f"❌ Unexpected changes: {result.get('changes')}, expected {expected}")
+        return False
+    if evaluator.repo.launches > 2:
+        print(f"❌ Evaluation started {evaluator.repo.launches} git processes")
+        return False
+
+    outside = tempfile.mkdtemp()
+    with repo.Repository(outside) as repository:
+        if repository.is_repository or repository.head() is not None:
+            print("❌ A plain directory should not look like a repository")
+            return False
+    os.rmdir(outside)
+    print(f"✅ {len(expected)} files changed since the baseline; "
+          f"{evaluator.repo.launches} git processes for the whole evaluation")
+    return True
+
+
+def main():
+    """Run git access layer tests"""
+    print("🧪 Testing Batched Git Access\n")
+
+    tests = [test_matches_git_cli, test_working_tree_status, test_evaluation_process_budget]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
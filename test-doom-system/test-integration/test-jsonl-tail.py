@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test the reverse JSONL reader
+Verifies newest-first reads across block boundaries, that "last N" queries
+read a bounded number of bytes, and the `doom scores` / `doom logs` commands
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import events, paths  # noqa: E402
+from test_support import run_cli  # noqa: E402
+
+
+def write_scores(path, count, agents=('agent-bugfix-junior', 'agent-feature-junior', 'agent-bugfix-senior')):
+    rows = [{'timestamp': f'2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}', 'task_id': f'task-{i}',
+             'agent_name': agents[i % len(agents)], 'task_status': 'completed', 'reward': round(i / count, 4),
+             'components': {'lint_score': 1.0}} for i in range(count)]
+    events.append_jsonl(path, rows)
+    return rows
+
+
+def test_reverse_lines(project_dir):
+    """Lines come back newest first whatever the block size"""
+    print("\n⏪ Testing reverse line reads")
+
+    path = Path(project_dir) / 'lines.jsonl'
+    lines = [b'{"n": 0}', b'{"long": "' + b'x' * 300 + b'"}', b'', b'{"n": 2}', b'   ', b'{"n": 4}']
+    # The last row is still being written and has no newline yet
+    path.write_bytes(b'\n'.join(lines) + b'\n{"n": 5, "partial"')
+    expected = [line for line in reversed(lines) if line.strip()]
+
+    for block_size in (1, 7, 64, 4096):
+        found = list(events.read_reverse(path, block_size))
+        if found != expected:
+            print(f"❌ Block size {block_size}: {found}")
+            return False
+    path.write_bytes(b'{"only": "partial"')
+    if list(events.read_reverse(path)) or list(events.read_reverse(Path(project_dir) / 'missing.jsonl')):
+        print("❌ A partial or missing file should yield nothing")
+        return False
+    print(f"✅ {len(expected)} lines newest first for block sizes 1-4096; partial rows skipped")
+    return True
+
+
+class CountingFile(io.FileIO):
+    bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        CountingFile.bytes_read += len(data)
+        return data
+
+
+def test_bounded_reads(project_dir):
+    """A last-N query reads a few blocks, not the whole file"""
+    print("\n📏 Testing read cost")
+
+    path = paths.scoreboard_dir() / 'rlvr.jsonl'
+    rows = write_scores(path, 30000)
+    size = path.stat().st_size
+
+    events.open = lambda file, mode='rb': CountingFile(file, 'r')
+    try:
+        latest = events.tail(path, 5, agent_name='agent-feature-junior')
+        tail_bytes = CountingFile.bytes_read
+        CountingFile.bytes_read = 0
+        one_task = events.tail(path, 1, task_id='task-29990')
+        task_bytes = CountingFile.bytes_read
+    finally:
+        del events.open
+
+    expected = [row for row in reversed(rows) if row['agent_name'] == 'agent-feature-junior'][:5]
+    if latest != expected or [row['task_id'] for row in one_task] != ['task-29990']:
+        print(f"❌ Wrong rows: {[row['task_id'] for row in latest]}")
+        return False
+    if tail_bytes > 2 * events.BLOCK_SIZE or task_bytes > 2 * events.BLOCK_SIZE:
+        print(f"❌ Read {tail_bytes} and {task_bytes} bytes of a {size}-byte file")
+        return False
+    print(f"✅ Last 5 for one agent read {tail_bytes} of {size} bytes")
+    return True
+
+
+def test_cli_commands(project_dir):
+    """`doom scores` and `doom logs` filter and limit the newest rows"""
+    print("\n🖥️  Testing doom scores / doom logs")
+
+    write_scores(paths.scoreboard_dir() / 'rlvr.jsonl', 50)
+    for i in range(30):
+        events.record('tool_use', task_id=f'task-{i % 3}', agent_name='agent-bugfix-junior', tool=f'Tool{i}')
+
+    scores = run_cli(project_dir, 'scores', '--agent', 'agent-bugfix-senior', '--last', '3', '--json')
+    table = run_cli(project_dir, 'scores', '--agent', 'agent-bugfix-senior', '--last', '1')
+    logs = run_cli(project_dir, 'logs', '--tail', '4', '--task', 'task-1', '--json')
+    if scores.returncode != 0 or table.returncode != 0 or logs.returncode != 0:
+        print(f"❌ CLI failed: {scores.stderr}{table.stderr}{logs.stderr}")
+        return False
+
+    score_ids = [row['task_id'] for row in json.loads(scores.stdout)]
+    tools = [row['tool'] for row in json.loads(logs.stdout)]
+    if score_ids != ['task-47', 'task-44', 'task-41'] or 'task-47' not in table.stdout or 'task-44' in table.stdout:
+        print(f"❌ Unexpected scores: {score_ids}\n{table.stdout}")
+        return False
+    if tools != ['Tool19', 'Tool22', 'Tool25', 'Tool28']:
+        print(f"❌ Unexpected events: {tools}")
+        return False
+    print(f"✅ scores --last 3 -> {score_ids}; logs --tail 4 oldest-first")
+    return True
+
+
+def main():
+    """Run reverse reader tests"""
+    print("🧪 Testing JSONL Tail Reads\n")
+
+    tests = [test_reverse_lines, test_bounded_reads, test_cli_commands]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test time-windowed leaderboards
+Verifies window sums, trend against the previous window, the materialized
+snapshot and that bucket state stays bounded as rewards accumulate
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import leaderboard  # noqa: E402
+from test_support import run_cli  # noqa: E402
+
+NOW = datetime(2025, 6, 15, 12, 30, 0)
+
+
+def row(agent, reward, when, status='completed'):
+    return {
+        'timestamp': when.isoformat(),
+        'task_id': f'task-{when:%Y%m%d%H%M%S}',
+        'agent_name': agent,
+        'task_status': status,
+        'reward': reward,
+    }
+
+
+def test_windows_and_trend(project_dir):
+    """Ranks and trend come from the current and previous windows"""
+    print("\n📈 Testing windows and trend")
+
+    buckets = leaderboard.Buckets()
+    for day in range(14):
+        when = NOW - timedelta(days=day, hours=1)
+        recent = day < 7
+        buckets.add(row('agent-feature-senior', 4.0 if recent else 3.0, when))
+        buckets.add(row('agent-bugfix-junior', 2.0 if recent else 3.0, when, 'completed' if recent else 'failed'))
+    buckets.add(row('agent-security-senior', 5.0, NOW - timedelta(days=40)))
+
+    board = buckets.board('reward', '7d', NOW)
+    entries = {e['agent_name']: e for e in board['entries']}
+    if [e['agent_name'] for e in board['entries']] != ['agent-feature-senior', 'agent-bugfix-junior']:
+        print(f"❌ Unexpected 7d ranking: {board['entries']}")
+        return False
+    if entries['agent-feature-senior']['trend'] != 'up' or entries['agent-bugfix-junior']['trend'] != 'down':
+        print(f"❌ Unexpected trends: {entries}")
+        return False
+
+    rates = buckets.board('success-rate', '30d', NOW)['entries']
+    if rates[0]['agent_name'] != 'agent-feature-senior' or rates[1]['value'] != 0.5:
+        print(f"❌ Unexpected success rates: {rates}")
+        return False
+
+    all_time = buckets.board('reward', 'all', NOW)['entries']
+    if all_time[0]['agent_name'] != 'agent-security-senior' or len(all_time) != 3:
+        print(f"❌ All-time board should include every agent: {all_time}")
+        return False
+
+    day_board = buckets.board('tasks', '24h', NOW)['entries']
+    if len(day_board) != 2 or day_board[0]['value'] != 1:
+        print(f"❌ Unexpected 24h board: {day_board}")
+        return False
+    print("✅ 7d up/down trend, success rate, all-time and 24h boards")
+    return True
+
+
+def test_materialized_snapshot(project_dir):
+    """Evaluations update every board in leaderboard.json"""
+    print("\n🗂️  Testing materialized snapshot")
+
+    now = datetime.utcnow()
+    for i in range(6):
+        leaderboard.record_reward(row('agent-bugfix-senior', 3.5, now - timedelta(minutes=i)))
+    leaderboard.record_reward(row('agent-refactor-principal', 4.5, now))
+
+    snapshot = json.loads(leaderboard.leaderboard_file().read_text())
+    expected = {f'{m}:{p}' for m in leaderboard.METRICS for p in leaderboard.PERIODS}
+    if set(snapshot['boards']) != expected:
+        print(f"❌ Snapshot is missing boards: {expected - set(snapshot['boards'])}")
+        return False
+
+    by_tasks = leaderboard.get_board('tasks', '24h')['entries']
+    if by_tasks[0]['agent_name'] != 'agent-bugfix-senior' or by_tasks[0]['value'] != 6:
+        print(f"❌ Unexpected tasks board: {by_tasks}")
+        return False
+
+    result = run_cli(project_dir, 'leaderboard', '--period', '24h')
+    lines = result.stdout.splitlines()
+    if result.returncode != 0 or 'agent-refactor-principal' not in lines[2]:
+        print(f"❌ CLI leaderboard failed: {result.stdout}{result.stderr}")
+        return False
+    print(f"✅ {len(snapshot['boards'])} boards materialized; CLI ranks {lines[2].split()[1]} first")
+    return True
+
+
+def test_rebuild_matches_incremental(project_dir):
+    """Rebuilding from rlvr rows gives the same boards as incremental updates"""
+    print("\n🔁 Testing rebuild")
+
+    now = datetime.utcnow()
+    rows = [row(f'agent-{kind}-senior', (i % 5) + 0.5, now - timedelta(hours=i * 7))
+            for i, kind in enumerate(['feature', 'bugfix', 'security'] * 20)]
+    # Evaluations arrive in time order; rebuild must cope with any order
+    for r in sorted(rows, key=lambda r: r['timestamp']):
+        leaderboard.record_reward(r)
+    incremental = leaderboard.load_buckets().materialize(now)['boards']
+
+    leaderboard.rebuild(reversed(rows))
+    rebuilt = leaderboard.load_buckets().materialize(now)['boards']
+    if incremental != rebuilt:
+        print("❌ Rebuilt boards differ from incremental ones")
+        return False
+    print("✅ Rebuilt boards match")
+    return True
+
+
+def test_bounded_state(project_dir):
+    """Bucket state and board reads do not grow with the number of rewards"""
+    print("\n⏱️  Testing bounded state")
+
+    buckets = leaderboard.Buckets()
+    for i in range(5000):
+        buckets.add(row(f'agent-a{i % 5}-senior', (i % 7) * 0.5, NOW - timedelta(days=200) + timedelta(hours=i)))
+    agent = buckets.state['agents']['agent-a0-senior']
+    if len(agent['hours']) > leaderboard.HOUR_RETENTION + 1 or len(agent['days']) > leaderboard.DAY_RETENTION + 1:
+        print(f"❌ Buckets not pruned: {len(agent['hours'])} hours, {len(agent['days'])} days")
+        return False
+
+    latest = datetime.fromisoformat(agent['latest'])
+    start = time.perf_counter()
+    for _ in range(20):
+        buckets.materialize(latest)
+    per_build_ms = (time.perf_counter() - start) * 1000 / 20
+    print(f"   - {len(agent['hours'])} hour / {len(agent['days'])} day buckets, "
+          f"all 12 boards in {per_build_ms:.2f} ms")
+    if per_build_ms > 50:
+        print("❌ Materializing boards is too slow")
+        return False
+    print("✅ State bounded by retention, not reward count")
+    return True
+
+
+def main():
+    """Run leaderboard tests"""
+    print("🧪 Testing Time-Windowed Leaderboards\n")
+
+    tests = [test_windows_and_trend, test_materialized_snapshot, test_rebuild_matches_incremental,
+             test_bounded_state]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
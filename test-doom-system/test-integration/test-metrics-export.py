@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test the metrics textfile exporter
+Verifies exact counts from concurrent processes in the mmap'd state file,
+the rendered exposition format and throttling, and metrics from real hooks
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import metrics  # noqa: E402
+from test_support import run_hook  # noqa: E402
+
+
+WORKER = '''
+import sys
+sys.path.insert(0, sys.argv[1])
+from doom import metrics
+for i in range(int(sys.argv[2])):
+    metrics.inc('doom_tool_calls_total', tool='Edit', status='success')
+    metrics.observe('doom_hook_duration_seconds', 0.02, hook='post_tool_use')
+'''
+
+
+def parse_samples(text):
+    """{'name{labels}': value} for every sample line"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            series, value = line.rsplit(' ', 1)
+            samples[series] = float(value)
+    return samples
+
+
+def test_concurrent_updates(project_dir):
+    """Parallel processes update the same series without losing increments"""
+    print("\n🔀 Testing concurrent updates")
+
+    env = dict(os.environ, CLAUDE_PROJECT_DIR=project_dir)
+    workers = [subprocess.Popen(['python3', '-c', WORKER, str(PROJECT_ROOT), '300'], env=env) for _ in range(4)]
+    inode = None
+    for worker in workers:
+        worker.wait()
+        state = metrics.state_file().stat()
+        if inode is not None and state.st_ino != inode:
+            print("❌ The state file was replaced instead of updated in place")
+            return False
+        inode = state.st_ino
+
+    samples = parse_samples(metrics.render())
+    calls = samples.get('doom_tool_calls_total{status="success",tool="Edit"}')
+    observed = samples.get('doom_hook_duration_seconds_count{hook="post_tool_use"}')
+    bucket = samples.get('doom_hook_duration_seconds_bucket{hook="post_tool_use",le="0.025"}')
+    if calls != 1200 or observed != 1200 or bucket != 1200:
+        print(f"❌ Lost updates: calls={calls}, observed={observed}, bucket={bucket}")
+        return False
+    size = metrics.state_file().stat().st_size
+    print(f"✅ 4 processes x 300 updates counted exactly in a fixed {size // 1024} KiB state file")
+    return True
+
+
+def test_exposition_format(project_dir):
+    """Histograms are cumulative, labels escaped, output ends with # EOF"""
+    print("\n📄 Testing exposition format")
+
+    for value in (0.003, 0.07, 0.07, 30.0):
+        metrics.observe('doom_evaluator_component_duration_seconds', value, component='lint_score')
+    metrics.set_gauge('doom_agent_reward', 0.5, agent_name='agent-bugfix-junior')
+    metrics.set_gauge('doom_agent_reward', 0.82, agent_name='agent-bugfix-junior')
+    metrics.inc('doom_tasks_started_total', type='say "hi"\\now')
+    text = metrics.render()
+    samples = parse_samples(text)
+
+    prefix = 'doom_evaluator_component_duration_seconds'
+    buckets = [samples[f'{prefix}_bucket{{component="lint_score",le="{le}"}}'] for le in ('0.01', '0.1', '60', '+Inf')]
+    if buckets != [1, 3, 4, 4] or abs(samples[f'{prefix}_sum{{component="lint_score"}}'] - 30.143) > 1e-9:
+        print(f"❌ Unexpected histogram: {buckets}")
+        return False
+    if samples.get('doom_agent_reward{agent_name="agent-bugfix-junior"}') != 0.82:
+        print("❌ Gauge should hold the last value")
+        return False
+    if 'doom_tasks_started_total{type="say \\"hi\\"\\\\now"} 1' not in text or not text.endswith('# EOF\n'):
+        print(f"❌ Bad escaping or terminator:\n{text}")
+        return False
+    if '# TYPE doom_agent_reward gauge' not in text or '# TYPE doom_tool_calls_total' in text:
+        print("❌ Only metrics with samples should be rendered, each with its TYPE")
+        return False
+
+    os.environ['DOOM_METRICS_INTERVAL'] = '3600'
+    try:
+        first, second = metrics.maybe_render(), metrics.maybe_render()
+    finally:
+        del os.environ['DOOM_METRICS_INTERVAL']
+    if first != metrics.textfile_path() or second is not None or Path(first).read_text() != text:
+        print(f"❌ Expected one render per interval: {first}, {second}")
+        return False
+    print(f"✅ {len(samples)} samples; cumulative buckets {buckets}; renders throttled to the interval")
+    return True
+
+
+def test_hooks_record_metrics(project_dir):
+    """A prompt, three tool calls and a Stop show up in the textfile"""
+    print("\n🪝 Testing hook metrics")
+
+    # Render the textfile on every hook instead of at most once per interval
+    run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'Fix the bug in login validation'},
+             DOOM_METRICS_INTERVAL='0')
+    for tool in ('Edit', 'Edit', 'Bash'):
+        run_hook(project_dir, 'post-tool-use.py', {'tool_name': tool, 'tool_input': {}, 'tool_response': {}},
+                 DOOM_METRICS_INTERVAL='0')
+    stop = run_hook(project_dir, 'stop.py', {}, DOOM_METRICS_INTERVAL='0')
+    if stop.returncode != 0:
+        print(f"❌ Stop failed: {stop.stderr}")
+        return False
+
+    textfile = Path(project_dir) / '.claude' / 'metrics' / 'doom.prom'
+    samples = parse_samples(textfile.read_text())
+    expected = {
+        'doom_hook_duration_seconds_count{hook="post_tool_use"}': 3,
+        'doom_hook_duration_seconds_count{hook="stop"}': 1,
+        'doom_tool_calls_total{status="success",tool="Edit"}': 2,
+        'doom_tasks_started_total{type="bugfix"}': 1,
+        'doom_tasks_total{agent_tier="junior",status="completed",type="bugfix"}': 1,
+        'doom_task_tool_calls_count{type="bugfix"}': 1,
+        'doom_task_tool_calls_sum{type="bugfix"}': 3,
+        'doom_evaluator_component_duration_seconds_count{component="lint_score"}': 1,
+    }
+    wrong = {k: samples.get(k) for k, v in expected.items() if samples.get(k) != v}
+    rewards = [k for k in samples if k.startswith('doom_agent_reward{')]
+    if wrong or len(rewards) != 1:
+        print(f"❌ Unexpected samples: {wrong}, rewards {rewards}")
+        return False
+    # The reward lands in a finite bucket: the histogram covers the evaluator's -5..5 range
+    histogram = {k: v for k, v in samples.items() if k.startswith('doom_reward_bucket{') and 'le="5"' in k}
+    if list(histogram.values()) != [1]:
+        print(f"❌ Reward outside the histogram's finite buckets: {histogram}")
+        return False
+    print(f"✅ {len(samples)} samples after 5 hook runs, including {rewards[0]}")
+    return True
+
+
+def main():
+    """Run metrics exporter tests"""
+    print("🧪 Testing Metrics Export\n")
+
+    tests = [test_concurrent_updates, test_exposition_format, test_hooks_record_metrics]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test token-budgeted prompt assembly
+Verifies that repeated guidance is dropped, that sections keep a stable
+prefix order across tasks, that the budget trims similar tasks before lessons
+and the template while keeping the user's prompt, and that the hook applies
+the agent's context budget and reports the savings
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import metrics, prompts  # noqa: E402
+from doom.budget import estimate_tokens  # noqa: E402
+from test_support import run_cli, run_hook  # noqa: E402
+
+TEMPLATE = {'template_id': 'bugfix', 'version': '1',
+            'text': 'Please provide the following details:\n1. Expected behavior\n2. Steps to reproduce'}
+LESSONS = [{'text': 'Add a regression test for the crash', 'count': 4},
+           {'text': 'Run the linter and fix warnings before finishing', 'count': 2}]
+SIMILAR = [{'task_id': 'bugfix-1', 'summary': 'Fix the crash in the login form', 'agent_name': 'agent-bugfix-junior',
+            'reward': 0.9, 'feedback': ['Add a regression test for the crash', 'Check the empty password case']},
+           {'task_id': 'bugfix-2', 'summary': 'Login page crashes on Safari', 'agent_name': 'agent-bugfix-senior',
+            'reward': 0.4, 'feedback': ['Check the empty password case']}]
+
+
+def task(task_id):
+    return {'task_id': task_id, 'task_type': 'bugfix', 'priority': 'P2', 'agent_name': 'agent-bugfix-junior'}
+
+
+def test_dedupe_and_order(project_dir):
+    """Guidance repeated across sections appears once; the prefix is stable across tasks"""
+    print("\n🧹 Testing deduplication and section order")
+
+    first = prompts.assemble('Fix the login crash', task('bugfix-a'), LESSONS, TEMPLATE, SIMILAR, max_tokens=1000)
+    second = prompts.assemble('Fix the signup crash', task('bugfix-b'), LESSONS, TEMPLATE, SIMILAR[1:],
+                              max_tokens=1000)
+    text = first['text']
+    if text.count('Add a regression test for the crash') != 1 or text.count('Check the empty password case') != 1:
+        print(f"❌ Repeated guidance should appear once:\n{text}")
+        return False
+    if first['report']['deduplicated'] != 2 or first['report']['saved_tokens'] <= 0:
+        print(f"❌ Unexpected report: {first['report']}")
+        return False
+    order = [text.index(marker) for marker in ('Agent:', 'Please provide', 'Lessons from previous tasks:',
+                                               'Similar past tasks:', 'Task ID:', 'Fix the login crash')]
+    prefix = text[:text.index('Similar past tasks:')]
+    if order != sorted(order) or not second['text'].startswith(prefix):
+        print(f"❌ Stable sections should come first and match across tasks:\n{text}")
+        return False
+    print(f"✅ {first['report']['deduplicated']} repeats dropped; {len(prefix)}-byte shared prefix")
+    return True
+
+
+def test_budget_trims(project_dir):
+    """Similar tasks go first, then lessons, then the template; the prompt always stays"""
+    print("\n✂️  Testing budget trimming")
+
+    prompt = 'Fix the login crash'
+    unlimited = prompts.assemble(prompt, task('bugfix-a'), LESSONS, TEMPLATE, SIMILAR, max_tokens=1000)
+    budget = unlimited['report']['tokens'] - 20
+    trimmed = prompts.assemble(prompt, task('bugfix-a'), LESSONS, TEMPLATE, SIMILAR, max_tokens=budget)
+    report = trimmed['report']
+    if report['tokens'] > budget or set(report['trimmed']) != {'similar'} or 'Lessons from' not in trimmed['text']:
+        print(f"❌ Only similar tasks should be trimmed: {report}\n{trimmed['text']}")
+        return False
+    bare = prompts.assemble(prompt, task('bugfix-a'), LESSONS, TEMPLATE, SIMILAR, max_tokens=10)
+    if bare['report']['trimmed'] != {'similar': 2, 'lessons': 2, 'template': 1} or \
+            not bare['text'].endswith(prompt) or 'Task ID: bugfix-a' not in bare['text']:
+        print(f"❌ A tiny budget should keep only the header and prompt: {bare}")
+        return False
+    if bare['report']['tokens'] != estimate_tokens(bare['text']):
+        print("❌ Reported tokens should match the text")
+        return False
+    print(f"✅ {unlimited['report']['tokens']} → {report['tokens']} tokens at budget {budget}; "
+          f"header and prompt only: {bare['report']['tokens']} tokens")
+    return True
+
+
+def test_hook_agent_budget(project_dir):
+    """UserPromptSubmit caps the budget by the agent's context and records the savings"""
+    print("\n🪝 Testing the hook with an agent context budget")
+
+    agents_dir = Path(project_dir) / '.claude' / 'agents'
+    agents_dir.mkdir(parents=True)
+    (agents_dir / 'agent-bugfix-junior.md').write_text(
+        '---\nname: agent-bugfix-junior\nmax_context_tokens: 2500\n---\nFixes bugs.\n')
+    if prompts.budget_for('agent-bugfix-junior') != 50 or prompts.budget_for('agent-feature-senior') != 1000:
+        print("❌ Budget should be 2% of 2500 tokens for the defined agent and the default otherwise")
+        return False
+
+    result = run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'Fix the crash when saving'})
+    enhanced = json.loads(result.stdout)['userPrompt']
+    task_id = json.loads((Path(project_dir) / '.claude' / 'tasks' / 'current.json').read_text())['task_id']
+    report = json.loads((Path(project_dir) / '.claude' / 'tasks' / task_id / 'metadata.json').read_text())[
+        'prompt_tokens']
+    if report['budget'] != 50 or report['trimmed'] != {'template': 1} or 'Steps to reproduce' in enhanced:
+        print(f"❌ The template should not fit in 50 tokens: {report}\n{enhanced}")
+        return False
+
+    status = run_cli(project_dir, 'status', '--task', task_id)
+    exposition = metrics.render()
+    if f"{report['saved_tokens']} saved" not in status.stdout or 'doom_prompt_tokens_saved_total' not in exposition:
+        print(f"❌ Savings should be reported: {status.stdout}")
+        return False
+    print(f"✅ {status.stdout.splitlines()[-1]}")
+    return True
+
+
+def main():
+    """Run prompt budget tests"""
+    print("🧪 Testing Prompt Budget\n")
+
+    tests = [test_dedupe_and_order, test_budget_trims, test_hook_agent_budget]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test resource limits and accounting
+Verifies setrlimit enforcement and wait4 accounting for commands, the
+cgroup v2 plumbing, hook self-limits and their reset in long-lived
+children, and the per-hook and per-component measurements behind
+`doom resources`
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import resources  # noqa: E402
+from test_support import run_cli, run_hook  # noqa: E402
+
+
+ALLOCATE = 'import sys; block = bytearray(int(sys.argv[1]) * 1024 * 1024); block[::4096] = b"x" * len(block[::4096])'
+SPIN = 'while True: pass'
+PROBE = '''
+import resource, subprocess, sys
+sys.path.insert(0, sys.argv[1])
+from doom import resources
+resources.limit_self()
+print(resource.getrlimit(resource.RLIMIT_DATA)[0], resource.getrlimit(resource.RLIMIT_CPU)[0], flush=True)
+show = 'import resource; print(resource.getrlimit(resource.RLIMIT_DATA)[0], resource.getrlimit(resource.RLIMIT_CPU)[0])'
+subprocess.run([sys.executable, '-c', show], preexec_fn=resources.restore_self)
+resources.run([sys.executable, '-c', show], {'max_memory_mb': 200})
+'''
+
+
+def use_resources(project_dir, **section):
+    """Project evaluator config with the resources section updated"""
+    config = json.loads((PROJECT_ROOT / 'doom' / 'config' / 'evaluator-config.json').read_text())
+    config['resources'].update(section)
+    target = Path(project_dir) / '.claude' / 'evaluator-config.json'
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(config))
+
+
+def test_command_limits(project_dir):
+    """Commands get RLIMIT_DATA and RLIMIT_CPU; usage comes from the command itself, even when killed"""
+    print("\n📏 Testing command limits and accounting")
+
+    python = [sys.executable, '-c']
+    with resources.measure('evaluator', 'allocate') as allowed:
+        ok = resources.run(python + [ALLOCATE, '64'], {'max_memory_mb': 512}, capture_output=True)
+    with resources.measure('evaluator', 'oversized') as denied:
+        oom = resources.run(python + [ALLOCATE, '400'], {'max_memory_mb': 128}, capture_output=True, text=True)
+    with resources.measure('evaluator', 'spin'):
+        spun = resources.run(python + [SPIN], {'max_cpu_seconds': 1}, timeout=10)
+    # Without a cgroup the CPU share is not enforced: the spinner runs until its timeout
+    with resources.measure('evaluator', 'throttled') as throttled:
+        try:
+            resources.run(python + [SPIN], {'max_cpu_percent': 10}, timeout=1.5)
+            timed_out = False
+        except subprocess.TimeoutExpired:
+            timed_out = True
+    records = {r['name']: r for r in resources._pending}
+    resources.flush()
+
+    if ok.returncode != 0 or not 64 * 1024 <= allowed['max_rss_kb'] < 200 * 1024:
+        print(f"❌ 64 MB should fit in 512 MB and be measured: rc={ok.returncode}, {allowed['max_rss_kb']} KB")
+        return False
+    if oom.returncode == 0 or 'MemoryError' not in oom.stderr or denied['max_rss_kb'] > 128 * 1024:
+        print(f"❌ 400 MB should fail under 128 MB: rc={oom.returncode}, {oom.stderr[-200:]}")
+        return False
+    spin = records['spin']
+    if spun.returncode != -24 or spin.get('killed_by') != 'SIGXCPU' or not 0.9 <= spin['cpu_seconds'] < 3:
+        print(f"❌ A 1 s CPU limit should stop the spinner with SIGXCPU: {spun.returncode}, {spin}")
+        return False
+    if not timed_out or throttled.get('killed_by') != 'SIGKILL' or not throttled['max_rss_kb']:
+        print(f"❌ max_cpu_percent alone should leave the spinner to its timeout, still measured: {throttled}")
+        return False
+    if records['allocate'].get('enforced') != 'rlimit' or not resources.resources_file().exists():
+        print(f"❌ Unexpected records: {records}")
+        return False
+    print(f"✅ 64 MB child peaked at {allowed['max_rss_kb'] // 1024} MB; 400 MB refused; "
+          f"spinner stopped by SIGXCPU after {spin['cpu_seconds']:.2f} CPU s, by its timeout without a cgroup")
+    return True
+
+
+def test_cgroup_plumbing(project_dir):
+    """With a cgroup v2 parent, limits are written to a child group the command joins"""
+    print("\n🧱 Testing cgroup v2 plumbing")
+
+    parent = Path(project_dir) / 'cgroup'
+    parent.mkdir()
+    (parent / 'cgroup.controllers').write_text('cpu memory pids\n')
+    limits = {'max_memory_mb': 256, 'max_cpu_percent': 25, 'max_processes': 64, 'cgroup_parent': str(parent)}
+    with resources.measure('evaluator', 'cgroup') as usage:
+        result = resources.run(['sh', '-c', 'echo $$'], limits, capture_output=True, text=True)
+
+    # A real cgroupfs removes the group afterwards; a plain directory keeps the files for inspection
+    groups = list(parent.glob('doom-*'))
+    controls = {f.name: f.read_text().strip() for f in groups[0].iterdir()} if len(groups) == 1 else {}
+    expected = {'memory.max': '268435456', 'cpu.max': '25000 100000', 'pids.max': '64',
+                'cgroup.procs': result.stdout.strip()}
+    if controls != expected or usage.get('enforced') != 'cgroup':
+        print(f"❌ Unexpected cgroup files: {controls}, {usage}")
+        return False
+    missing = resources.run(['true'], dict(limits, cgroup_parent=str(parent / 'absent')))
+    if missing.returncode != 0:
+        print("❌ A missing cgroup parent should fall back to setrlimit")
+        return False
+    written = ', '.join(f'{k}={v}' for k, v in expected.items() if k != 'cgroup.procs')
+    print(f"✅ Child joined {groups[0].name} with {written}")
+    return True
+
+
+def test_hook_limits_and_report(project_dir):
+    """Hooks lower their own limits but not their drainer's or commands', and doom resources ranks them"""
+    print("\n🪝 Testing hook accounting and doom resources")
+
+    use_resources(project_dir, hooks={'max_memory_mb': 300, 'max_cpu_seconds': 120})
+    env = dict(os.environ, CLAUDE_PROJECT_DIR=project_dir)
+    probe = subprocess.run([sys.executable, '-c', PROBE, str(PROJECT_ROOT)], capture_output=True, text=True, env=env)
+    inherited = [str(resource.getrlimit(which)[0]) for which in (resource.RLIMIT_DATA, resource.RLIMIT_CPU)]
+    expected = [str(300 * 1024 * 1024), '120'] + inherited + [str(200 * 1024 * 1024), inherited[1]]
+    if probe.stdout.split() != expected:
+        print(f"❌ Hook limits not applied, or not restored in the children: {probe.stdout}{probe.stderr}")
+        return False
+
+    run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'Fix the crash in the parser'})
+    for tool in ('Edit', 'Bash'):
+        run_hook(project_dir, 'post-tool-use.py', {'tool_name': tool, 'tool_input': {}, 'tool_response': {}})
+    stop = run_hook(project_dir, 'stop.py', {})
+    if stop.returncode != 0:
+        print(f"❌ Stop failed: {stop.stderr}")
+        return False
+
+    rows = [json.loads(line) for line in resources.resources_file().read_text().splitlines()]
+    hooks = sorted(r['name'] for r in rows if r['scope'] == 'hook')
+    components = {r['name'] for r in rows if r['scope'] == 'evaluator'}
+    if hooks != ['post_tool_use', 'post_tool_use', 'stop', 'user_prompt_submit'] or len(components) != 7:
+        print(f"❌ Unexpected measurements: {hooks}, {sorted(components)}")
+        return False
+    if not all(r['task_id'] and r['max_rss_kb'] > 0 for r in rows if r['scope'] == 'hook'):
+        print("❌ Hook records need a task id and the process peak")
+        return False
+
+    report = run_cli(project_dir, 'resources', '--scope', 'hook', '--json')
+    ranked = json.loads(report.stdout)
+    if ranked[0]['name'] != 'stop' or [r['runs'] for r in ranked if r['name'] == 'post_tool_use'] != [2]:
+        print(f"❌ Stop should be the heaviest hook: {ranked}")
+        return False
+    print(f"✅ {len(rows)} measurements; heaviest hook {ranked[0]['name']} "
+          f"({ranked[0]['cpu_seconds']:.2f} CPU s, {ranked[0]['max_rss_kb'] // 1024} MB)")
+    return True
+
+
+def test_enforcement_off(project_dir):
+    """enforce=false measures without limiting"""
+    print("\n🔓 Testing enforce=false")
+
+    use_resources(project_dir, enforce=False)
+    config = json.loads((Path(project_dir) / '.claude' / 'evaluator-config.json').read_text())
+    if resources.limits_for('hooks') is not None or resources.limits_for('evaluator', config) is not None:
+        print("❌ No limits expected with enforce=false")
+        return False
+    with resources.measure('evaluator', 'free') as usage:
+        resources.run(['true'], resources.limits_for('evaluator', config))
+    resources.flush()
+    if 'enforced' in usage:
+        print(f"❌ Unexpected enforcement: {usage}")
+        return False
+    print("✅ Limits off; command still measured")
+    return True
+
+
+def main():
+    """Run resource limit tests"""
+    print("🧪 Testing Resource Limits\n")
+
+    tests = [test_command_limits, test_cgroup_plumbing, test_hook_limits_and_report, test_enforcement_off]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
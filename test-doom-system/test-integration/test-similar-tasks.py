@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test the similar-task index
+Verifies BM25 ranking with agent, reward and feedback in each hit, that
+Stop indexes finished tasks and UserPromptSubmit puts the closest ones in the
+assignment, that queries stay in the millisecond range on a large index, and
+that a rebuild covers live and archived tasks
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import archive, similar  # noqa: E402
+from test_support import run_cli, run_hook  # noqa: E402
+
+
+PAST_TASKS = [
+    ('bugfix-1', 'agent-bugfix-senior', 0.9, 'Fix the crash in the login form when the password is empty'),
+    ('bugfix-2', 'agent-bugfix-junior', 0.4, 'Login page crashes on Safari after submitting the form'),
+    ('feature-1', 'agent-feature-senior', 0.8, 'Add a dark mode toggle to the settings page'),
+    ('refactor-1', 'agent-refactor-principal', 0.7, 'Refactor the session module into smaller functions'),
+    ('perf-1', 'agent-feature-senior', 0.6, 'Speed up the search results page'),
+]
+
+
+def metadata(task_id, agent_name, reward, prompt):
+    return {'task_id': task_id, 'agent_name': agent_name, 'task_type': task_id.split('-')[0], 'reward': reward,
+            'status': 'completed', 'prompt': prompt, 'completed_at': '2024-05-01T10:00:00'}
+
+
+def test_ranking(project_dir):
+    """Login crash prompts rank the login crash tasks first, with their feedback"""
+    print("\n🔎 Testing BM25 ranking")
+
+    for task in PAST_TASKS:
+        suggestions = [{'suggestion': 'Add a regression test for the crash'}] if task[0] == 'bugfix-2' else []
+        similar.add_task(metadata(*task), suggestions)
+    # Evaluated again with a better reward; only the newer copy is returned
+    similar.add_task(metadata('bugfix-1', 'agent-bugfix-senior', 0.95, PAST_TASKS[0][3]))
+
+    matches = similar.query('The login form crashes when I submit it', k=3)
+    ids = [m['task_id'] for m in matches]
+    if ids[:2] != ['bugfix-2', 'bugfix-1'] or len(set(ids)) != len(ids):
+        print(f"❌ Unexpected ranking: {[(m['task_id'], m['score']) for m in matches]}")
+        return False
+    if matches[0]['feedback'] != ['Add a regression test for the crash'] or matches[1]['reward'] != 0.95:
+        print(f"❌ Hits should carry feedback and the newest reward: {matches}")
+        return False
+    if similar.query('the and of', k=3) or similar.query('kubernetes', k=3):
+        print("❌ Stopwords and unknown terms should match nothing")
+        return False
+    if [m['task_id'] for m in similar.query('login crash', k=3, exclude=['bugfix-2'])][:1] != ['bugfix-1']:
+        print("❌ Excluded tasks should be skipped")
+        return False
+    print(f"✅ {[(m['task_id'], m['score']) for m in matches]}")
+    return True
+
+
+def test_hooks_enrich_prompt(project_dir):
+    """Stop indexes the task; the next similar prompt gets it in the assignment"""
+    print("\n🪝 Testing Stop indexing and prompt enrichment")
+
+    run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'Fix the crash in the login form'})
+    first = json.loads((Path(project_dir) / '.claude' / 'tasks' / 'current.json').read_text())['task_id']
+    if run_hook(project_dir, 'stop.py', {}).returncode != 0:
+        print("❌ Stop failed")
+        return False
+    result = run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'The login form crashes again, please fix'})
+    prompt = json.loads(result.stdout)['userPrompt']
+    second = json.loads((Path(project_dir) / '.claude' / 'tasks' / 'current.json').read_text())['task_id']
+    task = json.loads((Path(project_dir) / '.claude' / 'tasks' / second / 'metadata.json').read_text())
+    if 'Similar past tasks:\n- Fix the crash in the login form (agent-bugfix-junior, reward' not in prompt:
+        print(f"❌ The assignment should list the earlier task:\n{prompt}")
+        return False
+    if task.get('similar_tasks') != [first]:
+        print(f"❌ Task metadata should name the similar task: {task}")
+        return False
+    print(f"✅ {second} was assigned with {first} as context")
+    return True
+
+
+def test_scale(project_dir):
+    """Queries read only their terms' shards and stay fast with thousands of tasks"""
+    print("\n⏱️  Testing query latency on a large index")
+
+    rng = random.Random(7)
+    words = [f'term{i}' for i in range(3000)] + ['login', 'crash', 'form', 'payment', 'timeout', 'cache']
+    with similar._lock():
+        for i in range(5000):
+            prompt = ' '.join(rng.choice(words) for _ in range(25))
+            similar._append(metadata(f'bugfix-{i}', 'agent-bugfix-junior', 0.5, prompt), ())
+    # A record torn by a crash is dropped before the next append
+    with open(similar.idx_file(), 'ab') as f:
+        f.write(b'\x00' * 5)
+    doc = similar.add_task(metadata('bugfix-last', 'agent-bugfix-senior', 1.0, 'payment timeout in the cache'))
+
+    timings = []
+    for text in ('login form crash', 'payment timeout after cache miss', 'term12 term99 term2048 crash'):
+        for _ in range(5):
+            start = time.perf_counter()
+            matches = similar.query(text, k=5)
+            timings.append((time.perf_counter() - start) * 1000)
+    median = sorted(timings)[len(timings) // 2]
+    if doc != 5000 or similar.query('payment timeout cache', k=1)[0]['task_id'] != 'bugfix-last':
+        print(f"❌ The torn record should be dropped and the new task found: doc {doc}")
+        return False
+    if median > 50 or not matches:
+        print(f"❌ Queries too slow: median {median:.1f} ms")
+        return False
+    size = sum(p.stat().st_size for p in similar.index_dir().rglob('*') if p.is_file())
+    print(f"✅ 5001 tasks, {size // 1024} KB on disk, median query {median:.1f} ms")
+    return True
+
+
+def test_rebuild(project_dir):
+    """Rebuild indexes live and archived tasks with their feedback"""
+    print("\n🔁 Testing rebuild")
+
+    tasks_dir = Path(project_dir) / '.claude' / 'tasks'
+    for task in PAST_TASKS:
+        (tasks_dir / task[0]).mkdir(parents=True)
+        (tasks_dir / task[0] / 'metadata.json').write_text(json.dumps(metadata(*task)))
+    open_task = dict(metadata('feature-2', 'agent-feature-junior', None, 'Add export to CSV'), status='in_progress')
+    (tasks_dir / 'feature-2').mkdir()
+    (tasks_dir / 'feature-2' / 'metadata.json').write_text(json.dumps(open_task))
+    feedback_dir = Path(project_dir) / '.claude' / 'feedback'
+    feedback_dir.mkdir(parents=True)
+    (feedback_dir / 'agent-bugfix-junior_feedback.jsonl').write_text(json.dumps(
+        {'task_id': 'bugfix-2', 'suggestion': 'Add a regression test for the crash', 'area': 'testing'}) + '\n')
+    archive.pack(older_than_days=0)
+
+    result = run_cli(project_dir, 'similar', '--rebuild', '--json', 'login', 'crash')
+    lines = result.stdout.splitlines()
+    matches = json.loads(lines[-1]) if lines else []
+    if not lines or not lines[0].startswith('Indexed 5 tasks') or len(archive.task_ids()) != 5:
+        print(f"❌ Unexpected rebuild: {result.stdout}{result.stderr}")
+        return False
+    if [m['task_id'] for m in matches][:2] != ['bugfix-1', 'bugfix-2'] or not matches[1]['feedback']:
+        print(f"❌ Rebuilt index should rank the login crashes with feedback: {matches}")
+        return False
+    print(f"✅ {lines[0]}")
+    return True
+
+
+def main():
+    """Run similar-task index tests"""
+    print("🧪 Testing Similar Tasks\n")
+
+    tests = [test_ranking, test_hooks_enrich_prompt, test_scale, test_rebuild]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test the packed task archive
+Verifies that finished tasks are packed into monthly segments and their
+directories removed, that unfinished, pending and recent tasks stay live,
+that status and trace read archived tasks transparently, that packing
+again after an interrupted run neither duplicates members nor index rows,
+and that a crash while writing a segment leaves the old one readable
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import archive  # noqa: E402
+from test_support import run_cli, run_hook  # noqa: E402
+
+OLD = time.time() - 30 * 86400
+
+# Packs in a fresh process that dies, without closing the zip, after writing its first member
+CRASHING_PACK = '''
+import os, sys, zipfile
+sys.path.insert(0, sys.argv[1])
+from doom import archive
+write = zipfile.ZipFile.write
+def crash(self, *args, **kwargs):
+    write(self, *args, **kwargs)
+    self.fp.flush()
+    os._exit(9)
+zipfile.ZipFile.write = crash
+archive.pack()
+'''
+
+
+def make_task(project_dir, task_id, completed_at, status='completed', evaluation='final', age=OLD):
+    """A task directory with metadata and a trace, last touched `age`"""
+    directory = Path(project_dir) / '.claude' / 'tasks' / task_id
+    directory.mkdir(parents=True)
+    metadata = {'task_id': task_id, 'agent_name': 'bugfix-agent', 'task_type': 'bugfix', 'status': status,
+                'reward': 0.75 if evaluation == 'final' else None, 'evaluation': evaluation,
+                'created_at': completed_at, 'completed_at': completed_at}
+    (directory / 'metadata.json').write_text(json.dumps(metadata))
+    span = {'name': 'stop', 'cat': 'hook', 'ts': int(age * 1e6), 'dur': 1500, 'pid': 1}
+    (directory / 'trace.jsonl').write_text(json.dumps(span) + '\n')
+    for path in directory.iterdir():
+        os.utime(path, (age, age))
+    return directory
+
+
+def test_pack_and_read(project_dir):
+    """Finished old tasks are packed by month; status and trace still find them"""
+    print("\n📦 Testing pack and transparent reads")
+
+    packed = [make_task(project_dir, f'task-{i}', f'2024-0{m}-1{i}T10:00:00') for i, m in ((1, 1), (2, 1), (3, 2))]
+    live = [make_task(project_dir, 'task-open', '2024-01-20T10:00:00', status='in_progress'),
+            make_task(project_dir, 'task-pending', '2024-01-21T10:00:00', evaluation='pending'),
+            make_task(project_dir, 'task-recent', '2024-01-22T10:00:00', age=time.time())]
+
+    dry = json.loads(run_cli(project_dir, 'archive', '--dry-run', '--json').stdout)
+    if dry['archived'] != 3 or not all(d.exists() for d in packed):
+        print(f"❌ A dry run should only report: {dry}")
+        return False
+    result = run_cli(project_dir, 'archive', '--json')
+    summary = json.loads(result.stdout)
+    if summary['segments'] != ['2024-01.zip', '2024-02.zip'] or summary['archive']['tasks'] != 3 or summary['files'] != 6:
+        print(f"❌ Unexpected summary: {result.stdout}{result.stderr}")
+        return False
+    if any(d.exists() for d in packed) or not all(d.exists() for d in live):
+        print("❌ Only the finished, old, evaluated tasks should leave the tasks directory")
+        return False
+    with zipfile.ZipFile(archive.archive_dir() / '2024-01.zip') as segment:
+        names = sorted(segment.namelist())
+    if names != ['task-1/metadata.json', 'task-1/trace.jsonl', 'task-2/metadata.json', 'task-2/trace.jsonl']:
+        print(f"❌ Unexpected members: {names}")
+        return False
+
+    status = json.loads(run_cli(project_dir, 'status', '--task', 'task-3', '--json').stdout)
+    trace = json.loads(run_cli(project_dir, 'trace', 'task-2').stdout)
+    if (status['task_id'], status['reward'], status['evaluation']) != ('task-3', 0.75, 'final'):
+        print(f"❌ status should read archived metadata: {status}")
+        return False
+    if not any(e.get('name') == 'stop' for e in trace['traceEvents']):
+        print(f"❌ trace should read archived spans: {trace}")
+        return False
+    if archive.load_metadata('task-open')['status'] != 'in_progress' or archive.load_metadata('task-x'):
+        print("❌ Live tasks read from their directory and unknown ones are None")
+        return False
+    print(f"✅ {summary['archived']} tasks in {summary['segments']}; status and trace read them back")
+    return True
+
+
+def test_repack_after_interruption(project_dir):
+    """A pack interrupted after writing the segment completes without duplicates"""
+    print("\n🔁 Testing repack after an interrupted run")
+
+    tasks = [make_task(project_dir, f'task-{i}', f'2024-03-0{i}T10:00:00') for i in (1, 2)]
+    # Interrupted: members written, nothing indexed or removed
+    segments = archive.archive_dir()
+    segments.mkdir(parents=True)
+    archive._pack_segment(segments / '2024-03.zip', archive.candidates(7)[:1])
+    first = archive.pack()
+    # Interrupted later: indexed, directory not yet removed
+    make_task(project_dir, 'task-1', '2024-03-01T10:00:00')
+    second = archive.pack()
+
+    with zipfile.ZipFile(segments / '2024-03.zip') as segment:
+        names = segment.namelist()
+    rows = archive.index_file().read_text().splitlines()
+    if len(names) != len(set(names)) or len(names) != 4 or len(rows) != 2:
+        print(f"❌ Duplicates after repacking: {names}, {rows}")
+        return False
+    if first['archived'] != 2 or second['archived'] != 1 or any(t.exists() for t in tasks):
+        print(f"❌ Unexpected pack results: {first}, {second}")
+        return False
+    print(f"✅ {len(names)} members and {len(rows)} index rows after two interrupted runs")
+    return True
+
+
+def test_crash_while_packing(project_dir):
+    """A process killed mid-pack leaves the month's segment and the task directories intact"""
+    print("\n💥 Testing a crash while writing a segment")
+
+    make_task(project_dir, 'task-1', '2024-04-01T10:00:00')
+    archive.pack()
+    pending = make_task(project_dir, 'task-2', '2024-04-02T10:00:00')
+    crashed = subprocess.run([sys.executable, '-c', CRASHING_PACK, str(PROJECT_ROOT)], capture_output=True,
+                             text=True, env=dict(os.environ, CLAUDE_PROJECT_DIR=project_dir))
+    if crashed.returncode != 9:
+        print(f"❌ The pack should have crashed: {crashed.returncode} {crashed.stderr[-300:]}")
+        return False
+    if archive.load_metadata('task-1') is None or not pending.exists():
+        print("❌ The segment should still read, and the unpacked task keep its directory")
+        return False
+    summary = archive.pack()
+    with zipfile.ZipFile(archive.archive_dir() / '2024-04.zip') as segment:
+        names = sorted(segment.namelist())
+    leftovers = list(archive.archive_dir().glob('.*.tmp'))
+    if summary['archived'] != 1 or len(names) != 4 or pending.exists() or leftovers:
+        print(f"❌ Packing again should finish the job: {summary}, {names}, {leftovers}")
+        return False
+    if archive.locate('task-2')['segment'] != '2024-04.zip' or archive.task_ids() != {'task-1', 'task-2'}:
+        print("❌ The index should find both tasks")
+        return False
+    print(f"✅ Segment readable after the crash; repacked to {len(names)} members")
+    return True
+
+
+def test_hook_task_round_trip(project_dir):
+    """A task recorded by the hooks reads the same before and after archiving"""
+    print("\n🪝 Testing a hook-recorded task")
+
+    run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'Fix the crash in the parser'})
+    task_id = json.loads((Path(project_dir) / '.claude' / 'tasks' / 'current.json').read_text())['task_id']
+    if run_hook(project_dir, 'stop.py', {}).returncode != 0:
+        print("❌ Stop failed")
+        return False
+    before = json.loads(run_cli(project_dir, 'status', '--task', task_id, '--json').stdout)
+    spans = len(json.loads(run_cli(project_dir, 'trace', task_id).stdout)['traceEvents'])
+    summary = archive.pack(older_than_days=0)
+    after = json.loads(run_cli(project_dir, 'status', '--task', task_id, '--json').stdout)
+    spans_after = len(json.loads(run_cli(project_dir, 'trace', task_id).stdout)['traceEvents'])
+    if summary['archived'] != 1 or (Path(project_dir) / '.claude' / 'tasks' / task_id).exists():
+        print(f"❌ The finished task should be packed: {summary}")
+        return False
+    if before != after or spans != spans_after:
+        print(f"❌ Archived task reads differently: {before} vs {after}, {spans} vs {spans_after} events")
+        return False
+    print(f"✅ {task_id} reads the same from the archive (reward {after['reward']:.2f}, {spans_after} events)")
+    return True
+
+
+def main():
+    """Run task archive tests"""
+    print("🧪 Testing Task Archive\n")
+
+    tests = [test_pack_and_read, test_repack_after_interruption, test_crash_while_packing,
+             test_hook_task_round_trip]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
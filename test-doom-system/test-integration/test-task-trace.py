@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test cross-hook trace spans
+Verifies derived tool and agent spans, per-track summaries, and a Chrome
+trace exported by `doom trace` after a task runs through every hook
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import trace  # noqa: E402
+from test_support import run_cli, run_hook  # noqa: E402
+
+
+def test_derived_spans(project_dir):
+    """Tool spans pair Pre/PostToolUse; gaps fill idle time; nesting counts once"""
+    print("\n🧩 Testing derived spans")
+
+    start = 1000.0
+    for name, begin, end, tool in (('user_prompt_submit', 0.0, 0.1, None), ('pre_tool_use', 1.0, 1.05, 'Bash'),
+                                   ('post_tool_use', 3.0, 3.02, 'Bash'), ('post_tool_use', 5.0, 5.02, 'Read'),
+                                   ('stop', 6.0, 8.0, None)):
+        trace.add_span('task-1', name, 'hook', start + begin, start + end, **({'tool_name': tool} if tool else {}))
+    trace.add_span('task-1', 'evaluate', 'evaluator', start + 6.1, start + 7.9)
+    trace.add_span('task-1', 'lint_score', 'evaluator', start + 6.2, start + 6.7)
+    trace.flush()
+
+    document = trace.export('task-1')
+    spans = [e for e in document['traceEvents'] if e['ph'] == 'X']
+    tools = [(e['name'], e['ts'] - int(start * 1e6), e['dur']) for e in spans if e['cat'] == 'tool']
+    gaps = [e['dur'] for e in spans if e['cat'] == 'agent']
+    if tools != [('Bash', 1050000, 1950000)]:
+        print(f"❌ Unexpected tool spans: {tools}")
+        return False
+    if gaps != [900000, 1980000, 980000]:
+        print(f"❌ Unexpected agent gaps: {gaps}")
+        return False
+    totals = trace.summary(document)
+    if totals != {'hooks': 2190.0, 'tools': 1950.0, 'evaluator': 1800.0, 'agent': 3860.0}:
+        print(f"❌ Unexpected summary: {totals}")
+        return False
+    print(f"✅ Bash ran 1.95 s between its hooks; {len(gaps)} agent gaps; summary {totals}")
+    return True
+
+
+def test_hooks_to_chrome_trace(project_dir):
+    """A task through every hook exports one timeline with all four tracks"""
+    print("\n🕒 Testing doom trace export")
+
+    run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'Fix the crash in the parser'})
+    task_id = json.loads((Path(project_dir) / '.claude' / 'tasks' / 'current.json').read_text())['task_id']
+    edit = {'tool_name': 'Edit', 'tool_input': {'file_path': f'{project_dir}/src/parser.py'}}
+    run_hook(project_dir, 'pre-check.py', edit)
+    time.sleep(0.2)
+    run_hook(project_dir, 'post-tool-use.py', dict(edit, tool_response={}))
+    run_hook(project_dir, 'post-tool-use.py', {'tool_name': 'Read', 'tool_input': {}, 'tool_response': {}})
+    stop = run_hook(project_dir, 'stop.py', {})
+    if stop.returncode != 0:
+        print(f"❌ Stop failed: {stop.stderr}")
+        return False
+
+    output = Path(project_dir) / 'trace.json'
+    exported = run_cli(project_dir, 'trace', task_id, '-o', str(output))
+    if exported.returncode != 0:
+        print(f"❌ doom trace failed: {exported.stderr}")
+        return False
+    spans = [e for e in json.loads(output.read_text())['traceEvents'] if e['ph'] == 'X']
+
+    hooks = sorted(e['name'] for e in spans if e['cat'] == 'hook')
+    tools = [e for e in spans if e['cat'] == 'tool']
+    evaluator = {e['name'] for e in spans if e['cat'] == 'evaluator'}
+    stop_span = next(e for e in spans if e['name'] == 'stop')
+    evaluate_span = next((e for e in spans if e['name'] == 'evaluate'), None)
+    if hooks != ['post_tool_use', 'post_tool_use', 'pre_tool_use', 'stop', 'user_prompt_submit']:
+        print(f"❌ Unexpected hook spans: {hooks}")
+        return False
+    if len(tools) != 1 or tools[0]['name'] != 'Edit' or tools[0]['dur'] < 200000:
+        print(f"❌ Expected one Edit tool span of at least 200 ms: {tools}")
+        return False
+    if len(evaluator) != 8 or not evaluate_span or not \
+            stop_span['ts'] <= evaluate_span['ts'] <= evaluate_span['ts'] + evaluate_span['dur'] <= \
+            stop_span['ts'] + stop_span['dur']:
+        print(f"❌ Evaluator spans should nest inside Stop: {sorted(evaluator)}")
+        return False
+    if not any(e['cat'] == 'agent' for e in spans) or 'agent' not in exported.stdout:
+        print(f"❌ Missing agent gaps or summary: {exported.stdout}")
+        return False
+    print(f"✅ {len(spans)} spans on one timeline; {exported.stdout.strip()}")
+    return True
+
+
+def test_unknown_task(project_dir):
+    """Exporting a task without spans fails cleanly"""
+    print("\n🚫 Testing unknown task")
+
+    result = run_cli(project_dir, 'trace', 'task-missing')
+    if result.returncode != 1 or 'no trace' not in result.stderr:
+        print(f"❌ Expected an error: {result.returncode} {result.stderr}")
+        return False
+    print("✅ Unknown task reported without output")
+    return True
+
+
+def main():
+    """Run trace tests"""
+    print("🧪 Testing Task Trace Export\n")
+
+    tests = [test_derived_spans, test_hooks_to_chrome_trace, test_unknown_task]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
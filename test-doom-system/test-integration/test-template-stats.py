@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test optimization template effectiveness statistics
+Verifies the running mean/variance, Welch comparisons between template
+versions, the UserPromptSubmit -> Stop recording loop and the CLI report
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import templates  # noqa: E402
+from test_support import run_cli, run_hook  # noqa: E402
+
+
+def test_running_statistics(project_dir):
+    """Welford updates and merges match batch statistics"""
+    print("\n🧮 Testing running statistics")
+
+    rng = random.Random(7)
+    values = [rng.gauss(3.0, 1.5) for _ in range(500)]
+    stats = templates._empty_stats()
+    for value in values:
+        templates.update(stats, value)
+    left, right = templates._empty_stats(), templates._empty_stats()
+    for value in values[:200]:
+        templates.update(left, value)
+    for value in values[200:]:
+        templates.update(right, value)
+    merged = templates.merge(left, right)
+
+    expected_mean, expected_var = statistics.mean(values), statistics.variance(values)
+    for name, candidate in (('incremental', stats), ('merged', merged)):
+        if abs(candidate['mean'] - expected_mean) > 1e-9 or abs(templates.variance(candidate) - expected_var) > 1e-9:
+            print(f"❌ {name} stats differ from batch statistics")
+            return False
+
+    # Reference: two-sided p for t=2.0 with 10 degrees of freedom is 0.0734
+    p_value = templates._incomplete_beta(5.0, 0.5, 10 / 14)
+    if abs(p_value - 0.0734) > 1e-3:
+        print(f"❌ Student-t p-value off: {p_value}")
+        return False
+    print(f"✅ mean {expected_mean:.3f}, variance {expected_var:.3f} match; t-distribution p-value correct")
+    return True
+
+
+def test_hook_loop(project_dir):
+    """UserPromptSubmit applies the template; Stop records its outcome"""
+    print("\n🔁 Testing hook recording loop")
+
+    result = run_hook(project_dir, 'user-prompt-submit.py', {'prompt': 'Fix the crash when saving'})
+    enhanced = json.loads(result.stdout)['userPrompt']
+    if 'Steps to reproduce' not in enhanced:
+        print(f"❌ Bugfix template not applied:\n{enhanced}")
+        return False
+
+    run_hook(project_dir, 'stop.py', {})
+    rows = templates.summary('bugfix')
+    log = templates.effectiveness_file().read_text().splitlines()
+    if len(rows) != 1 or rows[0]['n'] != 1 or len(log) != 1:
+        print(f"❌ Outcome not recorded: {rows}, {len(log)} log rows")
+        return False
+    print(f"✅ Template bugfix@{rows[0]['version']} applied and its reward recorded")
+    return True
+
+
+def test_version_comparison(project_dir):
+    """Two template versions are compared from the running stats"""
+    print("\n⚖️  Testing version comparison")
+
+    rng = random.Random(3)
+    for i in range(40):
+        templates.record_outcome(f'bugfix-v1-{i}', 'bugfix', 'bugfix', '1', rng.gauss(2.5, 0.8))
+        templates.record_outcome(f'bugfix-v2-{i}', 'bugfix', 'bugfix', '2', rng.gauss(3.4, 0.8))
+        templates.record_outcome(f'feature-v1-{i}', 'feature', 'feature', '1', rng.gauss(3.0, 1.0))
+
+    result = templates.compare('bugfix', '2', '1')
+    if not result['significant'] or result['difference'] <= 0:
+        print(f"❌ Expected v2 significantly better: {result}")
+        return False
+
+    same = templates.compare('feature', '1', '1')
+    if same['significant']:
+        print(f"❌ A version compared with itself should not differ: {same}")
+        return False
+
+    cli = run_cli(project_dir, 'templates', '--template', 'bugfix', '--compare', '2', '1')
+    if cli.returncode != 0 or '(significant)' not in cli.stdout:
+        print(f"❌ CLI comparison failed: {cli.stdout}{cli.stderr}")
+        return False
+
+    report = run_cli(project_dir, 'templates', '--json')
+    if len(json.loads(report.stdout)) != 3:
+        print(f"❌ Expected 3 series in the report: {report.stdout}")
+        return False
+    print(f"✅ v2 vs v1: {result['difference']:+.2f}, p={result['p_value']:.2g}; report lists 3 series")
+    return True
+
+
+def test_rebuild_and_size(project_dir):
+    """Stats stay constant-size and rebuild reproduces them from the log"""
+    print("\n🔁 Testing rebuild and stats size")
+
+    for i in range(1000):
+        templates.record_outcome(f'task-{i}', ['bugfix', 'feature'][i % 2], 'bugfix', str(1 + i % 3), (i % 9) * 0.5)
+    before = templates.load_stats()
+    size = templates.stats_file().stat().st_size
+
+    counts = templates.rebuild()
+    after = templates.load_stats()
+    drift = max(abs(before[k]['mean'] - after[k]['mean']) + abs(before[k]['m2'] - after[k]['m2']) for k in before)
+    if counts != {'rows': 1000, 'series': 6} or drift > 1e-6:
+        print(f"❌ Rebuild mismatch: {counts}, drift {drift}")
+        return False
+    if size > 4096:
+        print(f"❌ Stats file grew with the log: {size} bytes")
+        return False
+    print(f"✅ 1000 outcomes -> {counts['series']} series in {size} bytes; rebuild matches")
+    return True
+
+
+def main():
+    """Run template statistics tests"""
+    print("🧪 Testing Template Effectiveness Statistics\n")
+
+    tests = [test_running_statistics, test_hook_loop, test_version_comparison, test_rebuild_and_size]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
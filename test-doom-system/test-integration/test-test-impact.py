@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Test impact selection
+Verifies the file -> tests map, full-run triggers and reliability, and
+evaluator runs against a stand-in `npm` that only executes selected tests,
+including a changed file none of them reaches any more
+"""
+
+import json
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from doom import impact  # noqa: E402
+from doom.evaluator import RLVREvaluator  # noqa: E402
+
+# Which source lines each test file executes
+SUITE = {
+    'tests/test_a.js': {'src/a.js': [1, 2, 3, 4, 5, 6]},
+    'tests/test_b.js': {'src/b.js': [1, 2, 3, 4, 5, 6, 7, 8], 'src/shared.js': [1, 2]},
+    'tests/test_c.js': {'src/c.js': [1, 2, 3, 4], 'src/shared.js': [3, 4, 5]},
+}
+
+# Stand-in for `npm run test:coverage -- --json [tests...]`: runs the named
+# tests (all when none are named), writes a per-test LCOV report and logs the call
+FAKE_NPM = textwrap.dedent('''\
+    #!/usr/bin/env python3
+    import json, os, sys
+    args = sys.argv[1:]
+    with open('npm-calls.log', 'a') as log:
+        log.write(json.dumps(args) + '\\n')
+    if args[:2] != ['run', 'test:coverage']:
+        sys.exit(0)
+    suite = json.load(open('suite.json'))
+    selected = [a for a in args[2:] if not a.startswith('-')] or list(suite)
+    records, covered, executable = [], {}, {}
+    for test in selected:
+        for source, lines in suite[test].items():
+            records.append('TN:%s\\nSF:%s\\n%s\\nend_of_record' % (
+                test, source, '\\n'.join('DA:%d,%d' % (n, n in lines) for n in range(1, 11))))
+            covered.setdefault(source, set()).update(lines)
+            executable[source] = 10
+    os.makedirs('coverage', exist_ok=True)
+    open('coverage/lcov.info', 'w').write('\\n'.join(records) + '\\n')
+    pct = 100.0 * sum(len(c) for c in covered.values()) / sum(executable.values())
+    print(json.dumps({'total': {'lines': {'pct': pct}}}))
+''')
+
+
+def git(project_dir, *args):
+    return subprocess.run(['git', *args], cwd=project_dir, capture_output=True, text=True, check=True).stdout
+
+
+def make_project(project_dir):
+    root = Path(project_dir)
+    git(project_dir, 'init', '-q', '-b', 'main')
+    git(project_dir, 'config', 'user.email', 'test@example.com')
+    git(project_dir, 'config', 'user.name', 'Test')
+    (root / '.gitignore').write_text('.claude/\ncoverage/\nnpm-calls.log\nbin/\nsuite.json\n')
+    (root / 'suite.json').write_text(json.dumps(SUITE))
+    for test, sources in SUITE.items():
+        (root / test).parent.mkdir(parents=True, exist_ok=True)
+        (root / test).write_text(f'// {test}\n')
+        for source in sources:
+            (root / source).parent.mkdir(parents=True, exist_ok=True)
+            (root / source).write_text(''.join(f'{source} line {n}\n' for n in range(10)))
+    git(project_dir, 'add', '-A')
+    git(project_dir, 'commit', '-q', '-m', 'initial')
+
+    bin_dir = root / 'bin'
+    bin_dir.mkdir()
+    npm = bin_dir / 'npm'
+    npm.write_text(FAKE_NPM)
+    npm.chmod(npm.stat().st_mode | stat.S_IEXEC)
+    os.environ['PATH'] = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+
+
+def coverage_calls(project_dir):
+    log = Path(project_dir, 'npm-calls.log')
+    calls = [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+    return [call[4:] for call in calls if call[:2] == ['run', 'test:coverage']]
+
+
+def evaluate(project_dir, task_id):
+    task_dir = Path(project_dir) / '.claude' / 'tasks' / task_id
+    task_dir.mkdir(parents=True, exist_ok=True)
+    (task_dir / 'metadata.json').write_text(json.dumps({'task_id': task_id,
+                                                        'baseline_commit': git(project_dir, 'rev-parse', 'HEAD').strip()}))
+    evaluator = RLVREvaluator()
+    evaluator.timeout = 10
+    return evaluator.evaluate(task_id, 'agent-feature-junior', 'completed')
+
+
+def test_selection_rules(project_dir):
+    """Map lookups, forced full runs and reliability"""
+    print("\n🎯 Testing selection rules")
+
+    config = dict(impact.DEFAULT_CONFIG, full_run_every=3)
+    tests = {test: set(sources) for test, sources in SUITE.items()}
+    impact.record_run({'mode': 'full', 'changed_files': []}, tests, config=config)
+    mapping = impact.load_map()
+
+    shared = impact.select(['src/shared.js', 'README.md'], mapping, config)
+    if shared['mode'] != 'selected' or shared['tests'] != ['tests/test_b.js', 'tests/test_c.js']:
+        print(f"❌ Expected tests covering shared.js: {shared}")
+        return False
+    own_test = impact.select(['tests/test_a.js', 'tests/test_new.js'], mapping, config)
+    if own_test['tests'] != ['tests/test_a.js', 'tests/test_new.js']:
+        print(f"❌ Changed test files should run themselves: {own_test['tests']}")
+        return False
+
+    forced = {
+        'config': impact.select(['src/a.js', 'requirements-dev.txt'], mapping, config),
+        'unmapped': impact.select(['src/new1.js', 'src/new2.js', 'src/a.js'], mapping, config),
+    }
+    if forced['config']['mode'] != 'full' or forced['unmapped']['mode'] != 'full' or \
+            forced['unmapped']['reliability'] != round(1 / 3, 4):
+        print(f"❌ Expected forced full runs: {forced}")
+        return False
+
+    for _ in range(2):
+        impact.record_run(impact.select(['src/a.js'], config=config), config=config)
+    periodic = impact.select(['src/a.js'], config=config)
+    if periodic['mode'] != 'full' or 'periodic' not in periodic['reason']:
+        print(f"❌ Expected a periodic full run after 3 evaluations: {periodic}")
+        return False
+    print(f"✅ shared.js -> {len(shared['tests'])} tests; config change, unmapped files and "
+          f"every 3rd evaluation force full runs")
+    return True
+
+
+def test_recall_estimate(project_dir):
+    """Full runs score what the old map would have selected"""
+    print("\n📏 Testing recall estimate")
+
+    tests = {test: set(sources) for test, sources in SUITE.items()}
+    impact.record_run({'mode': 'full', 'changed_files': []}, tests)
+    # The suite grew: test_c now also exercises a.js, which the old map does not know
+    grown = dict(tests, **{'tests/test_c.js': tests['tests/test_c.js'] | {'src/a.js'}})
+    mapping = impact.record_run({'mode': 'full', 'changed_files': ['src/a.js']}, grown)
+    selection = impact.select(['src/b.js'], mapping)
+
+    if impact.estimated_recall(mapping) != 0.5 or selection['estimated_recall'] != 0.5 or \
+            selection['reliability'] != 0.5:
+        print(f"❌ Expected recall 0.5 (1 of 2 affected tests): {selection}")
+        return False
+    print(f"✅ Old map would have missed 1 of 2 affected tests; reliability {selection['reliability']}")
+    return True
+
+
+def test_evaluator_runs_selected_tests(project_dir):
+    """The first evaluation runs everything; the next only the affected tests"""
+    print("\n⚙️  Testing evaluator integration")
+
+    make_project(project_dir)
+    first = evaluate(project_dir, 'task-1')
+    if first['test_impact']['mode'] != 'full' or coverage_calls(project_dir) != [[]]:
+        print(f"❌ First evaluation should run the full suite: {first.get('test_impact')}")
+        return False
+
+    # Agent adds coverage to b.js in the work tree: 8 -> 10 covered lines of 10
+    Path(project_dir, 'src', 'b.js').write_text(''.join(f'line {n} changed\n' for n in range(10)))
+    suite = json.loads(Path(project_dir, 'suite.json').read_text())
+    suite['tests/test_b.js']['src/b.js'] = list(range(1, 11))
+    Path(project_dir, 'suite.json').write_text(json.dumps(suite))
+
+    second = evaluate(project_dir, 'task-2')
+    calls = coverage_calls(project_dir)
+    impact_info = second['test_impact']
+    if impact_info['mode'] != 'selected' or calls[-1] != ['tests/test_b.js']:
+        print(f"❌ Expected only test_b to run: {impact_info}, calls {calls}")
+        return False
+    before, after = second['coverage']['before'], second['coverage']['after']
+    if (before, after) != (23 / 40, 25 / 40) or second['components']['test_coverage_delta'] <= 0:
+        print(f"❌ Unexpected coverage: {second.get('coverage')}")
+        return False
+    print(f"✅ Full run, then 1 of {impact_info['total_tests']} tests for src/b.js "
+          f"(reliability {impact_info['reliability']}); coverage {before:.0%} -> {after:.0%}")
+    return True
+
+
+def test_unreached_changed_file(project_dir):
+    """A changed file the selected tests no longer reach counts as uncovered, not as removed"""
+    print("\n🕳️  Testing changed file without coverage")
+
+    make_project(project_dir)
+    evaluate(project_dir, 'task-1')
+
+    # a.js is rewritten and test_a stops exercising it; b.js gains two covered lines
+    Path(project_dir, 'src', 'a.js').write_text(''.join(f'rewritten {n}\n' for n in range(10)))
+    Path(project_dir, 'src', 'b.js').write_text(''.join(f'line {n} changed\n' for n in range(10)))
+    suite = json.loads(Path(project_dir, 'suite.json').read_text())
+    suite['tests/test_a.js'] = {}
+    suite['tests/test_b.js']['src/b.js'] = list(range(1, 11))
+    Path(project_dir, 'suite.json').write_text(json.dumps(suite))
+
+    result = evaluate(project_dir, 'task-2')
+    before, after = result['coverage']['before'], result['coverage']['after']
+    if result['test_impact']['mode'] != 'selected' or (before, after) != (23 / 40, 19 / 40):
+        print(f"❌ a.js should count as 10 uncovered lines: {result['test_impact']['mode']}, {before} -> {after}")
+        return False
+    if result['components']['test_coverage_delta'] >= 0:
+        print(f"❌ Losing a.js coverage should lower the score: {result['components']}")
+        return False
+    print(f"✅ Coverage {before:.1%} -> {after:.1%} with src/a.js counted as uncovered")
+    return True
+
+
+def main():
+    """Run test impact tests"""
+    print("🧪 Testing Test Impact Selection\n")
+
+    tests = [test_selection_rules, test_recall_estimate, test_evaluator_runs_selected_tests,
+             test_unreached_changed_file]
+    passed = 0
+    failed = 0
+    saved_path = os.environ['PATH']
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+            finally:
+                os.environ['PATH'] = saved_path
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Test reward-weight fitting
+Verifies that known weights are recovered from synthetic history, the
+non-negativity constraint, CSV input, streaming over a large generated input,
+that skipped rows are reported and that only a proposed config is written
+"""
+
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'test-doom-system'))
+
+from doom import weights  # noqa: E402
+from doom.evaluator import load_config  # noqa: E402
+from test_support import run_cli  # noqa: E402
+
+TARGET = 'human_satisfaction_score'
+COMPONENTS = list(load_config()['weights'])
+TRUE_WEIGHTS = [0.3, 0.15, 0.2, 0.1, 0.1, 0.05, 0.1]
+
+
+def synthetic_rows(count, true_weights=TRUE_WEIGHTS, noise=0.05, seed=11):
+    rng = random.Random(seed)
+    for i in range(count):
+        components = {name: rng.uniform(-1, 1) for name in COMPONENTS}
+        score = sum(w * components[name] for w, name in zip(true_weights, COMPONENTS)) + rng.gauss(0, noise)
+        yield {'task_id': f'task-{i}', 'components': components, TARGET: score}
+
+
+def write_jsonl(path, rows):
+    with open(path, 'w') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+
+
+def test_recovers_known_weights(project_dir):
+    """Fitted weights match the generating weights and sum to 1"""
+    print("\n🎯 Testing weight recovery")
+
+    history = Path(project_dir) / 'rlvr.jsonl'
+    write_jsonl(history, synthetic_rows(2000))
+    report = weights.fit_weights(history, TARGET)
+
+    fitted = [report['weights'][name] for name in COMPONENTS]
+    error = max(abs(a - b) for a, b in zip(fitted, TRUE_WEIGHTS))
+    if error > 0.02 or abs(sum(fitted) - 1) > 1e-3:
+        print(f"❌ Weights not recovered: {fitted}")
+        return False
+    if report['cv_folds'] != 5 or report['cv_mse'] is None or report['cv_mse'] > 0.01:
+        print(f"❌ Unexpected cross-validation: {report['cv_folds']} folds, mse {report['cv_mse']}")
+        return False
+    print(f"✅ Max weight error {error:.4f}; {report['cv_folds']}-fold CV MSE {report['cv_mse']:.5f}")
+    return True
+
+
+def test_negative_weights_clamped(project_dir):
+    """A component that hurts the outcome gets weight 0, not a negative weight"""
+    print("\n🚫 Testing non-negativity")
+
+    true_weights = [0.5, 0.3, -0.2, 0.2, 0.0, 0.0, 0.0]
+    history = Path(project_dir) / 'rlvr.jsonl'
+    write_jsonl(history, synthetic_rows(1000, true_weights))
+    report = weights.fit_weights(history, TARGET, folds=1)
+
+    if report['weights'][COMPONENTS[2]] != 0.0 or min(report['weights'].values()) < 0:
+        print(f"❌ Negative coefficient not clamped: {report['weights']}")
+        return False
+    if report['cv_mse'] is not None:
+        print("❌ folds=1 should skip cross-validation")
+        return False
+    print(f"✅ {COMPONENTS[2]} clamped to 0: {report['weights']}")
+    return True
+
+
+def test_csv_matches_jsonl(project_dir):
+    """A flat CSV export fits to the same weights as the JSONL history"""
+    print("\n📄 Testing CSV input")
+
+    rows = list(synthetic_rows(500))
+    jsonl_path = Path(project_dir) / 'rlvr.jsonl'
+    csv_path = Path(project_dir) / 'export.csv'
+    write_jsonl(jsonl_path, rows)
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['task_id', *COMPONENTS, TARGET])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({'task_id': row['task_id'], **row['components'],
+                             TARGET: row[TARGET]})
+
+    from_jsonl = weights.fit_weights(jsonl_path, TARGET)
+    from_csv = weights.fit_weights(csv_path, TARGET)
+    if from_jsonl['weights'] != from_csv['weights'] or from_jsonl['rows'] != from_csv['rows']:
+        print(f"❌ CSV and JSONL fits differ: {from_csv['weights']} vs {from_jsonl['weights']}")
+        return False
+    print(f"✅ {from_csv['rows']} rows, identical weights from CSV and JSONL")
+    return True
+
+
+def test_skipped_rows_reported(project_dir):
+    """Rows missing a component or the target are counted per field, and --target is required"""
+    print("\n🧮 Testing skipped-row report")
+
+    rows = list(synthetic_rows(400))
+    for row in rows[:100]:
+        del row['components']['efficiency_score']
+    for row in rows[100:110]:
+        del row[TARGET]
+    history = Path(project_dir) / 'rlvr.jsonl'
+    write_jsonl(history, rows)
+
+    report = weights.fit_weights(history, TARGET)
+    if report['rows'] != 290 or report['skipped'] != {'efficiency_score': 100, TARGET: 10}:
+        print(f"❌ Unexpected skip report: {report['rows']} rows, skipped {report['skipped']}")
+        return False
+
+    cli = run_cli(project_dir, 'fit-weights', '--input', str(history), '--target', TARGET)
+    untargeted = run_cli(project_dir, 'fit-weights', '--input', str(history))
+    if 'Skipped 110 rows: efficiency_score missing in 100' not in cli.stdout or untargeted.returncode == 0:
+        print(f"❌ CLI should report skipped rows and require --target: {cli.stdout}{untargeted.stderr}")
+        return False
+
+    write_jsonl(history, rows[:100])
+    try:
+        weights.fit_weights(history, TARGET)
+    except ValueError as e:
+        if "'efficiency_score' in 100" not in str(e):
+            print(f"❌ Error should name the missing component: {e}")
+            return False
+    else:
+        print("❌ A history without usable rows should be rejected")
+        return False
+    print(f"✅ {report['rows']} rows fitted, skips reported per field: {report['skipped']}")
+    return True
+
+
+def test_streaming_and_proposed_config(project_dir):
+    """Large inputs stream through fixed-size moments; the active config is untouched"""
+    print("\n🌊 Testing streaming fit and proposed config")
+
+    moments = weights.accumulate(synthetic_rows(100000, seed=5), COMPONENTS, TARGET,
+                                 folds=5, chunk_size=4096)
+    result = weights.fit(moments)
+    if result['n'] != 100000 or sum(m.n for m in moments) != 100000:
+        print(f"❌ Expected 100000 rows, fitted {result['n']}")
+        return False
+    if any(len(m.xtx) != len(COMPONENTS) for m in moments):
+        print("❌ Moments grew with the input")
+        return False
+
+    active = Path(project_dir) / '.claude' / 'evaluator-config.json'
+    active.parent.mkdir(parents=True)
+    active.write_text(json.dumps(load_config()))
+    before = active.read_text()
+    history = Path(project_dir) / 'rlvr.jsonl'
+    write_jsonl(history, synthetic_rows(300))
+
+    cli = run_cli(project_dir, 'fit-weights', '--input', str(history), '--target', TARGET)
+    proposed = Path(project_dir) / '.claude' / weights.PROPOSED_CONFIG
+    if cli.returncode != 0 or 'Proposed config written' not in cli.stdout:
+        print(f"❌ CLI failed: {cli.stdout}{cli.stderr}")
+        return False
+    if active.read_text() != before or not proposed.exists():
+        print("❌ Active config modified or proposal missing")
+        return False
+    proposal = json.loads(proposed.read_text())
+    if set(proposal['weights']) != set(COMPONENTS) or 'thresholds' not in proposal:
+        print(f"❌ Proposal is not a full evaluator config: {proposal}")
+        return False
+    print(f"✅ 100000 rows in {len(moments)} fixed-size folds ({weights.numpy and 'numpy' or 'python'} backend); "
+          f"proposal written beside the active config")
+    return True
+
+
+def main():
+    """Run weight fitting tests"""
+    print("🧪 Testing Reward Weight Fitting\n")
+
+    tests = [test_recovers_known_weights, test_negative_weights_clamped, test_csv_matches_jsonl,
+             test_skipped_rows_reported, test_streaming_and_proposed_config]
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        with tempfile.TemporaryDirectory() as project_dir:
+            os.environ['CLAUDE_PROJECT_DIR'] = project_dir
+            try:
+                if test(project_dir):
+                    passed += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ {test.__name__} failed with error: {e}")
+                failed += 1
+
+    print(f"\n📊 Results: {passed} passed, {failed} failed out of {len(tests)} tests")
+
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
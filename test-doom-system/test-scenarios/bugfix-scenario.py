@@ -8,10 +8,12 @@ import json
 import subprocess
 import os
 import sys
-import time
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from test_support import wait_until
+
 class BugfixScenario:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent.parent
@@ -37,8 +39,6 @@ class BugfixScenario:
             if not success:
                 print(f"❌ Failed at: {step_name}")
                 return False
-            
-            time.sleep(0.5)  # Small delay between steps
         
         print("\n✅ Bugfix scenario completed successfully!")
         return True
@@ -127,7 +127,7 @@ describe('handleLogin', () => {
         
         # Save to task directory
         task_dir = self.project_root / '.claude' / 'tasks' / self.task_id
-        if task_dir.exists():
+        if wait_until(task_dir.exists):
             with open(task_dir / 'fix.js', 'w') as f:
                 f.write(fix_content)
             
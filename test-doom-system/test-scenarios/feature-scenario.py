@@ -8,10 +8,12 @@ import json
 import subprocess
 import os
 import sys
-import time
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from test_support import wait_until
+
 class FeatureScenario:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent.parent
@@ -38,8 +40,6 @@ class FeatureScenario:
             if not success:
                 print(f"❌ Failed at: {step_name}")
                 return False
-            
-            time.sleep(0.5)
         
         print("\n✅ Feature scenario completed successfully!")
         return True
@@ -75,6 +75,9 @@ class FeatureScenario:
         if result.returncode != 0:
             print(f"❌ Hook failed: {result.stderr}")
             return False
+        if not wait_until((self.project_root / '.claude' / 'tasks' / 'current.json').exists):
+            print("❌ Hook did not record the task")
+            return False
         
         print("✅ Feature request submitted")
         print("   Type detected: feature")
@@ -0,0 +1,52 @@
+"""
+Shared helpers for the external test suite
+"""
+
+import json
+import os
+import subprocess
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+HOOKS = PROJECT_ROOT / '.claude' / 'hooks'
+DOOM_CLI = PROJECT_ROOT / 'doom' / 'scripts' / 'doom-cli.py'
+
+# Variables of a live Claude Code session or of an earlier test that must not reach a hook or a suite
+SESSION_VARS = ('DOOM_TASK_ID', 'DOOM_AGENT', 'DOOM_AGENT_NAME', 'DOOM_AGENT_TIER', 'DOOM_DEFER_EVALUATION',
+                'DOOM_METRICS_TEXTFILE', 'TASK_ID', 'AGENT_NAME')
+
+
+def wait_until(predicate, timeout=5.0, interval=0.01):
+    """
+    Poll `predicate` until it returns a truthy value or `timeout` expires.
+    Returns the last value so callers can use it directly.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        value = predicate()
+        if value or time.monotonic() >= deadline:
+            return value
+        time.sleep(interval)
+
+
+def hook_env(project_dir, **overrides):
+    """Environment for a hook run against `project_dir`, without session variables"""
+    env = os.environ.copy()
+    for key in SESSION_VARS:
+        env.pop(key, None)
+    env.update(CLAUDE_PROJECT_DIR=str(project_dir), DOOM_ENABLED='true', **overrides)
+    return env
+
+
+def run_hook(project_dir, name, payload, **env_overrides):
+    """Run a hook script with a JSON payload on stdin"""
+    return subprocess.run(['python3', str(HOOKS / name)], input=json.dumps(payload),
+                          capture_output=True, text=True, env=hook_env(project_dir, **env_overrides), timeout=120)
+
+
+def run_cli(project_dir, *args):
+    """Run `doom <args>` against `project_dir`"""
+    env = dict(os.environ, CLAUDE_PROJECT_DIR=str(project_dir))
+    return subprocess.run(['python3', str(DOOM_CLI), *args], capture_output=True, text=True, env=env,
+                          cwd=str(project_dir))